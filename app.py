@@ -25,6 +25,44 @@ def create_app():
     app.config["SECRET_KEY"] = "hannelore"
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("LOCAL_DATABASE_URL")
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SETTINGS_CACHE_TTL'] = int(os.getenv("SETTINGS_CACHE_TTL", 5))
+    app.config['QUERY_PROFILING'] = os.getenv("QUERY_PROFILING", "false").lower() == "true"
+    app.config['QUERY_PROFILING_N1_THRESHOLD'] = int(os.getenv("QUERY_PROFILING_N1_THRESHOLD", 10))
+    app.config['LOG_BUFFER_MODE'] = os.getenv("LOG_BUFFER_MODE", "async")
+    app.config['LOG_BUFFER_BATCH'] = int(os.getenv("LOG_BUFFER_BATCH", 100))
+    app.config['LOG_BUFFER_INTERVAL_MS'] = int(os.getenv("LOG_BUFFER_INTERVAL_MS", 500))
+    app.config['REPORT_JOBS_MODE'] = os.getenv("REPORT_JOBS_MODE", "queue")
+    app.config['REPORT_WORKER_CONCURRENCY'] = int(os.getenv("REPORT_WORKER_CONCURRENCY", 2))
+    app.config['REPORT_JOBS_DIR'] = os.getenv("REPORT_JOBS_DIR", os.path.join("excels", "ReportJobs"))
+    app.config['REPORT_JOB_TIMEOUT'] = int(os.getenv("REPORT_JOB_TIMEOUT", 1800))
+    app.config['REPORT_JOB_HEARTBEAT'] = float(os.getenv("REPORT_JOB_HEARTBEAT", 30))
+    app.config['SOCKETIO_MESSAGE_QUEUE'] = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    app.config['REPORT_CACHE_BACKEND'] = os.getenv("REPORT_CACHE_BACKEND", "s3")
+    app.config['REPORT_CACHE_DIR'] = os.getenv("REPORT_CACHE_DIR", os.path.join("excels", "ReportCache"))
+    app.config['REPORT_CACHE_PUBLIC_URL'] = os.getenv("REPORT_CACHE_PUBLIC_URL", "")
+    app.config['REPORT_CACHE_MAX_ENTRIES'] = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", 500))
+    app.config['REPORT_CACHE_TTL_HOURS'] = float(os.getenv("REPORT_CACHE_TTL_HOURS", 168))
+    app.config['REPORT_STREAM_RESPONSES'] = os.getenv("REPORT_STREAM_RESPONSES", "1") == "1"
+    app.config['REPORT_SPOOL_MAX_BYTES'] = int(os.getenv("REPORT_SPOOL_MAX_BYTES", 8 * 1024 * 1024))
+    app.config['S3_MULTIPART_THRESHOLD'] = int(os.getenv("S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+    app.config['S3_MULTIPART_CHUNKSIZE'] = int(os.getenv("S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024))
+    app.config['S3_MULTIPART_CONCURRENCY'] = int(os.getenv("S3_MULTIPART_CONCURRENCY", 4))
+    app.config['ATTACHMENT_FETCH_WORKERS'] = int(os.getenv("ATTACHMENT_FETCH_WORKERS", 8))
+    app.config['ATTACHMENT_FETCH_RETRIES'] = int(os.getenv("ATTACHMENT_FETCH_RETRIES", 2))
+    app.config['ATTACHMENT_FETCH_BACKOFF'] = float(os.getenv("ATTACHMENT_FETCH_BACKOFF", 0.5))
+    app.config['ATTACHMENT_FETCH_TIMEOUT'] = float(os.getenv("ATTACHMENT_FETCH_TIMEOUT", 30))
+    app.config['ATTACHMENT_FETCH_DEADLINE'] = float(os.getenv("ATTACHMENT_FETCH_DEADLINE", 600))
+    app.config['PDF_RASTER_WORKERS'] = int(os.getenv("PDF_RASTER_WORKERS", 2))
+    app.config['PDF_RASTER_DPI'] = int(os.getenv("PDF_RASTER_DPI", 150))
+    app.config['PDF_RASTER_SLIDE_DPI'] = int(os.getenv("PDF_RASTER_SLIDE_DPI", 120))
+    app.config['PDF_RASTER_MAX_PAGES'] = int(os.getenv("PDF_RASTER_MAX_PAGES", 20))
+    app.config['PDF_RASTER_PAGE_BUDGET'] = int(os.getenv("PDF_RASTER_PAGE_BUDGET", 300))
+    app.config['PDF_RASTER_TIMEOUT'] = int(os.getenv("PDF_RASTER_TIMEOUT", 60))
+    app.config['IMAGE_EMBED_DPI'] = int(os.getenv("IMAGE_EMBED_DPI", 150))
+    app.config['IMAGE_EMBED_JPEG_QUALITY'] = int(os.getenv("IMAGE_EMBED_JPEG_QUALITY", 85))
+    app.config['RENDER_CACHE_DIR'] = os.getenv("RENDER_CACHE_DIR", os.path.join("excels", "RenderCache"))
+    app.config['RENDER_CACHE_MAX_MB'] = float(os.getenv("RENDER_CACHE_MAX_MB", 512))
+    app.config['EXCEL_STREAMING_REPORTS'] = [r.strip() for r in os.getenv("EXCEL_STREAMING_REPORTS", "").split(",") if r.strip()]
     app.config['MAIL_SERVER'] = 'smtp.gmail.com'
     app.config['MAIL_PORT'] = 587
     app.config['MAIL_USE_TLS'] = True
@@ -35,9 +73,18 @@ def create_app():
     mail.init_app(app)
     db.init_app(app)
     migrate.init_app(app, db)
-    socketio.init_app(app, cors_allowed_origins="*")
+    # Socket.IO handlers (user_{id} rooms); imported first so init_app registers them
+    import routes.Sockets  # noqa: F401
+    # with a message queue the report-worker process can emit to connected clients too
+    socketio.init_app(app, cors_allowed_origins="*", message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
     limiter.init_app(app)
 
+    from utils.QueryProfiler import query_profiler
+    query_profiler.init_app(app)
+
+    from utils.LogBuffer import log_buffer
+    log_buffer.init_app(app)
+
     
 
     # dito daw ilagay lahat ng routes
@@ -86,6 +133,12 @@ def create_app():
     from routes.New_Tasks import tasks_bp
     app.register_blueprint(tasks_bp)
 
+    from routes.Diagnostics import diagnostics
+    app.register_blueprint(diagnostics)
+
+    from routes.Jobs import jobs
+    app.register_blueprint(jobs)
+
 
     @app.route("/test-email")
     def test_email():
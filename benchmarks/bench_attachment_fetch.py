@@ -0,0 +1,94 @@
+"""
+Attachment fetch benchmark
+==========================
+
+Downloads N attachments (200 by default) of 64 KB from a local HTTP stub
+that answers each request after D milliseconds (50 by default), the way a
+department supporting-document compile pulls them from S3. Compares the
+old loop of requests.get calls with utils.AttachmentFetcher at 1, 4, 8
+and 16 workers, and checks that the fetcher returns every file in order.
+
+Run with: python benchmarks/bench_attachment_fetch.py [attachments] [delay_ms]
+"""
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from utils.AttachmentFetcher import Attachment_Fetcher  # noqa: E402
+
+SIZE = 64 * 1024
+
+
+def stub_server(delay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, like S3
+
+        def do_GET(self):
+            time.sleep(delay)
+            n = int(self.path.rsplit("/", 1)[1])
+            body = n.to_bytes(4, "big") * (SIZE // 4)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def sequential(urls):
+    contents = []
+    for url in urls:
+        resp = requests.get(url, timeout=30)
+        resp.raise_for_status()
+        contents.append(resp.content)
+    return contents
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    delay_ms = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    server = stub_server(delay_ms / 1000)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/files/{n}" for n in range(count)]
+
+    print(f"{count} attachments x {SIZE // 1024} KB, {delay_ms} ms server delay\n")
+    print(f"{'fetch':<22} {'wall s':>8} {'files/s':>9}")
+
+    started = time.perf_counter()
+    sequential(urls)
+    elapsed = time.perf_counter() - started
+    print(f"{'requests.get loop':<22} {elapsed:>8.2f} {count / elapsed:>9.1f}")
+
+    for workers in (1, 4, 8, 16):
+        fetcher = Attachment_Fetcher(workers=workers)
+        started = time.perf_counter()
+        results = fetcher.fetch_all(urls)
+        elapsed = time.perf_counter() - started
+
+        assert [r.content[:4] for r in results] == [n.to_bytes(4, "big") for n in range(count)]
+        assert not any(r.error for r in results)
+        print(f"{f'fetcher, {workers} workers':<22} {elapsed:>8.2f} {count / elapsed:>9.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
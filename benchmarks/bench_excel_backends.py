@@ -0,0 +1,119 @@
+"""
+Excel backend benchmark
+=======================
+
+Writes a master OPCR and a weighted OPCR with C categories (10 by default)
+of T tasks each (50 by default) twice: with ExcelHandler (openpyxl) and
+with utils.StreamingExcelHandler (xlsxwriter, constant_memory). Each run
+happens in its own subprocess so the peak RSS it reports belongs to that
+backend alone; wall time covers the template setup, the writes and the
+save. openpyxl's merge_cells checks every existing merge, so its time
+grows quadratically with the task count. Workbooks are built in memory
+(FileStorage.spooled_file), the upload is replaced with one that only
+reports the size, and the report cache is off.
+
+The weighted openpyxl writer reads System_Settings, so every run gets a
+bare app on a throwaway SQLite database.
+
+Run with: python benchmarks/bench_excel_backends.py [categories] [tasks]
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+REPORTS = {"master_opcr": "createNewMasterOPCR", "weighted_opcr": "createNewWeightedOPCR"}
+BACKENDS = {"openpyxl": "utils.ExcelHandler", "xlsxwriter": "utils.StreamingExcelHandler"}
+
+
+def sample(categories, tasks):
+    def task(c, n):
+        return {
+            "title": f"Task {c}.{n}",
+            "frequency": 2,
+            "summary": {"target": 10 + n % 7, "actual": 8 + n % 5},
+            "working_days": {"target": 4, "actual": n % 3 - 1},
+            "corrections": {"target": 2, "actual": n % 4},
+            "description": {
+                "target": "documents prepared and reviewed", "actual": "documents submitted", "time": "day",
+                "alterations": "correction", "timeliness_mode": "deadline" if n % 4 == 0 else "count",
+                "task_weight": 0.05,
+            },
+            "rating": {"quantity": 4, "efficiency": 3 + n % 3, "timeliness": 5, "average": 4, "weighted_avg": 0.2},
+        }
+
+    data = [{f"Category {c}": [task(c, n) for n in range(tasks)]} for c in range(categories)]
+    assigned = {f"Task {c}.{n}": ["Ana Reyes", "Ben Santos"] for c in range(categories) for n in range(0, tasks, 3)}
+    admin = {
+        "fullName": "Juan Dela Cruz",
+        "position": "College President",
+        "lastName": "Dela Cruz",
+        "individuals": {
+            key: {"name": f"{key.title()} Person", "position": "Dean"}
+            for key in ("approve", "assess", "final", "discuss", "confirm")
+        },
+    }
+    return data, assigned, admin
+
+
+def run_one(report, backend, categories, tasks):
+    """Child process: writes one report and prints its timings as JSON."""
+    import importlib
+
+    from flask import Flask
+
+    from app import db
+    from utils import FileStorage
+
+    module = importlib.import_module(BACKENDS[backend])
+    FileStorage.upload_fileobj = lambda output, bucket, key: output.seek(0, os.SEEK_END)
+    data, assigned, admin = sample(categories, tasks)
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["REPORT_CACHE_BACKEND"] = "off"
+    db.init_app(app)
+
+    with app.app_context():
+        import models.Departments, models.PCR, models.Categories, models.Positions, models.FormTemplate, models.System_Settings  # noqa: F401
+        db.create_all()
+
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        size = getattr(module, REPORTS[report])(data, assigned, admin)
+        elapsed = time.perf_counter() - started
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak / 1024, "growth_mb": (peak - baseline) / 1024, "size_kb": size / 1024}))
+
+
+def main():
+    categories = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    tasks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f"{categories} categories x {tasks} tasks = {categories * tasks * 6 + categories} report rows\n")
+    print(f"{'report':<15} {'backend':<11} {'wall s':>8} {'peak MB':>9} {'+MB':>8} {'file KB':>9}")
+    for report in REPORTS:
+        for backend in BACKENDS:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", report, backend, str(categories), str(tasks)],
+                capture_output=True, text=True, check=True, cwd=ROOT,
+            )
+            stats = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{report:<15} {backend:<11} {stats['seconds']:>8.2f} {stats['peak_mb']:>9.1f} "
+                  f"{stats['growth_mb']:>8.1f} {stats['size_kb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        run_one(sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5]))
+    else:
+        main()
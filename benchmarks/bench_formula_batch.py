@@ -0,0 +1,51 @@
+"""
+Batch rating benchmark
+======================
+
+Rates N synthetic (target, actual) pairs with each default formula, once by
+calling Formula_Engine.compute_rating per row and once through
+Formula_Engine.compute_ratings_batch, and checks both give the same ratings.
+
+Run with: python benchmarks/bench_formula_batch.py [rows ...]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.Formula_engine import Formula_Engine
+from bench_formula_engine import FORMULAS
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    engine = Formula_Engine()
+    rng = np.random.default_rng(42)
+
+    print(f"{'rows':>10} {'metric':<12}{'scalar s':>10}{'batch s':>10}{'speedup':>10}")
+    for rows in sizes:
+        targets = rng.integers(1, 20, rows).tolist()
+        actuals = rng.integers(0, 25, rows).tolist()
+
+        for name, formula in FORMULAS.items():
+            start = time.perf_counter()
+            scalar = [engine.compute_rating(formula, t, a) for t, a in zip(targets, actuals)]
+            scalar_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch = engine.compute_ratings_batch(formula, targets, actuals)
+            batch_time = time.perf_counter() - start
+
+            assert batch == scalar, f"{name}: batch ratings differ from scalar ratings"
+            print(
+                f"{rows:>10} {name:<12}{scalar_time:>10.3f}{batch_time:>10.3f}"
+                f"{scalar_time / batch_time:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
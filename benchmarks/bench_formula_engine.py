@@ -0,0 +1,57 @@
+"""
+Formula engine micro-benchmark
+==============================
+
+Compares the per-call cost of rating a sub-task the old way (fresh SimpleEval,
+expression re-parsed on every call) against Formula_Engine.compute_rating,
+which goes through the compiled formula cache.
+
+Run with: python benchmarks/bench_formula_engine.py [calls]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from simpleeval import SimpleEval
+from models.Formula_engine import Formula_Engine, formula_cache
+
+
+FORMULAS = {
+    "quantity": {"expression": "(actual / target) if target > 0 else 0", "rating_scale": {"1": {"lt": 0.7}, "2": {"gte": 0.7, "lte": 0.899}, "3": {"gte": 0.9, "lte": 1}, "4": {"gte": 1.01, "lte": 1.299}, "5": {"gte": 1.3}}},
+    "efficiency": {"expression": "actual", "rating_scale": {"1": {"gte": 7}, "2": {"gte": 5, "lte": 6}, "3": {"gte": 3, "lte": 4}, "4": {"gte": 1, "lte": 2}, "5": {"eq": 0}}},
+    "timeliness": {"expression": "(((target - actual) / target) + 1) if target > 0 else 1", "rating_scale": {"1": {"lt": 0.51}, "2": {"gte": 0.51, "lte": 0.89}, "3": {"gte": 0.9, "lte": 1.14}, "4": {"gte": 1.15, "lte": 1.29}, "5": {"gte": 1.3}}},
+}
+
+
+def legacy_compute_rating(engine, formula, target, actual):
+    """compute_rating as it was before the compiled cache."""
+    s = SimpleEval()
+    s.names = {"target": target, "actual": actual}
+    s.functions = {}
+    calc = float(s.eval(formula["expression"]))
+    for rating, rules in formula["rating_scale"].items():
+        if engine._match_rules(calc, rules):
+            return int(rating)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    engine = Formula_Engine()
+
+    print(f"{'metric':<12}{'legacy us/call':>16}{'compiled us/call':>18}{'speedup':>10}")
+    for name, formula in FORMULAS.items():
+        legacy = timeit.timeit(lambda: legacy_compute_rating(engine, formula, 10, 9), number=calls)
+        compiled = timeit.timeit(lambda: engine.compute_rating(formula, 10, 9), number=calls)
+        print(
+            f"{name:<12}{legacy / calls * 1e6:>16.2f}{compiled / calls * 1e6:>18.2f}"
+            f"{legacy / compiled:>9.1f}x"
+        )
+
+    print("\ncache:", formula_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
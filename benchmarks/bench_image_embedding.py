@@ -0,0 +1,128 @@
+"""
+Image embedding benchmark
+=========================
+
+Builds a synthetic corpus of N image attachments (24 by default): 12-MP
+camera JPEGs (a third of them with EXIF rotation), 1080p screenshots,
+photographic PNGs and transparent logos. Each is embedded the way the
+compilers used to do it (full resolution, re-encoded to PNG) and through
+utils.ImageNormalizer for the DOCX and PPTX slots. Reports encode time,
+embedded bytes and the size and build time of a DOCX holding the whole
+corpus.
+
+Run with: python benchmarks/bench_image_embedding.py [images]
+"""
+
+import io
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from docx import Document  # noqa: E402
+from docx.shared import Inches  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+from utils.ImageNormalizer import EXIF_ORIENTATION, Image_Normalizer  # noqa: E402
+from utils.PresentationCompiler import ATTACHMENT_SLOT  # noqa: E402
+from utils.SupportDocCompiler import IMAGE_SLOT  # noqa: E402
+
+
+def encode(img, fmt, **params):
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    return buf.getvalue()
+
+
+def camera(n):
+    size = (4032, 3024)
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 12 + n % 5)
+    img = Image.merge("RGB", [gradient, noise, gradient.transpose(Image.Transpose.ROTATE_90).resize(size)])
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6 if n % 3 == 0 else 1
+    return "camera jpeg", encode(img, "JPEG", quality=92, exif=exif)
+
+
+def screenshot(n):
+    img = Image.new("RGB", (1920, 1080), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, 1920, 60], fill=(31, 114, 196))
+    for row, y in enumerate(range(100, 1040, 28)):
+        draw.text((40, y), f"Row {row} of attendance sheet #{n}  " * 3, fill="black")
+    return "screenshot png", encode(img, "PNG")
+
+
+def photo_png(n):
+    size = (2000, 1500)
+    img = Image.merge("RGB", [Image.effect_noise(size, 20 + n % 7)] * 2 + [Image.linear_gradient("L").resize(size)])
+    return "photo png", encode(img, "PNG")
+
+
+def logo(n):
+    img = Image.new("RGBA", (1200, 1200), (0, 0, 0, 0))
+    ImageDraw.Draw(img).ellipse([50, 50, 1150, 1150], fill=(200, 30 + n, 30, 255))
+    return "transparent png", encode(img, "PNG")
+
+
+def corpus(count):
+    makers = [camera, camera, camera, screenshot, camera, photo_png, screenshot, logo]
+    return [makers[n % len(makers)](n) for n in range(count)]
+
+
+def old_pipeline(content, slot):
+    img = Image.open(io.BytesIO(content))
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    return encode(img, "PNG")
+
+
+def new_pipeline(normalizer, settings):
+    def embed(content, slot):
+        return normalizer.normalize(content, normalizer.box(slot, settings), settings).data
+    return embed
+
+
+def run(embed, images, slot):
+    started = time.perf_counter()
+    data = [embed(content, slot) for _, content in images]
+    return data, time.perf_counter() - started
+
+
+def docx(data):
+    started = time.perf_counter()
+    doc = Document()
+    for image in data:
+        doc.add_paragraph().add_run().add_picture(io.BytesIO(image), width=Inches(IMAGE_SLOT[0]))
+    out = io.BytesIO()
+    doc.save(out)
+    return len(out.getvalue()), time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    images = corpus(count)
+    normalizer = Image_Normalizer()
+    settings = normalizer.settings()
+
+    kinds = Counter(kind for kind, _ in images)
+    source_mb = sum(len(content) for _, content in images) / 2 ** 20
+    print(f"{count} images ({', '.join(f'{n} {k}' for k, n in kinds.items())}), {source_mb:.1f} MB as uploaded")
+    print(f"normalizer: {settings['dpi']} dpi, JPEG quality {settings['jpeg_quality']}\n")
+    print(f"{'pipeline':<18} {'slot':<6} {'encode s':>9} {'embedded MB':>12} {'docx MB':>8} {'docx s':>7}")
+
+    for name, embed in (("full-res PNG", old_pipeline), ("ImageNormalizer", new_pipeline(normalizer, settings))):
+        data, encode_s = run(embed, images, IMAGE_SLOT)
+        size, build_s = docx(data)
+        print(f"{name:<18} {'docx':<6} {encode_s:>9.2f} {sum(map(len, data)) / 2 ** 20:>12.1f} "
+              f"{size / 2 ** 20:>8.1f} {build_s:>7.2f}")
+
+        data, encode_s = run(embed, images, ATTACHMENT_SLOT)
+        print(f"{name:<18} {'pptx':<6} {encode_s:>9.2f} {sum(map(len, data)) / 2 ** 20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
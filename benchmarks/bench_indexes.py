@@ -0,0 +1,188 @@
+"""
+Filter index benchmark
+======================
+
+Seeds a large synthetic dataset, then runs the hottest service queries with
+the composite ix_* indexes dropped and again with them created, printing the
+EXPLAIN plan and median latency of each.
+
+Uses a throwaway SQLite file by default; point BENCH_DATABASE_URL at an empty
+MySQL schema to get MySQL plans (the tables are created and dropped).
+
+Run with: python benchmarks/bench_indexes.py [scale]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask
+from sqlalchemy import func, insert, text
+
+from app import db
+
+
+PERIODS = [f"PERIOD-2026-{i:08X}" for i in range(8)]
+REPEAT = 20
+
+
+def make_app():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def seed(scale):
+    from models.Tasks import Main_Task, Output, Sub_Task, Assigned_Department
+    from models.PCR import IPCR, OPCR
+    from models.Notification import Notification
+    from models.Logs import Log
+
+    rng = random.Random(7)
+    users, departments, tasks = 500 * scale, 20, 200 * scale
+    ipcrs = users * len(PERIODS)
+    rows = 25_000 * scale
+    now = datetime.now()
+
+    def chunks(table, make, count, size=5_000):
+        for start in range(0, count, size):
+            db.session.execute(insert(table), [make(i) for i in range(start, min(start + size, count))])
+        db.session.commit()
+
+    chunks(Main_Task, lambda i: dict(
+        id=i + 1, mfo=f"Task {i}", time_description="", modification="",
+        target_accomplishment="", actual_accomplishment="",
+        status=rng.choice((0, 1, 1, 1)), period=PERIODS[i % len(PERIODS)],
+    ), tasks)
+    chunks(IPCR, lambda i: dict(
+        id=i + 1, user_id=i % users + 1, period=PERIODS[i // users], status=rng.choice((0, 1, 1)),
+    ), ipcrs)
+    chunks(OPCR, lambda i: dict(
+        id=i + 1, department_id=i % departments + 1, period=PERIODS[i // departments % len(PERIODS)],
+        status=1, isMain=i % 3 == 0,
+    ), departments * len(PERIODS) * 4)
+    chunks(Assigned_Department, lambda i: dict(
+        department_id=i % departments + 1, main_task_id=rng.randint(1, tasks),
+        period=PERIODS[i % len(PERIODS)],
+    ), tasks * 4)
+    chunks(Output, lambda i: dict(
+        user_id=rng.randint(1, users), main_task_id=rng.randint(1, tasks),
+        ipcr_id=rng.randint(1, ipcrs), period=PERIODS[i % len(PERIODS)], status=rng.choice((0, 1, 1)),
+    ), rows)
+    chunks(Sub_Task, lambda i: dict(
+        mfo=f"Task {i}", batch_id="", main_task_id=rng.randint(1, tasks), ipcr_id=rng.randint(1, ipcrs),
+        period=PERIODS[i % len(PERIODS)], status=rng.choice((0, 1, 1)),
+    ), rows)
+    chunks(Notification, lambda i: dict(
+        name="seed", user_id=rng.randint(1, users), created_at=now - timedelta(minutes=i),
+    ), rows)
+    chunks(Log, lambda i: dict(
+        user_id=rng.randint(1, users), full_name="Seed User", department="Seed", action="VIEW",
+        target="SEED", created_at=now - timedelta(minutes=i),
+    ), rows)
+
+    return users, departments, tasks
+
+
+def top_queries(users, departments, tasks):
+    """The service queries these indexes were chosen for."""
+    from models.Tasks import Main_Task, Output, Sub_Task, Assigned_Department
+    from models.PCR import IPCR, OPCR
+    from models.Notification import Notification
+    from models.Logs import Log
+
+    period = PERIODS[-1]
+    user_id, dept_id, task_id = users // 2, departments // 2, tasks // 2
+    since = datetime.now() - timedelta(days=7)
+
+    return {
+        "sub_tasks by period (analytics)": db.session.query(Sub_Task.id, IPCR.user_id)
+            .join(IPCR, Sub_Task.ipcr_id == IPCR.id)
+            .filter(Sub_Task.period == period, Sub_Task.status == 1, IPCR.status == 1),
+        "ipcr of user in period": IPCR.query.filter_by(user_id=user_id, period=period),
+        "outputs of user for task": Output.query.filter_by(user_id=user_id, main_task_id=task_id),
+        "outputs of task in period": Output.query.filter(Output.main_task_id == task_id, Output.period == period),
+        "department tasks in period": Assigned_Department.query.filter_by(department_id=dept_id, period=period),
+        "main opcr in period": OPCR.query.filter_by(status=1, isMain=True, period=period),
+        "main tasks in period": Main_Task.query.filter_by(status=1, period=period),
+        "notifications of user": Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()),
+        "log activity last 7 days": db.session.query(func.date(Log.created_at), func.count(Log.id))
+            .filter(Log.created_at >= since).group_by(func.date(Log.created_at)),
+    }
+
+
+def explain(query):
+    statement = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if db.engine.dialect.name == "sqlite" else "EXPLAIN "
+    plan = db.session.execute(text(prefix + str(statement))).fetchall()
+    return [" | ".join(str(value) for value in row) for row in plan]
+
+
+def measure(queries):
+    results = {}
+    for name, query in queries.items():
+        timings = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            query.all()
+            timings.append(time.perf_counter() - start)
+        results[name] = (statistics.median(timings) * 1000, explain(query))
+    return results
+
+
+def filter_indexes():
+    return [index for table in db.metadata.sorted_tables for index in table.indexes if index.name.startswith("ix_")]
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    app = make_app()
+
+    with app.app_context():
+        import models.Departments, models.PCR, models.Categories, models.Positions, models.FormTemplate, models.Logs  # noqa: F401
+        db.drop_all()
+        db.create_all()
+
+        start = time.perf_counter()
+        sizes = seed(scale)
+        print(f"seeded scale {scale} in {time.perf_counter() - start:.1f}s")
+        queries = top_queries(*sizes)
+
+        for index in filter_indexes():
+            index.drop(db.engine)
+        before = measure(queries)
+
+        for index in filter_indexes():
+            index.create(db.engine)
+        if db.engine.dialect.name == "sqlite":
+            db.session.execute(text("ANALYZE"))
+        after = measure(queries)
+
+        print(f"\n{'query':<34}{'before ms':>11}{'after ms':>11}{'speedup':>9}")
+        for name in queries:
+            b, a = before[name][0], after[name][0]
+            print(f"{name:<34}{b:>11.3f}{a:>11.3f}{b / a:>8.1f}x")
+
+        for name in queries:
+            print(f"\n== {name}")
+            print("  before: " + "\n          ".join(before[name][1]))
+            print("  after:  " + "\n          ".join(after[name][1]))
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Master OPCR aggregation benchmark
+=================================
+
+Seeds D departments (50 by default) with N submitted IPCRs each (200 by
+default) and five sub-tasks per IPCR, then builds the master OPCR data
+once with the old per-object walk and once with
+PCRGenerationService._build_master_data (one grouped query), reporting
+wall time and statement counts and checking that both agree.
+
+Uses a throwaway SQLite file by default; set BENCH_DATABASE_URL to an empty
+MySQL schema for production-like numbers.
+
+Run with: python benchmarks/bench_master_opcr.py [departments] [ipcrs]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask
+from sqlalchemy import event, insert
+
+from app import db
+
+
+PERIOD = "PERIOD-BENCH"
+TASKS = 20
+SUBS_PER_IPCR = 5
+
+
+def make_app():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_master_opcr.db")
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def seed(departments, ipcrs):
+    from models.Categories import Category
+    from models.Departments import Department
+    from models.PCR import IPCR, OPCR, Assigned_PCR
+    from models.Tasks import Main_Task, Sub_Task
+    from models.User import User
+
+    deadline = datetime(2026, 6, 30, 17, 0)
+    users = departments * ipcrs
+
+    def chunks(table, rows, size=10_000):
+        for start in range(0, len(rows), size):
+            db.session.execute(insert(table), rows[start:start + size])
+
+    chunks(Department, [{"id": d, "name": f"Office {d}"} for d in range(1, departments + 1)])
+    chunks(Category, [{"id": c, "name": f"Category {c}", "period": PERIOD, "priority_order": c} for c in (1, 2)])
+    chunks(Main_Task, [
+        {"id": t, "mfo": f"Task {t}", "time_description": "", "modification": "", "target_accomplishment": "",
+         "actual_accomplishment": "", "category_id": t % 2 + 1, "period": PERIOD,
+         "timeliness_mode": "deadline" if t % 4 == 0 else "timeframe",
+         "target_deadline": deadline if t % 4 == 0 else None}
+        for t in range(1, TASKS + 1)
+    ])
+    chunks(User, [
+        {"id": u, "profile_id": u, "first_name": f"User{u}", "last_name": "Bench", "department_id": (u - 1) // ipcrs + 1}
+        for u in range(1, users + 1)
+    ])
+    chunks(OPCR, [{"id": d, "department_id": d, "period": PERIOD, "isMain": True} for d in range(1, departments + 1)])
+    chunks(IPCR, [{"id": u, "user_id": u, "period": PERIOD, "form_status": "submitted"} for u in range(1, users + 1)])
+    chunks(Assigned_PCR, [{"opcr_id": (u - 1) // ipcrs + 1, "ipcr_id": u, "period": PERIOD} for u in range(1, users + 1)])
+    chunks(Sub_Task, [
+        {"mfo": "", "batch_id": "", "main_task_id": (u + s * 3) % TASKS + 1, "ipcr_id": u, "period": PERIOD,
+         "target_acc": 5, "actual_acc": u % 7, "target_mod": 1, "actual_mod": u % 2, "target_time": 3,
+         "actual_time": u % 5, "actual_deadline": deadline + timedelta(hours=u % 90 - 45)}
+        for u in range(1, users + 1) for s in range(SUBS_PER_IPCR)
+    ])
+    db.session.commit()
+
+
+def legacy_master_data(opcrs, period, settings):
+    """The pre-aggregation implementation: two walks over every OPCR's IPCR sub-tasks."""
+    from models.Categories import Category
+    from services.PCR.pcr_generation_service import PCRGenerationService
+    from services.PCR.pcr_rating_service import PCRRatingService
+
+    task_index, data = {}, []
+    for cat in Category.query.filter_by(status=1, period=period).order_by(Category.priority_order.desc()).all():
+        task_list = []
+        for mt in cat.main_tasks:
+            if mt.status == 0:
+                continue
+            task = PCRGenerationService._build_master_task_dict(mt)
+            task_list.append(task)
+            task_index[mt.id] = task
+        data.append({cat.name: task_list})
+
+    assigned = {}
+    for opcr in opcrs:
+        for apcr in opcr.assigned_pcrs:
+            ipcr = apcr.ipcr
+            if ipcr.status == 0 or ipcr.form_status == "draft":
+                continue
+            for sub in ipcr.sub_tasks:
+                assigned.setdefault(sub.main_task.mfo, set()).add(f"{ipcr.user.first_name} {ipcr.user.last_name}")
+
+    for opcr in opcrs:
+        for apcr in opcr.assigned_pcrs:
+            ipcr = apcr.ipcr
+            if ipcr.status == 0 or ipcr.form_status == "draft":
+                continue
+            for sub in ipcr.sub_tasks:
+                task = task_index.get(sub.main_task.id)
+                if not task:
+                    continue
+                if sub.main_task.timeliness_mode == "deadline" and sub.actual_deadline and sub.main_task.target_deadline:
+                    actual_days = (sub.actual_deadline - sub.main_task.target_deadline).days
+                else:
+                    actual_days = sub.actual_time or 0
+                task["summary"]["target"] += sub.target_acc
+                task["summary"]["actual"] += sub.actual_acc
+                task["corrections"]["target"] += sub.target_mod
+                task["corrections"]["actual"] += sub.actual_mod
+                task["working_days"]["target"] += sub.target_time
+                task["working_days"]["actual"] += actual_days
+                task["frequency"] += 1
+
+    for task in task_index.values():
+        if task["frequency"] == 0:
+            continue
+        q = e = t = 0
+        if settings.enable_formula:
+            q = PCRRatingService.compute_quantity_rating(task["summary"]["target"], task["summary"]["actual"], settings)
+            e = PCRRatingService.compute_efficiency_rating(task["corrections"]["target"], task["corrections"]["actual"], settings)
+            t = PCRRatingService.compute_timeliness_rating(task["working_days"]["target"], task["working_days"]["actual"], settings)
+        task["rating"] = {"quantity": q, "efficiency": e, "timeliness": t, "average": PCRRatingService.calculateAverage(q, e, t)}
+        task.pop("_task_id", None)
+
+    return data, {k: set(v) for k, v in assigned.items()}
+
+
+def timed(label, statements, fn):
+    from models.PCR import OPCR
+
+    db.session.expunge_all()
+    statements.clear()
+    start = time.perf_counter()
+    opcrs = OPCR.query.filter_by(status=1, isMain=True, period=PERIOD).all()
+    result = fn(opcrs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed * 1000:>10.1f} ms{len(statements):>12}")
+    return elapsed, result
+
+
+def main():
+    departments = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    ipcrs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    app = make_app()
+
+    with app.app_context(), app.test_request_context():
+        import models.Departments, models.PCR, models.Categories, models.Positions, models.FormTemplate  # noqa: F401
+        from models.System_Settings import System_Settings
+        from services.PCR.pcr_generation_service import PCRGenerationService
+
+        db.drop_all()
+        db.create_all()
+        row = System_Settings.load_or_create()
+        row.current_period_id = PERIOD
+        row.bump_version()
+        db.session.commit()
+
+        start = time.perf_counter()
+        seed(departments, ipcrs)
+        print(f"seeded {departments} departments x {ipcrs} IPCRs in {time.perf_counter() - start:.1f}s")
+        settings = System_Settings.get_default_settings()
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+        print(f"{'':<28}{'time':>13}{'statements':>12}")
+        legacy, (legacy_data, legacy_assigned) = timed(
+            "per-object walk", statements, lambda opcrs: legacy_master_data(opcrs, PERIOD, settings))
+        grouped, (data, assigned, _) = timed(
+            "grouped SQL", statements, lambda opcrs: PCRGenerationService._build_master_data(opcrs, PERIOD, settings))
+        print(f"speedup: {legacy / grouped:.1f}x")
+
+        assert data == legacy_data
+        assert {mfo: set(names) for mfo, names in assigned.items()} == legacy_assigned
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Notification fan-out benchmark
+==============================
+
+Notifies N users (5,000 by default) once with the old per-row
+session.add loop plus a global broadcast, and once through
+Notification_Service._notify_users (multi-row INSERT, one emit per
+user_{id} room), reporting wall time and statement counts.
+
+Uses a throwaway SQLite file by default; set BENCH_DATABASE_URL to an empty
+MySQL schema for production-like numbers.
+
+Run with: python benchmarks/bench_notifications.py [users]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask
+from sqlalchemy import event, insert
+
+from app import db, socketio
+
+
+def make_app():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_notifications.db")
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    socketio.init_app(app)
+    return app
+
+
+def legacy_notify(users, msg):
+    """The pre-fan-out implementation: one add per user and a global broadcast."""
+    from models.Notification import Notification
+
+    for user in users:
+        db.session.add(Notification(user_id=user.id, name=msg))
+    db.session.commit()
+    socketio.emit("notification")
+
+
+def timed(label, statements, fn):
+    statements.clear()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34}{elapsed * 1000:>10.1f} ms{len(statements):>12}")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    app = make_app()
+
+    with app.app_context():
+        import models.Departments, models.PCR, models.Categories, models.Positions, models.FormTemplate  # noqa: F401
+        from models.Notification import Notification, Notification_Service
+        from models.User import User
+
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(User), [
+            {"id": i, "profile_id": i, "first_name": f"User{i}", "last_name": "Bench"}
+            for i in range(1, count + 1)
+        ])
+        db.session.commit()
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+        print(f"fan-out to {count} users")
+        print(f"{'':<34}{'time':>13}{'statements':>12}")
+        legacy = timed("per-row add + global emit", statements, lambda: legacy_notify(User.query.all(), "legacy"))
+        fan_out = timed("multi-row insert + room emits", statements, lambda: Notification_Service.notify_everyone("fan-out"))
+        print(f"speedup: {legacy / fan_out:.1f}x")
+
+        assert Notification.query.filter_by(name="fan-out").count() == count
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
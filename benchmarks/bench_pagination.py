@@ -0,0 +1,99 @@
+"""
+Keyset pagination benchmark
+===========================
+
+Seeds N logs (200,000 by default) and fetches pages of 50 at increasing
+depths, once with LIMIT/OFFSET and once with the (created_at, id) seek
+predicate used by utils.Pagination.keyset_page, reporting the median
+latency at each depth.
+
+Uses a throwaway SQLite file by default; set BENCH_DATABASE_URL to an empty
+MySQL schema for production-like numbers.
+
+Run with: python benchmarks/bench_pagination.py [logs]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask
+from sqlalchemy import insert
+
+from app import db
+
+
+PAGE = 50
+REPEAT = 15
+
+
+def make_app():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_pagination.db")
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "bench"
+    db.init_app(app)
+    return app
+
+
+def median_ms(fn):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app = make_app()
+
+    with app.app_context(), app.test_request_context():
+        import models.Departments, models.PCR, models.Categories, models.Positions, models.FormTemplate  # noqa: F401
+        from models.Logs import Log
+        from utils.Pagination import encode_cursor, keyset_page
+
+        db.drop_all()
+        db.create_all()
+
+        now = datetime.now()
+        for start in range(0, count, 10_000):
+            db.session.execute(insert(Log), [
+                {"user_id": i % 500, "full_name": "Bench User", "department": "Bench", "action": "VIEW",
+                 "target": "BENCH", "created_at": now - timedelta(seconds=i // 3)}  # ties on purpose
+                for i in range(start, min(start + 10_000, count))
+            ])
+        db.session.commit()
+
+        ordered = Log.query.order_by(Log.created_at.desc(), Log.id.desc())
+        print(f"{count} logs, pages of {PAGE}")
+        print(f"{'depth':>10}{'offset ms':>12}{'keyset ms':>12}{'speedup':>9}")
+
+        for depth in (0, count // 10, count // 2, count - PAGE):
+            # the cursor a client would hold after walking to this depth
+            last = ordered.offset(depth - 1).first() if depth else None
+            cursor = encode_cursor("logs", last.created_at, last.id) if last else None
+
+            offset = median_ms(lambda: [log.to_dict() for log in ordered.offset(depth).limit(PAGE).all()])
+            keyset = median_ms(lambda: keyset_page(Log.query, Log, "logs", cursor, PAGE))
+
+            expected = [log.id for log in ordered.offset(depth).limit(PAGE).all()]
+            assert [item["id"] for item in keyset_page(Log.query, Log, "logs", cursor, PAGE)["items"]] == expected
+            print(f"{depth:>10}{offset:>12.2f}{keyset:>12.2f}{offset / keyset:>8.1f}x")
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
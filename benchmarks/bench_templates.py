@@ -0,0 +1,62 @@
+"""
+Report template setup benchmark
+===============================
+
+Times the template setup each report pays before it writes a single cell:
+a fresh parse (load_workbook / Document / PresentationCompiler.Template, as
+the handlers used to do) against a copy from utils.TemplateCache, for
+every template under excels/. Reported per report, averaged over N runs.
+
+Run with: python benchmarks/bench_templates.py [runs]
+"""
+
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from docx import Document
+from openpyxl import load_workbook
+
+from utils.PresentationCompiler import Template, TEMPLATE_PATH as PPTX_TEMPLATE
+from utils.SupportDocCompiler import TEMPLATE_PATH as DOCX_TEMPLATE
+from utils.TemplateCache import Template_Cache
+
+
+def timed(fn, runs):
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - started) * 1000 / runs
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cache = Template_Cache()
+
+    cases = [(path, load_workbook, cache.workbook) for path in sorted(glob.glob("excels/*.xlsx"))]
+    cases.append((PPTX_TEMPLATE, Template, cache.presentation))
+    if os.path.exists(DOCX_TEMPLATE):
+        cases.append((DOCX_TEMPLATE, Document, cache.document))
+    else:
+        print(f"(skipping {DOCX_TEMPLATE}: not found)")
+
+    print(f"{'template':<38} {'fresh ms':>10} {'cached ms':>10} {'speedup':>8}")
+    for path, fresh, cached in cases:
+        cached(path)  # first call parses; every report after that copies
+        fresh_ms = timed(lambda: fresh(path), runs)
+        cached_ms = timed(lambda: cached(path), runs)
+        print(f"{os.path.basename(path):<38} {fresh_ms:>10.2f} {cached_ms:>10.2f} {fresh_ms / cached_ms:>7.1f}x")
+
+    print()
+    for row in cache.stats():
+        print(f"{os.path.basename(row['path']):<38} loads={row['loads']} hits={row['hits']} "
+              f"load={row['total_load_ms']:.1f}ms copies={row['copies']} copy={row['total_copy_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,11 @@ Custom CLI commands for database management and setup.
 Commands:
   flask seed-db          - Initialize the database with foundation data
   flask verify-db        - Verify database integrity
+  flask refresh-signatories - Write current signatories onto existing IPCR/OPCR rows
+  flask rollup-logs      - Rebuild the log activity rollups from the logs table
+  flask check-log-rollups - Compare the log activity rollups against raw counts
+  flask report-worker    - Build queued Excel/DOCX/PPTX report jobs
+  flask warm-render-cache - Render a period's supporting documents into the render cache
 """
 
 import click
@@ -318,3 +323,95 @@ def init_cli(app):
         
         except Exception as e:
             click.secho(f"✗ Verification error: {e}", fg="red")
+
+    @app.cli.command()
+    @click.option("--department", "department_id", type=int, default=None, help="Only refresh this department")
+    def refresh_signatories(department_id):
+        """Write current signatories onto existing IPCR/OPCR rows"""
+        from services.PCR.pcr_signatory_service import PCRSignatoryService
+
+        try:
+            if department_id is None:
+                count = PCRSignatoryService.refresh_all()
+            else:
+                count = PCRSignatoryService.refresh_department(department_id)
+            db.session.commit()
+            click.secho(f"✓ Refreshed signatories on {count} PCRs", fg="green")
+        except Exception as e:
+            db.session.rollback()
+            click.secho(f"✗ Failed: {e}", fg="red")
+
+    @app.cli.command()
+    def rollup_logs():
+        """Rebuild the hourly/daily log activity rollups from the logs table"""
+        from models.Logs import Log_Rollup
+
+        try:
+            with db.engine.begin() as conn:
+                count = Log_Rollup.rebuild(conn)
+            click.secho(f"✓ Rolled up {count} logs", fg="green")
+        except Exception as e:
+            click.secho(f"✗ Failed: {e}", fg="red")
+
+    @app.cli.command()
+    def check_log_rollups():
+        """Compare the log activity rollups against raw log counts"""
+        from models.Logs import Log_Rollup
+
+        with db.engine.connect() as conn:
+            mismatches = Log_Rollup.check(conn)
+
+        if not mismatches:
+            click.secho("✓ Log rollups match the logs table", fg="green")
+            return
+
+        for mismatch in mismatches:
+            click.secho(f"✗ {mismatch}", fg="red")
+        click.echo("Run 'flask rollup-logs' to rebuild them.")
+        raise SystemExit(1)
+
+    @app.cli.command()
+    @click.option("--concurrency", type=int, default=None, help="Jobs run at the same time (REPORT_WORKER_CONCURRENCY)")
+    @click.option("--once", is_flag=True, help="Run at most one queued job and exit")
+    def report_worker(concurrency, once):
+        """Build queued Excel/DOCX/PPTX report jobs"""
+        from utils.ReportWorker import Report_Worker
+
+        worker = Report_Worker(app, concurrency=concurrency)
+        if once:
+            job_id = worker.run_once()
+            click.echo(f"Ran job {job_id}" if job_id else "No queued jobs")
+            return
+
+        click.secho(f"✓ Report worker {worker.name} running {worker.concurrency} jobs at a time", fg="green")
+        worker.run()
+
+    @app.cli.command()
+    @click.option("--period", default=None, help="Period id (default: the current period)")
+    @click.option("--department", "department_id", type=int, default=None, help="Only this department's documents")
+    def warm_render_cache(period, department_id):
+        """Render a period's supporting documents into the render cache"""
+        from models.PCR import IPCR, Supporting_Document
+        from utils import FileStorage
+        from utils.RenderCache import render_cache
+
+        if render_cache.settings() is None:
+            click.secho("✗ The render cache is off (RENDER_CACHE_MAX_MB=0)", fg="red")
+            return
+
+        period = period or System_Settings.get_default_settings().current_period_id
+        query = Supporting_Document.query.filter_by(period=period, status=1, isApproved="approved")
+        if department_id is not None:
+            query = query.join(IPCR).join(User).filter(User.department_id == department_id)
+
+        documents = [
+            {"object_name": d.file_name, "file_type": d.file_type, "download_url": FileStorage.get_file(d.file_name)}
+            for d in query.all()
+        ]
+        click.echo(f"Warming {len(documents)} supporting documents of {period}...")
+        counts = render_cache.warm(documents)
+        click.secho(
+            f"✓ {counts['rendered']} rendered, {counts['cached']} already cached, "
+            f"{counts['skipped']} not previewable, {counts['failed']} failed",
+            fg="green" if not counts["failed"] else "yellow",
+        )
@@ -6,6 +6,11 @@ class TestConfig:
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SETTINGS_CACHE_TTL = 0
+    LOG_BUFFER_MODE = "sync"
+    REPORT_JOBS_MODE = "inline"
+    REPORT_CACHE_BACKEND = "off"
+    RENDER_CACHE_MAX_MB = 0
     WTF_CSRF_ENABLED = False
     SECRET_KEY = "test-secret"
     MAIL_SERVER = 'smtp.gmail.com'
@@ -20,6 +25,44 @@ class ProdConfig:
     SECRET_KEY = "hannelore"
     SQLALCHEMY_DATABASE_URI = os.getenv("LOCAL_DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SETTINGS_CACHE_TTL = int(os.getenv("SETTINGS_CACHE_TTL", 5))
+    QUERY_PROFILING = os.getenv("QUERY_PROFILING", "false").lower() == "true"
+    QUERY_PROFILING_N1_THRESHOLD = int(os.getenv("QUERY_PROFILING_N1_THRESHOLD", 10))
+    LOG_BUFFER_MODE = os.getenv("LOG_BUFFER_MODE", "async")
+    LOG_BUFFER_BATCH = int(os.getenv("LOG_BUFFER_BATCH", 100))
+    LOG_BUFFER_INTERVAL_MS = int(os.getenv("LOG_BUFFER_INTERVAL_MS", 500))
+    REPORT_JOBS_MODE = os.getenv("REPORT_JOBS_MODE", "queue")
+    REPORT_WORKER_CONCURRENCY = int(os.getenv("REPORT_WORKER_CONCURRENCY", 2))
+    REPORT_JOBS_DIR = os.getenv("REPORT_JOBS_DIR", os.path.join("excels", "ReportJobs"))
+    REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT", 1800))
+    REPORT_JOB_HEARTBEAT = float(os.getenv("REPORT_JOB_HEARTBEAT", 30))
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    REPORT_CACHE_BACKEND = os.getenv("REPORT_CACHE_BACKEND", "s3")
+    REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join("excels", "ReportCache"))
+    REPORT_CACHE_PUBLIC_URL = os.getenv("REPORT_CACHE_PUBLIC_URL", "")
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", 500))
+    REPORT_CACHE_TTL_HOURS = float(os.getenv("REPORT_CACHE_TTL_HOURS", 168))
+    REPORT_STREAM_RESPONSES = os.getenv("REPORT_STREAM_RESPONSES", "1") == "1"
+    REPORT_SPOOL_MAX_BYTES = int(os.getenv("REPORT_SPOOL_MAX_BYTES", 8 * 1024 * 1024))
+    S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+    S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024))
+    S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", 4))
+    ATTACHMENT_FETCH_WORKERS = int(os.getenv("ATTACHMENT_FETCH_WORKERS", 8))
+    ATTACHMENT_FETCH_RETRIES = int(os.getenv("ATTACHMENT_FETCH_RETRIES", 2))
+    ATTACHMENT_FETCH_BACKOFF = float(os.getenv("ATTACHMENT_FETCH_BACKOFF", 0.5))
+    ATTACHMENT_FETCH_TIMEOUT = float(os.getenv("ATTACHMENT_FETCH_TIMEOUT", 30))
+    ATTACHMENT_FETCH_DEADLINE = float(os.getenv("ATTACHMENT_FETCH_DEADLINE", 600))
+    PDF_RASTER_WORKERS = int(os.getenv("PDF_RASTER_WORKERS", 2))
+    PDF_RASTER_DPI = int(os.getenv("PDF_RASTER_DPI", 150))
+    PDF_RASTER_SLIDE_DPI = int(os.getenv("PDF_RASTER_SLIDE_DPI", 120))
+    PDF_RASTER_MAX_PAGES = int(os.getenv("PDF_RASTER_MAX_PAGES", 20))
+    PDF_RASTER_PAGE_BUDGET = int(os.getenv("PDF_RASTER_PAGE_BUDGET", 300))
+    PDF_RASTER_TIMEOUT = int(os.getenv("PDF_RASTER_TIMEOUT", 60))
+    IMAGE_EMBED_DPI = int(os.getenv("IMAGE_EMBED_DPI", 150))
+    IMAGE_EMBED_JPEG_QUALITY = int(os.getenv("IMAGE_EMBED_JPEG_QUALITY", 85))
+    RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join("excels", "RenderCache"))
+    RENDER_CACHE_MAX_MB = float(os.getenv("RENDER_CACHE_MAX_MB", 512))
+    EXCEL_STREAMING_REPORTS = [r.strip() for r in os.getenv("EXCEL_STREAMING_REPORTS", "").split(",") if r.strip()]
     MAIL_SERVER = 'smtp.gmail.com'
     MAIL_PORT = 587
     MAIL_USE_TLS = True
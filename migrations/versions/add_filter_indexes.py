@@ -0,0 +1,53 @@
+"""Add composite indexes for the period/status and foreign-key access paths
+
+Revision ID: filter_indexes_001
+Revises: settings_version_001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'filter_indexes_001'
+down_revision = 'settings_version_001'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns, mysql prefix lengths for TEXT columns)
+INDEXES = [
+    ('ix_assigned_tasks_user_main_task', 'assigned_tasks', ['user_id', 'main_task_id'], None),
+    ('ix_outputs_user_main_task', 'outputs', ['user_id', 'main_task_id'], None),
+    ('ix_outputs_main_task_period', 'outputs', ['main_task_id', 'period'], None),
+    ('ix_outputs_user_period', 'outputs', ['user_id', 'period'], None),
+    ('ix_outputs_period_status', 'outputs', ['period', 'status'], None),
+    ('ix_assigned_departments_department_period', 'assigned_departments', ['department_id', 'period'], {'period': 100}),
+    ('ix_assigned_departments_main_task_department', 'assigned_departments', ['main_task_id', 'department_id'], None),
+    ('ix_main_tasks_period_status', 'main_tasks', ['period', 'status'], None),
+    ('ix_sub_tasks_period_status', 'sub_tasks', ['period', 'status'], None),
+    ('ix_sub_tasks_main_task_period', 'sub_tasks', ['main_task_id', 'period'], None),
+    ('ix_sub_tasks_ipcr_status', 'sub_tasks', ['ipcr_id', 'status'], None),
+    ('ix_supporting_documents_period_status', 'supporting_documents', ['period', 'status'], None),
+    ('ix_supporting_documents_ipcr_status', 'supporting_documents', ['ipcr_id', 'status'], None),
+    ('ix_ipcr_user_period', 'ipcr', ['user_id', 'period'], None),
+    ('ix_ipcr_period_status', 'ipcr', ['period', 'status'], None),
+    ('ix_opcr_department_period', 'opcr', ['department_id', 'period'], None),
+    ('ix_opcr_period_status_main', 'opcr', ['period', 'status', 'isMain'], None),
+    ('ix_notifications_user_created', 'notifications', ['user_id', 'created_at'], None),
+    ('ix_logs_created_at', 'logs', ['created_at'], None),
+    ('ix_logs_user_created', 'logs', ['user_id', 'created_at'], None),
+]
+
+
+def upgrade():
+    for name, table, columns, lengths in INDEXES:
+        kwargs = {'mysql_length': lengths} if lengths else {}
+        op.create_index(name, table, columns, unique=False, **kwargs)
+
+
+def downgrade():
+    # MySQL may have dropped its implicit foreign-key index in favour of one
+    # of these; dropping that one then fails until the FK gets its own index.
+    for name, table, columns, lengths in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
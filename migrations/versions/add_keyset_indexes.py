@@ -0,0 +1,33 @@
+"""Add created_at indexes backing keyset pagination of users and supporting documents
+
+Revision ID: keyset_indexes_001
+Revises: log_rollups_001
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'keyset_indexes_001'
+down_revision = 'log_rollups_001'
+branch_labels = None
+depends_on = None
+
+
+# logs and notifications are already covered by ix_logs_created_at and
+# ix_notifications_user_created (InnoDB appends the primary key to both)
+INDEXES = [
+    ('ix_users_created_at', 'users', ['created_at']),
+    ('ix_supporting_documents_period_created', 'supporting_documents', ['period', 'created_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,57 @@
+"""Add hourly and daily log activity rollup tables
+
+Revision ID: log_rollups_001
+Revises: filter_indexes_001
+Create Date: 2026-10-18 12:00:00.000000
+
+Backfill after upgrading with: flask rollup-logs
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'log_rollups_001'
+down_revision = 'filter_indexes_001'
+branch_labels = None
+depends_on = None
+
+
+def _key_columns():
+    return [
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('target', sa.String(length=50), nullable=False),
+        sa.Column('department', sa.String(length=50), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'log_activity_hourly',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('weekday', sa.Integer(), nullable=False),
+        sa.Column('hour', sa.Integer(), nullable=False),
+        *_key_columns(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('bucket', 'action', 'target', 'department', 'role', name='uq_log_activity_hourly_key'),
+    )
+    op.create_index('ix_log_activity_hourly_weekday_hour', 'log_activity_hourly', ['weekday', 'hour'], unique=False)
+
+    op.create_table(
+        'log_activity_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.Date(), nullable=False),
+        *_key_columns(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('bucket', 'action', 'target', 'department', 'role', name='uq_log_activity_daily_key'),
+    )
+
+
+def downgrade():
+    op.drop_table('log_activity_daily')
+    op.drop_index('ix_log_activity_hourly_weekday_hour', table_name='log_activity_hourly')
+    op.drop_table('log_activity_hourly')
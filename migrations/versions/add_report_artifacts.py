@@ -0,0 +1,40 @@
+"""Add report_artifacts table for the content-addressed report cache
+
+Revision ID: report_artifacts_001
+Revises: report_jobs_001
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'report_artifacts_001'
+down_revision = 'report_jobs_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'report_artifacts',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('backend', sa.String(length=20), nullable=False),
+        sa.Column('storage_key', sa.Text(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('hits', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index('ix_report_artifacts_created_at', 'report_artifacts', ['created_at'], unique=False)
+    op.create_index('ix_report_artifacts_last_used_at', 'report_artifacts', ['last_used_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_report_artifacts_last_used_at', table_name='report_artifacts')
+    op.drop_index('ix_report_artifacts_created_at', table_name='report_artifacts')
+    op.drop_table('report_artifacts')
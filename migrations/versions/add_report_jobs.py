@@ -0,0 +1,53 @@
+"""Add report_jobs table for queued report generation
+
+Revision ID: report_jobs_001
+Revises: keyset_indexes_001
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'report_jobs_001'
+down_revision = 'keyset_indexes_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'report_jobs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('dedup_key', sa.String(length=64), nullable=False),
+        sa.Column('active_key', sa.String(length=64), nullable=True),
+        sa.Column('requested_by', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=True),
+        sa.Column('message', sa.String(length=255), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.Column('result_url', sa.Text(), nullable=True),
+        sa.Column('result_path', sa.Text(), nullable=True),
+        sa.Column('result_name', sa.String(length=255), nullable=True),
+        sa.Column('mimetype', sa.String(length=255), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('notified_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('active_key'),
+    )
+    op.create_index('ix_report_jobs_status_created', 'report_jobs', ['status', 'created_at'], unique=False)
+    op.create_index('ix_report_jobs_finished_notified', 'report_jobs', ['finished_at', 'notified_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_report_jobs_finished_notified', table_name='report_jobs')
+    op.drop_index('ix_report_jobs_status_created', table_name='report_jobs')
+    op.drop_table('report_jobs')
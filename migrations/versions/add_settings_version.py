@@ -0,0 +1,26 @@
+"""Add version column to system_settings for per-worker settings cache
+
+Revision ID: settings_version_001
+Revises: 8dc9791f207b
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'settings_version_001'
+down_revision = '8dc9791f207b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('system_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('system_settings', schema=None) as batch_op:
+        batch_op.drop_column('version')
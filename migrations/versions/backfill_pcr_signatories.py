@@ -0,0 +1,113 @@
+"""Backfill the materialized IPCR/OPCR signatory columns
+
+IPCR/OPCR.to_dict used to resolve the signatories on every read; they are
+now written when PCRs, heads or settings change. This fills the columns of
+existing rows (including the newly stored IPCR confirm slot) once, with the
+same rules as refresh_signatories at the time of this revision.
+
+Revision ID: pcr_signatories_001
+Revises: report_artifacts_001
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'pcr_signatories_001'
+down_revision = 'report_artifacts_001'
+branch_labels = None
+depends_on = None
+
+
+PRESIDENT_POSITION = "College President"
+PMT_POSITION = "PMT Chairperson"
+SIGNATORY_COLUMNS = (
+    "reviewed_by", "rev_position", "approved_by", "app_position", "discussed_with", "dis_position",
+    "assessed_by", "ass_position", "final_rating_by", "fin_position", "confirmed_by", "con_position",
+)
+
+users = sa.table(
+    "users",
+    sa.column("id", sa.Integer), sa.column("first_name", sa.String), sa.column("middle_name", sa.String),
+    sa.column("last_name", sa.String), sa.column("role", sa.String), sa.column("department_id", sa.Integer),
+    sa.column("position_id", sa.Integer),
+)
+positions = sa.table("positions", sa.column("id", sa.Integer), sa.column("name", sa.String))
+settings_table = sa.table(
+    "system_settings",
+    sa.column("id", sa.Integer), sa.column("current_president_fullname", sa.String),
+    sa.column("current_mayor_fullname", sa.String),
+)
+ipcr = sa.table("ipcr", sa.column("id", sa.Integer), sa.column("user_id", sa.Integer),
+                *(sa.column(name, sa.Text) for name in SIGNATORY_COLUMNS))
+opcr = sa.table("opcr", sa.column("id", sa.Integer), sa.column("department_id", sa.Integer),
+                *(sa.column(name, sa.Text) for name in SIGNATORY_COLUMNS))
+
+
+def _full_name(user):
+    mi = user.middle_name[0] + ". " if user.middle_name else " "
+    return f"{user.first_name} {mi}{user.last_name}"
+
+
+def _signatories(review, discuss, assess, president, mayor):
+    values = (*review, president, PRESIDENT_POSITION, *discuss, *assess,
+              president, PRESIDENT_POSITION, mayor, PMT_POSITION)
+    return dict(zip(SIGNATORY_COLUMNS, values))
+
+
+def backfill(bind):
+    """Writes the signatories of every IPCR and OPCR; returns the number of rows."""
+    settings = bind.execute(sa.select(settings_table).order_by(settings_table.c.id).limit(1)).first()
+    president = (settings.current_president_fullname if settings else None) or ""
+    mayor = (settings.current_mayor_fullname if settings else None) or ""
+
+    position_names = dict(bind.execute(sa.select(positions.c.id, positions.c.name)).all())
+    all_users = {user.id: user for user in bind.execute(sa.select(users).order_by(users.c.id)).all()}
+    heads = {}
+    for user in all_users.values():
+        if user.role == "head":
+            heads.setdefault(user.department_id, user)
+
+    def person(user):
+        return (_full_name(user), position_names.get(user.position_id) or "") if user else ("", "")
+
+    president_slot = (president, PRESIDENT_POSITION)
+    ipcr_rows = []
+    for row in bind.execute(sa.select(ipcr.c.id, ipcr.c.user_id)).all():
+        user = all_users.get(row.user_id)
+        if user is None:
+            continue
+        head = person(heads.get(user.department_id))
+        if user.role == "faculty":
+            values = _signatories(head, person(user), head, president, mayor)
+        elif user.role in ("head", "administrator"):
+            values = _signatories(president_slot, person(user), president_slot, president, mayor)
+        else:  # president
+            values = _signatories(president_slot, president_slot, president_slot, president, mayor)
+        ipcr_rows.append({"row_id": row.id, **values})
+
+    opcr_rows = []
+    for row in bind.execute(sa.select(opcr.c.id, opcr.c.department_id)).all():
+        head = person(heads.get(row.department_id))
+        opcr_rows.append({"row_id": row.id, **_signatories(head, head, president_slot, president, mayor)})
+
+    for table, rows in ((ipcr, ipcr_rows), (opcr, opcr_rows)):
+        if rows:
+            bind.execute(
+                table.update()
+                .where(table.c.id == sa.bindparam("row_id"))
+                .values({name: sa.bindparam(name) for name in SIGNATORY_COLUMNS}),
+                rows,
+            )
+    return len(ipcr_rows) + len(opcr_rows)
+
+
+def upgrade():
+    backfill(op.get_bind())
+
+
+def downgrade():
+    # the columns were already there; the backfilled values are kept
+    pass
@@ -5,9 +5,11 @@ from flask import jsonify
 from sqlalchemy.dialects.mysql import JSON, TEXT
 from models.User import User
 from models.Notification import Notification, Notification_Service
-from models.Tasks import Sub_Task, Output
+from models.Tasks import Sub_Task, Output, Assigned_Department
+from models.PCR import IPCR, OPCR
 from app import socketio
-from sqlalchemy import func, outerjoin
+from sqlalchemy import func, outerjoin, select, exists
+from sqlalchemy.orm import column_property, undefer_group
 
 class Department(db.Model):
     __tablename__ = "departments"
@@ -25,25 +27,46 @@ class Department(db.Model):
     
     assigned_pcrs = db.relationship("Assigned_PCR", back_populates = "department")
 
+    # correlated COUNT subqueries, deferred into the "counts" group:
+    # Department.query.options(undefer_group("counts")) loads them for every
+    # department in the same SELECT, otherwise the first access loads the group
+    user_count = column_property(
+        select(func.count(User.id)).where(User.department_id == id).correlate_except(User).scalar_subquery(),
+        deferred=True, group="counts",
+    )
+    opcr_count = column_property(
+        select(func.count(OPCR.id)).where(OPCR.department_id == id).correlate_except(OPCR).scalar_subquery(),
+        deferred=True, group="counts",
+    )
+    task_count = column_property(
+        select(func.count(Assigned_Department.id)).where(Assigned_Department.department_id == id)
+        .correlate_except(Assigned_Department).scalar_subquery(),
+        deferred=True, group="counts",
+    )
+    ipcr_count = column_property(
+        select(func.count(IPCR.id)).join(User, IPCR.user_id == User.id).where(User.department_id == id)
+        .correlate_except(IPCR, User).scalar_subquery(),
+        deferred=True, group="counts",
+    )
+    head_occupied = column_property(
+        exists().where(User.department_id == id, User.role == "head").correlate_except(User),
+        deferred=True, group="counts",
+    )
+
     def count_tasks(self):
-        return len([main_task.info() for main_task in self.main_tasks])
+        return self.task_count
 
     def count_users(self):
-        return len([user.to_dict() for user in self.users])
+        return self.user_count
     
     def count_opcr(self):
-        return len([opcr.to_dict() for opcr in self.opcrs])
+        return self.opcr_count
     
     def count_ipcr(self):
-        ipcr_count = 0
-        for user in self.users:
-            ipcr_count += len(user.ipcrs)            
-        return ipcr_count
+        return self.ipcr_count
     
     def is_head_occupied(self):
-        for user in self.users:
-            if user.role == "head": return True        
-        return False
+        return bool(self.head_occupied)
     
     
     def info(self):
@@ -98,7 +121,7 @@ class Department(db.Model):
 class Department_Service():
     def get_all_departments():
         try:
-            all_depts = Department.query.filter_by(status=1).all()
+            all_depts = Department.query.options(undefer_group("counts")).filter_by(status=1).all()
             all_converted = [dept.to_dict() for dept in all_depts]
 
             
@@ -115,7 +138,7 @@ class Department_Service():
     def get_departments_info():
         try:
             print("getting lite")
-            all_depts = Department.query.filter_by(status=1).all()
+            all_depts = Department.query.options(undefer_group("counts")).filter_by(status=1).all()
             all_converted = [dept.info() for dept in all_depts]
             return jsonify(all_converted), 200
         except OperationalError:
@@ -128,7 +151,7 @@ class Department_Service():
         
     def get_department(id):
         try:
-            all_depts = Department.query.filter_by(id = id).first()
+            all_depts = Department.query.options(undefer_group("counts")).filter_by(id = id).first()
             
             if all_depts:
                 dept = all_depts.to_dict()
@@ -208,8 +231,7 @@ class Department_Service():
             db.session.commit()
 
             # Send notifications (use single quotes in f-strings to avoid syntax issues)
-            Notification_Service.notify_heads(f"{department_name} has been added.")
-            Notification_Service.notify_presidents(f"{department_name} has been added.")
+            Notification_Service.notify_audience(f"{department_name} has been added.", roles=["head", "president"])
             Notification_Service.notify_administrators(f"{department_name} has been added.")
 
             return jsonify(message="Office successfully created."), 200
@@ -246,8 +268,7 @@ class Department_Service():
             found_department.icon = data["icon"]
 
             db.session.commit()
-            Notification_Service.notify_heads(f"{data["department_name"]} has been updated.")
-            Notification_Service.notify_presidents(f"{data["department_name"]} has been updated.")
+            Notification_Service.notify_audience(f"{data["department_name"]} has been updated.", roles=["head", "president"])
             Notification_Service.notify_administrators(f"{data["department_name"]} has been updated.")
 
             return jsonify(message = "Office successfully updated."), 200
@@ -276,15 +297,20 @@ class Department_Service():
         try:
             user = User.query.get(id)
             prev_dept = user.department.name
+            prev_dept_id = user.department_id
 
             user.department_id = None
+
+            from services.PCR.pcr_signatory_service import PCRSignatoryService
+            PCRSignatoryService.refresh_departments(prev_dept_id, None)
             db.session.commit()
             print("UPDSTING")
             socketio.emit("user_modified", "user removed from department")
 
-            Notification_Service.notify_heads(f"{user.first_name + " " + user.last_name} has been removed from {prev_dept}.")
-            Notification_Service.notify_presidents(f"{user.first_name + " " + user.last_name} has been removed from {prev_dept}.")
-            Notification_Service.notify_administrators(f"{user.first_name + " " + user.last_name} has been removed from {prev_dept}.")
+            Notification_Service.notify_audience(
+                f"{user.first_name + " " + user.last_name} has been removed from {prev_dept}.",
+                roles=["head", "president", "administrator"],
+            )
             return jsonify(message="Member successfully removed."), 200
         
         except DataError as e:
@@ -325,6 +351,9 @@ class Department_Service():
                         db.session.delete(sub_task)
                     db.session.delete(output)
 
+            from services.PCR.pcr_signatory_service import PCRSignatoryService
+            PCRSignatoryService.refresh_departments(dept.id, None)
+
             db.session.commit()
             socketio.emit("department", "archived")
             return jsonify(message="Office successfully archived."), 200
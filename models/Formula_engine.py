@@ -1,4 +1,484 @@
-from simpleeval import SimpleEval, NameNotDefined
+import ast
+import bisect
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from simpleeval import SimpleEval, NameNotDefined, DEFAULT_OPERATORS
+
+
+# Upper bound on distinct formulas kept compiled per worker. Formulas come from
+# System_Settings and Assigned_Department rows, so a few hundred is plenty.
+FORMULA_CACHE_SIZE = 256
+
+
+class _Unsupported(Exception):
+    """Raised while compiling a node the closure compiler does not handle."""
+
+
+def _compile_node(node):
+    """
+    Turns a parsed expression node into a closure of (target, actual).
+    Operators are taken from simpleeval's DEFAULT_OPERATORS so results match
+    SimpleEval exactly; anything else raises _Unsupported.
+    """
+    if isinstance(node, ast.Expr):
+        return _compile_node(node.value)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if not isinstance(value, (int, float)):
+            raise _Unsupported(type(value).__name__)
+        return lambda target, actual: value
+
+    if isinstance(node, ast.Name):
+        if node.id == "target":
+            return lambda target, actual: target
+        if node.id == "actual":
+            return lambda target, actual: actual
+        raise _Unsupported(node.id)
+
+    if isinstance(node, ast.BinOp):
+        op = DEFAULT_OPERATORS.get(type(node.op))
+        if op is None:
+            raise _Unsupported(type(node.op).__name__)
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+        return lambda target, actual: op(left(target, actual), right(target, actual))
+
+    if isinstance(node, ast.UnaryOp):
+        op = DEFAULT_OPERATORS.get(type(node.op))
+        if op is None:
+            raise _Unsupported(type(node.op).__name__)
+        operand = _compile_node(node.operand)
+        return lambda target, actual: op(operand(target, actual))
+
+    if isinstance(node, ast.Compare):
+        first = _compile_node(node.left)
+        steps = []
+        for operation, comparator in zip(node.ops, node.comparators):
+            op = DEFAULT_OPERATORS.get(type(operation))
+            if op is None:
+                raise _Unsupported(type(operation).__name__)
+            steps.append((op, _compile_node(comparator)))
+
+        def compare(target, actual):
+            right = first(target, actual)
+            result = True
+            for op, comparator in steps:
+                if not result:
+                    break
+                left = right
+                right = comparator(target, actual)
+                result = op(left, right)
+            return result
+
+        return compare
+
+    if isinstance(node, ast.BoolOp):
+        values = [_compile_node(value) for value in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        def boolop(target, actual):
+            result = False
+            for value in values:
+                result = value(target, actual)
+                if is_and and not result:
+                    break
+                if not is_and and result:
+                    break
+            return result
+
+        return boolop
+
+    if isinstance(node, ast.IfExp):
+        test = _compile_node(node.test)
+        body = _compile_node(node.body)
+        orelse = _compile_node(node.orelse)
+        return lambda target, actual: body(target, actual) if test(target, actual) else orelse(target, actual)
+
+    raise _Unsupported(type(node).__name__)
+
+
+# Operators the array compiler evaluates with NumPy. //, % and ** are left out
+# because their inf/NaN edge cases differ from Python floats; formulas using
+# them are rated row by row.
+_ARRAY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+    ast.Gt: np.greater,
+    ast.Lt: np.less,
+    ast.GtE: np.greater_equal,
+    ast.LtE: np.less_equal,
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+
+
+class _Needs_Scalar(Exception):
+    """Raised when a batch has rows the array path cannot rate exactly (e.g. x / 0)."""
+
+
+def _truthy(value):
+    return np.asarray(value) != 0
+
+
+def _compile_array_node(node):
+    """
+    Array counterpart of _compile_node: returns a function of
+    (target, actual, mask) over float64 arrays. Only rows in mask are live,
+    which is how IfExp/BoolOp/Compare short-circuiting is mirrored.
+    """
+    if isinstance(node, ast.Expr):
+        return _compile_array_node(node.value)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if not isinstance(value, (int, float)):
+            raise _Unsupported(type(value).__name__)
+        return lambda target, actual, mask: value
+
+    if isinstance(node, ast.Name):
+        if node.id == "target":
+            return lambda target, actual, mask: target
+        if node.id == "actual":
+            return lambda target, actual, mask: actual
+        raise _Unsupported(node.id)
+
+    if isinstance(node, ast.BinOp):
+        op = _ARRAY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise _Unsupported(type(node.op).__name__)
+        left = _compile_array_node(node.left)
+        right = _compile_array_node(node.right)
+        is_div = isinstance(node.op, ast.Div)
+
+        def binop(target, actual, mask):
+            lhs = left(target, actual, mask)
+            rhs = right(target, actual, mask)
+            if is_div and np.any(mask & (np.asarray(rhs) == 0)):
+                raise _Needs_Scalar("division by zero")
+            return op(lhs, rhs)
+
+        return binop
+
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.Not):
+            operand = _compile_array_node(node.operand)
+            return lambda target, actual, mask: ~_truthy(operand(target, actual, mask))
+        op = _ARRAY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise _Unsupported(type(node.op).__name__)
+        operand = _compile_array_node(node.operand)
+        return lambda target, actual, mask: op(operand(target, actual, mask))
+
+    if isinstance(node, ast.Compare):
+        first = _compile_array_node(node.left)
+        steps = []
+        for operation, comparator in zip(node.ops, node.comparators):
+            op = _ARRAY_OPERATORS.get(type(operation))
+            if op is None:
+                raise _Unsupported(type(operation).__name__)
+            steps.append((op, _compile_array_node(comparator)))
+
+        def compare(target, actual, mask):
+            right = first(target, actual, mask)
+            result = np.ones(mask.shape, dtype=bool)
+            for op, comparator in steps:
+                left = right
+                right = comparator(target, actual, mask & result)
+                result = result & op(left, right)
+            return result
+
+        return compare
+
+    if isinstance(node, ast.BoolOp):
+        values = [_compile_array_node(value) for value in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        def boolop(target, actual, mask):
+            live = mask
+            result = None
+            for value in values:
+                current = value(target, actual, live)
+                result = current if result is None else np.where(live, current, result)
+                live = live & (_truthy(current) if is_and else ~_truthy(current))
+            return result
+
+        return boolop
+
+    if isinstance(node, ast.IfExp):
+        test = _compile_array_node(node.test)
+        body = _compile_array_node(node.body)
+        orelse = _compile_array_node(node.orelse)
+
+        def ifexp(target, actual, mask):
+            chosen = _truthy(test(target, actual, mask))
+            return np.where(
+                chosen,
+                body(target, actual, mask & chosen),
+                orelse(target, actual, mask & ~chosen),
+            )
+
+        return ifexp
+
+    raise _Unsupported(type(node).__name__)
+
+
+def _rule_interval(rules):
+    """
+    Returns (low, low_inclusive, high, high_inclusive) for one rating's rules,
+    intersecting every lt/lte/gt/gte/eq condition. Returns None when the rules
+    are not plain numeric bounds.
+    """
+    if not isinstance(rules, dict):
+        return None
+
+    low, low_inclusive = float("-inf"), True
+    high, high_inclusive = float("inf"), True
+
+    for op, value in rules.items():
+        if op not in ("lt", "lte", "gt", "gte", "eq"):
+            continue  # _match_rules ignores unknown keys as well
+        if not isinstance(value, (int, float)) or value != value:
+            return None
+
+        if op in ("gt", "gte", "eq"):
+            inclusive = op != "gt"
+            if value > low or (value == low and low_inclusive and not inclusive):
+                low, low_inclusive = value, inclusive
+        if op in ("lt", "lte", "eq"):
+            inclusive = op != "lt"
+            if value < high or (value == high and high_inclusive and not inclusive):
+                high, high_inclusive = value, inclusive
+
+    return low, low_inclusive, high, high_inclusive
+
+
+def _is_empty(low, low_inclusive, high, high_inclusive):
+    return low > high or (low == high and not (low_inclusive and high_inclusive))
+
+
+def _find_overlap(intervals, shared_bounds=False):
+    """
+    Sorts (low, low_inclusive, high, high_inclusive, rating) tuples by their
+    lower bound and returns the first pair of ratings that overlap, or None.
+    With shared_bounds, neighbours that both include the same bound (lte 3
+    and gte 3) are not an overlap; the first matching rule rates that value.
+    """
+    intervals.sort(key=lambda i: (i[0], not i[1]))
+
+    for curr, nxt in zip(intervals, intervals[1:]):
+        curr_high, curr_inclusive = curr[2], curr[3]
+        next_low, next_inclusive = nxt[0], nxt[1]
+        touching = curr_high == next_low and curr_inclusive and next_inclusive
+        if curr_high > next_low or (touching and not shared_bounds):
+            return curr[4], nxt[4]
+
+    return None
+
+
+class Rating_Intervals:
+    """
+    A rating_scale compiled into sorted, non-overlapping intervals so a value
+    is rated with one bisect instead of testing every rule.
+    """
+
+    def __init__(self, intervals):
+        self._keys = [(i[0], 0 if i[1] else 1) for i in intervals]
+        self._intervals = intervals
+
+        self._lows = np.array([i[0] for i in intervals], dtype=float)
+        self._low_inclusive = np.array([i[1] for i in intervals], dtype=bool)
+        self._highs = np.array([i[2] for i in intervals], dtype=float)
+        self._high_inclusive = np.array([i[3] for i in intervals], dtype=bool)
+        self._ratings = np.array([i[4] for i in intervals], dtype=np.int64)
+
+    @classmethod
+    def build(cls, rating_scale):
+        """Returns a Rating_Intervals, or None if the scale cannot be expressed as one."""
+        intervals = []
+        for rating, rules in rating_scale:
+            bounds = _rule_interval(rules)
+            if bounds is None:
+                return None
+            if _is_empty(*bounds):
+                continue
+            try:
+                intervals.append((*bounds, int(rating)))
+            except (TypeError, ValueError):
+                return None
+
+        if _find_overlap(intervals):
+            return None
+
+        return cls(intervals)
+
+    def lookup(self, calc):
+        index = bisect.bisect_right(self._keys, (calc, 0)) - 1
+        if index < 0:
+            return None
+
+        _, _, high, high_inclusive, rating = self._intervals[index]
+        if calc < high or (calc == high and high_inclusive):
+            return rating
+        return None
+
+    def lookup_array(self, calc):
+        """
+        Vectorised lookup for non-NaN values. Returns (ratings, matched) where
+        ratings is only meaningful where matched is True.
+        """
+        if not len(self._intervals):
+            return np.zeros(calc.shape, dtype=np.int64), np.zeros(calc.shape, dtype=bool)
+
+        index = np.searchsorted(self._lows, calc, side="right") - 1
+        # an exclusive lower bound equal to the value belongs to the interval before it
+        safe = np.clip(index, 0, None)
+        on_open_low = (index >= 0) & (calc == self._lows[safe]) & ~self._low_inclusive[safe]
+        index = np.where(on_open_low, index - 1, index)
+
+        safe = np.clip(index, 0, None)
+        highs = self._highs[safe]
+        matched = (index >= 0) & ((calc < highs) | ((calc == highs) & self._high_inclusive[safe]))
+        return self._ratings[safe], matched
+
+
+class Compiled_Formula:
+    """
+    A formula JSON parsed once: the expression as a closure plus a private
+    copy of its rating scale.
+    """
+
+    def __init__(self, formula, tree):
+        self.source = copy.deepcopy(formula)
+        self.expression = self.source["expression"]
+        self.rating_scale = tuple(self.source["rating_scale"].items())
+        self.intervals = Rating_Intervals.build(self.rating_scale)
+        expression = self.expression
+
+        try:
+            self._evaluate_array = _compile_array_node(tree)
+        except _Unsupported:
+            self._evaluate_array = None
+
+        try:
+            self._evaluate = _compile_node(tree)
+        except _Unsupported:
+            # Names, calls etc. outside the fast subset still go through
+            # SimpleEval, but with the parse step already done.
+            def _evaluate(target, actual):
+                s = SimpleEval(names={"target": target, "actual": actual}, functions={})
+                return s.eval(expression, previously_parsed=tree)
+
+            self._evaluate = _evaluate
+
+    def evaluate(self, target, actual):
+        return float(self._evaluate(target, actual))
+
+    def evaluate_array(self, targets, actuals):
+        """
+        Evaluates the expression over float64 arrays. Raises _Unsupported or
+        _Needs_Scalar when the batch has to be rated row by row instead.
+        """
+        if self._evaluate_array is None:
+            raise _Unsupported(self.expression)
+
+        mask = np.ones(targets.shape, dtype=bool)
+        with np.errstate(all="ignore"):
+            calc = self._evaluate_array(targets, actuals, mask)
+        return np.broadcast_to(np.asarray(calc, dtype=float), targets.shape)
+
+
+class Formula_Cache:
+    """
+    Bounded LRU of Compiled_Formula keyed by a stable hash of the formula JSON.
+    The same dict object is usually rated many times in a row (one settings row,
+    many sub-tasks), so the last key seen for each object id is remembered and
+    confirmed with an equality check instead of re-hashing.
+    """
+
+    def __init__(self, maxsize=FORMULA_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_id = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(formula):
+        payload = json.dumps(formula, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, formula):
+        with self._lock:
+            key = self._keys_by_id.get(id(formula))
+            compiled = self._entries.get(key) if key else None
+            if compiled is not None and compiled.source == formula:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+
+        key = self.key_for(formula)
+
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self._remember(formula, key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        try:
+            tree = SimpleEval.parse(formula["expression"])
+        except Exception as e:
+            raise ValueError(f"Invalid Expression: {str(e)}")
+
+        compiled = Compiled_Formula(formula, tree)
+
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            self._remember(formula, key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return compiled
+
+    def _remember(self, formula, key):
+        if len(self._keys_by_id) >= self.maxsize * 4:
+            self._keys_by_id.clear()
+        self._keys_by_id[id(formula)] = key
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+formula_cache = Formula_Cache()
 
 
 class Formula_Engine:
@@ -93,45 +573,116 @@ class Formula_Engine:
         ranges = []
 
         for rating, rules in rating_scale.items():
-            low = float("-inf")
-            high = float("inf")
-
-            if "gt" in rules:
-                low = rules["gt"]
-            if "gte" in rules:
-                low = rules["gte"]
-            if "lt" in rules:
-                high = rules["lt"]
-            if "lte" in rules:
-                high = rules["lte"]
+            bounds = _rule_interval(rules)
+            if bounds is None:
+                raise ValueError(f"Invalid rules for rating {rating}")
+            ranges.append((*bounds, rating))
 
-            ranges.append((low, high, rating))
+        # saved scales may share a bound between neighbours, as they always could
+        overlap = _find_overlap(ranges, shared_bounds=True)
+        if overlap:
+            raise ValueError(f"Rating ranges overlap between {overlap[0]} and {overlap[1]}")
 
-        ranges.sort()
+    def compile(self, formula):
+        """Returns the cached Compiled_Formula for a formula JSON, compiling it on first use."""
+        return formula_cache.get(formula)
 
-        for i in range(len(ranges) - 1):
-            curr_high = ranges[i][1]
-            next_low = ranges[i + 1][0]
-
-            if curr_high > next_low:
-                raise ValueError(
-                    f"Rating ranges overlap between {ranges[i][2]} and {ranges[i + 1][2]}"
-                )
+    @staticmethod
+    def cache_stats():
+        return formula_cache.stats()
 
     def compute_rating(self, formula, target, actual):
-        s = SimpleEval()
-        s.names = {"target": target, "actual": actual}
-        s.functions = {}
+        compiled = self.compile(formula)
 
         try:
-            calc = float(s.eval(formula["expression"]))
+            calc = compiled.evaluate(target, actual)
         except Exception as e:
             raise ValueError(f"Invalid Expression: {str(e)}")
 
-        for rating, rules in formula["rating_scale"].items():
+        return self._rate(compiled, calc)
+
+    def compute_ratings_batch(self, formula, targets, actuals):
+        """
+        Rates many (target, actual) pairs with one formula. Returns a list of
+        ratings identical to calling compute_rating for each pair, including
+        raising the same ValueError for the first row that divides by zero.
+        """
+        compiled = self.compile(formula)
+
+        targets_arr = np.asarray(targets)
+        actuals_arr = np.asarray(actuals)
+        targets_arr, actuals_arr = np.broadcast_arrays(targets_arr, actuals_arr)
+
+        numeric = targets_arr.dtype.kind in "biuf" and actuals_arr.dtype.kind in "biuf"
+        try:
+            if not numeric:
+                raise _Unsupported("non-numeric input")
+            calc = compiled.evaluate_array(
+                targets_arr.astype(float).ravel(), actuals_arr.astype(float).ravel()
+            )
+        except (_Unsupported, _Needs_Scalar):
+            # object arrays keep the caller's ints as ints, so errors read the same
+            targets_obj, actuals_obj = np.broadcast_arrays(
+                np.asarray(targets, dtype=object), np.asarray(actuals, dtype=object)
+            )
+            return [
+                self.compute_rating(formula, target, actual)
+                for target, actual in zip(targets_obj.ravel().tolist(), actuals_obj.ravel().tolist())
+            ]
+
+        return self._rate_array(compiled, calc)
+
+    def compute_ratings_many(self, formulas, targets, actuals):
+        """
+        compute_ratings_batch for rows that don't all share one formula (e.g.
+        department overrides): rows are grouped by compiled formula and each
+        group is rated in one batch. Returns the ratings in row order.
+        """
+        groups = {}
+        for i, formula in enumerate(formulas):
+            groups.setdefault(self.compile(formula), []).append(i)
+
+        ratings = [None] * len(formulas)
+        for compiled, rows in groups.items():
+            rated = self.compute_ratings_batch(
+                compiled.source, [targets[i] for i in rows], [actuals[i] for i in rows]
+            )
+            for i, rating in zip(rows, rated):
+                ratings[i] = rating
+        return ratings
+
+    def _rate(self, compiled, calc):
+        # NaN compares false against every bound, so it keeps the rule-by-rule path
+        if compiled.intervals is not None and calc == calc:
+            return compiled.intervals.lookup(calc)
+
+        for rating, rules in compiled.rating_scale:
             if self._match_rules(calc, rules):
                 return int(rating)
 
+    def _rate_array(self, compiled, calc):
+        is_nan = np.isnan(calc)
+
+        if compiled.intervals is not None:
+            ratings, matched = compiled.intervals.lookup_array(np.where(is_nan, 0.0, calc))
+            matched &= ~is_nan
+            result = ratings.tolist()
+            for i in np.flatnonzero(~matched & ~is_nan).tolist():
+                result[i] = None
+        else:
+            values, inverse = np.unique(calc[~is_nan], return_inverse=True)
+            rated = [self._rate(compiled, value) for value in values.tolist()]
+            result = [None] * len(calc)
+            for i, j in zip(np.flatnonzero(~is_nan).tolist(), inverse.ravel().tolist()):
+                result[i] = rated[j]
+
+        if is_nan.any():
+            nan_rating = self._rate(compiled, float("nan"))
+            for i in np.flatnonzero(is_nan).tolist():
+                result[i] = nan_rating
+
+        return result
+
     def _match_rules(self, calc, rules):
         if "eq" in rules and calc != rules["eq"]:
             return False
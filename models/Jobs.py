@@ -0,0 +1,272 @@
+from app import db, socketio
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import update
+from flask import current_app, g, jsonify, request, send_file
+import hashlib
+import io
+import json
+import uuid
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class Report_Job(db.Model):
+    """
+    One report generation request. While a job is queued or running its
+    active_key holds the dedup key, so the unique index lets only one
+    identical job be in flight; it is cleared when the job finishes.
+    """
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        db.Index("ix_report_jobs_status_created", "status", "created_at"),
+        db.Index("ix_report_jobs_finished_notified", "finished_at", "notified_at"),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, default=dict)
+    dedup_key = db.Column(db.String(64), nullable=False)
+    active_key = db.Column(db.String(64), unique=True, nullable=True)
+    requested_by = db.Column(db.JSON, default=list)
+
+    status = db.Column(db.String(20), default=JOB_QUEUED, nullable=False)
+    progress = db.Column(db.Integer, default=0)
+    message = db.Column(db.String(255), default="")
+    attempts = db.Column(db.Integer, default=0)
+    worker = db.Column(db.String(100), nullable=True)
+
+    result_url = db.Column(db.Text, nullable=True)
+    result_path = db.Column(db.Text, nullable=True)
+    result_name = db.Column(db.String(255), nullable=True)
+    mimetype = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    notified_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "link": self.result_url,
+            "download_url": f"/api/v1/jobs/{self.id}/download" if self.status == JOB_DONE else None,
+            "created_at": str(self.created_at),
+            "started_at": str(self.started_at) if self.started_at else None,
+            "finished_at": str(self.finished_at) if self.finished_at else None,
+        }
+
+
+class Report_Artifact(db.Model):
+    """
+    A generated report kept by utils.ReportCache under the sha256 of its
+    inputs. storage_key is the S3 object name, or the file path for the
+    local backend.
+    """
+    __tablename__ = "report_artifacts"
+
+    key = db.Column(db.String(64), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    backend = db.Column(db.String(20), nullable=False)
+    storage_key = db.Column(db.Text, nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.Integer, default=0)
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.now, index=True)
+    last_used_at = db.Column(db.DateTime, default=datetime.now, index=True)
+
+
+class Report_Job_Error(Exception):
+    """Raised by report handlers for expected failures (e.g. nothing to compile); the message is shown to the user."""
+
+
+class Report_Job_Service:
+
+    def dedup_key(kind, params):
+        canonical = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _requester_id():
+        payload = g.get("token_payload") or {}
+        return payload.get("id")
+
+    def enqueue(kind, params, user_id=None):
+        """
+        Returns (job, created). An identical queued or running job is reused
+        and the requester is added to the users notified when it finishes;
+        if it finished successfully in the meantime, it is returned done and
+        the requester may download its result.
+        """
+        key = Report_Job_Service.dedup_key(kind, params)
+
+        existing = Report_Job.query.filter_by(active_key=key).first()
+        if existing is None:
+            job = Report_Job(kind=kind, params=params, dedup_key=key, active_key=key,
+                             requested_by=[user_id] if user_id else [])
+            db.session.add(job)
+            try:
+                db.session.commit()
+                return job, True
+            except IntegrityError:
+                # another request enqueued the same job in between
+                db.session.rollback()
+                existing = Report_Job.query.filter_by(active_key=key).first()
+                if existing is None:
+                    raise
+
+        # requested_by is rewritten whole, so concurrent joins must take turns;
+        # the lock also orders the join against the worker finishing the job
+        existing = (
+            Report_Job.query
+            .filter_by(id=existing.id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+        if existing.status == JOB_FAILED:
+            # it failed after the lookup; start a fresh job as a later request would
+            db.session.rollback()
+            return Report_Job_Service.enqueue(kind, params, user_id)
+
+        if user_id and user_id not in (existing.requested_by or []):
+            existing.requested_by = [*(existing.requested_by or []), user_id]
+        db.session.commit()
+        return existing, False
+
+    def submit(kind, params):
+        """
+        Entry point for report routes. In "queue" mode (REPORT_JOBS_MODE) the
+        job is enqueued for the report-worker and 202 is returned with its id;
+        in "inline" mode it runs inside the request and the response is the
+        one the route always returned. ?stream=1 asks for the file itself as
+        the response body (see stream()).
+        """
+        from services.report_jobs import run_report
+
+        if Report_Job_Service._stream_requested():
+            return Report_Job_Service.stream(kind, params)
+
+        if current_app.config.get("REPORT_JOBS_MODE", "queue") == "inline":
+            try:
+                artifact = run_report(kind, params)
+            except Report_Job_Error as e:
+                return jsonify(error=str(e)), 400
+            except Exception as e:
+                return jsonify(error=str(e)), 500
+
+            if artifact.get("url") is not None:
+                return jsonify(link=artifact["url"]), 200
+            return send_file(io.BytesIO(artifact["content"]), as_attachment=True,
+                             download_name=artifact["filename"], mimetype=artifact["mimetype"])
+
+        try:
+            job, created = Report_Job_Service.enqueue(kind, params, Report_Job_Service._requester_id())
+            from utils.ReportWorker import job_notifier
+            job_notifier.ensure_started(current_app._get_current_object())
+            code = 200 if job.status == JOB_DONE else 202
+            return jsonify(job_id=job.id, deduplicated=not created, job=job.to_dict()), code
+        except Exception as e:
+            db.session.rollback()
+            return jsonify(error=str(e)), 500
+
+    def _stream_requested():
+        return (
+            current_app.config.get("REPORT_STREAM_RESPONSES", True)
+            and request.args.get("stream", "").lower() in ("1", "true", "yes")
+        )
+
+    def stream(kind, params):
+        """
+        Runs the report inside the request and sends the workbook straight
+        back: it is neither uploaded nor cached, and no job is recorded.
+        """
+        from services.report_jobs import run_report
+        from utils.FileStorage import XLSX_MIMETYPE
+        from utils.ReportCache import report_cache
+
+        try:
+            with report_cache.direct() as workbook:
+                artifact = run_report(kind, params)
+        except Report_Job_Error as e:
+            return jsonify(error=str(e)), 400
+        except Exception as e:
+            return jsonify(error=str(e)), 500
+
+        if workbook:
+            return send_file(io.BytesIO(workbook["content"]), as_attachment=True,
+                             download_name=workbook["filename"], mimetype=XLSX_MIMETYPE)
+        if artifact.get("content") is not None:
+            return send_file(io.BytesIO(artifact["content"]), as_attachment=True,
+                             download_name=artifact["filename"], mimetype=artifact["mimetype"])
+        return jsonify(link=artifact["url"]), 200
+
+    def _visible(job):
+        payload = g.get("token_payload") or {}
+        return payload.get("role") == "administrator" or payload.get("id") in (job.requested_by or [])
+
+    def get_job(job_id):
+        job = db.session.get(Report_Job, job_id)
+        if job is None or not Report_Job_Service._visible(job):
+            return jsonify(error="There is no job with that id"), 404
+        return jsonify(job.to_dict()), 200
+
+    def download(job_id):
+        job = db.session.get(Report_Job, job_id)
+        if job is None or not Report_Job_Service._visible(job):
+            return jsonify(error="There is no job with that id"), 404
+        if job.status != JOB_DONE:
+            return jsonify(error="The report is not ready yet", job=job.to_dict()), 409
+
+        if job.result_url:
+            return jsonify(link=job.result_url), 200
+        try:
+            return send_file(job.result_path, as_attachment=True, download_name=job.result_name, mimetype=job.mimetype)
+        except FileNotFoundError:
+            return jsonify(error="The report file is no longer available"), 410
+
+    def download_artifact(key):
+        """Serves a report cached by the local REPORT_CACHE_BACKEND; the key acts like a presigned URL."""
+        from utils.FileStorage import XLSX_MIMETYPE
+        from utils.ReportCache import Local_Artifact_Store, report_cache
+
+        store = report_cache.backend()
+        artifact = db.session.get(Report_Artifact, key)
+        if not isinstance(store, Local_Artifact_Store) or artifact is None or artifact.backend != store.name:
+            return jsonify(error="There is no report with that key"), 404
+        try:
+            return send_file(store.path(key), as_attachment=True, download_name=artifact.filename,
+                             mimetype=XLSX_MIMETYPE)
+        except FileNotFoundError:
+            return jsonify(error="The report file is no longer available"), 410
+
+    def notify(job):
+        """
+        Emits report_ready (or report_failed) with the job to every requester's
+        user_{id} room; returns False if another process already did.
+        """
+        claimed = db.session.execute(
+            update(Report_Job)
+            .where(Report_Job.id == job.id, Report_Job.notified_at.is_(None))
+            .values(notified_at=datetime.now())
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return False
+
+        event = "report_ready" if job.status == JOB_DONE else "report_failed"
+        payload = job.to_dict()
+        for user_id in job.requested_by or []:
+            socketio.emit(event, payload, to=f"user_{user_id}")
+        return True
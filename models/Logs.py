@@ -3,10 +3,17 @@ from datetime import datetime
 from sqlalchemy.exc import IntegrityError, OperationalError, DataError, ProgrammingError
 from flask import jsonify
 
-from sqlalchemy import func
+from sqlalchemy import func, insert, update
+from collections import Counter
+
+from utils.Pagination import InvalidCursor, keyset_page, wants_page
 
 class Log(db.Model):
     __tablename__ = "logs"
+    __table_args__ = (
+        db.Index("ix_logs_created_at", "created_at"),
+        db.Index("ix_logs_user_created", "user_id", "created_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer)
     full_name = db.Column(db.String(50), nullable=False)
@@ -34,8 +41,184 @@ class Log(db.Model):
             "timestamp": str(self.created_at),       
         }
     
+class Log_Activity_Hourly(db.Model):
+    """Log counts per hour; weekday/hour are stored so charts need no date functions."""
+    __tablename__ = "log_activity_hourly"
+    __table_args__ = (
+        db.UniqueConstraint("bucket", "action", "target", "department", "role", name="uq_log_activity_hourly_key"),
+        db.Index("ix_log_activity_hourly_weekday_hour", "weekday", "hour"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.DateTime, nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # Sunday = 1 ... Saturday = 7, like MySQL DAYOFWEEK
+    hour = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(50), nullable=False, default="")
+    target = db.Column(db.String(50), nullable=False, default="")
+    department = db.Column(db.String(50), nullable=False, default="")
+    role = db.Column(db.String(20), nullable=False, default="")
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Log_Activity_Daily(db.Model):
+    __tablename__ = "log_activity_daily"
+    __table_args__ = (
+        db.UniqueConstraint("bucket", "action", "target", "department", "role", name="uq_log_activity_daily_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.Date, nullable=False)
+    action = db.Column(db.String(50), nullable=False, default="")
+    target = db.Column(db.String(50), nullable=False, default="")
+    department = db.Column(db.String(50), nullable=False, default="")
+    role = db.Column(db.String(20), nullable=False, default="")
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Log_Rollup:
+    """
+    Keeps log_activity_hourly/daily in step with the logs table. apply() is
+    called in the same transaction as every logs insert; rebuild() and
+    check() back the rollup-logs / check-log-rollups CLI commands.
+    """
+
+    KEY = ("action", "target", "department", "role")
+
+    def _roles(conn, user_ids):
+        from models.User import User
+
+        ids = {int(u) for u in user_ids if str(u or "").isdigit() and int(u)}
+        if not ids:
+            return {}
+        rows = conn.execute(db.select(User.id, User.role).where(User.id.in_(ids))).all()
+        return {row.id: row.role or "" for row in rows}
+
+    def _count(rows, roles):
+        hourly, daily = Counter(), Counter()
+        for row in rows:
+            created_at = row["created_at"]
+            user_id = row.get("user_id")
+            key = (
+                row.get("action") or "",
+                row.get("target") or "",
+                row.get("department") or "",
+                roles.get(int(user_id), "") if str(user_id or "").isdigit() else "",
+            )
+            hourly[(created_at.replace(minute=0, second=0, microsecond=0),) + key] += 1
+            daily[(created_at.date(),) + key] += 1
+        return hourly, daily
+
+    def _rows(counts, extra):
+        return [
+            {"bucket": bucket, "count": count, **dict(zip(Log_Rollup.KEY, key)), **extra(bucket)}
+            for (bucket, *key), count in counts.items()
+        ]
+
+    def _add(conn, model, counts, extra=lambda bucket: {}):
+        """Adds counts to existing buckets and inserts the missing ones, as one upsert where the dialect has it."""
+        table = model.__table__
+        rows = Log_Rollup._rows(counts, extra)
+        if not rows:
+            return
+
+        if conn.dialect.name == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            statement = mysql_insert(table)
+            conn.execute(statement.on_duplicate_key_update(count=table.c.count + statement.inserted["count"]), rows)
+        elif conn.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            statement = sqlite_insert(table)
+            conn.execute(statement.on_conflict_do_update(
+                index_elements=["bucket", *Log_Rollup.KEY],
+                set_={"count": table.c.count + statement.excluded["count"]},
+            ), rows)
+        else:
+            for row in rows:
+                match = [table.c.bucket == row["bucket"]] + [table.c[name] == row[name] for name in Log_Rollup.KEY]
+                if conn.execute(update(table).where(*match).values(count=table.c.count + row["count"])).rowcount == 0:
+                    conn.execute(insert(table).values(**row))
+
+    def _hour_fields(bucket):
+        return {"weekday": bucket.isoweekday() % 7 + 1, "hour": bucket.hour}
+
+    def apply(conn, rows):
+        """rows: dicts with the Log columns (created_at required) that were just inserted on conn."""
+        hourly, daily = Log_Rollup._count(rows, Log_Rollup._roles(conn, [r.get("user_id") for r in rows]))
+        Log_Rollup._add(conn, Log_Activity_Hourly, hourly, Log_Rollup._hour_fields)
+        Log_Rollup._add(conn, Log_Activity_Daily, daily)
+
+    def rebuild(conn, batch_size=10000):
+        """Recomputes both rollups from the raw logs; returns the number of logs read."""
+        from models.User import User
+
+        conn.execute(Log_Activity_Hourly.__table__.delete())
+        conn.execute(Log_Activity_Daily.__table__.delete())
+
+        hourly, daily = Counter(), Counter()
+        roles = {row.id: row.role or "" for row in conn.execute(db.select(User.id, User.role))}
+        result = conn.execution_options(yield_per=batch_size).execute(
+            db.select(Log.user_id, Log.action, Log.target, Log.department, Log.created_at)
+        )
+        total = 0
+        for partition in result.partitions():
+            h, d = Log_Rollup._count([row._asdict() for row in partition if row.created_at], roles)
+            hourly.update(h)
+            daily.update(d)
+            total += len(partition)
+
+        for model, counts, extra in (
+            (Log_Activity_Hourly, hourly, Log_Rollup._hour_fields),
+            (Log_Activity_Daily, daily, lambda bucket: {}),
+        ):
+            rows = Log_Rollup._rows(counts, extra)
+            for start in range(0, len(rows), batch_size):
+                conn.execute(insert(model.__table__), rows[start:start + batch_size])
+        return total
+
+    def check(conn):
+        """Compares per-day raw counts with both rollups; returns a list of mismatch descriptions."""
+        raw = {
+            str(day): count for day, count in conn.execute(
+                db.select(func.date(Log.created_at), func.count(Log.id)).group_by(func.date(Log.created_at))
+            )
+        }
+        daily = {
+            str(day): int(count) for day, count in conn.execute(
+                db.select(Log_Activity_Daily.bucket, func.sum(Log_Activity_Daily.count)).group_by(Log_Activity_Daily.bucket)
+            )
+        }
+        hourly = Counter()
+        for bucket, count in conn.execute(
+            db.select(Log_Activity_Hourly.bucket, func.sum(Log_Activity_Hourly.count)).group_by(Log_Activity_Hourly.bucket)
+        ):
+            hourly[str(bucket)[:10]] += int(count)
+
+        mismatches = []
+        for day in sorted(set(raw) | set(daily) | set(hourly)):
+            if not raw.get(day, 0) == daily.get(day, 0) == hourly.get(day, 0):
+                mismatches.append(
+                    f"{day}: logs={raw.get(day, 0)} daily={daily.get(day, 0)} hourly={hourly.get(day, 0)}"
+                )
+        return mismatches
+
+
 class Log_Service:
 
+    def queue_log(userid, f_name, dept, action, target, description = None, ip = None, agent = None):
+        """Like add_logs, but hands the row to the log buffer instead of committing on the request path."""
+        from utils.LogBuffer import log_buffer
+
+        return log_buffer.add({
+            "user_id": userid,
+            "full_name": f_name,
+            "department": dept,
+            "action": action,
+            "target": target,
+            "description": description,
+            "ip_address": ip,
+            "user_agent": agent,
+        })
+
     def add_logs(userid, f_name, dept, action, target, description = None, ip = None, agent = None):
         try: 
             new_log = Log(full_name = f_name,
@@ -49,6 +232,11 @@ class Log_Service:
                           )
             
             db.session.add(new_log)
+            db.session.flush()
+            Log_Rollup.apply(db.session.connection(), [{
+                "user_id": userid, "action": action, "target": target,
+                "department": dept, "created_at": new_log.created_at,
+            }])
             db.session.commit()
             return "Logs recorded"
         except DataError as e:
@@ -66,12 +254,18 @@ class Log_Service:
             print(str(e))
             return str(e)
         
-    def get_all_logs():
+    def get_all_logs(cursor=None, limit=None):
         try:
+            if wants_page(cursor, limit):
+                return jsonify(keyset_page(Log.query, Log, "logs", cursor, limit)), 200
+
             all_logs = Log.query.all()
             converted = [log.to_dict() for log in all_logs]
 
             return jsonify(converted), 200
+        except InvalidCursor as e:
+            return jsonify(error=str(e)), 400
+
         except OperationalError:
             #db.session.rollback()
             return jsonify(error="Database connection error"), 500
@@ -81,41 +275,50 @@ class Log_Service:
             return jsonify(error=str(e)), 500
         
     def get_log_activity_trend(interval):
-        query = db.session.query(func.count(Log.id).label("value"))
+        daily = (
+            db.session.query(Log_Activity_Daily.bucket, func.sum(Log_Activity_Daily.count))
+            .group_by(Log_Activity_Daily.bucket)
+            .all()
+        )
 
         if interval == 'yearly':
-            date_label = func.date_format(Log.created_at, '%Y')
+            label = lambda day: day.strftime('%Y')
         elif interval == 'monthly':
-            date_label = func.date_format(Log.created_at, '%Y-%m')
+            label = lambda day: day.strftime('%Y-%m')
         elif interval == 'weekly':
-            # %v is the ISO week number, %x is the year for the week
-            date_label = func.date_format(Log.created_at, 'Week %v, %x')
+            # ISO week and its year, like MySQL's 'Week %v, %x'
+            label = lambda day: "Week {1:02d}, {0}".format(*day.isocalendar())
         else:  # daily
-            date_label = func.date(Log.created_at)
+            label = lambda day: str(day)
+
+        totals = Counter()
+        for day, value in daily:
+            totals[label(day)] += int(value)
 
-        results = query.add_columns(date_label.label("name")) \
-                    .group_by(date_label) \
-                    .order_by(date_label) \
-                    .all()
-        
         # Standardize output for the frontend
-        data = [{"name": str(r.name), "value": r.value} for r in results]
+        data = [{"name": name, "value": totals[name]} for name in sorted(totals)]
         return jsonify(data), 200
         
 
     def get_logs_activity():
+        """One row per (date, type, target, department) with its log count."""
         results = (
             db.session.query(
-                Log.action.label("type"),
-                Log.target.label("target"),
-                Log.department.label("department"),
-                func.date(Log.created_at).label("date"),                
+                Log_Activity_Daily.bucket.label("date"),
+                Log_Activity_Daily.action.label("type"),
+                Log_Activity_Daily.target.label("target"),
+                Log_Activity_Daily.department.label("department"),
+                func.sum(Log_Activity_Daily.count).label("count"),
+            )
+            .group_by(
+                Log_Activity_Daily.bucket, Log_Activity_Daily.action,
+                Log_Activity_Daily.target, Log_Activity_Daily.department,
             )
             .all()
         )
 
         data = [
-            {"date": r.date.strftime("%Y-%m-%d"), "type": r.type, "target": r.target, "department": r.department}
+            {"date": r.date.strftime("%Y-%m-%d"), "type": r.type, "target": r.target, "department": r.department, "count": int(r.count)}
             for r in results
         ]
 
@@ -130,22 +333,14 @@ class Log_Service:
             ...
         ]
         """
-        results = (
-            db.session.query(
-                func.extract("hour", Log.created_at).label("hour"),
-                func.count(Log.id).label("value")
-            )
-            .group_by(func.extract("hour", Log.created_at))
-            .order_by(func.extract("hour", Log.created_at))
+        results = dict(
+            db.session.query(Log_Activity_Hourly.hour, func.sum(Log_Activity_Hourly.count))
+            .group_by(Log_Activity_Hourly.hour)
             .all()
         )
 
         # Initialize 24-hour bins to ensure all hours are present
-        data = []
-        for h in range(24):
-            count = next((r.value for r in results if int(r.hour) == h), 0)
-            label = f"{h:02d}:00"
-            data.append({"name": label, "value": int(count)})
+        data = [{"name": f"{h:02d}:00", "value": int(results.get(h, 0))} for h in range(24)]
 
         return jsonify(data), 200
     
@@ -158,16 +353,16 @@ class Log_Service:
         """
         results = (
             db.session.query(
-                func.dayofweek(Log.created_at).label("day"),  # Sunday = 1, Saturday = 7
-                func.hour(Log.created_at).label("hour"),
-                func.count(Log.id).label("count")
+                Log_Activity_Hourly.weekday.label("day"),  # Sunday = 1, Saturday = 7
+                Log_Activity_Hourly.hour.label("hour"),
+                func.sum(Log_Activity_Hourly.count).label("count")
             )
-            .group_by("day", "hour")
+            .group_by(Log_Activity_Hourly.weekday, Log_Activity_Hourly.hour)
             .all()
         )
 
         data = [
-            {"day": r.day, "hour": r.hour, "count": r.count}
+            {"day": r.day, "hour": r.hour, "count": int(r.count)}
             for r in results
         ]
         return jsonify(data), 200
@@ -2,10 +2,20 @@ from app import db, socketio
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError, OperationalError, DataError
 from flask import jsonify
+from sqlalchemy import insert, or_, and_
+
+from utils.Pagination import InvalidCursor, keyset_page, wants_page
+
+
+# rows per executemany; PyMySQL rewrites each into multi-row INSERT ... VALUES
+NOTIFICATION_INSERT_CHUNK = 5000
 
 
 class Notification(db.Model):
     __tablename__ = "notifications"
+    __table_args__ = (
+        db.Index("ix_notifications_user_created", "user_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.Text, nullable=False)
@@ -27,11 +37,44 @@ class Notification(db.Model):
 class Notification_Service:
 
     def _notify_users(users, msg):
-        """Shared helper: create notifications for a list of users and emit."""
-        for user in users:
-            db.session.add(Notification(user_id=user.id, name=msg))
+        """
+        Shared helper: create notifications for a list of users (or user ids)
+        with one bulk insert in one transaction, then push each new row to
+        its owner's user_{id} room.
+        """
+        user_ids = list(dict.fromkeys(u if isinstance(u, int) else u.id for u in users))
+        if not user_ids:
+            return []
+
+        # whole seconds, like the DATETIME column on MySQL, so the read-back below matches
+        created_at = datetime.now().replace(microsecond=0)
+        rows = [{"user_id": user_id, "name": msg, "created_at": created_at, "read": False} for user_id in user_ids]
+        for start in range(0, len(rows), NOTIFICATION_INSERT_CHUNK):
+            db.session.execute(insert(Notification.__table__), rows[start:start + NOTIFICATION_INSERT_CHUNK])
         db.session.commit()
-        socketio.emit("notification")
+
+        # multi-row INSERT doesn't return ids on MySQL; read them back through (user_id, created_at)
+        ids = dict(
+            db.session.query(Notification.user_id, Notification.id)
+            .filter(Notification.created_at == created_at, Notification.name == msg)
+            .filter(Notification.user_id.in_(user_ids))
+            .order_by(Notification.id)
+            .all()
+        )
+
+        for user_id in user_ids:
+            socketio.emit("notification", {
+                "id": ids.get(user_id),
+                "name": msg,
+                "created_at": str(created_at),
+                "read": False,
+            }, to=f"user_{user_id}")
+
+        return user_ids
+
+    def _recipient_ids(*conditions):
+        from models.User import User
+        return [row.id for row in db.session.query(User.id).filter(or_(*conditions)).all()]
 
     def _handle_exc(e):
         db.session.rollback()
@@ -48,11 +91,18 @@ class Notification_Service:
             db.session.rollback()
             return jsonify(error=str(e)), 500
 
-    def get_user_notification(user_id):
+    def get_user_notification(user_id, cursor=None, limit=None):
         try:
+            query = Notification.query.filter_by(user_id=user_id)
+            if wants_page(cursor, limit):
+                return jsonify(keyset_page(query, Notification, f"notifications:{user_id}", cursor, limit)), 200
+
             notifications = Notification.query.filter_by(user_id=user_id).all()
             return jsonify([n.to_dict() for n in notifications]), 200
 
+        except InvalidCursor as e:
+            return jsonify(error=str(e)), 400
+
         except Exception as e:
             db.session.rollback()
             return jsonify(error=str(e)), 500
@@ -60,16 +110,16 @@ class Notification_Service:
     def notify_everyone(msg):
         try:
             from models.User import User
-            Notification_Service._notify_users(User.query.all(), msg)
+            Notification_Service._notify_users([row.id for row in db.session.query(User.id).all()], msg)
         except Exception as e:
             db.session.rollback()
 
     def notify_user(user_id, msg):
         try:
             from models.User import User
-            user = User.query.filter_by(id=user_id).first()
-            if user:
-                Notification_Service._notify_users([user], msg)
+            Notification_Service._notify_users(
+                Notification_Service._recipient_ids(User.id == user_id), msg
+            )
         except Exception as e:
             db.session.rollback()
 
@@ -77,20 +127,14 @@ class Notification_Service:
         try:
             from models.User import User
             Notification_Service._notify_users(
-                User.query.filter_by(department_id=dept_id).all(), msg
+                Notification_Service._recipient_ids(User.department_id == dept_id), msg
             )
         except Exception as e:
             db.session.rollback()
 
     def notify_by_role(role, msg):
         """Generic role-based notifier used by heads, presidents, administrators."""
-        try:
-            from models.User import User
-            users = User.query.filter_by(role=role).all()
-            if users:
-                Notification_Service._notify_users(users, msg)
-        except Exception as e:
-            db.session.rollback()
+        Notification_Service.notify_audience(msg, roles=[role])
 
     def notify_heads(msg):
         Notification_Service.notify_by_role("head", msg)
@@ -102,10 +146,28 @@ class Notification_Service:
         Notification_Service.notify_by_role("administrator", msg)
 
     def notify_department_heads(dept_id, msg):
+        Notification_Service.notify_audience(msg, department_heads=[dept_id])
+
+    def notify_audience(msg, user_ids=(), roles=(), departments=(), department_heads=()):
+        """
+        One notification per matching user, resolved with a single query and
+        inserted in one transaction. Use instead of chaining notify_heads,
+        notify_presidents, ... for the same message.
+        """
         try:
             from models.User import User
-            heads = User.query.filter_by(role="head", department_id=dept_id).all()
-            if heads:
-                Notification_Service._notify_users(heads, msg)
+
+            conditions = []
+            if user_ids:
+                conditions.append(User.id.in_(list(user_ids)))
+            if roles:
+                conditions.append(User.role.in_(list(roles)))
+            if departments:
+                conditions.append(User.department_id.in_(list(departments)))
+            if department_heads:
+                conditions.append(and_(User.role == "head", User.department_id.in_(list(department_heads))))
+
+            if conditions:
+                Notification_Service._notify_users(Notification_Service._recipient_ids(*conditions), msg)
         except Exception as e:
             db.session.rollback()
@@ -3,6 +3,26 @@ from datetime import datetime
 from utils import FileStorage
 
 
+PRESIDENT_POSITION = "College President"
+PMT_POSITION = "PMT Chairperson"
+
+_UNSET = object()
+
+
+def _full_name(user):
+    mi = user.middle_name[0] + ". " if user.middle_name else " "
+    return f"{user.first_name} {mi}{user.last_name}"
+
+
+def _position_name(user):
+    return user.position.name if user and user.position else ""
+
+
+def _department_head(department_id):
+    from models.User import User
+    return User.query.filter_by(department_id=department_id, role="head").first()
+
+
 class OPCR_Rating(db.Model):
     __tablename__ = "opcr_ratings"
 
@@ -49,6 +69,11 @@ class Assigned_PCR(db.Model):
 
 class Supporting_Document(db.Model):
     __tablename__ = "supporting_documents"
+    __table_args__ = (
+        db.Index("ix_supporting_documents_period_status", "period", "status"),
+        db.Index("ix_supporting_documents_ipcr_status", "ipcr_id", "status"),
+        db.Index("ix_supporting_documents_period_created", "period", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     file_type = db.Column(db.Text, default="")
@@ -94,6 +119,40 @@ class Supporting_Document(db.Model):
             "relevance_justification": self.relevance_justification
         }
 
+    @staticmethod
+    def approved_for_department(dept_id, period):
+        """
+        Active, approved documents of a department's IPCRs for a period, in one
+        joined query that also loads the task, user and department to_dict() reads.
+        """
+        from sqlalchemy.orm import contains_eager, joinedload, load_only
+        from models.Departments import Department
+        from models.Tasks import Main_Task, Sub_Task
+        from models.User import User
+
+        return (
+            Supporting_Document.query
+            .join(Supporting_Document.ipcr)
+            .join(IPCR.user)
+            .filter(
+                Supporting_Document.period == period,
+                Supporting_Document.status == 1,
+                Supporting_Document.isApproved == "approved",
+                User.department_id == dept_id,
+            )
+            .options(
+                contains_eager(Supporting_Document.ipcr).load_only(IPCR.id, IPCR.user_id)
+                .contains_eager(IPCR.user).load_only(
+                    User.id, User.first_name, User.middle_name, User.last_name, User.department_id,
+                )
+                .joinedload(User.department).load_only(Department.id, Department.name),
+                joinedload(Supporting_Document.sub_task).load_only(Sub_Task.id, Sub_Task.main_task_id)
+                .joinedload(Sub_Task.main_task).load_only(Main_Task.id, Main_Task.mfo),
+            )
+            .order_by(Supporting_Document.id)
+            .all()
+        )
+
     def reject(self):
         from utils.FileStorage import delete_s3_file
         self.isApproved = "rejected"
@@ -137,6 +196,10 @@ class OPCR_Supporting_Document(db.Model):
 
 class IPCR(db.Model):
     __tablename__ = "ipcr"
+    __table_args__ = (
+        db.Index("ix_ipcr_user_period", "user_id", "period"),
+        db.Index("ix_ipcr_period_status", "period", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     reviewed_by = db.Column(db.Text, default="")
@@ -197,94 +260,49 @@ class IPCR(db.Model):
             "status": self.status,
         }
 
-    def _middle_initial(self, user):
-        return user.middle_name[0] + ". " if user.middle_name else " "
-
     def _slot(self, name, position):
         return {"name": name, "position": position, "date": ""}
 
-    def to_dict(self):
-        from models.System_Settings import System_Settings
-        from models.User import User
+    def refresh_signatories(self, settings=None, head=_UNSET):
+        """
+        Writes the signatory names/positions for the owner's current role,
+        department head and settings. Called whenever one of those changes;
+        the caller commits. Pass settings/head when refreshing in bulk.
+        """
+        if settings is None:
+            from models.System_Settings import System_Settings
+            settings = System_Settings.get_default_settings()
 
-        settings = System_Settings.get_default_settings()
-        president = settings.current_president_fullname or ""
-        mayor = settings.current_mayor_fullname or ""
         user = self.user
-        mi = self._middle_initial(user)
-        full = f"{user.first_name} {mi}{user.last_name}"
+        if head is _UNSET:
+            head = _department_head(user.department_id)
 
-        dept_head = User.query.filter_by(department_id=user.department_id, role="head").first()
-        dmi = self._middle_initial(dept_head) if dept_head else " "
-        head_full = f"{dept_head.first_name} {dmi}{dept_head.last_name}" if dept_head else ""
-        head_pos = dept_head.position.name if dept_head else ""
-
-        print("generating users", full, head_full, president, mayor)
-        review, approve, discuss, assess, final = "", "", "", "", ""
+        president = settings.current_president_fullname or ""
+        full = _full_name(user)
+        head_full = _full_name(head) if head else ""
+        head_pos = _position_name(head)
 
         if user.role == "faculty":
-            review = self._slot(head_full, head_pos)
-            approve = self._slot(president, "College President")
-            discuss = self._slot(full, user.position.name)
-            assess = self._slot(head_full, head_pos)
-            final = self._slot(president, "College President")
-
-            self.reviewed_by = head_full
-            self.rev_position = head_pos
-            self.approved_by = president
-            self.app_position = "College President"
-            self.discussed_with = full
-            self.dis_position = user.position.name
-            self.assessed_by = head_full
-            self.ass_position = head_pos
-            self.final_rating_by = president
-            self.fin_position = "College President"
-
-            db.session.commit()
+            review = assess = (head_full, head_pos)
+            discuss = (full, _position_name(user))
         elif user.role in ("head", "administrator"):
-            review = self._slot(president, "College President")
-            approve = self._slot(president, "College President")
-            discuss = self._slot(full, user.position.name)
-            assess = self._slot(president, "College President")
-            final = self._slot(president, "College President")
-
-            self.reviewed_by = president
-            self.rev_position = "College President"
-            self.approved_by = president
-            self.app_position = "College President"
-            self.discussed_with = full
-            self.dis_position = user.position.name
-            self.assessed_by = president
-            self.ass_position = "College President"
-            self.final_rating_by = president
-            self.fin_position = "College President"
-            db.session.commit()
+            review = assess = (president, PRESIDENT_POSITION)
+            discuss = (full, _position_name(user))
         else:  # president
-            review = self._slot(president, "College President")
-            approve = self._slot(president, "College President")
-            discuss = self._slot(president, "College President")
-            assess = self._slot(president, "College President")
-            final = self._slot(president, "College President")
-
-            self.reviewed_by = president
-            self.rev_position = "College President"
-            self.approved_by = president
-            self.app_position = "College President"
-            self.discussed_with = president
-            self.dis_position = "College President"
-            self.assessed_by = president
-            self.ass_position = "College President"
-            self.final_rating_by = president
-            self.fin_position = "College President"
-
-            db.session.commit()
+            review = assess = discuss = (president, PRESIDENT_POSITION)
 
-        db.session.commit()
+        self.reviewed_by, self.rev_position = review
+        self.approved_by, self.app_position = president, PRESIDENT_POSITION
+        self.discussed_with, self.dis_position = discuss
+        self.assessed_by, self.ass_position = assess
+        self.final_rating_by, self.fin_position = president, PRESIDENT_POSITION
+        self.confirmed_by, self.con_position = settings.current_mayor_fullname or "", PMT_POSITION
 
+    def to_dict(self):
         return {
             "id": self.id,
             "user": self.user_id,
-            "user_info": user.info(),
+            "user_info": self.user.info(),
             "sub_tasks": [t.to_dict() for t in self.sub_tasks],
             "sub_tasks_count": self.count_sub_tasks(),
             "created_at": str(self.created_at),
@@ -293,17 +311,21 @@ class IPCR(db.Model):
             "batch_id": self.batch_id,
             "status": self.status,
             "period_id": self.period,
-            "review": review,
-            "approve": approve,
-            "discuss": discuss,
-            "assess": assess,
-            "final": final,
-            "confirm": self._slot(mayor, "PMT Chairperson"),
+            "review": self._slot(self.reviewed_by, self.rev_position),
+            "approve": self._slot(self.approved_by, self.app_position),
+            "discuss": self._slot(self.discussed_with, self.dis_position),
+            "assess": self._slot(self.assessed_by, self.ass_position),
+            "final": self._slot(self.final_rating_by, self.fin_position),
+            "confirm": self._slot(self.confirmed_by, self.con_position),
         }
 
 
 class OPCR(db.Model):
     __tablename__ = "opcr"
+    __table_args__ = (
+        db.Index("ix_opcr_department_period", "department_id", "period"),
+        db.Index("ix_opcr_period_status_main", "period", "status", "isMain"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     reviewed_by = db.Column(db.Text, default="")
@@ -343,33 +365,27 @@ class OPCR(db.Model):
     def _slot(self, name, position):
         return {"name": name, "position": position, "date": ""}
 
-    def to_dict(self):
-        from models.System_Settings import System_Settings
-        from models.User import User
+    def refresh_signatories(self, settings=None, head=_UNSET):
+        """Same as IPCR.refresh_signatories; the department head discusses the OPCR."""
+        if settings is None:
+            from models.System_Settings import System_Settings
+            settings = System_Settings.get_default_settings()
+
+        if head is _UNSET:
+            head = _department_head(self.department_id)
 
-        settings = System_Settings.get_default_settings()
         president = settings.current_president_fullname or ""
-        mayor = settings.current_mayor_fullname or ""
-
-        head = User.query.filter_by(department_id=self.department_id, role="head").first()
-        mi = head.middle_name[0] + ". " if head and head.middle_name else " "
-        head_full = f"{head.first_name} {mi}{head.last_name}" if head else ""
-        head_pos = head.position.name if head else ""
-
-        self.reviewed_by = head_full
-        self.rev_position = head_pos
-        self.approved_by = president
-        self.app_position = "College President"
-        self.discussed_with = head_full
-        self.dis_position = head_pos
-        self.assessed_by = president
-        self.ass_position = "College President"
-        self.final_rating_by = president
-        self.fin_position = "College President"
-        self.confirmed_by = mayor
-        self.con_position = "PMT Chairperson"
-        db.session.commit()
+        head_full = _full_name(head) if head else ""
+        head_pos = _position_name(head)
 
+        self.reviewed_by, self.rev_position = head_full, head_pos
+        self.approved_by, self.app_position = president, PRESIDENT_POSITION
+        self.discussed_with, self.dis_position = head_full, head_pos
+        self.assessed_by, self.ass_position = president, PRESIDENT_POSITION
+        self.final_rating_by, self.fin_position = president, PRESIDENT_POSITION
+        self.confirmed_by, self.con_position = settings.current_mayor_fullname or "", PMT_POSITION
+
+    def to_dict(self):
         return {
             "id": self.id,
             "ipcr_count": self.count_ipcr(),
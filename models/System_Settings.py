@@ -2,11 +2,17 @@ from app import db
 from app import socketio
 from datetime import datetime, date
 from sqlalchemy.exc import IntegrityError, OperationalError, DataError, ProgrammingError
-from flask import jsonify
+from flask import jsonify, current_app
 from sqlalchemy.dialects.mysql import JSON, TEXT
+import copy
+import threading
+import time
 import uuid
 import secrets
 
+# Seconds a worker trusts its cached settings before re-checking the version column
+SETTINGS_CACHE_TTL = 5
+
 class System_Settings(db.Model):
     __tablename__ = "system_settings"
 
@@ -63,6 +69,9 @@ class System_Settings(db.Model):
         onupdate=datetime.now
     )
 
+    # Bumped on every write so other workers drop their cached snapshot
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
 
 
     current_period_id = db.Column(db.String(100), nullable=True)
@@ -117,6 +126,10 @@ class System_Settings(db.Model):
         # No active period found
         return current_phases if current_phases else None
 
+    def bump_version(self):
+        """Marks the row as changed for every worker's Settings_Cache."""
+        self.version = (self.version or 0) + 1
+
 
 
     def to_dict(self):
@@ -146,6 +159,14 @@ class System_Settings(db.Model):
     
     @staticmethod
     def get_default_settings():
+        """
+        Returns a read-only Settings_Snapshot of the current settings, served
+        from the per-worker cache. Use System_Settings.query to modify settings.
+        """
+        return Settings_Cache.for_app().get()
+
+    @staticmethod
+    def load_or_create():
         """
         Safe getter: Returns current settings or creates default if none exists.
         This ensures the application never breaks if settings are deleted.
@@ -179,7 +200,115 @@ class System_Settings(db.Model):
                 settings = System_Settings.query.first()
         
         return settings
-    
+
+
+def _as_date(value):
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def _date_range(start, end):
+    start, end = _as_date(start), _as_date(end)
+    return (start, end) if start and end else None
+
+
+class Settings_Snapshot:
+    """
+    Immutable copy of the System_Settings row shared by every request in a
+    worker. JSON columns are private copies and must not be mutated; the
+    planning/monitoring/rating ranges are parsed once into dates.
+    """
+
+    def __init__(self, row):
+        for column in System_Settings.__table__.columns.keys():
+            object.__setattr__(self, column, copy.deepcopy(getattr(row, column)))
+
+        object.__setattr__(self, "planning_range", _date_range(row.planning_start_date, row.planning_end_date))
+        object.__setattr__(self, "monitoring_range", _date_range(row.monitoring_start_date, row.monitoring_end_date))
+        object.__setattr__(self, "rating_range", _date_range(row.rating_start_date, row.rating_end_date))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings snapshot is read-only; update System_Settings instead")
+
+    def in_range(self, phase, day=None):
+        date_range = getattr(self, f"{phase}_range")
+        if not date_range:
+            return False
+        day = day or date.today()
+        return date_range[0] <= day <= date_range[1]
+
+    def get_current_period(self):
+        today = datetime.now().date()
+        current_phases = [
+            phase for phase in ("planning", "monitoring", "rating")
+            if self.in_range(phase, today)
+        ]
+        return current_phases if current_phases else None
+
+
+class Settings_Cache:
+    """
+    Read-through cache of the settings row, one per app (i.e. per worker).
+    The snapshot is trusted for SETTINGS_CACHE_TTL seconds, after which a
+    single-column version query decides whether to reload it.
+    """
+
+    def __init__(self, ttl=SETTINGS_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.reloads = 0
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def for_app(app=None):
+        app = app or current_app._get_current_object()
+        cache = app.extensions.get("settings_cache")
+        if cache is None:
+            cache = Settings_Cache(app.config.get("SETTINGS_CACHE_TTL", SETTINGS_CACHE_TTL))
+            app.extensions["settings_cache"] = cache
+        return cache
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.ttl:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                version = (
+                    db.session.query(System_Settings.version)
+                    .filter(System_Settings.id == snapshot.id)
+                    .scalar()
+                )
+                if version == snapshot.version:
+                    self._checked_at = time.monotonic()
+                    self.hits += 1
+                    return snapshot
+
+            snapshot = Settings_Snapshot(System_Settings.load_or_create())
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+            return snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def stats(self):
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "version": self._snapshot.version if self._snapshot else None,
+        }
+
 
 class System_Settings_Service:
     @staticmethod
@@ -197,6 +326,7 @@ class System_Settings_Service:
             db.session.add(settings)
 
         print("PATCHING SETTINGS" , new_settings)
+        signers = (settings.current_president_fullname, settings.current_mayor_fullname)
         
         settings.rating_thresholds = new_settings.get("rating_thresholds", settings.rating_thresholds)
         settings.quantity_formula = new_settings.get("quantity_formula", settings.quantity_formula)
@@ -219,34 +349,25 @@ class System_Settings_Service:
         settings.current_mayor_fullname = new_settings.get("current_mayor_fullname", settings.current_mayor_fullname)
 
         settings.enable_formula = new_settings.get("enable_formula", settings.enable_formula)
+        settings.bump_version()
+
+        # past periods keep the signatories they were rated under
+        if (settings.current_president_fullname, settings.current_mayor_fullname) != signers:
+            from services.PCR.pcr_signatory_service import PCRSignatoryService
+            PCRSignatoryService.refresh_period(settings.current_period_id, settings)
 
 
         try:
             print("SETTINGS PATCHED")
             db.session.commit()
+            Settings_Cache.for_app().invalidate()
             return jsonify({"status":"success", "data":settings.to_dict()}), 200
         except (IntegrityError, OperationalError, DataError, ProgrammingError) as e:
             db.session.rollback()
             return jsonify({"status":"error", "message":str(e)}), 500
         
     def check_if_rating_period():
-
-        setting = System_Settings.query.first()
-        if not setting or not setting.rating_start_date or not setting.rating_end_date:
-            return False
-
-
-        start = str(setting.rating_start_date)
-        end = str(setting.rating_end_date)
-
-        start_date = datetime.strptime(start, "%Y-%m-%d").date()
-        end_date = datetime.strptime(end, "%Y-%m-%d").date()
-        today = date.today()
-
-        
-
-        is_between = start_date <= today <= end_date
-        return is_between
+        return System_Settings.get_default_settings().in_range("rating")
     
     def change_period():
         """
@@ -265,11 +386,13 @@ class System_Settings_Service:
             # Update the current period ID
             settings.current_period_id = random_id
             settings.updated_at = datetime.now()
+            settings.bump_version()
             
             from models.PCR import OPCR, OPCR_Rating, OPCR_Supporting_Document
-            
+            # the new period has no PCRs yet, so there are no signatories to refresh
             
             db.session.commit()
+            Settings_Cache.for_app().invalidate()
             
             return jsonify({
                 "status": "success",
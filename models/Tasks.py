@@ -2,12 +2,17 @@ from app import db
 from datetime import datetime
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy import func
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from flask import current_app
 from models.Formula_engine import Formula_Engine
+import threading
 
 
 class Assigned_Task(db.Model):
     __tablename__ = "assigned_tasks"
+    __table_args__ = (
+        db.Index("ix_assigned_tasks_user_main_task", "user_id", "main_task_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
@@ -39,6 +44,12 @@ class Assigned_Task(db.Model):
 
 class Output(db.Model):
     __tablename__ = "outputs"
+    __table_args__ = (
+        db.Index("ix_outputs_user_main_task", "user_id", "main_task_id"),
+        db.Index("ix_outputs_main_task_period", "main_task_id", "period"),
+        db.Index("ix_outputs_user_period", "user_id", "period"),
+        db.Index("ix_outputs_period_status", "period", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
@@ -103,6 +114,10 @@ class Output(db.Model):
 
 class Assigned_Department(db.Model):
     __tablename__ = "assigned_departments"
+    __table_args__ = (
+        db.Index("ix_assigned_departments_department_period", "department_id", "period", mysql_length={"period": 100}),
+        db.Index("ix_assigned_departments_main_task_department", "main_task_id", "department_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     department_id = db.Column(db.Integer, db.ForeignKey("departments.id"))
@@ -145,8 +160,135 @@ class Assigned_Department(db.Model):
         }
 
 
+FORMULA_REGISTRY_SIZE = 512
+FORMULA_METRICS = ("quantity", "efficiency", "timeliness")
+
+
+class Formula_Registry:
+    """
+    Effective rating formulas per (department_id, main_task_id, period), one per
+    app (i.e. per worker). All Assigned_Department rows of a department are
+    loaded with a single query the first time any of its tasks is resolved;
+    entries are tagged with the settings version so a bump from any worker
+    (see invalidate) makes every worker reload on its next settings check.
+
+    A period of None matches rows of any period, like Sub_Task._get_formula did.
+    """
+
+    def __init__(self, maxsize=FORMULA_REGISTRY_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._departments = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def for_app(app=None):
+        app = app or current_app._get_current_object()
+        registry = app.extensions.get("formula_registry")
+        if registry is None:
+            registry = Formula_Registry()
+            app.extensions["formula_registry"] = registry
+        return registry
+
+    def _load(self, department_id, period):
+        query = db.session.query(
+            Assigned_Department.main_task_id,
+            Assigned_Department.enable_formulas,
+            Assigned_Department.quantity_formula,
+            Assigned_Department.efficiency_formula,
+            Assigned_Department.timeliness_formula,
+        ).filter(Assigned_Department.department_id == department_id)
+
+        if period is not None:
+            query = query.filter(Assigned_Department.period == period)
+
+        overrides = {}
+        for row in query.order_by(Assigned_Department.id).all():
+            # Any-period lookups keep the first row (the old .first() query),
+            # period lookups the last one (the old dict comprehension).
+            if period is None and row.main_task_id in overrides:
+                continue
+            overrides[row.main_task_id] = (
+                dict(zip(FORMULA_METRICS, row[2:])) if row.enable_formulas else None
+            )
+        return overrides
+
+    def _overrides(self, department_id, period, version):
+        key = (department_id, period)
+        entry = self._departments.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            with self._lock:
+                if key in self._departments:
+                    self._departments.move_to_end(key)
+            return entry[1]
+
+        overrides = self._load(department_id, period)
+        with self._lock:
+            self.misses += 1
+            self._departments[key] = (version, overrides)
+            self._departments.move_to_end(key)
+            while len(self._departments) > self.maxsize:
+                self._departments.popitem(last=False)
+        return overrides
+
+    def resolve(self, department_id, main_task_id, period, metric, settings=None):
+        """Returns the formula to rate `metric` with, falling back to the settings formula."""
+        if settings is None:
+            from models.System_Settings import System_Settings
+            settings = System_Settings.get_default_settings()
+
+        if department_id is not None:
+            override = self._overrides(department_id, period, settings.version).get(main_task_id)
+            if override:
+                return override[metric]
+
+        return getattr(settings, f"{metric}_formula")
+
+    def invalidate(self, department_id=None):
+        """
+        Drops the cached overrides of one department (or all) in this worker
+        and bumps the settings version so the other workers follow. Call it
+        after the caller's transaction has committed, so no worker can reload
+        the old rows once the cache is dropped; the bump is committed here.
+        """
+        from models.System_Settings import System_Settings, Settings_Cache
+
+        with self._lock:
+            for key in list(self._departments):
+                if department_id is None or key[0] == department_id:
+                    del self._departments[key]
+            self.invalidations += 1
+
+        try:
+            settings = System_Settings.query.first()
+            if settings:
+                settings.bump_version()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print("Formula registry invalidation failed", e)
+        Settings_Cache.for_app().invalidate()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._departments),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
 class Main_Task(db.Model):
     __tablename__ = "main_tasks"
+    __table_args__ = (
+        db.Index("ix_main_tasks_period_status", "period", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     mfo = db.Column(db.Text, nullable=False)
@@ -332,6 +474,11 @@ class Main_Task(db.Model):
 
 class Sub_Task(db.Model):
     __tablename__ = "sub_tasks"
+    __table_args__ = (
+        db.Index("ix_sub_tasks_period_status", "period", "status"),
+        db.Index("ix_sub_tasks_main_task_period", "main_task_id", "period"),
+        db.Index("ix_sub_tasks_ipcr_status", "ipcr_id", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     mfo = db.Column(db.Text, nullable=False)
@@ -361,49 +508,25 @@ class Sub_Task(db.Model):
     ipcr = db.relationship("IPCR", back_populates="sub_tasks")
     supporting_documents = db.relationship("Supporting_Document", back_populates="sub_task")
 
+    def _department_id(self):
+        department = self.ipcr.user.department if self.ipcr and self.ipcr.user else None
+        return department.id if department else None
+
     def _get_formula(self, metric):
         """Returns the formula for the given metric, with department-level override support."""
-        from models.System_Settings import System_Settings
-
-        assigned = Assigned_Department.query.filter_by(
-            department_id=self.ipcr.user.department.id,
-            main_task_id=self.main_task.id,
-        ).first()
-
-        if assigned and assigned.enable_formulas:
-            return getattr(assigned, f"{metric}_formula")
-
-        settings = System_Settings.get_default_settings()
-        return getattr(settings, f"{metric}_formula")
+        return Formula_Registry.for_app().resolve(
+            self._department_id(), self.main_task_id, None, metric
+        )
 
     def calculate_with_override(self, metric, target, actual):
         from models.System_Settings import System_Settings
 
         settings = System_Settings.get_default_settings()
-        assigned_dept_configs = None
-        dept_cfg = None
-
-        if self.ipcr.user.department:
-
-            assigned_dept_configs = {
-                ad.main_task_id: {
-                    "enable": ad.enable_formulas,
-                    "quantity": ad.quantity_formula,
-                    "efficiency": ad.efficiency_formula,
-                    "timeliness": ad.timeliness_formula,
-                }
-                for ad in Assigned_Department.query.filter_by(
-                    department_id=self.ipcr.user.department.id,
-                    period=settings.current_period_id,
-                ).all()
-            }
-
-            
-            dept_cfg = assigned_dept_configs.get(self.main_task_id)
+        formula = Formula_Registry.for_app().resolve(
+            self._department_id(), self.main_task_id, settings.current_period_id, metric, settings
+        )
 
         engine = Formula_Engine()
-        formula = dept_cfg[metric] if (dept_cfg and dept_cfg["enable"]) else getattr(settings, f"{metric}_formula")
-
         return engine.compute_rating(formula=formula, target=target, actual=actual)
 
     def calculateQuantity(self):
@@ -426,7 +549,7 @@ class Sub_Task(db.Model):
         self.efficiency = rating
         return rating
 
-    def calculateTimeliness(self):
+    def _timeliness_inputs(self):
         target = self.target_time
         actual = self.actual_time
 
@@ -439,6 +562,11 @@ class Sub_Task(db.Model):
             actual = 0 if days_late <= 0 else days_late
             target = 1
 
+        return target, actual
+
+    def calculateTimeliness(self):
+        target, actual = self._timeliness_inputs()
+
         engine = Formula_Engine()
         rating = engine.compute_rating(
             formula=self._get_formula("timeliness"),
@@ -448,6 +576,50 @@ class Sub_Task(db.Model):
         self.timeliness = rating
         return rating
 
+    @staticmethod
+    def calculate_many(requests, period=None, settings=None):
+        """
+        Batch form of calculate_with_override: `requests` are
+        (sub_task, metric, target, actual) tuples. Formulas are resolved
+        through the registry (period None matches any period, like
+        _get_formula) and rated with Formula_Engine.compute_ratings_many.
+        Returns the ratings in request order.
+        """
+        if settings is None:
+            from models.System_Settings import System_Settings
+            settings = System_Settings.get_default_settings()
+
+        registry = Formula_Registry.for_app()
+        formulas = [
+            registry.resolve(sub_task._department_id(), sub_task.main_task_id, period, metric, settings)
+            for sub_task, metric, _, _ in requests
+        ]
+        return Formula_Engine().compute_ratings_many(
+            formulas, [r[2] for r in requests], [r[3] for r in requests]
+        )
+
+    @staticmethod
+    def calculate_all(sub_tasks, settings=None):
+        """
+        calculateQuantity, calculateEfficiency and calculateTimeliness for many
+        sub-tasks in one batch. Stores the ratings on each sub-task like they do
+        and returns them as (quantity, efficiency, timeliness) tuples.
+        """
+        requests = []
+        for sub_task in sub_tasks:
+            requests += [
+                (sub_task, "quantity", sub_task.target_acc, sub_task.actual_acc),
+                (sub_task, "efficiency", sub_task.target_mod, sub_task.actual_mod),
+                (sub_task, "timeliness", *sub_task._timeliness_inputs()),
+            ]
+        ratings = Sub_Task.calculate_many(requests, None, settings)
+
+        results = []
+        for i, sub_task in enumerate(sub_tasks):
+            sub_task.quantity, sub_task.efficiency, sub_task.timeliness = ratings[3 * i:3 * i + 3]
+            results.append(tuple(ratings[3 * i:3 * i + 3]))
+        return results
+
     def calculateAverage(self):
         q = min(self.quantity, 5)
         e = min(self.efficiency, 5)
@@ -41,6 +41,9 @@ class Profile(db.Model):
 
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index("ix_users_created_at", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -6,7 +6,7 @@ from flask import Blueprint, request, jsonify
 from app import db, socketio
 from utils.decorators import token_required, log_action
 from models.Analytics import PerformanceAlert, PerformanceAlertService, CustomKPI, CustomKPIService
-from models.System_Settings import System_Settings, System_Settings_Service
+from models.System_Settings import System_Settings, System_Settings_Service, Settings_Cache
 from models.Notification import Notification, Notification_Service
 from utils.PerformanceAlerts import PerformanceAlertEngine, CustomKPIMonitor
 
@@ -55,7 +55,9 @@ def update_alert_config():
         if "kpi_definitions" in data:
             settings.kpi_definitions = data.get("kpi_definitions", {})
 
+        settings.bump_version()
         db.session.commit()
+        Settings_Cache.for_app().invalidate()
 
         return jsonify({
             "status": "success",
@@ -0,0 +1,42 @@
+from flask import Blueprint, jsonify
+from utils.decorators import token_required
+from utils.QueryProfiler import query_profiler
+from utils.LogBuffer import log_buffer
+from utils.TemplateCache import template_cache
+from utils.ReportCache import report_cache
+from utils.RenderCache import render_cache
+
+
+diagnostics = Blueprint("diagnostics", __name__, url_prefix="/api/v1/diagnostics")
+
+
+@diagnostics.route("/queries", methods = ["GET"])
+@token_required(allowed_roles=["administrator"])
+def get_query_profile():
+    return jsonify(query_profiler.report()), 200
+
+@diagnostics.route("/queries", methods = ["DELETE"])
+@token_required(allowed_roles=["administrator"])
+def reset_query_profile():
+    query_profiler.reset()
+    return jsonify(message = "Query profile cleared."), 200
+
+@diagnostics.route("/log-buffer", methods = ["GET"])
+@token_required(allowed_roles=["administrator"])
+def get_log_buffer_stats():
+    return jsonify(log_buffer.stats()), 200
+
+@diagnostics.route("/templates", methods = ["GET"])
+@token_required(allowed_roles=["administrator"])
+def get_template_cache_stats():
+    return jsonify(template_cache.stats()), 200
+
+@diagnostics.route("/report-cache", methods = ["GET"])
+@token_required(allowed_roles=["administrator"])
+def get_report_cache_stats():
+    return jsonify(report_cache.stats()), 200
+
+@diagnostics.route("/render-cache", methods = ["GET"])
+@token_required(allowed_roles=["administrator"])
+def get_render_cache_stats():
+    return jsonify(render_cache.stats()), 200
@@ -0,0 +1,21 @@
+from flask import Blueprint
+from utils.decorators import token_required
+from models.Jobs import Report_Job_Service
+
+
+jobs = Blueprint("jobs", __name__, url_prefix="/api/v1/jobs")
+
+
+@jobs.route("/artifacts/<key>", methods = ["GET"])
+def download_artifact(key):
+    return Report_Job_Service.download_artifact(key)
+
+@jobs.route("/<job_id>", methods = ["GET"])
+@token_required()
+def get_job(job_id):
+    return Report_Job_Service.get_job(job_id)
+
+@jobs.route("/<job_id>/download", methods = ["GET"])
+@token_required()
+def download_job(job_id):
+    return Report_Job_Service.download(job_id)
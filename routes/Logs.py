@@ -9,6 +9,6 @@ logs = Blueprint("logs", __name__, url_prefix="/api/v1/log")
 @logs.route("/", methods = ["GET"])
 @token_required()
 def get_logs():
-    return Log_Service.get_all_logs()
+    return Log_Service.get_all_logs(cursor=request.args.get("cursor"), limit=request.args.get("limit"))
 
 
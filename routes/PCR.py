@@ -4,6 +4,7 @@ from utils.decorators import log_action, token_required
 from services.User.users_service import Users
 from services.pcr_service import PCR_Service
 from services.tasks_service import Tasks_Service
+from models.Jobs import Report_Job_Service
 from utils import NewExcelHandler, FileStorage
 import datetime
 import os
@@ -116,60 +117,34 @@ def add_task_to_ipcr(main_task_id, batch_id, user_id, ipcr_id):
     return Tasks_Service.create_task_for_ipcr(task_id=main_task_id, current_batch_id=batch_id , user_id=user_id, ipcr_id=ipcr_id)
 
 
-@log_action(action = "DOWNLOAD", target="IPCR")
-@token_required()
 @pcrs.route("/ipcr/download/<ipcr_id>", methods = ["GET"])
-
+@token_required()
+@log_action(action = "DOWNLOAD", target="IPCR")
 def download_ipcr(ipcr_id):
+    return Report_Job_Service.submit("ipcr", {"ipcr_id": ipcr_id, "weighted": False, "draft": False})
 
-    file_url = NewExcelHandler.createNewIPCR_from_db(ipcr_id=ipcr_id, individuals={
-        "review": {"name": "Arman Bitancur", "position": "Librarian II", "date": ""},
-        "approve": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "discuss": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "assess": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "final": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "confirm": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" }
-    })
-
-    return jsonify(link = file_url), 200
-
-@log_action(action = "DOWNLOAD", target="IPCR")
-@token_required()
 @pcrs.route("/weighted_ipcr/download/<ipcr_id>", methods = ["GET"])
+@token_required()
+@log_action(action = "DOWNLOAD", target="IPCR")
 def download_wipcr(ipcr_id):
+    return Report_Job_Service.submit("ipcr", {"ipcr_id": ipcr_id, "weighted": True, "draft": False})
 
-    file_url = NewExcelHandler.createWeightedIPCR_from_db(ipcr_id=ipcr_id, individuals={
-        "review": {"name": "Arman Bitancur", "position": "Librarian II", "date": ""},
-        "approve": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "discuss": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "assess": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "final": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "confirm": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" }
-    })
-
-    return jsonify(link = file_url), 200
-
-@log_action(action = "DOWNLOAD", target="IPCR")
-@token_required()
 @pcrs.route("/planned_ipcr/download/<ipcr_id>", methods = ["GET"])
+@token_required()
+@log_action(action = "DOWNLOAD", target="IPCR")
 def download_dipcr(ipcr_id):
-
-    file_url = NewExcelHandler.createNewIPCR_from_db(ipcr_id=ipcr_id, individuals={
-        "review": {"name": "Arman Bitancur", "position": "Librarian II", "date": ""},
-        "approve": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "discuss": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "assess": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "final": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
-        "confirm": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" }
-    }, is_draft=True)
-
-    return jsonify(link = file_url), 200
+    return Report_Job_Service.submit("ipcr", {"ipcr_id": ipcr_id, "weighted": False, "draft": True})
 
 @pcrs.route("/ipcr/documents/<ipcr_id>", methods = ["GET"])
 @token_required()
 def get_supporting_documents(ipcr_id):
     return PCR_Service.get_ipcr_supporting_document(ipcr_id=ipcr_id)
 
+@pcrs.route("/documents", methods = ["GET"])
+@token_required()
+def collect_all_supporting_documents():
+    return PCR_Service.collect_all_supporting_documents(cursor=request.args.get("cursor"), limit=request.args.get("limit"))
+
 @pcrs.route("/documents/<dept_id>", methods = ["GET"])
 def collect_supporting_documents(dept_id):
     return PCR_Service.collect_all_supporting_documents_by_department(dept_id)
@@ -229,36 +204,39 @@ def create_opcr(dept_id):
     return PCR_Service.create_opcr(dept_id=dept_id, ipcr_ids=ipcr_ids)
 
 
+@pcrs.route("/signatories/<int:dept_id>", methods = ["PATCH"])
+@token_required(allowed_roles=["administrator", "president"])
+def refresh_signatories(dept_id):
+    return PCR_Service.refresh_department_signatories(dept_id)
+
+
 @pcrs.route("/opcr/download/<opcr_id>", methods = ["GET"])
 @token_required(allowed_roles=["administrator", "head", "president"])
 @log_action(action = "DOWNLOAD", target="OPCR")
 
 def test_opcr(opcr_id):
-    file_link = PCR_Service.new_generate_opcr(opcr_id=opcr_id, is_weighted=False, is_draft=False)
-    return jsonify(link = file_link), 200
+    return Report_Job_Service.submit("opcr", {"opcr_id": opcr_id, "weighted": False})
 
 @pcrs.route("/planned-opcr/download/<dept_id>", methods = ["GET"])
 @token_required(allowed_roles=["administrator", "head", "president"])
 @log_action(action = "DOWNLOAD", target="OPCR")
 
 def download_planned_opcr(dept_id):
-    file_link = PCR_Service.generate_planned_opcr_by_department(department_id=dept_id)
-    return jsonify(link = file_link), 200
+    return Report_Job_Service.submit("planned_opcr", {"department_id": dept_id})
 
 @pcrs.route("/weighted-opcr/download/<opcr_id>", methods = ["GET"])
 @token_required(allowed_roles=["administrator", "head"])
 @log_action(action = "DOWNLOAD", target="OPCR")
 
 def download_weighted_opcr(opcr_id):
-    file_link = PCR_Service.new_generate_opcr(opcr_id=opcr_id, is_weighted=True, is_draft=False)
-    return jsonify(link = file_link), 200
+    return Report_Job_Service.submit("opcr", {"opcr_id": opcr_id, "weighted": True})
 
 @pcrs.route("/master-opcr/download/", methods = ["GET"])
 @token_required(allowed_roles=["administrator", "president"])
 @log_action(action = "DOWNLOAD", target="MASTER OPCR")
 
 def test_master_opcr():
-    return PCR_Service.generate_master_opcr()
+    return Report_Job_Service.submit("master_opcr", {})
 
 
 
@@ -352,59 +330,18 @@ def upload_ipcr_excel():
 @pcrs.route("/supporting_docu/compile/<ipcr_id>", methods=["GET"])
 @token_required()
 def compile_pictures_by_ipcr(ipcr_id):
-    from utils.SupportDocCompiler import into_document, collect_by_ipcr
-    from models.PCR import IPCR
- 
-    docs = collect_by_ipcr(ipcr_id=ipcr_id)
-    if not docs:
-        return jsonify(error="No supporting documents to compile."), 400
- 
-    # Build a meaningful title using the user's name
-    ipcr = IPCR.query.get(ipcr_id)
-    title = f"Supporting Documents — {ipcr.user.full_name()}" if ipcr else "Supporting Documents Report"
- 
-    rendered = into_document(docs, report_title=title)
-    if not rendered:
-        return jsonify(error="No supporting documents could be compiled."), 400
-    return rendered
+    return Report_Job_Service.submit("supporting_docx", {"ipcr_id": ipcr_id})
  
  
 @pcrs.route("/supporting_docu/presentation/<ipcr_id>", methods=["GET"])
 @token_required()
 def compile_presentation_by_ipcr(ipcr_id):
-    from utils.PresentationCompiler import into_presentation, collect_by_ipcr
-    from models.PCR import IPCR
- 
-    docs = collect_by_ipcr(ipcr_id=ipcr_id)
-    if not docs:
-        return jsonify(error="No supporting documents to compile."), 400
- 
-    # Build a meaningful title using the user's name
-    ipcr = IPCR.query.get(ipcr_id)
-    title = f"Supporting Documents — {ipcr.user.full_name()}" if ipcr else "Supporting Documents Report"
- 
-    rendered = into_presentation(docs, report_title=title)
-    if not rendered:
-        return jsonify(error="No supporting documents could be compiled."), 400
-    return rendered
+    return Report_Job_Service.submit("supporting_pptx", {"ipcr_id": ipcr_id})
 
 @pcrs.route("/supporting_dept/compile/<dept_id>", methods=["GET"])
 @token_required()
 def compile_pictures_by_dept(dept_id):
-    from utils.SupportDocCompiler import into_document, collect_by_department
-    from models.Departments import Department
- 
-    docs = collect_by_department(dept_id=dept_id)
-    if not docs:
-        return jsonify(error="No supporting documents to compile."), 400
- 
-    dept = Department.query.get(dept_id)
-    title = f"Supporting Documents — {dept.name}" if dept else "Supporting Documents Report"
- 
-    rendered = into_document(docs, report_title=title)
-    if not rendered:
-        return jsonify(error="No supporting documents could be compiled."), 400
-    return rendered
+    return Report_Job_Service.submit("supporting_docx", {"dept_id": dept_id})
  
 
 @pcrs.route("/opcr/calculate/<opcr_id>", methods = ["POST"])
@@ -51,20 +51,23 @@ def test_check_time():
 
     setting = System_Settings.get_default_settings()
 
-    start = str(setting.rating_start_date)
-    end = str(setting.rating_end_date)
+    print(setting.rating_range, date.today())
 
-    start_date = datetime.strptime(start, "%Y-%m-%d").date()
-    end_date = datetime.strptime(end, "%Y-%m-%d").date()
-    today = date.today()
-
-    print(start_date, end_date, today)
-
-    is_between = start_date <= today <= end_date
-    
-    return str(is_between)
+    return str(setting.in_range("rating"))
 
 @settings.route("/reset", methods = ["PATCH"])
 @token_required(allowed_roles=["administrator", "president"])
 def reset_period():
     return System_Settings_Service.change_period()
+
+@settings.route("/cache-stats", methods = ["GET"])
+@token_required(allowed_roles=["administrator"])
+def get_cache_stats():
+    from models.System_Settings import Settings_Cache
+    from models.Tasks import Formula_Engine, Formula_Registry
+
+    return jsonify(
+        settings=Settings_Cache.for_app().stats(),
+        formulas=Formula_Engine.cache_stats(),
+        formula_registry=Formula_Registry.for_app().stats(),
+    ), 200
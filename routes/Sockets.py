@@ -0,0 +1,39 @@
+from flask import request
+from flask_socketio import join_room
+import jwt
+
+from app import socketio
+
+
+def _socket_token(auth):
+    """Token from the Socket.IO auth payload, the ?token= query string or a Bearer header."""
+    if isinstance(auth, dict) and auth.get("token"):
+        return auth["token"]
+    if request.args.get("token"):
+        return request.args["token"]
+
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        return auth_header.split(" ", 1)[1].strip()
+    return None
+
+
+@socketio.on("connect")
+def on_connect(auth=None):
+    """
+    Authenticated clients join their user_{id} room so notifications reach
+    only them. Anonymous connections are still accepted for the broadcast
+    events, they just don't get a room.
+    """
+    token = _socket_token(auth)
+    if not token:
+        return True
+
+    try:
+        payload = jwt.decode(token, "priscilla", algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return True
+
+    if payload.get("id"):
+        join_room(f"user_{payload['id']}")
+    return True
@@ -11,7 +11,7 @@ users = Blueprint("users", __name__, url_prefix="/api/v1/users")
 @users.route("/", methods = ["GET"])
 @token_required()
 def get_users():
-    return Users.get_all_users()
+    return Users.get_all_users(cursor=request.args.get("cursor"), limit=request.args.get("limit"))
 
 @users.route("/pres-exists", methods = ["GET"])
 @token_required()
@@ -31,7 +31,7 @@ def get_user(id):
 @users.route("/notification/<id>", methods = ["GET"])
 @token_required()
 def get_user_notifications(id):
-    return Notification_Service.get_user_notification(id)
+    return Notification_Service.get_user_notification(id, cursor=request.args.get("cursor"), limit=request.args.get("limit"))
 
 @users.route("/", methods = ["PATCH"])
 @token_required()
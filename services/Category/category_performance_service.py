@@ -13,20 +13,20 @@ class CategoryPerformanceService:
             if sub.status == 1 and sub.period == period and sub.ipcr and sub.ipcr.status == 1:
                 yield sub
 
-    def _subtask_ratings(sub, enable_formula):
-        """Return (quantity, efficiency, timeliness) for a sub_task."""
+    def _subtask_ratings(subs, enable_formula):
+        """Return (quantity, efficiency, timeliness) for each sub_task, rated in one batch with formulas on."""
         if enable_formula:
-            return sub.calculateQuantity(), sub.calculateEfficiency(), sub.calculateTimeliness()
-        return sub.quantity, sub.efficiency, sub.timeliness
+            return Sub_Task.calculate_all(subs)
+        return [(sub.quantity, sub.efficiency, sub.timeliness) for sub in subs]
 
     def _avg_task_metrics(main_task, period, enable_formula):
         """
         Average quantity/efficiency/timeliness across valid sub_tasks for one task.
         Returns (q, e, t, count).
         """
+        subs = list(CategoryPerformanceService._get_valid_subtasks(main_task, period))
         q_sum = e_sum = t_sum = count = 0
-        for sub in CategoryPerformanceService._get_valid_subtasks(main_task, period):
-            q, e, t = CategoryPerformanceService._subtask_ratings(sub, enable_formula)
+        for q, e, t in CategoryPerformanceService._subtask_ratings(subs, enable_formula):
             q_sum += q if q else 0
             e_sum += e if e else 0
             t_sum += t if t else 0
@@ -156,7 +156,7 @@ class CategoryPerformanceService:
                 continue
 
             # Aggregate subtask ratings per department for this task
-            task_dept = {}
+            subs = []
             for sub in task.sub_tasks:
                 if sub.status != 1 or sub.period != settings.current_period_id:
                     continue
@@ -166,13 +166,17 @@ class CategoryPerformanceService:
                 if not sub.output.user.department:
                     continue
 
+                subs.append(sub)
+
+            task_dept = {}
+            ratings = CategoryPerformanceService._subtask_ratings(subs, settings.enable_formula)
+            for sub, (q, e, t) in zip(subs, ratings):
                 dept_name = sub.output.user.department.name
 
                 
                 if dept_name not in task_dept:
                     task_dept[dept_name] = {"q": 0.0, "e": 0.0, "t": 0.0, "count": 0}
 
-                q, e, t = CategoryPerformanceService._subtask_ratings(sub, settings.enable_formula)
                 task_dept[dept_name]["q"] += q if q else 0
                 task_dept[dept_name]["e"] += e if e else 0
                 task_dept[dept_name]["t"] += t if t else 0
@@ -9,6 +9,7 @@ from models.Tasks import Assigned_Task, Output, Sub_Task
 from models.Departments import Department
 from models.Notification import Notification_Service
 from utils.AI import get_relevance_score
+from utils.Pagination import InvalidCursor, keyset_page, wants_page
 
 class PCRCRUDService:
 
@@ -29,6 +30,7 @@ class PCRCRUDService:
             )
             db.session.add(new_ipcr)
             db.session.flush()
+            new_ipcr.refresh_signatories()
 
             print("assigning task")
 
@@ -113,6 +115,7 @@ class PCRCRUDService:
             )
             db.session.add(new_ipcr)
             db.session.flush()
+            new_ipcr.refresh_signatories()
 
             for mt_id in main_task_id_array:
                 if Output.query.filter_by(
@@ -165,6 +168,7 @@ class PCRCRUDService:
         new_opcr = OPCR(department_id=dept_id, isMain=True, period=period)
         db.session.add(new_opcr)
         db.session.flush()
+        new_opcr.refresh_signatories()
 
         OPCR.query.filter_by(department_id=dept_id).filter(
             OPCR.period != period
@@ -502,11 +506,17 @@ class PCRCRUDService:
         except Exception as e:
             return jsonify(error="Collecting supporting documents failed"), 500
 
-    def collect_all_supporting_documents():
+    def collect_all_supporting_documents(cursor=None, limit=None):
         try:
             from models.System_Settings import System_Settings
             period = System_Settings.get_default_settings().current_period_id
-            docs = Supporting_Document.query.filter_by(period=period).all()
+            query = Supporting_Document.query.filter_by(period=period)
+            if wants_page(cursor, limit):
+                return jsonify(message=keyset_page(query, Supporting_Document, f"supporting_documents:{period}", cursor, limit)), 200
+
+            docs = query.all()
             return jsonify(message=[d.to_dict() for d in docs]), 200
+        except InvalidCursor as e:
+            return jsonify(error=str(e)), 400
         except Exception as e:
             return jsonify(error="Collecting supporting documents failed"), 500
@@ -1,11 +1,15 @@
 from app import db, socketio
 from flask import jsonify
+from sqlalchemy import and_, case, func, literal_column
+from sqlalchemy.orm import contains_eager, joinedload, load_only, selectinload
 
 from models.PCR import IPCR, OPCR, Assigned_PCR
+from models.Tasks import Assigned_Department, Assigned_Task, Main_Task, Sub_Task
 from models.User import User
 from services.PCR.pcr_rating_service import PCRRatingService
 from services.tasks_service import Tasks_Service
 from utils import ExcelHandler
+from utils.StreamingExcelHandler import excel_handler
 
 
 class PCRGenerationService:
@@ -49,8 +53,41 @@ class PCRGenerationService:
             },
         }
 
+    def _opcr_options():
+        """
+        Everything _build_head_data and _aggregate_subtasks walk, loaded up
+        front: OPCR -> assigned_pcrs -> ipcr -> (user, sub_tasks -> main_task).
+        Each level is one statement, so the count no longer grows with the
+        number of IPCRs in the office.
+        """
+        return (
+            joinedload(OPCR.department),
+            selectinload(OPCR.ipcrs).load_only(IPCR.id),
+            selectinload(OPCR.assigned_pcrs).joinedload(Assigned_PCR.ipcr).options(
+                joinedload(IPCR.user),
+                selectinload(IPCR.sub_tasks).joinedload(Sub_Task.main_task),
+            ),
+        )
+
+    def _load_opcr(opcr_id):
+        return OPCR.query.options(*PCRGenerationService._opcr_options()).filter_by(id=opcr_id).first()
+
+    def _department_head(department_id):
+        return (
+            User.query.options(joinedload(User.position))
+            .filter_by(department_id=department_id, role="head")
+            .first()
+        )
+
+    def _latest_opcr(department_id):
+        return (
+            OPCR.query.options(joinedload(OPCR.department), selectinload(OPCR.ipcrs).load_only(IPCR.id))
+            .filter_by(department_id=department_id)
+            .order_by(OPCR.id.desc())
+            .first()
+        )
+
     def _get_dept_configs(dept_id, period):
-        from models.Tasks import Assigned_Department
         return {
             ad.main_task_id: {
                 "enable": ad.enable_formulas,
@@ -100,8 +137,6 @@ class PCRGenerationService:
         Build task_index, assigned, and categories from an OPCR's department tasks.
         Returns (task_index, assigned, categories).
         """
-        from models.Tasks import Assigned_Department
-
         task_index = {}
         assigned = {}
         categories = {}
@@ -110,6 +145,7 @@ class PCRGenerationService:
             Assigned_Department.query
             .filter_by(department_id=opcr.department_id, period=settings.current_period_id)
             .join(Assigned_Department.main_task)
+            .options(contains_eager(Assigned_Department.main_task).joinedload(Main_Task.category))
             .all()
         )
 
@@ -164,21 +200,27 @@ class PCRGenerationService:
                 task["working_days"]["actual"] += actual_days
                 task["frequency"] += 1
 
-    def _compute_task_ratings(task, settings, dept_configs, check_rating_period=False):
-        """Apply formula overrides and return updated (q, e, t, avg)."""
-        q = task["rating"]["quantity"] or 0
-        e = task["rating"]["efficiency"] or 0
-        t = task["rating"]["timeliness"] or 0
+    def _compute_task_ratings(tasks, settings, dept_configs, check_rating_period=False):
+        """Apply formula overrides and return updated (q, e, t, avg) per task, rated in one batch."""
+        ratings = [
+            [task["rating"]["quantity"] or 0, task["rating"]["efficiency"] or 0, task["rating"]["timeliness"] or 0]
+            for task in tasks
+        ]
 
-        print(task["_task_id"])
         """settings.enable_formula and not check_rating_period"""
-        if settings.enable_formula and check_rating_period:
-            tid = task["_task_id"]
-            q = PCRRatingService.compute_rating_with_override("quantity", task["summary"]["target"], task["summary"]["actual"], tid, settings, dept_configs)
-            e = PCRRatingService.compute_rating_with_override("efficiency", task["corrections"]["target"], task["corrections"]["actual"], tid, settings, dept_configs)
-            t = PCRRatingService.compute_rating_with_override("timeliness", task["working_days"]["target"], task["working_days"]["actual"], tid, settings, dept_configs)
-        
-        return q, e, t, PCRRatingService.calculateAverage(q, e, t)
+        if settings.enable_formula and check_rating_period and tasks:
+            rows = []
+            for task in tasks:
+                tid = task["_task_id"]
+                rows += [
+                    ("quantity", task["summary"]["target"], task["summary"]["actual"], tid),
+                    ("efficiency", task["corrections"]["target"], task["corrections"]["actual"], tid),
+                    ("timeliness", task["working_days"]["target"], task["working_days"]["actual"], tid),
+                ]
+            rated = PCRRatingService.compute_ratings_with_override(rows, settings, dept_configs)
+            ratings = [rated[3 * i:3 * i + 3] for i in range(len(tasks))]
+
+        return [(q, e, t, PCRRatingService.calculateAverage(q, e, t)) for q, e, t in ratings]
 
     def _finalize_data(categories, settings, dept_configs, check_rating_period=False, is_draft=False):
         """Flatten categories into data list, apply ratings, strip _task_id."""
@@ -213,29 +255,24 @@ class PCRGenerationService:
         task_index, assigned, categories = PCRGenerationService._build_opcr_structures(opcr, settings)
         PCRGenerationService._aggregate_subtasks(opcr, task_index, assigned)
 
-        # 2. Iterate through aggregated tasks and update the DB
-        for task_id, task_data in task_index.items():
-            # Only compute if there is activity (frequency > 0)
-            if task_data["frequency"] > 0:
-                print("computing opcr task")
-                q, e, t, avg = PCRGenerationService._compute_task_ratings(
-                    task_data, settings, dept_configs, True
-                )
-
-                # 3. Update the Assigned_Department record
-                ad_id = task_data["rating"]["a_dept_id"]
-                assigned_dept_record = Assigned_Department.query.get(ad_id)
-                
-                if assigned_dept_record:
-                    print(q, e, t)
-                    assigned_dept_record.quantity = q
-                    assigned_dept_record.efficiency = e
-                    assigned_dept_record.timeliness = t
-
-                    db.session.commit()
-
-                    # Weighted average calculation is usually handled during export/view, 
-                    # but we store the raw Q, E, T here.
+        # 2. Rate every aggregated task with activity (frequency > 0) and update the DB
+        active = [task_data for task_data in task_index.values() if task_data["frequency"] > 0]
+        ratings = PCRGenerationService._compute_task_ratings(active, settings, dept_configs, True)
+        for task_data, (q, e, t, avg) in zip(active, ratings):
+            # 3. Update the Assigned_Department record
+            ad_id = task_data["rating"]["a_dept_id"]
+            assigned_dept_record = Assigned_Department.query.get(ad_id)
+            
+            if assigned_dept_record:
+                print(q, e, t)
+                assigned_dept_record.quantity = q
+                assigned_dept_record.efficiency = e
+                assigned_dept_record.timeliness = t
+
+                db.session.commit()
+
+                # Weighted average calculation is usually handled during export/view, 
+                # but we store the raw Q, E, T here.
 
         try:
             db.session.commit()
@@ -248,7 +285,7 @@ class PCRGenerationService:
     def get_opcr(opcr_id):
         from models.System_Settings import System_Settings, System_Settings_Service
 
-        opcr = OPCR.query.get(opcr_id)
+        opcr = PCRGenerationService._load_opcr(opcr_id)
         settings = System_Settings.get_default_settings()
         dept_configs = PCRGenerationService._get_dept_configs(opcr.department_id, settings.current_period_id)
 
@@ -258,7 +295,7 @@ class PCRGenerationService:
         is_rating = System_Settings_Service.check_if_rating_period()
         data = PCRGenerationService._finalize_data(categories, settings, dept_configs, is_rating)
 
-        head = User.query.filter_by(department_id=opcr.department_id, role="head").first()
+        head = PCRGenerationService._department_head(opcr.department_id)
         head_data = PCRGenerationService._build_head_data(opcr, head)
 
         return jsonify(
@@ -267,7 +304,6 @@ class PCRGenerationService:
         )
 
     def get_planned_opcr_by_department(department_id):
-        from models.Tasks import Assigned_Department
         from models.System_Settings import System_Settings
 
         settings = System_Settings.get_default_settings()
@@ -283,8 +319,8 @@ class PCRGenerationService:
                 task.pop("_task_id", None)
             data.append({cat_name: meta["tasks"]})
 
-        head = User.query.filter_by(department_id=department_id, role="head").first()
-        opcr = OPCR.query.filter_by(department_id=department_id).all()[-1]
+        head = PCRGenerationService._department_head(department_id)
+        opcr = PCRGenerationService._latest_opcr(department_id)
         head_data = PCRGenerationService._build_head_data(opcr, head)
 
         return jsonify(ipcr_data=data, assigned=assigned, admin_data=head_data, form_status=1)
@@ -316,7 +352,7 @@ class PCRGenerationService:
     def generate_opcr(opcr_id):
         from models.System_Settings import System_Settings, System_Settings_Service
 
-        opcr = OPCR.query.get(opcr_id)
+        opcr = PCRGenerationService._load_opcr(opcr_id)
         settings = System_Settings.get_default_settings()
         dept_configs = PCRGenerationService._get_dept_configs(opcr.department_id, settings.current_period_id)
 
@@ -326,7 +362,7 @@ class PCRGenerationService:
         is_rating = System_Settings_Service.check_if_rating_period()
         data = PCRGenerationService._finalize_data(categories, settings, dept_configs, is_rating)
 
-        head = User.query.filter_by(department_id=opcr.department_id, role="head").first()
+        head = PCRGenerationService._department_head(opcr.department_id)
         head_data = PCRGenerationService._build_head_data(opcr, head)
 
         return ExcelHandler.createNewOPCR(data=data, assigned=assigned, admin_data=head_data)
@@ -334,7 +370,7 @@ class PCRGenerationService:
     def generate_weighted_opcr(opcr_id):
         from models.System_Settings import System_Settings
 
-        opcr = OPCR.query.get(opcr_id)
+        opcr = PCRGenerationService._load_opcr(opcr_id)
         settings = System_Settings.get_default_settings()
         dept_configs = PCRGenerationService._get_dept_configs(opcr.department_id, settings.current_period_id)
 
@@ -342,15 +378,15 @@ class PCRGenerationService:
         PCRGenerationService._aggregate_subtasks(opcr, task_index, assigned)
         data = PCRGenerationService._finalize_data(categories, settings, dept_configs)
 
-        head = User.query.filter_by(department_id=opcr.department_id, role="head").first()
+        head = PCRGenerationService._department_head(opcr.department_id)
         head_data = PCRGenerationService._build_head_data(opcr, head)
 
-        return ExcelHandler.createNewWeightedOPCR(data=data, assigned=assigned, admin_data=head_data)
+        return excel_handler("weighted_opcr").createNewWeightedOPCR(data=data, assigned=assigned, admin_data=head_data)
 
     def new_generate_opcr(opcr_id, is_weighted=False, is_draft=False):
         from models.System_Settings import System_Settings, System_Settings_Service
 
-        opcr = OPCR.query.get(opcr_id)
+        opcr = PCRGenerationService._load_opcr(opcr_id)
         if not opcr:
             return None
 
@@ -364,11 +400,11 @@ class PCRGenerationService:
         is_rating = System_Settings_Service.check_if_rating_period()
         data = PCRGenerationService._finalize_data(categories, settings, dept_configs, is_rating, is_draft)
 
-        head = User.query.filter_by(department_id=opcr.department_id, role="head").first()
+        head = PCRGenerationService._department_head(opcr.department_id)
         head_data = PCRGenerationService._build_head_data(opcr, head)
 
         if is_weighted:
-            return ExcelHandler.createNewWeightedOPCR(data=data, assigned=assigned, admin_data=head_data)
+            return excel_handler("weighted_opcr").createNewWeightedOPCR(data=data, assigned=assigned, admin_data=head_data)
         return ExcelHandler.createNewOPCR(data=data, assigned=assigned, admin_data=head_data)
 
     def generate_planned_opcr_by_department(department_id):
@@ -384,29 +420,34 @@ class PCRGenerationService:
                 task.pop("_task_id", None)
             data.append({cat_name: meta["tasks"]})
 
-        head = User.query.filter_by(department_id=department_id, role="head").first()
-        opcr = OPCR.query.filter_by(department_id=department_id).all()[-1]
+        head = PCRGenerationService._department_head(department_id)
+        opcr = PCRGenerationService._latest_opcr(department_id)
         head_data = PCRGenerationService._build_head_data(opcr, head)
 
         return ExcelHandler.createNewOPCR(data=data, assigned=assigned, admin_data=head_data)
 
-    def generate_master_opcr():
-        try:
-            from models.System_Settings import System_Settings
+    def build_master_opcr():
+        """Writes and uploads the master OPCR workbook; returns its link, or None if there is no OPCR to consolidate."""
+        from models.System_Settings import System_Settings
 
-            settings = System_Settings.get_default_settings()
-            period = settings.current_period_id
-            opcrs = OPCR.query.filter_by(status=1, isMain=True, period=period).all()
+        settings = System_Settings.get_default_settings()
+        period = settings.current_period_id
+        opcrs = OPCR.query.filter_by(status=1, isMain=True, period=period).all()
 
-            if not opcrs:
-                return jsonify(error="There is no OPCR to consolidate"), 400
+        if not opcrs:
+            return None
 
-            data, assigned, task_index = PCRGenerationService._build_master_data(opcrs, period, settings)
-            head_data = PCRGenerationService._build_master_head_data(settings)
+        data, assigned, task_index = PCRGenerationService._build_master_data(opcrs, period, settings)
+        head_data = PCRGenerationService._build_master_head_data(settings)
 
-            return jsonify(link=ExcelHandler.createNewMasterOPCR(
-                data=data, assigned=assigned, admin_data=head_data
-            )), 200
+        return excel_handler("master_opcr").createNewMasterOPCR(data=data, assigned=assigned, admin_data=head_data)
+
+    def generate_master_opcr():
+        try:
+            link = PCRGenerationService.build_master_opcr()
+            if link is None:
+                return jsonify(error="There is no OPCR to consolidate"), 400
+            return jsonify(link=link), 200
 
         except Exception as e:
             return jsonify(error=str(e)), 500
@@ -421,13 +462,17 @@ class PCRGenerationService:
 
     def _build_planned_structures(department_id, settings):
         """Build task structures for a planned (draft) OPCR with only target data."""
-        from models.Tasks import Assigned_Department
-
         task_index = {}
         assigned = {}
         categories = {}
 
-        dept_tasks = Assigned_Department.query.filter_by(
+        dept_tasks = Assigned_Department.query.options(
+            joinedload(Assigned_Department.main_task).options(
+                joinedload(Main_Task.category),
+                selectinload(Main_Task.sub_tasks),
+                selectinload(Main_Task.assigned_tasks).joinedload(Assigned_Task.user).joinedload(User.department),
+            )
+        ).filter_by(
             department_id=department_id, period=settings.current_period_id
         ).all()
 
@@ -438,7 +483,11 @@ class PCRGenerationService:
                 continue
 
             categories.setdefault(cat.name, {"priority": cat.priority_order, "tasks": []})
-            assigned[mt.mfo] = [u["full_name"] for u in mt.get_users_by_dept(department_id)]
+            # same names as mt.get_users_by_dept, without serializing each user
+            assigned[mt.mfo] = [
+                at.user.full_name() for at in mt.assigned_tasks
+                if at.user and at.user.department and str(at.user.department.id) == str(department_id)
+            ]
 
             task = {
                 "title": mt.mfo,
@@ -494,6 +543,101 @@ class PCRGenerationService:
             "_task_id": main_task.id,
         }
 
+    def _days_between(later, earlier):
+        """
+        SQL for (later - earlier).days: whole days, floored like timedelta.
+        MySQL and SQLite only, the two backends this app runs on.
+        """
+        if db.engine.dialect.name == "mysql":
+            seconds = func.timestampdiff(literal_column("SECOND"), earlier, later)
+            div = "DIV"
+        else:
+            seconds = func.strftime("%s", later) - func.strftime("%s", earlier)
+            div = "/"
+
+        def whole_days(value):
+            # integer division; precedence 8 (that of "/") keeps "a - b" parenthesized
+            return value.op(div, precedence=8)(86400)
+
+        return case(
+            (seconds >= 0, whole_days(seconds)),
+            else_=-whole_days(86399 - seconds),
+        )
+
+    def _submitted_ipcr():
+        # NULLs pass, as they did in the Python checks
+        return func.coalesce(IPCR.status, 1) != 0, func.coalesce(IPCR.form_status, "") != "draft"
+
+    def _master_rows(opcr_ids, period):
+        """
+        One grouped statement over sub_tasks -> ipcr -> assigned_pcrs -> opcr,
+        joined to main_tasks and categories: per-MFO sums of every sub-task of
+        a submitted IPCR assigned to one of the given OPCRs. An IPCR assigned
+        twice is counted twice, as the per-object walk did.
+        """
+        from models.Categories import Category
+
+        deadline_days = PCRGenerationService._days_between(Sub_Task.actual_deadline, Main_Task.target_deadline)
+        actual_days = case(
+            (
+                and_(
+                    Main_Task.timeliness_mode == "deadline",
+                    Sub_Task.actual_deadline.isnot(None),
+                    Main_Task.target_deadline.isnot(None),
+                ),
+                deadline_days,
+            ),
+            else_=func.coalesce(Sub_Task.actual_time, 0),
+        )
+
+        def total(column):
+            return func.coalesce(func.sum(column), 0)
+
+        return (
+            db.session.query(
+                Sub_Task.main_task_id.label("main_task_id"),
+                total(Sub_Task.target_acc).label("target_acc"),
+                total(Sub_Task.actual_acc).label("actual_acc"),
+                total(Sub_Task.target_mod).label("target_mod"),
+                total(Sub_Task.actual_mod).label("actual_mod"),
+                total(Sub_Task.target_time).label("target_time"),
+                total(actual_days).label("actual_days"),
+                func.count(Sub_Task.id).label("frequency"),
+            )
+            .join(IPCR, Sub_Task.ipcr_id == IPCR.id)
+            .join(Assigned_PCR, Assigned_PCR.ipcr_id == IPCR.id)
+            .join(Main_Task, Sub_Task.main_task_id == Main_Task.id)
+            .join(Category, Main_Task.category_id == Category.id)
+            .filter(
+                Assigned_PCR.opcr_id.in_(opcr_ids),
+                *PCRGenerationService._submitted_ipcr(),
+                Category.status == 1,
+                Category.period == period,
+                func.coalesce(Main_Task.status, 1) != 0,
+            )
+            .group_by(Sub_Task.main_task_id)
+            .all()
+        )
+
+    def _master_assigned(opcr_ids):
+        """MFO -> names of the users whose submitted IPCRs carry it, sorted."""
+        rows = (
+            db.session.query(Main_Task.mfo, User.first_name, User.last_name)
+            .select_from(Sub_Task)
+            .join(Main_Task, Sub_Task.main_task_id == Main_Task.id)
+            .join(IPCR, Sub_Task.ipcr_id == IPCR.id)
+            .join(User, IPCR.user_id == User.id)
+            .join(Assigned_PCR, Assigned_PCR.ipcr_id == IPCR.id)
+            .filter(Assigned_PCR.opcr_id.in_(opcr_ids), *PCRGenerationService._submitted_ipcr())
+            .distinct()
+            .all()
+        )
+
+        assigned = {}
+        for mfo, first_name, last_name in rows:
+            assigned.setdefault(mfo, set()).add(f"{first_name} {last_name}")
+        return {mfo: sorted(names) for mfo, names in assigned.items()}
+
     def _build_master_data(opcrs, period, settings):
         """Build master OPCR data across all departments."""
         from models.Categories import Category
@@ -501,7 +645,7 @@ class PCRGenerationService:
         task_index = {}
         data = []
 
-        categories = Category.query.filter_by(status=1, period=period).order_by(
+        categories = Category.query.options(selectinload(Category.main_tasks)).filter_by(status=1, period=period).order_by(
             Category.priority_order.desc()
         ).all()
 
@@ -515,46 +659,19 @@ class PCRGenerationService:
                 task_index[mt.id] = task
             data.append({cat.name: task_list})
 
-        # Collect assigned users
-        assigned = {}
-        for opcr in opcrs:
-            for apcr in opcr.assigned_pcrs:
-                ipcr = apcr.ipcr
-                if ipcr.status == 0 or ipcr.form_status == "draft":
-                    continue
-                for sub in ipcr.sub_tasks:
-                    name = f"{ipcr.user.first_name} {ipcr.user.last_name}"
-                    assigned.setdefault(sub.main_task.mfo, set()).add(name)
-
-        assigned = {k: list(v) for k, v in assigned.items()}
+        opcr_ids = [opcr.id for opcr in opcrs]
+        assigned = PCRGenerationService._master_assigned(opcr_ids)
 
         # Aggregate subtask data
-        for opcr in opcrs:
-            for apcr in opcr.assigned_pcrs:
-                ipcr = apcr.ipcr
-                if ipcr.status == 0 or ipcr.form_status == "draft":
-                    continue
-                for sub in ipcr.sub_tasks:
-                    task = task_index.get(sub.main_task.id)
-                    if not task:
-                        continue
-
-                    if (
-                        sub.main_task.timeliness_mode == "deadline"
-                        and sub.actual_deadline
-                        and sub.main_task.target_deadline
-                    ):
-                        actual_days = (sub.actual_deadline - sub.main_task.target_deadline).days
-                    else:
-                        actual_days = sub.actual_time or 0
-
-                    task["summary"]["target"] += sub.target_acc
-                    task["summary"]["actual"] += sub.actual_acc
-                    task["corrections"]["target"] += sub.target_mod
-                    task["corrections"]["actual"] += sub.actual_mod
-                    task["working_days"]["target"] += sub.target_time
-                    task["working_days"]["actual"] += actual_days
-                    task["frequency"] += 1
+        for row in PCRGenerationService._master_rows(opcr_ids, period):
+            task = task_index.get(row.main_task_id)
+            if not task:
+                continue
+
+            task["summary"] = {"target": int(row.target_acc), "actual": int(row.actual_acc)}
+            task["corrections"] = {"target": int(row.target_mod), "actual": int(row.actual_mod)}
+            task["working_days"] = {"target": int(row.target_time), "actual": int(row.actual_days)}
+            task["frequency"] = int(row.frequency)
 
         # Compute ratings
         for task in task_index.values():
@@ -10,6 +10,15 @@ class PCRRatingService:
         res = engine.compute_rating(formula=formula, target=target, actual=actual)
         return res if res is not None else 0
 
+    def compute_ratings_with_override(rows, settings, dept_configs):
+        """Batch form of compute_rating_with_override for (metric, target, actual, task_id) rows."""
+        formulas = []
+        for metric, _, _, task_id in rows:
+            dept_cfg = dept_configs.get(task_id)
+            formulas.append(dept_cfg[metric] if (dept_cfg and dept_cfg["enable"]) else getattr(settings, f"{metric}_formula"))
+        ratings = Formula_Engine().compute_ratings_many(formulas, [r[1] for r in rows], [r[2] for r in rows])
+        return [res if res is not None else 0 for res in ratings]
+
     def compute_quantity_rating(target, actual, settings):
         return Formula_Engine().compute_rating(
             formula=settings.quantity_formula, target=target, actual=actual
@@ -0,0 +1,90 @@
+from app import db
+from flask import jsonify
+from sqlalchemy.orm import joinedload
+
+from models.PCR import IPCR, OPCR
+from models.User import User
+
+
+def _department_key(dept_id):
+    """Department ids arrive as form/JSON strings too; heads are keyed by int."""
+    return int(dept_id) if dept_id not in (None, "") else None
+
+
+class PCRSignatoryService:
+    """
+    Signatory names are materialized on the IPCR/OPCR rows at write time so
+    to_dict stays a pure read. Anything that changes who signs (PCR creation,
+    head changes, renamed users, settings/period changes) refreshes the rows
+    here before committing.
+    """
+
+    def _heads_by_department():
+        heads = {}
+        for head in User.query.filter_by(role="head").options(joinedload(User.position)).all():
+            heads.setdefault(_department_key(head.department_id), head)
+        return heads
+
+    def _refresh(ipcrs, opcrs, settings, heads):
+        for ipcr in ipcrs:
+            ipcr.refresh_signatories(settings, heads.get(_department_key(ipcr.user.department_id)))
+        for opcr in opcrs:
+            opcr.refresh_signatories(settings, heads.get(_department_key(opcr.department_id)))
+        return len(ipcrs) + len(opcrs)
+
+    def _ipcr_query():
+        return IPCR.query.join(IPCR.user).options(
+            joinedload(IPCR.user).joinedload(User.position)
+        )
+
+    def refresh_department(dept_id, settings=None):
+        """Refreshes every IPCR of the department's members and every OPCR of the department. Does not commit."""
+        from models.System_Settings import System_Settings
+
+        dept_id = _department_key(dept_id)
+        settings = settings or System_Settings.get_default_settings()
+        head = User.query.filter_by(department_id=dept_id, role="head").first() if dept_id else None
+
+        ipcrs = PCRSignatoryService._ipcr_query().filter(User.department_id == dept_id).all()
+        opcrs = OPCR.query.filter_by(department_id=dept_id).all() if dept_id else []
+        return PCRSignatoryService._refresh(ipcrs, opcrs, settings, {dept_id: head})
+
+    def refresh_departments(*dept_ids, settings=None):
+        return sum(
+            PCRSignatoryService.refresh_department(dept_id, settings)
+            for dept_id in dict.fromkeys(_department_key(d) for d in dept_ids)
+        )
+
+    def refresh_period(period, settings=None):
+        """Refreshes the IPCRs and OPCRs of one period; used when the president or mayor changes. Does not commit."""
+        from models.System_Settings import System_Settings
+
+        settings = settings or System_Settings.get_default_settings()
+        return PCRSignatoryService._refresh(
+            PCRSignatoryService._ipcr_query().filter(IPCR.period == period).all(),
+            OPCR.query.filter_by(period=period).all(),
+            settings,
+            PCRSignatoryService._heads_by_department(),
+        )
+
+    def refresh_all(settings=None):
+        """Refreshes every IPCR and OPCR, e.g. from `flask refresh-signatories`. Does not commit."""
+        from models.System_Settings import System_Settings
+
+        settings = settings or System_Settings.get_default_settings()
+        return PCRSignatoryService._refresh(
+            PCRSignatoryService._ipcr_query().all(),
+            OPCR.query.all(),
+            settings,
+            PCRSignatoryService._heads_by_department(),
+        )
+
+    def refresh_department_signatories(dept_id):
+        try:
+            count = PCRSignatoryService.refresh_department(dept_id)
+            db.session.commit()
+            return jsonify(message="Signatories successfully refreshed.", refreshed=count), 200
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify(error=str(e)), 500
@@ -1,7 +1,7 @@
 from app import db, socketio
 from sqlalchemy.exc import OperationalError, DataError
 from flask import jsonify
-from models.Tasks import Main_Task, Assigned_Task, Assigned_Department, Output, Sub_Task
+from models.Tasks import Main_Task, Assigned_Task, Assigned_Department, Output, Sub_Task, Formula_Registry
 from models.User import User
 from models.Notification import Notification, Notification_Service
 
@@ -219,6 +219,7 @@ class TaskAssignmentService:
             TaskAssignmentService._check_if_ipcrs_have_tasks()
 
             db.session.commit()
+            Formula_Registry.for_app().invalidate(int(dept_id))
             socketio.emit("task_modified", "task modified")
             socketio.emit("department_assigned", "task modified")
             Notification_Service.notify_department(
@@ -2,7 +2,7 @@ from app import db, socketio
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError, OperationalError, DataError
 from flask import jsonify
-from models.Tasks import Main_Task, Assigned_Department, Assigned_Task, Output
+from models.Tasks import Main_Task, Assigned_Department, Assigned_Task, Output, Formula_Registry
 from models.Notification import Notification, Notification_Service
 
 
@@ -132,21 +132,21 @@ class TaskCRUDService:
                         period=current_settings.current_period_id,
                     ))
 
-            for dept_id in all_previous_department:
-                if dept_id not in updated_departments:
-                    found_ad = Assigned_Department.query.filter_by(
-                        main_task_id=int(data["id"]), department_id=dept_id
-                    ).first()
-                    db.session.delete(found_ad)
+            removed_departments = [d for d in all_previous_department if d not in updated_departments]
+            for dept_id in removed_departments:
+                found_ad = Assigned_Department.query.filter_by(
+                    main_task_id=int(data["id"]), department_id=dept_id
+                ).first()
+                db.session.delete(found_ad)
 
-                    for ass_task in Assigned_Task.query.filter_by(main_task_id=int(data["id"])).all():
-                        if ass_task.user.department.id == dept_id:
-                            db.session.delete(ass_task)
+                for ass_task in Assigned_Task.query.filter_by(main_task_id=int(data["id"])).all():
+                    if ass_task.user.department.id == dept_id:
+                        db.session.delete(ass_task)
 
-                        for output in Output.query.filter_by(
-                            user_id=ass_task.user.id, main_task_id=data["id"]
-                        ).all():
-                            db.session.delete(output)
+                    for output in Output.query.filter_by(
+                        user_id=ass_task.user.id, main_task_id=data["id"]
+                    ).all():
+                        db.session.delete(output)
 
             field_map = {
                 "name": "mfo",
@@ -179,6 +179,8 @@ class TaskCRUDService:
 
             socketio.emit("category", "update")
             db.session.commit()
+            for dept_id in removed_departments:
+                Formula_Registry.for_app().invalidate(dept_id)
             Notification_Service.notify_everyone(msg=f"The task: {found_task.mfo} has been updated.")
             return jsonify(message="Task successfully updated."), 200
 
@@ -241,6 +243,7 @@ class TaskCRUDService:
                 setattr(found_task, field, value)
 
             db.session.commit()
+            Formula_Registry.for_app().invalidate(found_task.department_id)
             socketio.emit("rating", "change")
             return jsonify(message="Updated Successfully"), 200
 
@@ -257,6 +260,7 @@ class TaskCRUDService:
             assigned_dept.timeliness_formula = data.get("timeliness_formula", assigned_dept.timeliness_formula)
 
             db.session.commit()
+            Formula_Registry.for_app().invalidate(assigned_dept.department_id)
             return jsonify(message="Formula successfully updated."), 200
 
         except Exception as e:
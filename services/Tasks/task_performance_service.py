@@ -216,11 +216,14 @@ class TaskPerformanceService:
         totals = {"quantity": 0, "efficiency": 0, "timeliness": 0, "average": 0}
         count = 0
 
-        for sub_task in main_task.sub_tasks:
+        if settings.enable_formula:
+            ratings = Sub_Task.calculate_all(main_task.sub_tasks, settings)
+        for i, sub_task in enumerate(main_task.sub_tasks):
             if settings.enable_formula:
-                totals["quantity"] += sub_task.calculateQuantity()
-                totals["efficiency"] += sub_task.calculateEfficiency()
-                totals["timeliness"] += sub_task.calculateTimeliness()
+                quantity, efficiency, timeliness = ratings[i]
+                totals["quantity"] += quantity
+                totals["efficiency"] += efficiency
+                totals["timeliness"] += timeliness
             else:
                 totals["quantity"] += sub_task.quantity if sub_task.quantity else 0
                 totals["efficiency"] += sub_task.efficiency if sub_task.efficiency else 0
@@ -266,70 +269,78 @@ class TaskPerformanceService:
             "overall_average": round(results.avg_overall or 0, 2),
         }
 
-    def _build_task_summary(task, settings):
-        """Compute performance totals for a single main task across its sub_tasks."""
-        totals = {"quantity": 0, "efficiency": 0, "timeliness": 0, "average": 0}
-        count = 0
-
-        for sub_task in task.sub_tasks:
-            target_working_days = 0
-            actual_working_days = 0
-
-            if task.timeliness_mode == "timeframe":
-                timeliness = sub_task.calculate_with_override(
-                    "timeliness", sub_task.target_time, sub_task.actual_time
-                )
-            elif sub_task.actual_deadline and sub_task.main_task.target_deadline:
-                days_late = (sub_task.actual_deadline - sub_task.main_task.target_deadline).days
-                actual_working_days = days_late
-                target_working_days = 1
-                timeliness = sub_task.timeliness
+    def _build_task_summaries(tasks, settings):
+        """
+        Compute performance totals for each main task across its sub_tasks.
+        The formula ratings of every task are computed together in one
+        Sub_Task.calculate_many batch.
+        """
+        entries, requests, slots = [], [], []
+
+        for task in tasks:
+            for sub_task in task.sub_tasks:
+                ratings = {"quantity": sub_task.quantity, "efficiency": sub_task.efficiency, "timeliness": 0}
+                working_days = (0, 0)
+
+                if task.timeliness_mode == "timeframe":
+                    if not settings.enable_formula:   # otherwise rated from working_days below
+                        requests.append((sub_task, "timeliness", sub_task.target_time, sub_task.actual_time))
+                        slots.append(ratings)
+                elif sub_task.actual_deadline and sub_task.main_task.target_deadline:
+                    days_late = (sub_task.actual_deadline - sub_task.main_task.target_deadline).days
+                    working_days = (1, days_late)
+                    ratings["timeliness"] = sub_task.timeliness
+
+                if settings.enable_formula:
+                    requests += [
+                        (sub_task, "quantity", sub_task.target_acc, sub_task.actual_acc),
+                        (sub_task, "efficiency", sub_task.target_mod, sub_task.actual_mod),
+                        (sub_task, "timeliness", *working_days),
+                    ]
+                    slots += [ratings] * 3
+
+                entries.append((task, sub_task, ratings))
+
+        rated = Sub_Task.calculate_many(requests, settings.current_period_id, settings) if requests else []
+        for ratings, (_, metric, _, _), rating in zip(slots, requests, rated):
+            ratings[metric] = rating
+
+        totals = {task.id: {"quantity": 0, "efficiency": 0, "timeliness": 0, "average": 0, "count": 0} for task in tasks}
+        for task, sub_task, ratings in entries:
+            task_totals = totals[task.id]
+            for metric in ("quantity", "efficiency", "timeliness"):
+                task_totals[metric] += ratings[metric] if ratings[metric] else 0
+            task_totals["average"] += sub_task.calculateAverage()
+            task_totals["count"] += 1
+
+        summaries = []
+        for task in tasks:
+            base = {
+                "task_id": task.id,
+                "category_id": task.category_id,
+                "task_name": task.mfo,
+            }
+            task_totals = totals[task.id]
+            count = task_totals["count"]
+
+            if count > 0:
+                summaries.append({**base, **{
+                    "average_quantity": round(task_totals["quantity"] / count, 2),
+                    "average_efficiency": round(task_totals["efficiency"] / count, 2),
+                    "average_timeliness": round(task_totals["timeliness"] / count, 2),
+                    "overall_average": round(task_totals["average"] / count, 2),
+                }})
             else:
-                timeliness = 0
-
-            quantity = sub_task.quantity
-            efficiency = sub_task.efficiency
-
-            if settings.enable_formula:
-                quantity = sub_task.calculate_with_override(
-                    "quantity", sub_task.target_acc, sub_task.actual_acc
-                )
-                efficiency = sub_task.calculate_with_override(
-                    "efficiency", sub_task.target_mod, sub_task.actual_mod
-                )
-                timeliness = sub_task.calculate_with_override(
-                    "timeliness", target_working_days, actual_working_days
-                )
-
-            totals["quantity"] += quantity if quantity else 0
-            totals["efficiency"] += efficiency if efficiency else 0
-            totals["timeliness"] += timeliness if timeliness else 0
-            totals["average"] += sub_task.calculateAverage()
-            count += 1
-
-        base = {
-            "task_id": task.id,
-            "category_id": task.category_id,
-            "task_name": task.mfo,
-        }
-
-        if count > 0:
-            return {**base, **{
-                "average_quantity": round(totals["quantity"] / count, 2),
-                "average_efficiency": round(totals["efficiency"] / count, 2),
-                "average_timeliness": round(totals["timeliness"] / count, 2),
-                "overall_average": round(totals["average"] / count, 2),
-            }}
-
-        return {**base, "average_quantity": 0, "average_efficiency": 0,
-                "average_timeliness": 0, "overall_average": 0}
+                summaries.append({**base, "average_quantity": 0, "average_efficiency": 0,
+                                  "average_timeliness": 0, "overall_average": 0})
+        return summaries
 
     def get_all_tasks_average_summary():
         from models.System_Settings import System_Settings
 
         settings = System_Settings.get_default_settings()
         all_tasks = Main_Task.query.filter_by(status=1, period=settings.current_period_id).all()
-        data = [TaskPerformanceService._build_task_summary(task, settings) for task in all_tasks]
+        data = TaskPerformanceService._build_task_summaries(all_tasks, settings)
         return jsonify(data), 200
 
     def calculate_all_tasks_average_summary():
@@ -337,7 +348,7 @@ class TaskPerformanceService:
 
         settings = System_Settings.get_default_settings()
         all_tasks = Main_Task.query.filter_by(status=1, period=settings.current_period_id).all()
-        return [TaskPerformanceService._build_task_summary(task, settings) for task in all_tasks]
+        return TaskPerformanceService._build_task_summaries(all_tasks, settings)
 
     @staticmethod
     def get_user_performance_history(user_id, start_date=None, end_date=None):
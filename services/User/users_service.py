@@ -11,10 +11,20 @@ from datetime import timezone, timedelta, datetime
 
 from models.User import User, Profile
 from models.Notification import Notification_Service
+from services.PCR.pcr_signatory_service import PCRSignatoryService
 from utils.FileStorage import upload_profile_pic
 from utils.Generate import generate_default_password
+from utils.Pagination import InvalidCursor, keyset_page, wants_page
 from utils.Email import send_email, send_email_account_creation, send_templated_reset_email
 from models.Logs import Log_Service
+from sqlalchemy import func
+
+
+LANDING_DEPARTMENT_KEYS = {
+    "College of Computing Studies ": "cs",
+    "College of Education ": "educ",
+    "College of Hospitality Management": "hm",
+}
 
 
 JWT_EXPIRY_HOURS = os.getenv("JWT_EXPIRY_HOURS", 8)
@@ -72,9 +82,13 @@ class Users:
         except Exception as e:
             return jsonify(error=str(e)), 500
 
-    def get_all_users():
+    def get_all_users(cursor=None, limit=None):
         try:
+            if wants_page(cursor, limit):
+                return jsonify(keyset_page(User.query, User, "users", cursor, limit)), 200
             return jsonify([u.to_dict() for u in User.query.all()]), 200
+        except InvalidCursor as e:
+            return jsonify(error=str(e)), 400
         except OperationalError:
             return jsonify(error="Database connection error"), 500
         except Exception as e:
@@ -169,6 +183,9 @@ class Users:
 
             db.session.add(new_user)
 
+            if new_user.role == "head":
+                PCRSignatoryService.refresh_department(new_user.department_id)
+
             send_email_account_creation(
                 data["email"],
                 f"Hello! Your default password is: {new_default_password}",
@@ -229,6 +246,8 @@ class Users:
             if not user:
                 return jsonify(error="There is no user with that ID"), 400
 
+            previous_dept_id = user.department_id
+
             profile = rq.files.get("profile_picture_link")
             if profile:
                 user.profile.profile_picture_link = Users._upload_profile_picture(
@@ -272,6 +291,9 @@ class Users:
 
                     user.department_id = new_dept_id
 
+            if any(field in data for field in ("first_name", "last_name", "middle_name", "role", "position", "department")):
+                PCRSignatoryService.refresh_departments(previous_dept_id, user.department_id)
+
             db.session.commit()
             socketio.emit("user_modified", "modified")
             socketio.emit("user_updated", "modified")
@@ -691,13 +713,15 @@ class Users:
                 return jsonify(message="There is no user with that id."), 400
 
             user.role = "head"
+            PCRSignatoryService.refresh_departments(user.department_id, department.id)
             db.session.commit()
 
             full = user.full_name()
             Notification_Service.notify_user(user.id, f"This account is now the office head of {department.name}.")
-            Notification_Service.notify_department(department.id, f"{full} has been assigned as the new office head of {department.name}.")
-            Notification_Service.notify_heads(f"{full} has been assigned as the new office head of {department.name}.")
-            Notification_Service.notify_presidents(f"{full} has been assigned as the new office head of {department.name}.")
+            Notification_Service.notify_audience(
+                f"{full} has been assigned as the new office head of {department.name}.",
+                departments=[department.id], roles=["head", "president"],
+            )
             socketio.emit("department", "office head assigned")
             return jsonify(message="Office head successfully assigned."), 200
 
@@ -715,6 +739,7 @@ class Users:
                 return jsonify(message="There is no user with that id."), 400
 
             user.role = "faculty"
+            PCRSignatoryService.refresh_department(user.department_id)
             db.session.commit()
 
             full = user.full_name()
@@ -733,21 +758,23 @@ class Users:
             return jsonify(error=str(e)), 500
 
     def count_users_by_depts():
-        all_users = [u.to_dict() for u in User.query.all()]
-        counts = {"cs": 0, "educ": 0, "hm": 0, "other": 0}
-        dept_map = {
-            "College of Computing Studies ": "cs",
-            "College of Education ": "educ",
-            "College of Hospitality Management": "hm",
-        }
+        from models.Departments import Department
+
+        rows = (
+            db.session.query(Department.id, Department.name, func.count(User.id))
+            .join(User, User.department_id == Department.id)
+            .group_by(Department.id, Department.name)
+            .all()
+        )
+        total = db.session.query(func.count(User.id)).scalar()
 
-        for user in all_users:
-            if user["department"] == "NONE":
-                continue
-            key = dept_map.get(user["department"]["name"], "other")
-            counts[key] += 1
+        # cs/educ/hm/other are kept for the landing page; "departments" lists every office
+        counts = {"cs": 0, "educ": 0, "hm": 0, "other": 0}
+        for _, name, count in rows:
+            counts[LANDING_DEPARTMENT_KEYS.get(name, "other")] += count
 
-        return jsonify(message={**counts, "all": len(all_users)}), 200
+        departments = [{"id": dept_id, "name": name, "count": count} for dept_id, name, count in rows]
+        return jsonify(message={**counts, "all": total, "departments": departments}), 200
 
     # Profile Management Methods
     def get_profile(profile_id):
@@ -828,6 +855,8 @@ class Users:
             print("SDATA TO UPDATE",data)
             if not user:
                 return jsonify(error="User not found"), 404
+
+            previous_dept_id = user.department_id
             
             # Update allowed fields
             if "first_name" in data:
@@ -846,6 +875,8 @@ class Users:
             
             if "department_id" in data:
                 user.department_id = data["department_id"]
+
+            PCRSignatoryService.refresh_departments(previous_dept_id, user.department_id)
             
             db.session.commit()
             socketio.emit("user_modified", "user settings updated")
@@ -1012,6 +1043,8 @@ class Users:
             )
             
             db.session.add(new_user)
+            if new_user.role == "head":
+                PCRSignatoryService.refresh_department(new_user.department_id)
             db.session.commit()
             
             socketio.emit("user_created", "user added")
@@ -1034,11 +1067,16 @@ class Users:
             if not user:
                 return jsonify(error="User not found in this profile"), 404
             
+            previous_dept_id = user.department_id
+
             # Update allowed fields
             allowed_fields = ["first_name", "last_name", "middle_name", "position_id", "department_id", "role", "account_status"]
             for field in allowed_fields:
                 if field in data:
                     setattr(user, field, data[field])
+
+            if any(field in data for field in ("first_name", "last_name", "middle_name", "position_id", "department_id", "role")):
+                PCRSignatoryService.refresh_departments(previous_dept_id, user.department_id)
             
             db.session.commit()
             socketio.emit("user_modified", "user updated")
@@ -8,6 +8,7 @@ from services.PCR.pcr_crud_service import PCRCRUDService
 from services.PCR.pcr_workflow_service import PCRWorkflowService
 from services.PCR.pcr_generation_service import PCRGenerationService
 from services.PCR.pcr_analytics_service import PCRAnalyticsService
+from services.PCR.pcr_signatory_service import PCRSignatoryService
 
 
 class PCR_Service:
@@ -39,6 +40,7 @@ class PCR_Service:
     archive_document                    = staticmethod(PCRCRUDService.archive_document)
     collect_all_supporting_documents_by_department = staticmethod(PCRCRUDService.collect_all_supporting_documents_by_department)
     collect_all_supporting_documents    = staticmethod(PCRCRUDService.collect_all_supporting_documents)
+    refresh_department_signatories      = staticmethod(PCRSignatoryService.refresh_department_signatories)
 
     # Workflow
     reject_ipcr                         = staticmethod(PCRWorkflowService.reject_ipcr)
@@ -67,6 +69,7 @@ class PCR_Service:
     generate_weighted_opcr              = staticmethod(PCRGenerationService.generate_weighted_opcr)
     generate_planned_opcr_by_department = staticmethod(PCRGenerationService.generate_planned_opcr_by_department)
     generate_master_opcr                = staticmethod(PCRGenerationService.generate_master_opcr)
+    build_master_opcr                   = staticmethod(PCRGenerationService.build_master_opcr)
     new_generate_opcr                   = staticmethod(PCRGenerationService.new_generate_opcr)
 
     # Analytics
@@ -0,0 +1,107 @@
+from models.Jobs import Report_Job_Error
+
+
+# signatory block the IPCR download routes have always passed in
+IPCR_INDIVIDUALS = {
+    "review": {"name": "Arman Bitancur", "position": "Librarian II", "date": ""},
+    "approve": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
+    "discuss": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
+    "assess": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
+    "final": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" },
+    "confirm": {"name": "Arman Bitancur", "position": "Librarian II", "date": "" }
+}
+
+
+def _no_progress(done, total):
+    pass
+
+
+def _ipcr(params, progress):
+    from utils import NewExcelHandler
+
+    if params.get("weighted"):
+        return {"url": NewExcelHandler.createWeightedIPCR_from_db(ipcr_id=params["ipcr_id"], individuals=IPCR_INDIVIDUALS)}
+    return {"url": NewExcelHandler.createNewIPCR_from_db(
+        ipcr_id=params["ipcr_id"], individuals=IPCR_INDIVIDUALS, is_draft=bool(params.get("draft")),
+    )}
+
+
+def _opcr(params, progress):
+    from services.pcr_service import PCR_Service
+
+    link = PCR_Service.new_generate_opcr(opcr_id=params["opcr_id"], is_weighted=bool(params.get("weighted")), is_draft=False)
+    return {"url": link}
+
+
+def _planned_opcr(params, progress):
+    from services.pcr_service import PCR_Service
+
+    return {"url": PCR_Service.generate_planned_opcr_by_department(department_id=params["department_id"])}
+
+
+def _master_opcr(params, progress):
+    from services.pcr_service import PCR_Service
+
+    link = PCR_Service.build_master_opcr()
+    if link is None:
+        raise Report_Job_Error("There is no OPCR to consolidate")
+    return {"url": link}
+
+
+def _supporting_documents(compiler, params):
+    """Documents and report title for an IPCR or a department, collected by the given compiler module."""
+    if params.get("ipcr_id") is not None:
+        from models.PCR import IPCR
+
+        docs = compiler.collect_by_ipcr(ipcr_id=params["ipcr_id"])
+        ipcr = IPCR.query.get(params["ipcr_id"])
+        title = f"Supporting Documents — {ipcr.user.full_name()}" if ipcr else "Supporting Documents Report"
+    else:
+        from models.Departments import Department
+
+        docs = compiler.collect_by_department(dept_id=params["dept_id"])
+        dept = Department.query.get(params["dept_id"])
+        title = f"Supporting Documents — {dept.name}" if dept else "Supporting Documents Report"
+
+    if not docs:
+        raise Report_Job_Error("No supporting documents to compile.")
+    return docs, title
+
+
+def _supporting_document_docx(params, progress):
+    from utils import SupportDocCompiler
+
+    docs, title = _supporting_documents(SupportDocCompiler, params)
+    content = SupportDocCompiler.build_document(docs, report_title=title, progress=progress)
+    if not content:
+        raise Report_Job_Error("No supporting documents could be compiled.")
+    return {"content": content, "filename": SupportDocCompiler.DOCX_NAME, "mimetype": SupportDocCompiler.DOCX_MIMETYPE}
+
+
+def _supporting_document_pptx(params, progress):
+    from utils import PresentationCompiler
+
+    docs, title = _supporting_documents(PresentationCompiler, params)
+    content = PresentationCompiler.build_presentation(docs, report_title=title, progress=progress)
+    if not content:
+        raise Report_Job_Error("No supporting documents could be compiled.")
+    return {"content": content, "filename": PresentationCompiler.PPTX_NAME, "mimetype": PresentationCompiler.PPTX_MIMETYPE}
+
+
+# kind -> handler(params, progress) returning {"url": ...} for uploaded
+# workbooks or {"content", "filename", "mimetype"} for generated files
+REPORT_KINDS = {
+    "ipcr": _ipcr,
+    "opcr": _opcr,
+    "planned_opcr": _planned_opcr,
+    "master_opcr": _master_opcr,
+    "supporting_docx": _supporting_document_docx,
+    "supporting_pptx": _supporting_document_pptx,
+}
+
+
+def run_report(kind, params, progress=None):
+    handler = REPORT_KINDS.get(kind)
+    if handler is None:
+        raise Report_Job_Error(f"Unknown report kind: {kind}")
+    return handler(params, progress or _no_progress)
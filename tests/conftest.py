@@ -6,6 +6,7 @@ import sys
 import os
 import pytest
 from datetime import datetime
+from sqlalchemy import event
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -65,6 +66,40 @@ def app():
         db.drop_all()
 
 
+@pytest.fixture
+def bare_app():
+    """
+    App with TestConfig and the test database but no blueprints, yielded inside
+    its app context. Test files that need seeding or extensions build their own
+    `app` fixture on it.
+    """
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.config.from_object(TestConfig)
+    db.init_app(app)
+
+    with app.app_context():
+        import models.Categories, models.FormTemplate, models.Jobs, models.PCR, models.Positions  # noqa: F401
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def statements(bare_app):
+    """SQL statements sent to the test database while the test runs; clear() it before the part being counted."""
+    captured = []
+
+    def capture(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(db.engine, "before_cursor_execute", capture)
+
+
 @pytest.fixture
 def client(app):
     """Flask test client."""
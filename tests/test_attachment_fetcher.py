@@ -0,0 +1,188 @@
+"""
+Attachment Fetcher Tests
+Attachments download concurrently, retry transient failures and come back in document order
+"""
+
+import io
+import os
+import threading
+import time
+import zipfile
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from utils.AttachmentFetcher import Attachment_Fetcher
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+TEMPLATE_MEDIA = set(zipfile.ZipFile(os.path.join(ROOT, "excels", "presentation-template.pptx")).namelist())
+
+
+@pytest.fixture
+def server():
+    """
+    Local stub: /files/<n>?ms=<delay> returns b"file-<n>", /flaky/<id> fails
+    twice with 503, /drip/<n> sends n 16 KiB chunks 100 ms apart, /missing is
+    a 404 and /image is a small PNG.
+    """
+    hits = Counter()
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    png = io.BytesIO()
+    Image.new("RGB", (40, 30), "navy").save(png, "PNG")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            with lock:
+                hits[path] += 1
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            try:
+                if query.startswith("ms="):
+                    time.sleep(int(query[3:]) / 1000)
+                if path.startswith("/files/"):
+                    self.reply(200, f"file-{path.rsplit('/', 1)[1]}".encode())
+                elif path.startswith("/flaky/") and hits[path] <= 2:
+                    self.reply(503, b"busy")
+                elif path.startswith("/flaky/"):
+                    self.reply(200, b"finally")
+                elif path.startswith("/drip/"):
+                    self.drip(int(path.rsplit("/", 1)[1]))
+                elif path == "/image":
+                    self.reply(200, png.getvalue())
+                else:
+                    self.reply(404, b"no such file")
+            finally:
+                with lock:
+                    state["active"] -= 1
+
+        def reply(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def drip(self, chunks):
+            self.send_response(200)
+            self.send_header("Content-Length", str(chunks * 16384))
+            self.end_headers()
+            try:
+                for _ in range(chunks):
+                    self.wfile.write(b"x" * 16384)
+                    time.sleep(0.1)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 64
+
+    httpd = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.hits, httpd.state = hits, state
+    yield httpd
+    httpd.shutdown()
+
+
+class TestFetch:
+    """Results follow the input order whatever order the downloads finish in."""
+
+    def test_order_is_deterministic(self, server):
+        # earlier files are the slowest, so they finish last
+        urls = [f"{server.base}/files/{n}?ms={(12 - n) * 20}" for n in range(12)]
+        results = Attachment_Fetcher(workers=4).fetch_all(urls)
+
+        assert [r.content for r in results] == [f"file-{n}".encode() for n in range(12)]
+        assert [r.url for r in results] == urls
+
+    def test_concurrency_is_bounded(self, server):
+        urls = [f"{server.base}/files/{n}?ms=50" for n in range(16)]
+        started = time.perf_counter()
+        Attachment_Fetcher(workers=4).fetch_all(urls)
+
+        assert server.state["peak"] <= 4
+        assert time.perf_counter() - started < 16 * 0.05 / 2
+
+    def test_blank_url_skips_download(self, server):
+        [blank, file] = Attachment_Fetcher(workers=2).fetch_all(["", f"{server.base}/files/1"])
+
+        assert (blank.content, blank.error, blank.attempts) == (None, None, 0)
+        assert file.content == b"file-1"
+
+
+class TestFailures:
+    """Transient failures are retried with backoff; the deadline caps the whole fetch."""
+
+    def test_transient_failure_retried(self, server):
+        [result] = Attachment_Fetcher(retries=2, backoff=0.01).fetch_all([f"{server.base}/flaky/a"])
+
+        assert result.content == b"finally"
+        assert result.attempts == 3
+
+    def test_retries_exhausted(self, server):
+        [result] = Attachment_Fetcher(retries=1, backoff=0.01).fetch_all([f"{server.base}/flaky/b"])
+
+        assert result.content is None
+        assert result.error.startswith("503")
+        assert server.hits["/flaky/b"] == 2
+
+    def test_not_found_is_not_retried(self, server):
+        [result] = Attachment_Fetcher(retries=3, backoff=0.01).fetch_all([f"{server.base}/missing"])
+
+        assert result.content is None and "404" in result.error
+        assert server.hits["/missing"] == 1
+
+    def test_deadline(self, server):
+        urls = [f"{server.base}/files/{n}?ms=400" for n in range(6)]
+        started = time.perf_counter()
+        results = Attachment_Fetcher(workers=2, retries=0, deadline=0.25).fetch_all(urls)
+
+        assert time.perf_counter() - started < 1.5
+        assert all(r.content is None and r.error for r in results)
+
+    def test_deadline_stops_slow_download(self, server):
+        # every read arrives well within the timeout, but the body takes 2 s
+        started = time.perf_counter()
+        [result] = Attachment_Fetcher(retries=0, timeout=5, deadline=0.3).fetch_all([f"{server.base}/drip/20"])
+
+        assert time.perf_counter() - started < 1.2
+        assert result.content is None
+        assert result.error == "deadline exceeded during the download"
+
+    def test_slow_download_within_deadline(self, server):
+        [result] = Attachment_Fetcher(retries=0, timeout=5, deadline=5).fetch_all([f"{server.base}/drip/4"])
+
+        assert result.content == b"x" * 4 * 16384
+
+
+class TestCompilers:
+    """The presentation compiler embeds the attachments that were fetched."""
+
+    def test_build_presentation(self, server, monkeypatch):
+        from utils import PresentationCompiler
+
+        monkeypatch.chdir(ROOT)
+        documents = [
+            {"task_name": "Task A", "user_name": "Ana Reyes", "title": "Photo", "file_name": "photo.png",
+             "file_type": "image/png", "download_url": f"{server.base}/image"},
+            {"task_name": "Task A", "user_name": "Ben Santos", "title": "Lost", "file_name": "lost.png",
+             "file_type": "image/png", "download_url": f"{server.base}/missing"},
+        ]
+        progress = []
+        content = PresentationCompiler.build_presentation(documents, progress=lambda done, total: progress.append(done))
+
+        names = zipfile.ZipFile(io.BytesIO(content)).namelist()
+        assert len([n for n in names if n.startswith("ppt/slides/slide") and n.endswith(".xml")]) == 4
+        assert len([n for n in names if n.startswith("ppt/media/") and n not in TEMPLATE_MEDIA]) == 1
+        assert progress == [1, 2]
@@ -0,0 +1,74 @@
+"""
+Department Count Tests
+User/OPCR/task/IPCR counts come from SQL COUNTs, in one statement for all departments
+"""
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import undefer_group
+
+from app import db
+from models.Departments import Department
+from models.PCR import IPCR, OPCR
+from models.Tasks import Assigned_Department
+from models.User import User
+from services.User.users_service import Users
+
+
+def seed(users_per_department):
+    """Three departments; department d gets d * users_per_department users, one IPCR each."""
+    db.session.execute(insert(Department), [
+        {"id": 1, "name": "College of Computing Studies "},
+        {"id": 2, "name": "College of Education "},
+        {"id": 3, "name": "Registrar"},
+    ])
+    users = [
+        {"id": d * 10000 + i, "profile_id": 1, "first_name": "User", "last_name": str(i), "department_id": d,
+         "role": "head" if d == 2 and i == 0 else "faculty"}
+        for d in (1, 2, 3) for i in range(d * users_per_department)
+    ]
+    db.session.execute(insert(User), users)
+    db.session.execute(insert(IPCR), [{"user_id": user["id"], "period": "P1"} for user in users])
+    db.session.execute(insert(OPCR), [{"department_id": 1, "period": "P1"}, {"department_id": 1, "period": "P2"}])
+    db.session.execute(insert(Assigned_Department), [{"department_id": 3, "main_task_id": t} for t in range(4)])
+    db.session.commit()
+    db.session.expunge_all()
+
+
+class TestDepartmentCounts:
+    """Counts match the rows, and loading them never touches the related rows."""
+
+    def test_counts(self, bare_app):
+        seed(2)
+        depts = {d.id: d for d in Department.query.options(undefer_group("counts")).all()}
+
+        assert [depts[d].count_users() for d in (1, 2, 3)] == [2, 4, 6]
+        assert [depts[d].count_ipcr() for d in (1, 2, 3)] == [2, 4, 6]
+        assert [depts[d].count_opcr() for d in (1, 2, 3)] == [2, 0, 0]
+        assert [depts[d].count_tasks() for d in (1, 2, 3)] == [0, 0, 4]
+        assert [depts[d].is_head_occupied() for d in (1, 2, 3)] == [False, True, False]
+
+    @pytest.mark.parametrize("users_per_department", [1, 50])
+    def test_single_statement_for_all_departments(self, bare_app, statements, users_per_department):
+        seed(users_per_department)
+        statements.clear()
+
+        for dept in Department.query.options(undefer_group("counts")).all():
+            dept.count_users(), dept.count_opcr(), dept.count_tasks(), dept.count_ipcr(), dept.is_head_occupied()
+
+        assert len(statements) == 1
+
+    @pytest.mark.parametrize("users_per_department", [1, 50])
+    def test_count_users_by_depts_is_constant(self, bare_app, statements, users_per_department):
+        seed(users_per_department)
+        statements.clear()
+
+        with bare_app.test_request_context():
+            response, status = Users.count_users_by_depts()
+
+        counts = response.get_json()["message"]
+        assert status == 200
+        assert len(statements) == 2
+        assert (counts["cs"], counts["educ"], counts["other"], counts["all"]) == (
+            users_per_department, 2 * users_per_department, 3 * users_per_department, 6 * users_per_department,
+        )
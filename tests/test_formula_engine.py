@@ -0,0 +1,213 @@
+"""
+Formula Engine Tests
+Unit tests for the compiled formula cache behind Formula_Engine.compute_rating
+"""
+
+import pytest
+from simpleeval import SimpleEval
+from models.Formula_engine import Formula_Engine, Formula_Cache
+
+
+QUANTITY_FORMULA = {
+    "expression": "(actual / target) if target > 0 else 0",
+    "rating_scale": {"1": {"lt": 0.7}, "2": {"gte": 0.7, "lte": 0.899}, "3": {"gte": 0.9, "lte": 1}, "4": {"gte": 1.01, "lte": 1.299}, "5": {"gte": 1.3}},
+}
+
+
+def legacy_compute_rating(formula, target, actual):
+    """Reference implementation: fresh SimpleEval on every call."""
+    s = SimpleEval()
+    s.names = {"target": target, "actual": actual}
+    s.functions = {}
+    calc = float(s.eval(formula["expression"]))
+    for rating, rules in formula["rating_scale"].items():
+        if Formula_Engine()._match_rules(calc, rules):
+            return int(rating)
+
+
+class TestCompiledFormula:
+    """Compiled formulas rate exactly like a fresh SimpleEval."""
+
+    @pytest.mark.parametrize("expression", [
+        "(actual / target) if target > 0 else 0",
+        "(((target - actual) / target) + 1) if target > 0 else 1",
+        "actual",
+        "-actual + 2 ** 2 % 3",
+        "0 < actual <= target and 1 or 0",
+        "abs(actual)",
+    ])
+    def test_matches_simpleeval(self, expression):
+        engine = Formula_Engine()
+        formula = {**QUANTITY_FORMULA, "expression": expression}
+        for target in (0, 1, 3, 10):
+            for actual in (0, 1, 2.5, 9, 13):
+                try:
+                    expected = legacy_compute_rating(formula, target, actual)
+                except Exception:
+                    with pytest.raises(ValueError):
+                        engine.compute_rating(formula, target, actual)
+                    continue
+                assert engine.compute_rating(formula, target, actual) == expected
+
+    def test_division_by_zero_is_value_error(self):
+        formula = {**QUANTITY_FORMULA, "expression": "actual / target"}
+        with pytest.raises(ValueError, match="Invalid Expression"):
+            Formula_Engine().compute_rating(formula, 0, 1)
+
+    def test_unknown_name_is_value_error(self):
+        formula = {**QUANTITY_FORMULA, "expression": "bogus + 1"}
+        with pytest.raises(ValueError, match="Invalid Expression"):
+            Formula_Engine().compute_rating(formula, 1, 1)
+
+
+class TestFormulaCache:
+    """LRU bound, counters and key stability."""
+
+    def test_key_ignores_dict_order(self):
+        reordered = {"rating_scale": QUANTITY_FORMULA["rating_scale"], "expression": QUANTITY_FORMULA["expression"]}
+        assert Formula_Cache.key_for(reordered) == Formula_Cache.key_for(QUANTITY_FORMULA)
+
+    def test_hits_and_misses(self):
+        cache = Formula_Cache(maxsize=4)
+        first = cache.get(QUANTITY_FORMULA)
+        assert cache.get(dict(QUANTITY_FORMULA)) is first
+        assert cache.get(QUANTITY_FORMULA) is first
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+
+    def test_mutated_formula_is_recompiled(self):
+        cache = Formula_Cache(maxsize=4)
+        formula = {**QUANTITY_FORMULA}
+        first = cache.get(formula)
+        formula["expression"] = "actual"
+        assert cache.get(formula) is not first
+        assert cache.stats()["misses"] == 2
+
+    def test_lru_bound(self):
+        cache = Formula_Cache(maxsize=2)
+        for expression in ("actual", "target", "actual + target"):
+            cache.get({**QUANTITY_FORMULA, "expression": expression})
+        assert cache.stats()["size"] == 2
+
+
+class TestRatingIntervals:
+    """The bisect lookup rates every value exactly like the rule-by-rule scan."""
+
+    BOUNDS = [-1, 0, 0.5, 0.7, 0.9, 1, 1.3, 2, 5]
+
+    def _random_scale(self, rng):
+        scale = {}
+        for rating in range(1, rng.randint(1, 6) + 1):
+            ops = rng.sample(["lt", "lte", "gt", "gte", "eq"], rng.randint(0, 2))
+            scale[str(rating)] = {op: rng.choice(self.BOUNDS) for op in ops}
+        return scale
+
+    def _values(self, rng):
+        values = [float("nan"), float("inf"), float("-inf")]
+        for bound in self.BOUNDS:
+            values += [bound, bound - 1e-9, bound + 1e-9]
+        values += [rng.uniform(-3, 7) for _ in range(20)]
+        return values
+
+    def test_equivalent_to_match_rules(self):
+        import random
+
+        engine = Formula_Engine()
+        rng = random.Random(20260101)
+        compiled_tables = 0
+
+        for _ in range(500):
+            formula = {"expression": "actual", "rating_scale": self._random_scale(rng)}
+            if engine.compile(formula).intervals is not None:
+                compiled_tables += 1
+            for value in self._values(rng):
+                expected = None
+                for rating, rules in formula["rating_scale"].items():
+                    if engine._match_rules(value, rules):
+                        expected = int(rating)
+                        break
+                assert engine.compute_rating(formula, 0, value) == expected, (formula, value)
+
+        # both the bisect path and the fallback path must be exercised
+        assert 0 < compiled_tables < 500
+
+    def test_default_scales_compile(self):
+        engine = Formula_Engine()
+        assert engine.compile(QUANTITY_FORMULA).intervals is not None
+        efficiency = {
+            "expression": "actual",
+            "rating_scale": {"1": {"gte": 7}, "2": {"gte": 5, "lte": 6}, "3": {"gte": 3, "lte": 4}, "4": {"gte": 1, "lte": 2}, "5": {"eq": 0}},
+        }
+        assert engine.compile(efficiency).intervals is not None
+
+    def test_overlapping_scale_falls_back(self):
+        formula = {"expression": "actual", "rating_scale": {"1": {"lte": 1}, "2": {"gte": 1}}}
+        engine = Formula_Engine()
+        assert engine.compile(formula).intervals is None
+        assert engine.compute_rating(formula, 0, 1) == 1
+
+    def test_validate_no_overlap(self):
+        engine = Formula_Engine()
+        engine._validate_no_overlap(QUANTITY_FORMULA["rating_scale"])
+        with pytest.raises(ValueError, match="overlap"):
+            engine._validate_no_overlap({"1": {"lte": 2}, "2": {"gte": 1}})
+
+    def test_validate_accepts_shared_bound(self):
+        engine = Formula_Engine()
+        engine._validate_no_overlap({"1": {"lte": 1}, "2": {"gte": 1}})
+        engine._validate_no_overlap({"1": {"lt": 1}, "2": {"gte": 1, "lte": 3}, "3": {"gte": 3}})
+
+
+class TestComputeRatingsBatch:
+    """compute_ratings_batch returns exactly what per-row compute_rating would."""
+
+    EXPRESSIONS = [
+        "(actual / target) if target > 0 else 0",
+        "(((target - actual) / target) + 1) if target > 0 else 1",
+        "actual",
+        "0 < actual <= target and 1 or 0",
+        "actual // 2",
+    ]
+    VALUES = [0, 1, 2, 5, 10, -1, 0.5, 1.3, float("nan"), float("inf")]
+
+    def test_matches_scalar(self):
+        import random
+
+        engine = Formula_Engine()
+        rng = random.Random(7)
+        scales = [
+            QUANTITY_FORMULA["rating_scale"],
+            {"1": {"lte": 1}, "2": {"gte": 1}, "3": {}},
+        ]
+
+        for expression in self.EXPRESSIONS:
+            for scale in scales:
+                formula = {"expression": expression, "rating_scale": scale}
+                for _ in range(20):
+                    targets = [rng.choice(self.VALUES[1:]) for _ in range(25)]
+                    actuals = [rng.choice(self.VALUES) for _ in range(25)]
+                    expected = [engine.compute_rating(formula, t, a) for t, a in zip(targets, actuals)]
+                    assert engine.compute_ratings_batch(formula, targets, actuals) == expected
+
+    def test_division_by_zero_raises_like_scalar(self):
+        engine = Formula_Engine()
+        formula = {**QUANTITY_FORMULA, "expression": "actual / target"}
+        with pytest.raises(ValueError) as scalar_error:
+            engine.compute_rating(formula, 0, 3)
+        with pytest.raises(ValueError) as batch_error:
+            engine.compute_ratings_batch(formula, [1, 0, 2], [1, 3, 4])
+        assert str(batch_error.value) == str(scalar_error.value)
+
+    def test_guarded_division_stays_vectorised(self):
+        engine = Formula_Engine()
+        assert engine.compute_ratings_batch(QUANTITY_FORMULA, [0, 10, 10], [5, 9, 13]) == [1, 3, 5]
+
+    def test_many_formulas_keep_row_order(self):
+        engine = Formula_Engine()
+        other = {"expression": "actual - target", "rating_scale": {"5": {"gte": 0}, "1": {"lt": 0}}}
+        formulas = [QUANTITY_FORMULA, other, dict(QUANTITY_FORMULA), other, QUANTITY_FORMULA]
+        targets, actuals = [10, 4, 10, 4, 0], [13, 3, 9, 6, 5]
+
+        expected = [engine.compute_rating(f, t, a) for f, t, a in zip(formulas, targets, actuals)]
+        assert engine.compute_ratings_many(formulas, targets, actuals) == expected == [5, 1, 3, 5, 1]
@@ -0,0 +1,177 @@
+"""
+Formula Registry Tests
+Effective formulas per (department, main task, period), loaded once per department
+"""
+
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from models.System_Settings import System_Settings
+from models.Tasks import Assigned_Department, Formula_Registry, Main_Task, Sub_Task
+from services.Tasks.task_crud_service import TaskCRUDService
+
+
+OVERRIDE = {"expression": "actual - target", "rating_scale": {"5": {"gte": 0}, "1": {"lt": 0}}}
+
+
+@pytest.fixture
+def assignments(bare_app):
+    period = System_Settings.get_default_settings().current_period_id
+    rows = [
+        Assigned_Department(department_id=1, main_task_id=10, period=period,
+                            enable_formulas=True, quantity_formula=OVERRIDE),
+        Assigned_Department(department_id=1, main_task_id=11, period=period,
+                            enable_formulas=False, quantity_formula=OVERRIDE),
+        Assigned_Department(department_id=2, main_task_id=10, period="PERIOD-OLD",
+                            enable_formulas=True, quantity_formula=OVERRIDE),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+class TestFormulaRegistry:
+    """resolve applies enable_formulas and falls back to the settings formula."""
+
+    def test_override_and_fallback(self, bare_app, assignments):
+        settings = System_Settings.get_default_settings()
+        registry = Formula_Registry.for_app()
+        period = settings.current_period_id
+
+        assert registry.resolve(1, 10, period, "quantity") == OVERRIDE
+        assert registry.resolve(1, 11, period, "quantity") == settings.quantity_formula
+        assert registry.resolve(1, 99, period, "quantity") == settings.quantity_formula
+        assert registry.resolve(None, 10, period, "quantity") == settings.quantity_formula
+
+    def test_period_scoping(self, bare_app, assignments):
+        settings = System_Settings.get_default_settings()
+        registry = Formula_Registry.for_app()
+
+        assert registry.resolve(2, 10, settings.current_period_id, "quantity") == settings.quantity_formula
+        assert registry.resolve(2, 10, None, "quantity") == OVERRIDE
+
+    def test_one_query_per_department_and_period(self, bare_app, assignments, statements):
+        settings = System_Settings.get_default_settings()
+        registry = Formula_Registry.for_app()
+        statements.clear()
+
+        for main_task_id in (10, 11, 12, 13):
+            for metric in ("quantity", "efficiency", "timeliness"):
+                registry.resolve(1, main_task_id, settings.current_period_id, metric, settings)
+
+        assert len(statements) == 1
+        assert registry.stats()["misses"] == 1
+        assert registry.stats()["hits"] == 11
+
+
+class TestFormulaRegistryInvalidation:
+    """Formula and assignment updates drop the department's cached overrides."""
+
+    def test_update_formula_invalidates(self, bare_app, assignments):
+        period = System_Settings.get_default_settings().current_period_id
+        registry = Formula_Registry.for_app()
+        assert registry.resolve(1, 11, period, "quantity") != OVERRIDE
+
+        response, code = TaskCRUDService.update_department_task_formula(
+            assignments[1].id, {"enable_formulas": True}
+        )
+        assert code == 200
+        assert registry.resolve(1, 11, period, "quantity") == OVERRIDE
+        assert registry.stats()["invalidations"] == 1
+
+    def test_failed_commit_keeps_cache(self, bare_app, assignments, monkeypatch):
+        period = System_Settings.get_default_settings().current_period_id
+        registry = Formula_Registry.for_app()
+        registry.resolve(1, 11, period, "quantity")
+
+        def fail():
+            raise RuntimeError("database went away")
+
+        monkeypatch.setattr(db.session, "commit", fail)
+        response, code = TaskCRUDService.update_department_task_formula(
+            assignments[1].id, {"enable_formulas": True}
+        )
+        monkeypatch.undo()
+
+        assert code == 500
+        assert registry.stats()["invalidations"] == 0
+        assert registry.stats()["size"] == 1
+        assert registry.resolve(1, 11, period, "quantity") != OVERRIDE
+
+    def test_version_bump_from_other_worker_reloads(self, bare_app, assignments):
+        period = System_Settings.get_default_settings().current_period_id
+        registry = Formula_Registry.for_app()
+        assert registry.resolve(1, 10, period, "quantity") == OVERRIDE
+
+        # another worker disables the override and bumps the settings version
+        db.session.get(Assigned_Department, assignments[0].id).enable_formulas = False
+        System_Settings.query.first().bump_version()
+        db.session.commit()
+
+        settings = System_Settings.get_default_settings()
+        assert registry.resolve(1, 10, period, "quantity") == settings.quantity_formula
+
+
+class TestBatchRatings:
+    """The summary services rate sub-tasks in one batch, with the same results as row by row."""
+
+    @pytest.fixture
+    def tasks(self, bare_app, assignments):
+        from models.Departments import Department
+        from models.PCR import IPCR
+        from models.User import Profile, User
+
+        settings = System_Settings.get_default_settings()
+        period = settings.current_period_id
+        row = System_Settings.query.first()
+        row.enable_formula = True
+        for metric in ("quantity", "efficiency", "timeliness"):
+            setattr(row, f"{metric}_formula", {
+                "expression": "(actual / target) if target > 0 else 0",
+                "rating_scale": {"1": {"lt": 0.7}, "2": {"gte": 0.7, "lt": 1.3}, "5": {"gte": 1.3}},
+            })
+        row.bump_version()
+        assignments[0].efficiency_formula = assignments[0].timeliness_formula = OVERRIDE
+
+        db.session.execute(insert(Department), [{"id": 1, "name": "Registrar"}])
+        db.session.execute(insert(Profile), [{"id": i, "email": f"user{i}@commithub.local"} for i in range(1, 7)])
+        db.session.execute(insert(User), [
+            {"id": i, "profile_id": i, "first_name": f"User{i}", "last_name": "Test", "role": "faculty",
+             "department_id": 1}
+            for i in range(1, 7)
+        ])
+        db.session.execute(insert(IPCR), [{"id": i, "user_id": i, "period": period} for i in range(1, 7)])
+        db.session.execute(insert(Main_Task), [
+            {"id": task_id, "mfo": f"Task {task_id}", "time_description": "", "modification": "",
+             "target_accomplishment": "", "actual_accomplishment": "", "period": period,
+             "timeliness_mode": "timeframe"}
+            for task_id in (10, 11)
+        ])
+        db.session.execute(insert(Sub_Task), [
+            {"mfo": "", "batch_id": "", "main_task_id": task_id, "ipcr_id": i, "period": period,
+             "target_acc": 10, "actual_acc": 4 * i, "target_mod": 2, "actual_mod": i % 3,
+             "target_time": 5, "actual_time": i, "quantity": 0, "efficiency": 0, "timeliness": 0}
+            for task_id in (10, 11) for i in range(1, 7)
+        ])
+        db.session.commit()
+        return Main_Task.query.order_by(Main_Task.id).all()
+
+    def test_calculate_all_matches_row_by_row(self, bare_app, tasks):
+        subs = [sub for task in tasks for sub in task.sub_tasks]
+        expected = [(sub.calculateQuantity(), sub.calculateEfficiency(), sub.calculateTimeliness()) for sub in subs]
+
+        assert Sub_Task.calculate_all(subs) == expected
+        assert len(set(expected)) > 1
+
+    def test_task_summaries_use_overrides(self, bare_app, tasks):
+        from services.Tasks.task_performance_service import TaskPerformanceService
+
+        summaries = {s["task_id"]: s for s in TaskPerformanceService.calculate_all_tasks_average_summary()}
+        for task in tasks:
+            quantities = [sub.calculate_with_override("quantity", sub.target_acc, sub.actual_acc)
+                          for sub in task.sub_tasks]
+            assert summaries[task.id]["average_quantity"] == round(sum(quantities) / len(quantities), 2)
+
+        # task 10 is rated with the department's override, task 11 with the settings formula
+        assert summaries[10]["average_quantity"] != summaries[11]["average_quantity"]
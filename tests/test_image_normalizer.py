@@ -0,0 +1,90 @@
+"""
+Image Normalizer Tests
+Image attachments are oriented, downsampled to their slot and embedded as JPEG or PNG by content
+"""
+
+import io
+
+from PIL import Image, ImageDraw
+
+from utils.ImageNormalizer import EXIF_ORIENTATION, Image_Normalizer
+
+
+def photo(size):
+    """Smooth colour gradients with sensor-like noise."""
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 40)
+    return Image.merge("RGB", [gradient, noise, gradient.transpose(Image.Transpose.ROTATE_180)])
+
+
+def line_art(size):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    for y in range(10, size[1] - 10, 24):
+        draw.rectangle([10, y, size[0] - 10, y + 8], fill="black")
+    return img
+
+
+def encode(img, fmt, **params):
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    return buf.getvalue()
+
+
+class TestPhotos:
+    """Photographs are downsampled to the slot and kept as JPEG."""
+
+    def test_large_jpeg_downsampled(self):
+        content = encode(photo((3000, 2000)), "JPEG", quality=95)
+        image = Image_Normalizer().normalize(content, (825, 0))
+
+        assert (image.format, image.width, image.height) == ("jpeg", 825, 550)
+        assert Image.open(io.BytesIO(image.data)).size == (825, 550)
+        assert len(image.data) < len(content) / 5
+
+    def test_jpeg_that_fits_is_embedded_untouched(self):
+        content = encode(photo((600, 400)), "JPEG")
+        image = Image_Normalizer().normalize(content, (825, 0))
+
+        assert image.data == content
+        assert (image.width, image.height) == (600, 400)
+
+    def test_exif_orientation_applied(self):
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = 6   # stored landscape, shown rotated 90°
+        content = encode(photo((1600, 800)), "JPEG", exif=exif)
+        image = Image_Normalizer().normalize(content, (1170, 832))
+
+        assert (image.width, image.height) == (416, 832)
+        assert Image.open(io.BytesIO(image.data)).getexif().get(EXIF_ORIENTATION, 1) == 1
+
+    def test_photographic_png_becomes_jpeg(self):
+        content = encode(photo((1200, 800)), "PNG")
+        image = Image_Normalizer().normalize(content, (825, 0))
+
+        assert image.format == "jpeg"
+        assert len(image.data) < len(content) / 3
+
+
+class TestLineArt:
+    """Line art and transparent images stay PNG."""
+
+    def test_line_art_stays_png(self):
+        content = encode(line_art((1600, 1000)), "PNG")
+        image = Image_Normalizer().normalize(content, (825, 0))
+
+        assert (image.format, image.width) == ("png", 825)
+
+    def test_transparency_kept(self):
+        logo = Image.new("RGBA", (300, 300), (0, 0, 0, 0))
+        ImageDraw.Draw(logo).ellipse([20, 20, 280, 280], fill=(200, 30, 30, 255))
+        image = Image_Normalizer().normalize(encode(logo, "PNG"), (825, 0))
+
+        assert image.format == "png"
+        assert Image.open(io.BytesIO(image.data)).mode == "RGBA"
+
+    def test_palette_gif(self):
+        content = encode(line_art((400, 300)).convert("P"), "GIF")
+        image = Image_Normalizer().normalize(content, (1170, 832))
+
+        assert (image.format, image.width, image.height) == ("png", 400, 300)
@@ -0,0 +1,88 @@
+"""
+Log Buffer Tests
+Batched audit-log writes, overflow accounting and decoded-claim reuse
+"""
+
+import time
+
+import jwt
+import pytest
+from flask import jsonify
+
+from app import db
+from models.Logs import Log, Log_Service
+from utils import decorators
+from utils.LogBuffer import Log_Buffer, log_buffer
+
+
+def record(i):
+    return {"user_id": i, "full_name": "Ana Santos", "department": "Registrar",
+            "action": "VIEW", "target": "IPCR"}
+
+
+@pytest.fixture
+def app(bare_app):
+    """The bare app with logs buffered synchronously, as TestConfig sets."""
+    log_buffer.init_app(bare_app)
+    return bare_app
+
+
+class TestLogBuffer:
+    """Records are queued and written in batches; overflow is counted, not raised."""
+
+    def test_sync_mode_writes_immediately(self, app):
+        assert Log_Service.queue_log(1, "Ana Santos", "Registrar", "LOGIN", "LOGIN") is True
+        assert Log.query.count() == 1
+
+    def test_flushes_every_batch(self, app):
+        app.config.update(LOG_BUFFER_MODE="async", LOG_BUFFER_BATCH=10, LOG_BUFFER_INTERVAL_MS=60000)
+        buffer = Log_Buffer(app)
+
+        for i in range(25):
+            buffer.add(record(i))
+
+        deadline = time.monotonic() + 5
+        while buffer.stats()["written"] < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert buffer.stats()["written"] >= 20
+        buffer.stop()
+        assert buffer.stats()["written"] == 25
+        assert buffer.stats()["pending"] == 0
+        assert Log.query.count() == 25
+
+    def test_overflow_is_dropped_and_counted(self, app):
+        app.config.update(LOG_BUFFER_MODE="async", LOG_BUFFER_SIZE=5, LOG_BUFFER_BATCH=100, LOG_BUFFER_INTERVAL_MS=60000)
+        buffer = Log_Buffer(app)
+
+        accepted = [buffer.add(record(i)) for i in range(8)]
+
+        assert accepted.count(False) == 3
+        assert buffer.stats()["dropped"] == 3
+        buffer.stop()
+        assert Log.query.count() == 5
+
+
+class TestLogActionDecorator:
+    """log_action reuses the claims token_required put on flask.g."""
+
+    def test_token_decoded_once(self, app, monkeypatch):
+        decoded = []
+        real_decode = jwt.decode
+        monkeypatch.setattr(decorators.jwt, "decode", lambda *a, **k: decoded.append(1) or real_decode(*a, **k))
+        db.session.add(decorators.User(id=1, profile_id=1, first_name="Ana", last_name="Santos"))
+        db.session.commit()
+
+        @app.route("/ipcr")
+        @decorators.token_required()
+        @decorators.log_action(action="VIEW", target="IPCR")
+        def view_ipcr():
+            return jsonify(ok=True)
+
+        token = jwt.encode({"id": 1, "role": "faculty", "first_name": "Ana", "last_name": "Santos",
+                            "department": {"name": "Registrar"}}, "priscilla", algorithm="HS256")
+        response = app.test_client().get("/ipcr", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        assert len(decoded) == 1
+        assert Log.query.filter_by(action="VIEW", full_name="Ana Santos").count() == 1
@@ -0,0 +1,122 @@
+"""
+Log Rollup Tests
+Hourly/daily activity rollups maintained on insert, rebuilt from raw logs,
+and read by the chart endpoints
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from models.Logs import Log, Log_Activity_Daily, Log_Activity_Hourly, Log_Rollup, Log_Service
+from models.User import User
+from utils.LogBuffer import log_buffer
+
+
+@pytest.fixture
+def app(bare_app):
+    """The bare app with logs buffered synchronously and two users."""
+    log_buffer.init_app(bare_app)
+    db.session.execute(insert(User), [
+        {"id": 1, "profile_id": 1, "first_name": "Ana", "last_name": "Santos", "role": "faculty"},
+        {"id": 2, "profile_id": 2, "first_name": "Ben", "last_name": "Reyes", "role": "head"},
+    ])
+    db.session.commit()
+    return bare_app
+
+
+def seed_raw_logs():
+    """Logs inserted behind the rollups' back, as before the migration."""
+    db.session.execute(insert(Log), [
+        {"user_id": 1, "full_name": "Ana Santos", "department": "Registrar", "action": "VIEW",
+         "target": "IPCR", "created_at": datetime(2026, 10, 18, 9, 15)},   # Sunday
+        {"user_id": 1, "full_name": "Ana Santos", "department": "Registrar", "action": "VIEW",
+         "target": "IPCR", "created_at": datetime(2026, 10, 18, 9, 45)},
+        {"user_id": 2, "full_name": "Ben Reyes", "department": "Registrar", "action": "UPDATE",
+         "target": "OPCR", "created_at": datetime(2026, 10, 19, 14, 5)},   # Monday
+    ])
+    db.session.commit()
+
+
+class TestIncrementalRollup:
+    """Every logs insert path updates both rollups in the same transaction."""
+
+    def test_queue_log_updates_rollups(self, app):
+        Log_Service.queue_log(1, "Ana Santos", "Registrar", "LOGIN", "LOGIN")
+        Log_Service.queue_log(1, "Ana Santos", "Registrar", "LOGIN", "LOGIN")
+
+        daily = Log_Activity_Daily.query.one()
+        assert (daily.action, daily.department, daily.role, daily.count) == ("LOGIN", "Registrar", "faculty", 2)
+        assert Log_Activity_Hourly.query.one().count == 2
+
+    def test_add_logs_updates_rollups(self, app):
+        Log_Service.add_logs(2, "Ben Reyes", "Registrar", "UPDATE", "OPCR")
+
+        hourly = Log_Activity_Hourly.query.one()
+        assert (hourly.role, hourly.count) == ("head", 1)
+        assert Log_Rollup.check(db.session.connection()) == []
+
+    def test_unknown_user_has_empty_role(self, app):
+        Log_Service.queue_log("0", "Unknown", "", "LOGIN", "LOGIN")
+        assert Log_Activity_Daily.query.one().role == ""
+
+
+class TestRebuildAndCheck:
+    """rollup-logs backfills from raw logs; check-log-rollups spots drift."""
+
+    def test_check_reports_missing_rollups(self, app):
+        seed_raw_logs()
+        mismatches = Log_Rollup.check(db.session.connection())
+        assert mismatches == ["2026-10-18: logs=2 daily=0 hourly=0", "2026-10-19: logs=1 daily=0 hourly=0"]
+
+    def test_rebuild_matches_raw_counts(self, app):
+        seed_raw_logs()
+        Log_Service.queue_log(1, "Ana Santos", "Registrar", "LOGIN", "LOGIN")
+
+        with db.engine.begin() as conn:
+            assert Log_Rollup.rebuild(conn, batch_size=2) == 4
+        assert Log_Rollup.check(db.session.connection()) == []
+
+        sunday = Log_Activity_Hourly.query.filter_by(bucket=datetime(2026, 10, 18, 9)).one()
+        assert (sunday.weekday, sunday.hour, sunday.count) == (1, 9, 2)
+
+
+class TestChartsReadRollups:
+    """The chart endpoints answer from the rollups alone."""
+
+    @pytest.fixture
+    def rolled_up(self, app):
+        seed_raw_logs()
+        with db.engine.begin() as conn:
+            Log_Rollup.rebuild(conn)
+        db.session.execute(Log.__table__.delete())  # prove the charts never touch raw logs
+        db.session.commit()
+
+    def test_trend(self, app, rolled_up):
+        with app.test_request_context():
+            daily, _ = Log_Service.get_log_activity_trend("daily")
+            weekly, _ = Log_Service.get_log_activity_trend("weekly")
+            monthly, _ = Log_Service.get_log_activity_trend("monthly")
+
+        assert daily.get_json() == [{"name": "2026-10-18", "value": 2}, {"name": "2026-10-19", "value": 1}]
+        assert weekly.get_json() == [{"name": "Week 42, 2026", "value": 2}, {"name": "Week 43, 2026", "value": 1}]
+        assert monthly.get_json() == [{"name": "2026-10", "value": 3}]
+
+    def test_by_hour_and_scatter(self, app, rolled_up):
+        with app.test_request_context():
+            by_hour, _ = Log_Service.get_logs_by_hour()
+            scatter, _ = Log_Service.get_activity_scatter()
+
+        hours = by_hour.get_json()
+        assert len(hours) == 24
+        assert hours[9] == {"name": "09:00", "value": 2}
+        assert hours[14] == {"name": "14:00", "value": 1}
+        assert sorted((p["day"], p["hour"], p["count"]) for p in scatter.get_json()) == [(1, 9, 2), (2, 14, 1)]
+
+    def test_activity(self, app, rolled_up):
+        with app.test_request_context():
+            activity, _ = Log_Service.get_logs_activity()
+
+        assert {"date": "2026-10-19", "type": "UPDATE", "target": "OPCR", "department": "Registrar", "count": 1} in activity.get_json()
@@ -0,0 +1,196 @@
+"""
+Master OPCR Aggregation Tests
+The grouped SQL aggregation matches the previous per-object walk
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from models.Categories import Category
+from models.Departments import Department
+from models.PCR import IPCR, OPCR, Assigned_PCR
+from models.System_Settings import System_Settings
+from models.Tasks import Main_Task, Sub_Task
+from models.User import User
+from services.PCR.pcr_generation_service import PCRGenerationService
+from services.PCR.pcr_rating_service import PCRRatingService
+
+
+PERIOD = "PERIOD-1"
+
+
+@pytest.fixture
+def app(bare_app):
+    with bare_app.test_request_context():
+        settings = System_Settings.load_or_create()
+        settings.current_period_id = PERIOD
+        settings.bump_version()
+        db.session.commit()
+        seed()
+        yield bare_app
+
+
+def legacy_master_data(opcrs, period, settings):
+    """The per-object implementation this replaced, kept as the reference."""
+    task_index = {}
+    data = []
+
+    categories = Category.query.filter_by(status=1, period=period).order_by(Category.priority_order.desc()).all()
+    for cat in categories:
+        task_list = []
+        for mt in cat.main_tasks:
+            if mt.status == 0:
+                continue
+            task = PCRGenerationService._build_master_task_dict(mt)
+            task_list.append(task)
+            task_index[mt.id] = task
+        data.append({cat.name: task_list})
+
+    assigned = {}
+    for opcr in opcrs:
+        for apcr in opcr.assigned_pcrs:
+            ipcr = apcr.ipcr
+            if ipcr.status == 0 or ipcr.form_status == "draft":
+                continue
+            for sub in ipcr.sub_tasks:
+                assigned.setdefault(sub.main_task.mfo, set()).add(f"{ipcr.user.first_name} {ipcr.user.last_name}")
+
+    for opcr in opcrs:
+        for apcr in opcr.assigned_pcrs:
+            ipcr = apcr.ipcr
+            if ipcr.status == 0 or ipcr.form_status == "draft":
+                continue
+            for sub in ipcr.sub_tasks:
+                task = task_index.get(sub.main_task.id)
+                if not task:
+                    continue
+                if sub.main_task.timeliness_mode == "deadline" and sub.actual_deadline and sub.main_task.target_deadline:
+                    actual_days = (sub.actual_deadline - sub.main_task.target_deadline).days
+                else:
+                    actual_days = sub.actual_time or 0
+                task["summary"]["target"] += sub.target_acc
+                task["summary"]["actual"] += sub.actual_acc
+                task["corrections"]["target"] += sub.target_mod
+                task["corrections"]["actual"] += sub.actual_mod
+                task["working_days"]["target"] += sub.target_time
+                task["working_days"]["actual"] += actual_days
+                task["frequency"] += 1
+
+    for task in task_index.values():
+        if task["frequency"] == 0:
+            continue
+        q = e = t = 0
+        if settings.enable_formula:
+            q = PCRRatingService.compute_quantity_rating(task["summary"]["target"], task["summary"]["actual"], settings)
+            e = PCRRatingService.compute_efficiency_rating(task["corrections"]["target"], task["corrections"]["actual"], settings)
+            t = PCRRatingService.compute_timeliness_rating(task["working_days"]["target"], task["working_days"]["actual"], settings)
+        task["rating"] = {"quantity": q, "efficiency": e, "timeliness": t, "average": PCRRatingService.calculateAverage(q, e, t)}
+        task.pop("_task_id", None)
+
+    return data, {k: set(v) for k, v in assigned.items()}
+
+
+def seed():
+    """
+    Three offices with main OPCRs plus one non-main OPCR. Covers draft and
+    archived IPCRs, an IPCR assigned to two OPCRs, an inactive task and
+    category, a task from another period, and deadline-mode sub-tasks that
+    finish early, late and a few hours either side of the deadline.
+    """
+    deadline = datetime(2026, 6, 30, 17, 0)
+    db.session.execute(insert(Department), [{"id": d, "name": f"Office {d}"} for d in (1, 2, 3)])
+    db.session.execute(insert(Category), [
+        {"id": 1, "name": "Core", "period": PERIOD, "priority_order": 2},
+        {"id": 2, "name": "Support", "period": PERIOD, "priority_order": 1},
+        {"id": 3, "name": "Retired", "period": PERIOD, "status": 0},
+        {"id": 4, "name": "Last Year", "period": "PERIOD-0"},
+    ])
+    db.session.execute(insert(Main_Task), [
+        {"id": t, "mfo": f"Task {t}", "time_description": "", "modification": "", "target_accomplishment": "",
+         "actual_accomplishment": "", "category_id": category, "period": PERIOD, "status": status,
+         "timeliness_mode": mode, "target_deadline": deadline if mode == "deadline" else None}
+        for t, category, status, mode in [
+            (1, 1, 1, "timeframe"), (2, 1, 1, "deadline"), (3, 2, 1, "timeframe"),
+            (4, 2, 0, "timeframe"), (5, 3, 1, "timeframe"), (6, 4, 1, "timeframe"),
+        ]
+    ])
+    db.session.execute(insert(User), [
+        {"id": u, "profile_id": u, "first_name": f"User{u}", "last_name": "Santos", "department_id": u % 3 + 1}
+        for u in range(1, 13)
+    ])
+    db.session.execute(insert(OPCR), [
+        {"id": d, "department_id": d, "period": PERIOD, "isMain": True} for d in (1, 2, 3)
+    ] + [{"id": 4, "department_id": 1, "period": PERIOD, "isMain": False}])
+    db.session.execute(insert(IPCR), [
+        {"id": u, "user_id": u, "period": PERIOD, "status": 0 if u == 11 else 1,
+         "form_status": "draft" if u == 12 else "submitted"}
+        for u in range(1, 13)
+    ])
+    db.session.execute(insert(Assigned_PCR), [
+        {"opcr_id": u % 3 + 1, "ipcr_id": u, "period": PERIOD} for u in range(1, 13)
+    ] + [{"opcr_id": 2, "ipcr_id": 1, "period": PERIOD}, {"opcr_id": 4, "ipcr_id": 2, "period": PERIOD}])
+
+    offsets = [(-3, 0), (2, 0), (0, 5), (0, -5), (-1, 20), (0, 0)]
+    db.session.execute(insert(Sub_Task), [
+        {"mfo": f"Task {t}", "batch_id": "", "main_task_id": t, "ipcr_id": u, "period": PERIOD,
+         "target_acc": u + t, "actual_acc": u, "target_mod": t, "actual_mod": u % 2,
+         "target_time": 5, "actual_time": u % 4 if t != 3 else None,
+         "actual_deadline": deadline.replace(day=30 + offsets[u % 6][0] if 30 + offsets[u % 6][0] <= 30 else 30)
+            if t == 2 else None}
+        for u in range(1, 13) for t in (1, 2, 3, 4, 5, 6)
+    ])
+    # a deadline sub-task past month end and a few hours either side of the deadline
+    db.session.execute(insert(Sub_Task), [
+        {"mfo": "Task 2", "batch_id": "", "main_task_id": 2, "ipcr_id": 3, "period": PERIOD,
+         "target_acc": 1, "actual_acc": 1, "target_mod": 0, "actual_mod": 0, "target_time": 1, "actual_time": 9,
+         "actual_deadline": actual}
+        for actual in (datetime(2026, 7, 2, 9, 0), datetime(2026, 6, 30, 11, 0), datetime(2026, 6, 30, 23, 0),
+                       datetime(2026, 6, 29, 18, 0))
+    ])
+    db.session.commit()
+
+
+class TestMasterOPCREquivalence:
+    """Same data, ratings and assignees as the per-object walk."""
+
+    @pytest.mark.parametrize("enable_formula", [False, True])
+    def test_matches_legacy(self, app, enable_formula):
+        row = System_Settings.load_or_create()
+        row.enable_formula = enable_formula
+        row.bump_version()
+        db.session.commit()
+        settings = System_Settings.get_default_settings()
+        opcrs = OPCR.query.filter_by(status=1, isMain=True, period=PERIOD).all()
+
+        expected_data, expected_assigned = legacy_master_data(opcrs, PERIOD, settings)
+        db.session.expunge_all()
+        opcrs = OPCR.query.filter_by(status=1, isMain=True, period=PERIOD).all()
+        data, assigned, _ = PCRGenerationService._build_master_data(opcrs, PERIOD, settings)
+
+        assert data == expected_data
+        assert {mfo: set(names) for mfo, names in assigned.items()} == expected_assigned
+
+    def test_deadline_days_floor_like_timedelta(self, app):
+        opcrs = OPCR.query.filter_by(status=1, isMain=True, period=PERIOD).all()
+        rows = {row.main_task_id: row for row in PCRGenerationService._master_rows([o.id for o in opcrs], PERIOD)}
+
+        deadline = datetime(2026, 6, 30, 17, 0)
+        subs = (
+            Sub_Task.query.join(IPCR).join(Assigned_PCR, Assigned_PCR.ipcr_id == IPCR.id)
+            .filter(Sub_Task.main_task_id == 2, Assigned_PCR.opcr_id.in_([1, 2, 3]), IPCR.status == 1,
+                    IPCR.form_status != "draft")
+            .all()
+        )
+        assert rows[2].actual_days == sum((sub.actual_deadline - deadline).days for sub in subs)
+
+    def test_statement_count_is_constant(self, app, statements):
+        settings = System_Settings.get_default_settings()
+        opcrs = OPCR.query.filter_by(status=1, isMain=True, period=PERIOD).all()
+        statements.clear()
+        PCRGenerationService._build_master_data(opcrs, PERIOD, settings)
+
+        # categories, their main tasks, assignees, and the grouped sums
+        assert len(statements) == 4
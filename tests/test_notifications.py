@@ -0,0 +1,95 @@
+"""
+Notification Fan-out Tests
+Multi-row inserts and user_{id} Socket.IO rooms
+"""
+
+import jwt
+import pytest
+from sqlalchemy import insert
+
+from app import db, socketio
+from models.Notification import Notification, Notification_Service
+from models.User import User
+import routes.Sockets  # noqa: F401  (registers the connect handler before init_app)
+
+
+@pytest.fixture
+def app(bare_app):
+    """The bare app with Socket.IO handlers and 50 users."""
+    socketio.init_app(bare_app)
+    db.session.execute(insert(User), [
+        {"id": i, "profile_id": i, "first_name": f"User{i}", "last_name": "Test",
+         "role": "head" if i <= 5 else "faculty", "department_id": 1 + i % 2}
+        for i in range(1, 51)
+    ])
+    db.session.commit()
+    return bare_app
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    calls = []
+    monkeypatch.setattr(socketio, "emit", lambda event, data=None, **kwargs: calls.append((event, data, kwargs)))
+    return calls
+
+
+class TestFanOut:
+    """All recipients go out in one INSERT and one emit per user room."""
+
+    def test_single_insert_for_everyone(self, app, emitted, statements):
+        statements.clear()
+        Notification_Service.notify_everyone("Rating period is open.")
+
+        assert len([statement for statement in statements if statement.startswith("INSERT")]) == 1
+        assert Notification.query.count() == 50
+        assert len(emitted) == 50
+        assert {call[2]["to"] for call in emitted} == {f"user_{i}" for i in range(1, 51)}
+
+    def test_payload_inline(self, app, emitted):
+        Notification_Service.notify_user(7, "Your IPCR was approved.")
+
+        event_name, payload, kwargs = emitted[0]
+        stored = Notification.query.filter_by(user_id=7).one()
+        assert event_name == "notification" and kwargs["to"] == "user_7"
+        assert payload == {"id": stored.id, "name": "Your IPCR was approved.",
+                           "created_at": str(stored.created_at), "read": False}
+
+    def test_payload_id_with_whole_second_timestamps(self, app, emitted):
+        # MySQL DATETIME drops microseconds, so the read-back must not rely on them
+        Notification_Service.notify_user(7, "Reminder.")
+        Notification_Service.notify_user(7, "Reminder.")
+
+        stored = Notification.query.filter_by(user_id=7).order_by(Notification.id).all()
+        assert all(n.created_at.microsecond == 0 for n in stored)
+        assert emitted[-1][1]["id"] == stored[-1].id
+        assert emitted[-1][1]["created_at"] == str(stored[-1].created_at)
+
+    def test_audience_deduplicates(self, app, emitted):
+        Notification_Service.notify_audience("Office updated.", roles=["head"], departments=[2])
+
+        recipients = [n.user_id for n in Notification.query.all()]
+        assert len(recipients) == len(set(recipients))
+        assert set(recipients) == set(range(1, 6)) | {i for i in range(1, 51) if 1 + i % 2 == 2}
+
+
+class TestUserRooms:
+    """Clients with a valid JWT receive only their own notifications."""
+
+    def test_authenticated_client_gets_own_notifications(self, app):
+        token = jwt.encode({"id": 3, "role": "head"}, "priscilla", algorithm="HS256")
+        own = socketio.test_client(app, auth={"token": token})
+        anonymous = socketio.test_client(app)
+
+        Notification_Service.notify_user(3, "Hello")
+        Notification_Service.notify_user(4, "Not for you")
+
+        received = [message["args"][0]["name"] for message in own.get_received() if message["name"] == "notification"]
+        assert received == ["Hello"]
+        assert anonymous.get_received() == []
+
+    def test_invalid_token_gets_no_room(self, app):
+        client = socketio.test_client(app, auth={"token": "not-a-jwt"})
+        assert client.is_connected()
+
+        Notification_Service.notify_user(3, "Hello")
+        assert client.get_received() == []
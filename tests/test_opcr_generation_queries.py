@@ -0,0 +1,134 @@
+"""
+OPCR Generation Query Tests
+OPCR aggregation loads its object graph eagerly, so the statement count
+stays the same however many IPCRs an office has
+"""
+
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from models.Categories import Category
+from models.Departments import Department
+from models.PCR import IPCR, OPCR, Assigned_PCR
+from models.Positions import Position
+from models.System_Settings import System_Settings
+from models.Tasks import Assigned_Department, Assigned_Task, Main_Task, Sub_Task
+from models.User import Profile, User
+from services.PCR.pcr_generation_service import PCRGenerationService
+from utils import ExcelHandler
+
+
+PERIOD = "PERIOD-1"
+SMALL, LARGE = 2, 40
+
+
+@pytest.fixture
+def app(bare_app, monkeypatch):
+    # the spreadsheet writers are out of scope; keep what they were handed
+    exported = []
+    for name in ("createNewOPCR", "createNewWeightedOPCR"):
+        monkeypatch.setattr(ExcelHandler, name, lambda data, assigned, admin_data: exported.append((data, assigned)))
+    bare_app.exported = exported
+
+    with bare_app.test_request_context():
+        settings = System_Settings.load_or_create()
+        settings.current_period_id = PERIOD
+        settings.bump_version()
+        db.session.commit()
+        seed_office(1, SMALL)
+        seed_office(2, LARGE)
+        yield bare_app
+
+
+def seed_office(dept_id, members):
+    """Department with two tasks, a head, and `members` IPCRs with one sub-task per task each."""
+    base = dept_id * 1000
+    db.session.execute(insert(Department), [{"id": dept_id, "name": f"Office {dept_id}"}])
+    db.session.execute(insert(Position), [{"id": dept_id, "name": "Faculty"}])
+    db.session.execute(insert(Category), [{"id": dept_id, "name": f"Core {dept_id}", "period": PERIOD}])
+    db.session.execute(insert(Main_Task), [
+        {"id": base + t, "mfo": f"Task {t}", "time_description": "", "modification": "",
+         "target_accomplishment": "", "actual_accomplishment": "", "category_id": dept_id, "period": PERIOD}
+        for t in (1, 2)
+    ])
+    db.session.execute(insert(Assigned_Department), [
+        {"department_id": dept_id, "main_task_id": base + t, "period": PERIOD, "task_weight": 50} for t in (1, 2)
+    ])
+    db.session.execute(insert(Profile), [{"id": base + i, "email": f"user{base + i}@commithub.local"} for i in range(members + 1)])
+    db.session.execute(insert(User), [
+        {"id": base + i, "profile_id": base + i, "first_name": f"User{i}", "last_name": "Santos",
+         "department_id": dept_id, "position_id": dept_id, "role": "head" if i == 0 else "faculty"}
+        for i in range(members + 1)
+    ])
+    db.session.execute(insert(OPCR), [{"id": dept_id, "department_id": dept_id, "period": PERIOD}])
+    db.session.execute(insert(IPCR), [
+        {"id": base + i, "user_id": base + i, "period": PERIOD, "status": 1} for i in range(1, members + 1)
+    ])
+    db.session.execute(insert(Assigned_PCR), [
+        {"opcr_id": dept_id, "ipcr_id": base + i, "department_id": dept_id, "period": PERIOD}
+        for i in range(1, members + 1)
+    ])
+    db.session.execute(insert(Assigned_Task), [
+        {"user_id": base + i, "main_task_id": base + t, "period": PERIOD}
+        for i in range(1, members + 1) for t in (1, 2)
+    ])
+    db.session.execute(insert(Sub_Task), [
+        {"mfo": f"Task {t}", "batch_id": "", "main_task_id": base + t, "ipcr_id": base + i, "period": PERIOD,
+         "target_acc": 2, "actual_acc": 1, "target_time": 3, "actual_time": 3}
+        for i in range(1, members + 1) for t in (1, 2)
+    ])
+    db.session.commit()
+
+
+def statements_for(statements, fn, *args):
+    """Runs fn once to warm the settings cache, then counts the statements of a second, cold-session run."""
+    fn(*args)
+    db.session.expunge_all()
+    statements.clear()
+    fn(*args)
+    db.session.expunge_all()
+    return len(statements)
+
+
+GENERATORS = [
+    PCRGenerationService.get_opcr,
+    PCRGenerationService.generate_opcr,
+    PCRGenerationService.generate_weighted_opcr,
+    PCRGenerationService.new_generate_opcr,
+]
+
+
+class TestConstantStatementCount:
+    """Doubling the office size must not add statements."""
+
+    @pytest.mark.parametrize("generator", GENERATORS, ids=lambda fn: fn.__name__)
+    def test_opcr_generators(self, app, statements, generator):
+        assert statements_for(statements, generator, 1) == statements_for(statements, generator, 2)
+
+    @pytest.mark.parametrize("generator", [
+        PCRGenerationService.get_planned_opcr_by_department,
+        PCRGenerationService.generate_planned_opcr_by_department,
+    ], ids=lambda fn: fn.__name__)
+    def test_planned_opcr(self, app, statements, generator):
+        assert statements_for(statements, generator, "1") == statements_for(statements, generator, "2")
+
+
+class TestAggregatedValues:
+    """Eager loading must not change what is aggregated."""
+
+    def test_totals_and_assigned(self, app):
+        PCRGenerationService.generate_opcr(2)
+        data, assigned = app.exported[-1]
+
+        tasks = data[0]["Core 2"]
+        assert [task["summary"] for task in tasks] == [{"target": 2 * LARGE, "actual": LARGE}] * 2
+        assert [task["frequency"] for task in tasks] == [LARGE, LARGE]
+        assert len(assigned["Task 1"]) == LARGE
+
+    def test_planned_assigned_names(self, app):
+        PCRGenerationService.generate_planned_opcr_by_department("1")
+        data, assigned = app.exported[-1]
+
+        members = User.query.filter_by(department_id=1, role="faculty").order_by(User.id).all()
+        assert assigned["Task 1"] == [user.full_name() for user in members]
@@ -0,0 +1,141 @@
+"""
+Keyset Pagination Tests
+Signed (created_at, id) cursors for logs, notifications, users and
+supporting documents
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from models.Logs import Log, Log_Service
+from models.Notification import Notification, Notification_Service
+from models.User import Profile, User
+from services.User.users_service import Users
+from utils.Pagination import InvalidCursor, decode_cursor, encode_cursor, page_size, MAX_PAGE_SIZE
+
+
+BASE = datetime(2026, 10, 18, 8, 0)
+
+
+@pytest.fixture
+def app(bare_app):
+    """The bare app inside a test request context."""
+    with bare_app.test_request_context():
+        yield bare_app
+
+
+def add_logs(count, start=0, created_at=None):
+    db.session.execute(insert(Log), [
+        {"user_id": 1, "full_name": "Ana Santos", "department": "Registrar", "action": "VIEW",
+         "target": f"LOG {i}", "created_at": created_at or BASE + timedelta(minutes=i)}
+        for i in range(start, start + count)
+    ])
+    db.session.commit()
+
+
+def walk(fetch, limit):
+    """Follows next_cursor until the last page; returns every page."""
+    pages, cursor = [], None
+    while True:
+        response, status = fetch(cursor, limit)
+        assert status == 200
+        page = response.get_json()
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            return pages
+
+
+class TestCursor:
+    """Cursors are opaque, signed and bound to one list."""
+
+    def test_round_trip(self, app):
+        token = encode_cursor("logs", BASE, 42)
+        assert decode_cursor("logs", token) == (BASE, 42)
+
+    def test_tampered_cursor_rejected(self, app):
+        token = encode_cursor("logs", BASE, 42)
+        with pytest.raises(InvalidCursor):
+            decode_cursor("logs", token[:-2] + "xx")
+
+    def test_cursor_bound_to_scope(self, app):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("users", encode_cursor("logs", BASE, 42))
+
+    def test_limit_is_clamped(self, app):
+        assert page_size(None) == 50
+        assert page_size("0") == 1
+        assert page_size(10 ** 6) == MAX_PAGE_SIZE
+
+
+class TestLogsPages:
+    """Pages are newest first, complete and stable while rows are inserted."""
+
+    def test_unpaged_request_keeps_full_list(self, app):
+        add_logs(5)
+        response, status = Log_Service.get_all_logs()
+        assert status == 200
+        assert len(response.get_json()) == 5
+
+    def test_walk_covers_every_row_once(self, app):
+        add_logs(23)
+        add_logs(7, start=100, created_at=BASE)  # ties on created_at are broken by id
+
+        pages = walk(lambda cursor, limit: Log_Service.get_all_logs(cursor, limit), 5)
+        ids = [item["id"] for page in pages for item in page["items"]]
+
+        assert len(pages) == 6
+        assert sorted(ids) == sorted(log.id for log in Log.query.all())
+        assert len(set(ids)) == len(ids)
+
+    def test_stable_under_concurrent_inserts(self, app):
+        add_logs(10)
+        first, _ = Log_Service.get_all_logs(None, 4)
+        first = first.get_json()
+
+        add_logs(5, start=1000)  # newer rows land before the cursor, not on later pages
+
+        second, _ = Log_Service.get_all_logs(first["next_cursor"], 4)
+        titles = [item["target"] for item in first["items"] + second.get_json()["items"]]
+        assert titles == [f"LOG {i}" for i in range(9, 1, -1)]
+
+    def test_bad_cursor_is_400(self, app):
+        _, status = Log_Service.get_all_logs("not-a-cursor", 5)
+        assert status == 400
+
+
+class TestOtherLists:
+    """Notifications, users and supporting documents share the helper."""
+
+    def test_notifications_scoped_to_user(self, app):
+        db.session.execute(insert(Notification), [
+            {"user_id": 1 + i % 2, "name": f"n{i}", "created_at": BASE + timedelta(minutes=i)} for i in range(10)
+        ])
+        db.session.commit()
+
+        pages = walk(lambda cursor, limit: Notification_Service.get_user_notification(1, cursor, limit), 2)
+        assert [item["name"] for page in pages for item in page["items"]] == ["n8", "n6", "n4", "n2", "n0"]
+
+        other_user_cursor = pages[0]["next_cursor"]
+        _, status = Notification_Service.get_user_notification(2, other_user_cursor, 2)
+        assert status == 400
+
+    def test_users(self, app):
+        db.session.execute(insert(Profile), [
+            {"id": i, "email": f"user{i}@commithub.local"} for i in range(1, 8)
+        ])
+        db.session.execute(insert(User), [
+            {"id": i, "profile_id": i, "first_name": f"User{i}", "last_name": "Test",
+             "created_at": BASE + timedelta(days=i)}
+            for i in range(1, 8)
+        ])
+        db.session.commit()
+
+        response, status = Users.get_all_users(None, 3)
+        page = response.get_json()
+        assert status == 200
+        assert [user["id"] for user in page["items"]] == [7, 6, 5]
+        assert page["has_more"] is True
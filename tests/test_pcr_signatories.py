@@ -0,0 +1,218 @@
+"""
+PCR Signatory Tests
+Signatories are written when PCRs or heads change; to_dict only reads them
+"""
+
+import pytest
+
+from app import db
+from models.Departments import Department
+from models.PCR import IPCR, OPCR
+from models.Positions import Position
+from models.System_Settings import System_Settings
+from models.User import Profile, User
+from services.PCR.pcr_crud_service import PCRCRUDService
+from services.PCR.pcr_signatory_service import PCRSignatoryService
+
+
+@pytest.fixture
+def app(bare_app):
+    """The bare app with a president and mayor set."""
+    settings = System_Settings.load_or_create()
+    settings.current_president_fullname = "Dr. Juan dela Cruz"
+    settings.current_mayor_fullname = "Mayor Reyes"
+    settings.bump_version()
+    db.session.commit()
+    return bare_app
+
+
+def make_user(first_name, role, department, position):
+    profile = Profile(email=f"{first_name.lower()}@commithub.local")
+    user = User(profile=profile, first_name=first_name, middle_name="Luna", last_name="Santos",
+                role=role, department=department, position=position)
+    db.session.add(user)
+    return user
+
+
+@pytest.fixture
+def office(app):
+    department = Department(name="Registrar")
+    faculty = Position(name="Faculty")
+    head_position = Position(name="Office Head")
+    member = make_user("Ana", "faculty", department, faculty)
+    head = make_user("Ben", "head", department, head_position)
+    db.session.commit()
+
+    ipcr = IPCR(user=member, period="PERIOD-1")
+    db.session.add(ipcr)
+    db.session.flush()
+    ipcr.refresh_signatories()
+    opcr = PCRCRUDService._create_or_get_opcr(department.id, "PERIOD-1")
+    db.session.commit()
+    return {"department": department, "member": member, "head": head, "ipcr": ipcr, "opcr": opcr}
+
+
+def writes(statements):
+    return [statement for statement in statements if not statement.lstrip().upper().startswith("SELECT")]
+
+
+class TestSignatoriesAtWriteTime:
+    """Creation and head changes materialize the signatory columns."""
+
+    def test_created_pcrs_have_signatories(self, app, office):
+        ipcr, opcr = office["ipcr"], office["opcr"]
+        assert (ipcr.reviewed_by, ipcr.rev_position) == ("Ben L. Santos", "Office Head")
+        assert (ipcr.discussed_with, ipcr.dis_position) == ("Ana L. Santos", "Faculty")
+        assert (ipcr.approved_by, ipcr.app_position) == ("Dr. Juan dela Cruz", "College President")
+        assert (ipcr.confirmed_by, ipcr.con_position) == ("Mayor Reyes", "PMT Chairperson")
+        assert (opcr.discussed_with, opcr.confirmed_by) == ("Ben L. Santos", "Mayor Reyes")
+
+    def test_refresh_department_after_head_change(self, app, office):
+        office["head"].role = "faculty"
+        office["member"].role = "head"
+
+        assert PCRSignatoryService.refresh_department(office["department"].id) == 2
+        db.session.commit()
+
+        ipcr, opcr = office["ipcr"], office["opcr"]
+        assert ipcr.reviewed_by == "Dr. Juan dela Cruz"
+        assert ipcr.discussed_with == "Ana L. Santos"
+        assert opcr.reviewed_by == "Ana L. Santos"
+
+    def test_string_department_id(self, app, office):
+        # form and JSON bodies carry department ids as strings
+        assert PCRSignatoryService.refresh_department(str(office["department"].id)) == 2
+        assert PCRSignatoryService.refresh_departments(str(office["department"].id), None) == 2
+
+        assert office["ipcr"].reviewed_by == "Ben L. Santos"
+        assert office["opcr"].discussed_with == "Ben L. Santos"
+
+
+class TestUserServicePaths:
+    """Every path that creates a head or changes a member's role or office refreshes the signatories."""
+
+    @pytest.fixture(autouse=True)
+    def quiet(self, monkeypatch):
+        from app import socketio
+        from services.User import users_service
+
+        monkeypatch.setattr(socketio, "emit", lambda *args, **kwargs: None)
+        monkeypatch.setattr(users_service, "send_email_account_creation", lambda *args: None)
+
+    def test_update_user_in_profile(self, app, office):
+        from services.User.users_service import Users
+
+        head = office["head"]
+        assert Users.update_user_in_profile(head.profile_id, head.id, {"role": "faculty"})[1] == 200
+
+        # the office has no head left to review or discuss
+        assert office["ipcr"].reviewed_by == ""
+        assert office["opcr"].discussed_with == ""
+
+    def test_update_user_in_profile_with_string_department(self, app, office):
+        from services.User.users_service import Users
+
+        member = office["member"]
+        data = {"first_name": "Anna", "department_id": str(office["department"].id)}
+        assert Users.update_user_in_profile(member.profile_id, member.id, data)[1] == 200
+
+        assert office["ipcr"].reviewed_by == "Ben L. Santos"
+        assert office["ipcr"].discussed_with == "Anna L. Santos"
+        assert office["opcr"].discussed_with == "Ben L. Santos"
+
+    def test_create_user_in_profile(self, app, office):
+        from services.User.users_service import Users
+
+        office["head"].department_id = None
+        db.session.commit()
+        data = {"first_name": "Cara", "middle_name": "Luna", "last_name": "Reyes", "role": "head",
+                "position_id": office["head"].position_id, "department_id": office["department"].id}
+        assert Users.create_user_in_profile(office["member"].profile_id, data)[1] == 201
+
+        assert office["ipcr"].reviewed_by == "Cara L. Reyes"
+
+    def test_add_new_user(self, app, office):
+        from services.User.users_service import Users
+
+        office["head"].department_id = None
+        db.session.commit()
+        data = {"first_name": "Dan", "middle_name": "Luna", "last_name": "Cruz", "role": "head",
+                "email": "dan@commithub.local", "position": office["head"].position_id,
+                "department": office["department"].id}
+        assert Users.add_new_user(data, None)[1] == 200
+
+        assert office["ipcr"].reviewed_by == "Dan L. Cruz"
+
+
+class TestSettingsChanges:
+    """Settings saves only rewrite the current period, and only when a signer changed."""
+
+    @pytest.fixture
+    def periods(self, app, office):
+        from models.System_Settings import System_Settings_Service
+
+        settings = System_Settings.query.first()
+        settings.current_period_id = "PERIOD-1"
+        old = IPCR(user=office["member"], period="PERIOD-0")
+        db.session.add(old)
+        db.session.flush()
+        old.refresh_signatories()
+        db.session.commit()
+        return {"old": old, "service": System_Settings_Service}
+
+    def test_unchanged_signers_write_nothing(self, app, office, periods, statements):
+        statements.clear()
+        periods["service"].update_settings({"current_president_fullname": "Dr. Juan dela Cruz",
+                                            "current_mayor_fullname": "Mayor Reyes"})
+
+        assert not [w for w in writes(statements) if "UPDATE ipcr" in w or "UPDATE opcr" in w]
+
+    def test_new_president_refreshes_current_period_only(self, app, office, periods):
+        periods["service"].update_settings({"current_president_fullname": "Dr. Maria Santos"})
+
+        assert office["ipcr"].approved_by == "Dr. Maria Santos"
+        assert office["opcr"].approved_by == "Dr. Maria Santos"
+        assert periods["old"].approved_by == "Dr. Juan dela Cruz"
+
+
+class TestBackfillMigration:
+    """The data migration writes what refresh_signatories would onto existing rows."""
+
+    def test_backfill(self, app, office):
+        import importlib.util
+        import os
+
+        path = os.path.join(os.path.dirname(__file__), "..", "migrations", "versions", "backfill_pcr_signatories.py")
+        spec = importlib.util.spec_from_file_location("backfill_pcr_signatories", path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+
+        ipcr, opcr = office["ipcr"], office["opcr"]
+        expected = [ipcr.to_dict(), opcr.to_dict()]
+        for row in (ipcr, opcr):
+            for column in migration.SIGNATORY_COLUMNS:
+                setattr(row, column, "")
+        db.session.commit()
+
+        assert migration.backfill(db.session.connection()) == 2
+        db.session.commit()
+        db.session.expire_all()
+
+        for before, after in zip(expected, [ipcr.to_dict(), opcr.to_dict()]):
+            for slot in ("review", "approve", "discuss", "assess", "final", "confirm"):
+                assert after[slot] == before[slot]
+        assert ipcr.confirmed_by == "Mayor Reyes"
+
+
+class TestPureSerialization:
+    """to_dict no longer writes or commits."""
+
+    def test_to_dict_issues_no_writes(self, app, office, statements):
+        statements.clear()
+        ipcr_data = office["ipcr"].to_dict()
+        opcr_data = office["opcr"].to_dict()
+
+        assert writes(statements) == []
+        assert not db.session.dirty
+        assert ipcr_data["review"] == {"name": "Ben L. Santos", "position": "Office Head", "date": ""}
+        assert opcr_data["confirm"] == {"name": "Mayor Reyes", "position": "PMT Chairperson", "date": ""}
@@ -0,0 +1,109 @@
+"""
+PDF Rasterizer Tests
+PDF attachments render in worker processes, within per-document and per-compile page limits
+"""
+
+import io
+import shutil
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from flask import Flask
+from PIL import Image
+
+from utils import PdfRasterizer
+from utils.PdfRasterizer import Page_Budget, Pdf_Raster_Error, Pdf_Rasterizer, Raster, Raster_Page
+
+
+def pdf_bytes(pages):
+    images = [Image.new("RGB", (200, 260), "white") for _ in range(pages)]
+    buf = io.BytesIO()
+    images[0].save(buf, "PDF", save_all=True, append_images=images[1:])
+    return buf.getvalue()
+
+
+@pytest.fixture
+def rasterizer():
+    rasterizer = Pdf_Rasterizer()
+    yield rasterizer
+    rasterizer.shutdown()
+
+
+@pytest.fixture
+def submitted(monkeypatch, rasterizer):
+    """Answers every render at once with as many blank pages as were asked for, out of 50."""
+    calls = []
+
+    def submit(workers, fn, data, dpi, pages, timeout):
+        calls.append({"dpi": dpi, "pages": pages, "timeout": timeout})
+        future = Future()
+        future.set_result(Raster([Raster_Page(b"png", 10, 10)] * pages, 50))
+        return None, future
+
+    monkeypatch.setattr(rasterizer, "_submit", submit)
+    return calls
+
+
+class TestLimits:
+    """Page caps and DPI come from settings, and the compile budget is shared."""
+
+    def test_defaults(self, rasterizer, submitted):
+        raster = rasterizer.rasterize(b"%PDF")
+
+        assert submitted == [{"dpi": PdfRasterizer.PDF_RASTER_DPI, "pages": PdfRasterizer.PDF_RASTER_MAX_PAGES,
+                              "timeout": PdfRasterizer.PDF_RASTER_TIMEOUT}]
+        assert raster.total_pages == 50
+
+    def test_caller_cannot_exceed_max_pages(self, rasterizer, submitted):
+        app = Flask(__name__)
+        app.config.update(PDF_RASTER_MAX_PAGES=6, PDF_RASTER_DPI=96)
+        with app.app_context():
+            rasterizer.rasterize(b"%PDF", max_pages=4)
+            rasterizer.rasterize(b"%PDF", max_pages=40)
+
+        assert [(c["pages"], c["dpi"]) for c in submitted] == [(4, 96), (6, 96)]
+
+    def test_budget_shared_across_documents(self, rasterizer, submitted):
+        budget = Page_Budget(30)
+        first = rasterizer.rasterize(b"%PDF", budget=budget)
+        second = rasterizer.rasterize(b"%PDF", budget=budget)
+
+        assert (len(first.pages), len(second.pages)) == (20, 10)
+        assert budget.remaining == 0
+        with pytest.raises(Pdf_Raster_Error, match="page limit"):
+            rasterizer.rasterize(b"%PDF", budget=budget)
+        assert len(submitted) == 2
+        assert rasterizer.stats()["over_budget"] == 1
+
+
+class TestWorkers:
+    """Renders run in a spawned pool that is replaced when a worker hangs."""
+
+    def test_invalid_pdf(self, rasterizer):
+        with pytest.raises(Pdf_Raster_Error):
+            rasterizer.rasterize(b"not a pdf")
+        assert rasterizer.stats()["failures"] == 1
+
+    def test_stuck_pool_is_killed(self, rasterizer):
+        pool, future = rasterizer._submit(1, time.sleep, 30)
+        time.sleep(0.5)
+        rasterizer._restart(pool)
+
+        with pytest.raises(BrokenProcessPool):
+            future.result(timeout=10)
+        assert rasterizer._pool is None
+        assert rasterizer.stats()["restarts"] == 1
+
+        # a later render starts a fresh pool
+        new_pool, future = rasterizer._submit(1, abs, -3)
+        assert new_pool is not pool and future.result(timeout=30) == 3
+
+    @pytest.mark.skipif(shutil.which("pdftoppm") is None, reason="poppler is not installed")
+    def test_render(self, rasterizer):
+        raster = rasterizer.rasterize(pdf_bytes(5), dpi=72, max_pages=3)
+
+        assert raster.total_pages == 5
+        assert len(raster.pages) == 3
+        assert Image.open(io.BytesIO(raster.pages[0].png)).size == (raster.pages[0].width, raster.pages[0].height)
@@ -0,0 +1,103 @@
+"""
+Query Profiler Tests
+Per-request statement counting, headers and N+1 fingerprinting
+"""
+
+import pytest
+from flask import Flask, jsonify
+
+from app import db
+from config import TestConfig
+from models.System_Settings import System_Settings
+from utils.QueryProfiler import Query_Profiler, normalize_sql
+
+
+@pytest.fixture
+def profiler():
+    return Query_Profiler()
+
+
+@pytest.fixture
+def app(bare_app, profiler):
+    """The bare app with profiling on and routes that batch, N+1 and fail a statement."""
+    app = bare_app
+    app.config["QUERY_PROFILING"] = True
+    app.config["QUERY_PROFILING_N1_THRESHOLD"] = 5
+    profiler.init_app(app)
+
+    @app.route("/batched")
+    def batched():
+        return jsonify(count=System_Settings.query.count())
+
+    @app.route("/n-plus-one")
+    def n_plus_one():
+        return jsonify([db.session.get(System_Settings, i) is None for i in range(1, 8)])
+
+    @app.route("/failing")
+    def failing():
+        try:
+            db.session.execute(db.text("SELECT * FROM missing_table"))
+        except Exception:
+            db.session.rollback()
+        return jsonify(count=System_Settings.query.count())
+
+    return app
+
+
+class TestNormalizeSql:
+    """Statements that differ only in parameters share a fingerprint."""
+
+    def test_literals_and_placeholders(self):
+        assert normalize_sql("SELECT * FROM users WHERE id = 5") == normalize_sql("SELECT * FROM users  WHERE id = %s")
+        assert normalize_sql("SELECT * FROM users WHERE name = 'x'") == "SELECT * FROM users WHERE name = ?"
+
+    def test_in_lists_collapse(self):
+        assert normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s)") == normalize_sql("SELECT * FROM t WHERE id IN (?)")
+
+
+class TestQueryProfiler:
+    """Headers on every response and per-endpoint aggregates for the admin route."""
+
+    def test_headers(self, app):
+        response = app.test_client().get("/batched")
+        assert response.headers["X-DB-Queries"] == "1"
+        assert float(response.headers["X-DB-Time"]) >= 0
+        assert "X-DB-N-Plus-One" not in response.headers
+
+    def test_flags_n_plus_one(self, app, profiler):
+        client = app.test_client()
+        response = client.get("/n-plus-one")
+        client.get("/n-plus-one")
+
+        assert response.headers["X-DB-Queries"] == "7"
+        assert response.headers["X-DB-N-Plus-One"] == "1"
+
+        endpoint = profiler.report()["endpoints"][0]
+        assert endpoint["endpoint"] == "GET /n-plus-one"
+        assert endpoint["requests"] == 2
+        assert endpoint["n_plus_one"][0]["executions"] == 14
+        assert endpoint["n_plus_one"][0]["n_plus_one_requests"] == 2
+
+    def test_failed_statement_leaves_no_timer(self, app):
+        response = app.test_client().get("/failing")
+        assert response.headers["X-DB-Queries"] == "1"
+
+        with app.app_context():
+            assert "query_profiler_start" not in db.engine.raw_connection().info
+
+    def test_unmatched_paths_share_one_entry(self, app, profiler):
+        client = app.test_client()
+        for path in ("/missing", "/wp-login.php", "/missing/123"):
+            client.get(path)
+
+        endpoints = [entry["endpoint"] for entry in profiler.report()["endpoints"]]
+        assert endpoints == ["<unmatched>"]
+
+    def test_disabled_by_default(self):
+        app = Flask(__name__)
+        app.config.from_object(TestConfig)
+        profiler = Query_Profiler(app)
+        assert profiler.enabled is False
+
+        response = app.test_client().get("/missing")
+        assert "X-DB-Queries" not in response.headers
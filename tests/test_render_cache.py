@@ -0,0 +1,200 @@
+"""
+Render Cache Tests
+Rendered attachment pages are reused across compiles, capped in size and written atomically
+"""
+
+import io
+import os
+import threading
+import zipfile
+from collections import Counter
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from flask import Flask
+from PIL import Image
+
+from utils.PdfRasterizer import Pdf_Rasterizer, Raster, Raster_Page
+from utils.RenderCache import Render_Cache
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def png(color, size=(40, 30)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def media(pptx):
+    archive = zipfile.ZipFile(io.BytesIO(pptx))
+    return sorted(archive.read(n) for n in archive.namelist() if n.startswith("ppt/media/"))
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(RENDER_CACHE_DIR=str(tmp_path / "renders"), RENDER_CACHE_MAX_MB=1)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def server():
+    """Local stub serving /image.png as a small PNG and counting requests."""
+    hits = Counter()
+    body = png("teal", (80, 60))
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            hits[self.path] += 1
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+
+    httpd = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.hits = hits
+    yield httpd
+    httpd.shutdown()
+
+
+class TestEntries:
+    """Entries are keyed by source, page, dpi and max dimension."""
+
+    def test_round_trip(self, app):
+        cache = Render_Cache()
+        cache.put("s3:a.pdf", 1, 150, 0, b"page-1")
+
+        assert cache.get("s3:a.pdf", 1, 150, 0) == b"page-1"
+        assert cache.get("s3:a.pdf", 1, 120, 0) is None
+        assert cache.get("s3:b.pdf", 1, 150, 0) is None
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+    def test_atomic_write_leaves_no_partial_files(self, app):
+        cache = Render_Cache()
+        cache.put("s3:a.png", 1, 0, 0, b"x" * 1000)
+
+        files = [f for _, _, names in os.walk(app.config["RENDER_CACHE_DIR"]) for f in names]
+        assert len(files) == 1 and files[0].endswith(".png")
+
+    def test_disabled_without_size(self, app):
+        app.config["RENDER_CACHE_MAX_MB"] = 0
+        cache = Render_Cache()
+        cache.put("s3:a.png", 1, 0, 0, b"data")
+
+        assert cache.source({"object_name": "a.png"}) is None
+        assert cache.get("s3:a.png", 1, 0, 0) is None
+        assert not os.path.exists(app.config["RENDER_CACHE_DIR"])
+
+    def test_source(self, app):
+        cache = Render_Cache()
+
+        assert cache.source({"object_name": "docs/a.pdf"}) == "s3:docs/a.pdf"
+        assert cache.source({}, b"content").startswith("sha256:")
+        assert cache.source({}) is None
+
+    def test_least_recently_used_evicted(self, app):
+        app.config["RENDER_CACHE_MAX_MB"] = 0.01   # ~10 KB
+        cache = Render_Cache()
+        for n in range(4):
+            cache.put(f"s3:{n}", 1, 0, 0, b"x" * 2000)
+        # age 0 and 1, then read 0: 1 is now the least recently used
+        os.utime(cache.path(cache.settings(), cache.key("s3:0", 1, 0, 0)), (1, 1))
+        os.utime(cache.path(cache.settings(), cache.key("s3:1", 1, 0, 0)), (0, 0))
+        assert cache.get("s3:0", 1, 0, 0) is not None
+
+        cache.put("s3:4", 1, 0, 0, b"x" * 4000)
+
+        assert cache.get("s3:1", 1, 0, 0) is None
+        assert cache.get("s3:0", 1, 0, 0) is not None
+        assert cache.stats()["evictions"] >= 1
+        assert cache.stats()["bytes"] <= 0.01 * 1024 * 1024
+
+
+class TestRenders:
+    """Images and PDF pages are rendered once per source."""
+
+    def test_image(self, app):
+        cache = Render_Cache()
+        first = cache.image("s3:photo.png", png("navy"), (2, 2))
+
+        assert (first.format, first.width, first.height) == ("png", 40, 30)
+        assert cache.has_image("s3:photo.png", (2, 2))
+        assert not cache.has_image("s3:photo.png", (1, 1))
+        assert cache.image("s3:photo.png", None, (2, 2)) == first
+        with pytest.raises(ValueError):
+            cache.image("s3:other.png", None, (2, 2))
+
+    def test_pdf_pages_served_from_cache(self, app, monkeypatch):
+        from utils import RenderCache
+
+        cache = Render_Cache()
+        monkeypatch.setattr(RenderCache, "render_cache", cache)
+        rasterizer = Pdf_Rasterizer()
+        renders = []
+
+        def submit(workers, fn, data, dpi, pages, timeout):
+            renders.append(pages)
+            future = Future()
+            future.set_result(Raster([Raster_Page(png("white", (60 + n, 80)), 60 + n, 80) for n in range(pages)], 6))
+            return None, future
+
+        monkeypatch.setattr(rasterizer, "_submit", submit)
+
+        first = rasterizer.rasterize(b"%PDF", dpi=100, max_pages=3, source="s3:a.pdf")
+        assert cache.has_raster("s3:a.pdf", 100, 3) and not cache.has_raster("s3:a.pdf", 100, 4)
+
+        again = rasterizer.rasterize(None, dpi=100, max_pages=2, source="s3:a.pdf")
+        assert renders == [3]
+        assert [p.png for p in again.pages] == [p.png for p in first.pages[:2]]
+        assert [(p.width, p.height) for p in again.pages] == [(60, 80), (61, 80)]
+        assert again.total_pages == 6
+        assert rasterizer.stats()["cached"] == 1
+
+
+class TestCompilers:
+    """A repeated compile embeds the cached renders without downloading again."""
+
+    def test_presentation_skips_download(self, app, server, monkeypatch):
+        from utils import PresentationCompiler
+
+        monkeypatch.chdir(ROOT)
+        app.config["RENDER_CACHE_DIR"] = os.path.abspath(app.config["RENDER_CACHE_DIR"])
+
+        def documents():
+            return [{"task_name": "Task A", "user_name": "Ana Reyes", "title": "Photo", "file_name": "photo.png",
+                     "object_name": "docs/photo.png", "file_type": "image/png",
+                     "download_url": f"{server.base}/image.png"}]
+
+        first = PresentationCompiler.build_presentation(documents())
+        second = PresentationCompiler.build_presentation(documents())
+
+        assert server.hits["/image.png"] == 1
+        assert media(first) == media(second)
+
+    def test_warm(self, app, server):
+        from utils.RenderCache import render_cache
+        from utils.SupportDocCompiler import IMAGE_SLOT
+
+        documents = [
+            {"object_name": "docs/photo.png", "file_type": "image/png", "download_url": f"{server.base}/image.png"},
+            {"object_name": "docs/notes.txt", "file_type": "text/plain", "download_url": f"{server.base}/notes.txt"},
+        ]
+
+        assert render_cache.warm(documents) == {"documents": 2, "cached": 0, "rendered": 1, "failed": 0, "skipped": 1}
+        assert render_cache.warm(documents) == {"documents": 2, "cached": 1, "rendered": 0, "failed": 0, "skipped": 1}
+        assert server.hits == {"/image.png": 1}
+        assert render_cache.has_image("s3:docs/photo.png", IMAGE_SLOT)
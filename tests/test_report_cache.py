@@ -0,0 +1,157 @@
+"""
+Report Cache Tests
+Generated reports are stored under a hash of their inputs and served again while unchanged
+"""
+
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from utils import ExcelHandler, FileStorage
+from utils.ReportCache import Report_Cache
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+TEMPLATE = "excels/OPCRTest.xlsx"
+OPCR_DIR = os.path.join(ROOT, "excels", "OPCR")
+
+DATA = [{"Core Functions": [{
+    "title": "Task 1",
+    "frequency": 2,
+    "summary": {"target": 10, "actual": 8},
+    "working_days": {"target": 4, "actual": 0},
+    "corrections": {"target": 2, "actual": 1},
+    "description": {
+        "target": "documents prepared", "actual": "documents submitted", "time": "day",
+        "alterations": "correction", "timeliness_mode": "count", "task_weight": 0.25,
+    },
+    "rating": {"quantity": 4, "efficiency": 3, "timeliness": 5, "average": 4, "weighted_avg": 1.0},
+}]}]
+ADMIN = {
+    "fullName": "Juan Dela Cruz",
+    "position": "College President",
+    "lastName": "Dela Cruz",
+    "individuals": {
+        key: {"name": f"{key.title()} Person", "position": "Dean"}
+        for key in ("approve", "assess", "final", "discuss", "confirm")
+    },
+}
+
+
+@pytest.fixture
+def app(bare_app, tmp_path, monkeypatch):
+    """Runs from the repository root with the local backend writing to a temporary directory; S3 uploads are captured."""
+    monkeypatch.chdir(ROOT)
+    bare_app.config.update(REPORT_CACHE_BACKEND="local", REPORT_CACHE_DIR=str(tmp_path / "cache"))
+
+    uploads = []
+    monkeypatch.setattr(FileStorage, "upload_fileobj", lambda output, bucket, key: uploads.append(key) or key)
+    bare_app.uploads = uploads
+    return bare_app
+
+
+def report(content=b"PK-report"):
+    return io.BytesIO(content)
+
+
+class TestKey:
+    """The key changes with the inputs, the template and the settings version."""
+
+    def test_same_inputs_same_key(self, app):
+        cache = Report_Cache()
+        assert cache.key("opcr", TEMPLATE, {"data": [1, 2], "b": "x"}) == cache.key("opcr", TEMPLATE, {"b": "x", "data": [1, 2]})
+
+    def test_inputs_and_kind_change_key(self, app):
+        cache = Report_Cache()
+        key = cache.key("opcr", TEMPLATE, {"data": [1, 2]})
+        assert cache.key("opcr", TEMPLATE, {"data": [1, 3]}) != key
+        assert cache.key("master_opcr", TEMPLATE, {"data": [1, 2]}) != key
+        assert cache.key("opcr", "excels/WeightedOPCRTest.xlsx", {"data": [1, 2]}) != key
+
+    def test_settings_version_changes_key(self, app):
+        from models.System_Settings import System_Settings
+
+        cache = Report_Cache()
+        key = cache.key("opcr", TEMPLATE, {})
+        System_Settings.query.first().bump_version()
+        db.session.commit()
+
+        assert cache.key("opcr", TEMPLATE, {}) != key
+
+
+class TestLookup:
+    """Published artifacts are found again until they expire or are evicted."""
+
+    def test_publish_then_hit(self, app):
+        cache = Report_Cache()
+        key = cache.key("opcr", TEMPLATE, {"data": 1})
+
+        assert cache.lookup(key) is None
+        url = cache.publish(key, report(), "OPCR/report.xlsx")
+
+        assert url == f"/api/v1/jobs/artifacts/{key}"
+        assert cache.lookup(key) == url
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+        assert stats["entries"] == 1 and stats["total_hits"] == 1
+
+    def test_missing_file_is_a_miss(self, app):
+        cache = Report_Cache()
+        key = cache.key("opcr", TEMPLATE, {"data": 1})
+        cache.publish(key, report(), "OPCR/report.xlsx")
+        os.remove(cache.backend().path(key))
+
+        assert cache.lookup(key) is None
+
+    def test_expired_entry_is_a_miss(self, app):
+        from models.Jobs import Report_Artifact
+
+        cache = Report_Cache()
+        key = cache.key("opcr", TEMPLATE, {"data": 1})
+        cache.publish(key, report(), "OPCR/report.xlsx")
+        db.session.get(Report_Artifact, key).created_at = datetime.now() - timedelta(hours=200)
+        db.session.commit()
+
+        assert cache.lookup(key) is None
+
+    def test_least_recently_used_evicted(self, app):
+        from models.Jobs import Report_Artifact
+
+        app.config["REPORT_CACHE_MAX_ENTRIES"] = 2
+        cache = Report_Cache()
+        keys = [cache.key("opcr", TEMPLATE, {"data": n}) for n in range(3)]
+        cache.publish(keys[0], report(), "OPCR/a.xlsx")
+        cache.publish(keys[1], report(), "OPCR/b.xlsx")
+        db.session.get(Report_Artifact, keys[1]).last_used_at = datetime.now() - timedelta(hours=1)
+        db.session.commit()
+        cache.publish(keys[2], report(), "OPCR/c.xlsx")
+
+        assert {a.key for a in Report_Artifact.query.all()} == {keys[0], keys[2]}
+        assert not os.path.exists(cache.backend().path(keys[1]))
+        assert cache.stats()["evictions"] == 1
+
+
+class TestWriters:
+    """An unchanged report is not written a second time."""
+
+    def test_master_opcr_served_from_cache(self, app):
+        from models.Jobs import Report_Job_Service
+        from utils.ReportCache import report_cache
+
+        before = set(os.listdir(OPCR_DIR))
+        first = ExcelHandler.createNewMasterOPCR(DATA, {}, ADMIN)
+        second = ExcelHandler.createNewMasterOPCR(DATA, {}, ADMIN)
+
+        assert first == second
+        assert set(os.listdir(OPCR_DIR)) == before
+        assert app.uploads == []
+        assert report_cache.stats()["entries"] == 1
+
+        with app.test_request_context():
+            response = Report_Job_Service.download_artifact(first.rsplit("/", 1)[1])
+            response.direct_passthrough = False
+            assert response.status_code == 200
+            assert response.get_data()[:2] == b"PK"
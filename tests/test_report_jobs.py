@@ -0,0 +1,376 @@
+"""
+Report Job Tests
+Queueing, deduplication, the worker loop and report_ready notifications
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask import g
+from sqlalchemy import insert
+
+from app import db, socketio
+from services import report_jobs
+
+
+@pytest.fixture
+def app(bare_app, tmp_path):
+    """The bare app with artifacts written to a temporary directory."""
+    bare_app.config.update(REPORT_JOBS_DIR=str(tmp_path), REPORT_JOB_TIMEOUT=60)
+    return bare_app
+
+
+@pytest.fixture
+def kinds(monkeypatch):
+    """Replaces the report handlers with fakes."""
+    from models.Jobs import Report_Job_Error
+
+    calls = []
+
+    def link(params, progress):
+        calls.append(params)
+        return {"url": f"https://files.example/{params['n']}.xlsx"}
+
+    def docx(params, progress):
+        for i in range(1, 5):
+            progress(i, 4)
+        return {"content": b"PK-docx", "filename": "report.docx", "mimetype": "application/octet-stream"}
+
+    def empty(params, progress):
+        raise Report_Job_Error("No supporting documents to compile.")
+
+    monkeypatch.setattr(report_jobs, "REPORT_KINDS", {"link": link, "docx": docx, "empty": empty})
+    return calls
+
+
+def worker(app):
+    from utils.ReportWorker import Report_Worker
+    return Report_Worker(app, concurrency=1)
+
+
+class TestEnqueue:
+    """Identical in-flight requests share one job."""
+
+    def test_identical_requests_are_deduplicated(self, app):
+        from models.Jobs import Report_Job, Report_Job_Service
+
+        first, created = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+        second, created_again = Report_Job_Service.enqueue("link", {"n": 1}, user_id=2)
+        other, _ = Report_Job_Service.enqueue("link", {"n": 2}, user_id=1)
+
+        assert created and not created_again
+        assert second.id == first.id
+        assert second.requested_by == [1, 2]
+        assert other.id != first.id
+        assert Report_Job.query.count() == 2
+
+    def test_finished_job_is_not_reused(self, app, kinds):
+        from models.Jobs import Report_Job_Service
+
+        first, _ = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+        worker(app).run_once()
+
+        again, created = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+        assert created
+        assert again.id != first.id
+
+
+    @pytest.fixture
+    def finish_after_lookup(self, app):
+        """Finishes the job between enqueue's active_key lookup and its row lock."""
+        from sqlalchemy import event, update
+        from models.Jobs import Report_Job
+
+        outcome = {}
+
+        def finish(state):
+            if not outcome or not state.is_select:
+                return None
+            values = outcome.copy()
+            outcome.clear()
+            frozen = state.invoke_statement().freeze()
+            state.session.execute(update(Report_Job).values(active_key=None, finished_at=datetime.now(), **values))
+            state.session.commit()
+            return frozen()
+
+        event.listen(db.session, "do_orm_execute", finish)
+        yield outcome
+        event.remove(db.session, "do_orm_execute", finish)
+
+    def test_join_after_job_finished_returns_result(self, app, finish_after_lookup):
+        from models.Jobs import Report_Job, Report_Job_Service, JOB_DONE
+
+        first, _ = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+        finish_after_lookup.update(status=JOB_DONE, result_url="https://files.example/1.xlsx")
+        second, created = Report_Job_Service.enqueue("link", {"n": 1}, user_id=2)
+
+        assert not created
+        assert second.id == first.id
+        assert second.status == JOB_DONE
+        assert second.to_dict()["link"] == "https://files.example/1.xlsx"
+        assert second.requested_by == [1, 2]
+        assert Report_Job.query.count() == 1
+
+    def test_join_after_job_failed_starts_over(self, app, finish_after_lookup):
+        from models.Jobs import Report_Job_Service, JOB_FAILED, JOB_QUEUED
+
+        first, _ = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+        finish_after_lookup.update(status=JOB_FAILED, error="boom")
+        second, created = Report_Job_Service.enqueue("link", {"n": 1}, user_id=2)
+
+        assert created
+        assert second.id != first.id
+        assert second.status == JOB_QUEUED
+        assert second.requested_by == [2]
+
+
+class TestReportWorker:
+    """The worker claims queued jobs, stores the artifact and records failures."""
+
+    def test_runs_url_report(self, app, kinds):
+        from models.Jobs import Report_Job, Report_Job_Service, JOB_DONE
+
+        job, _ = Report_Job_Service.enqueue("link", {"n": 7}, user_id=1)
+        assert worker(app).run_once() == job.id
+        assert worker(app).run_once() is None
+
+        job = db.session.get(Report_Job, job.id)
+        db.session.refresh(job)
+        assert job.status == JOB_DONE
+        assert job.result_url == "https://files.example/7.xlsx"
+        assert job.active_key is None
+        assert job.attempts == 1
+        assert kinds == [{"n": 7}]
+
+    def test_stores_generated_file(self, app, kinds, tmp_path):
+        from models.Jobs import Report_Job, Report_Job_Service, JOB_DONE
+
+        job, _ = Report_Job_Service.enqueue("docx", {"dept_id": 3}, user_id=1)
+        worker(app).run_once()
+
+        job = db.session.get(Report_Job, job.id)
+        db.session.refresh(job)
+        assert job.status == JOB_DONE
+        assert job.progress == 100
+        assert job.result_path.startswith(str(tmp_path))
+        with open(job.result_path, "rb") as f:
+            assert f.read() == b"PK-docx"
+
+    def test_expected_failure_is_recorded(self, app, kinds):
+        from models.Jobs import Report_Job, Report_Job_Service, JOB_FAILED
+
+        job, _ = Report_Job_Service.enqueue("empty", {"ipcr_id": 1}, user_id=1)
+        worker(app).run_once()
+
+        job = db.session.get(Report_Job, job.id)
+        db.session.refresh(job)
+        assert job.status == JOB_FAILED
+        assert job.error == "No supporting documents to compile."
+        assert job.active_key is None
+
+    def test_stale_running_job_is_requeued(self, app, kinds):
+        from models.Jobs import Report_Job, Report_Job_Service, JOB_RUNNING, JOB_DONE
+
+        job, _ = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+        job.status = JOB_RUNNING
+        job.attempts = 1
+        job.heartbeat_at = datetime.now() - timedelta(minutes=5)
+        db.session.commit()
+
+        assert worker(app).run_once() == job.id
+        db.session.refresh(job)
+        assert job.status == JOB_DONE
+        assert job.attempts == 2
+
+    def test_hung_job_fails_despite_heartbeat(self, app, kinds):
+        from models.Jobs import Report_Job_Service, JOB_RUNNING, JOB_FAILED
+
+        job, _ = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+        job.status = JOB_RUNNING
+        job.attempts = 1
+        job.started_at = datetime.now() - timedelta(minutes=2)
+        job.heartbeat_at = datetime.now()
+        db.session.commit()
+
+        assert worker(app).run_once() is None
+        db.session.refresh(job)
+        assert job.status == JOB_FAILED
+        assert job.error == "The report took too long to generate."
+        assert job.active_key is None
+        assert kinds == []
+
+    def test_late_result_of_timed_out_job_is_discarded(self, app, kinds, monkeypatch):
+        from sqlalchemy import update
+        from models.Jobs import Report_Job, Report_Job_Service, JOB_FAILED
+
+        report_worker = worker(app)
+
+        def hung(params, progress):
+            # another worker gives up on the job before it returns
+            db.session.execute(update(Report_Job).values(started_at=datetime.now() - timedelta(minutes=2)))
+            db.session.commit()
+            report_worker.requeue_stale()
+            return {"url": "https://files.example/late.xlsx"}
+
+        monkeypatch.setitem(report_jobs.REPORT_KINDS, "hung", hung)
+        job, _ = Report_Job_Service.enqueue("hung", {}, user_id=1)
+        report_worker.run_once()
+
+        db.session.refresh(job)
+        assert job.status == JOB_FAILED
+        assert job.result_url is None
+
+    def test_heartbeat_kept_without_progress(self, app, kinds, monkeypatch):
+        import time
+        from models.Jobs import Report_Job, Report_Job_Service
+
+        app.config["REPORT_JOB_HEARTBEAT"] = 0.05
+        beats = []
+
+        def slow(params, progress):
+            # a long workbook build that never reports progress
+            time.sleep(0.3)
+            beats.append(db.session.execute(db.select(Report_Job.heartbeat_at, Report_Job.started_at)).one())
+            return {"url": "https://files.example/slow.xlsx"}
+
+        monkeypatch.setitem(report_jobs.REPORT_KINDS, "slow", slow)
+        Report_Job_Service.enqueue("slow", {}, user_id=1)
+        worker(app).run_once()
+
+        [(heartbeat_at, started_at)] = beats
+        assert heartbeat_at >= started_at + timedelta(seconds=0.1)
+
+
+class TestJobAccess:
+    """Only requesters and administrators see a job; each finish is announced once."""
+
+    def test_status_visible_to_requesters_only(self, app):
+        from models.Jobs import Report_Job_Service
+
+        job, _ = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+
+        with app.test_request_context():
+            g.token_payload = {"id": 1, "role": "faculty"}
+            response, code = Report_Job_Service.get_job(job.id)
+            assert code == 200
+            assert response.get_json()["status"] == "queued"
+
+            g.token_payload = {"id": 2, "role": "faculty"}
+            assert Report_Job_Service.get_job(job.id)[1] == 404
+
+            g.token_payload = {"id": 2, "role": "administrator"}
+            assert Report_Job_Service.get_job(job.id)[1] == 200
+
+    def test_download_waits_for_the_job(self, app, kinds):
+        from models.Jobs import Report_Job_Service
+
+        job, _ = Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+
+        with app.test_request_context():
+            g.token_payload = {"id": 1, "role": "faculty"}
+            assert Report_Job_Service.download(job.id)[1] == 409
+
+            worker(app).run_once()
+            db.session.expire_all()
+            response, code = Report_Job_Service.download(job.id)
+            assert code == 200
+            assert response.get_json()["link"] == "https://files.example/1.xlsx"
+
+    def test_notifies_every_requester_once(self, app, kinds, monkeypatch):
+        from models.Jobs import Report_Job_Service
+        from utils.ReportWorker import Job_Notifier
+
+        emitted = []
+        monkeypatch.setattr(socketio, "emit", lambda event, data, to=None: emitted.append((event, to)))
+
+        Report_Job_Service.enqueue("link", {"n": 1}, user_id=1)
+        Report_Job_Service.enqueue("link", {"n": 1}, user_id=2)
+        worker(app).run_once()
+
+        notifier = Job_Notifier()
+        notifier.app = app
+        assert notifier.notify_finished() == 1
+        assert notifier.notify_finished() == 0
+        assert emitted == [("report_ready", "user_1"), ("report_ready", "user_2")]
+
+
+class TestInlineMode:
+    """REPORT_JOBS_MODE=inline answers the route like before the queue existed."""
+
+    def test_submit_returns_link(self, app, kinds):
+        from models.Jobs import Report_Job, Report_Job_Service
+
+        with app.test_request_context():
+            response, code = Report_Job_Service.submit("link", {"n": 4})
+
+        assert code == 200
+        assert response.get_json() == {"link": "https://files.example/4.xlsx"}
+        assert Report_Job.query.count() == 0
+
+    def test_submit_maps_expected_failure_to_400(self, app, kinds):
+        from models.Jobs import Report_Job_Service
+
+        with app.test_request_context():
+            response, code = Report_Job_Service.submit("empty", {"ipcr_id": 1})
+
+        assert code == 400
+        assert response.get_json()["error"] == "No supporting documents to compile."
+
+
+class TestRoutes:
+    """Report routes record the requester, so a non-admin can poll and download their own job."""
+
+    @pytest.fixture
+    def client(self, app, kinds, monkeypatch):
+        import jwt
+        from routes.Jobs import jobs
+        from routes.PCR import pcrs
+        from utils.ReportWorker import job_notifier
+
+        from models.User import Profile, User
+
+        db.create_all()   # the Logs table written by log_action
+        db.session.execute(insert(Profile), [{"id": i, "email": f"user{i}@commithub.local"} for i in (5, 6)])
+        db.session.execute(insert(User), [
+            {"id": i, "profile_id": i, "first_name": "Ana", "last_name": "Reyes", "role": "faculty"} for i in (5, 6)
+        ])
+        db.session.commit()
+        monkeypatch.setattr(job_notifier, "ensure_started", lambda app: None)
+        monkeypatch.setitem(report_jobs.REPORT_KINDS, "ipcr", lambda params, progress: {
+            "url": f"https://files.example/ipcr-{params['ipcr_id']}.xlsx"
+        })
+        app.config["REPORT_JOBS_MODE"] = "queue"
+        app.register_blueprint(pcrs)
+        app.register_blueprint(jobs)
+
+        def token(user_id, role):
+            payload = {"id": user_id, "role": role, "first_name": "Ana", "last_name": "Reyes",
+                       "department": {"name": "Office 1"}}
+            return {"Authorization": f"Bearer {jwt.encode(payload, 'priscilla', algorithm='HS256')}"}
+
+        client = app.test_client()
+        client.token = token
+        return client
+
+    def test_requester_polls_and_downloads_ipcr(self, app, client):
+        from models.Jobs import Report_Job
+
+        owner, other = client.token(5, "faculty"), client.token(6, "faculty")
+
+        response = client.get("/api/v1/pcr/ipcr/download/12", headers=owner)
+        assert response.status_code == 202
+        job_id = response.get_json()["job_id"]
+        assert db.session.get(Report_Job, job_id).requested_by == [5]
+
+        worker(app).run_once()
+
+        assert client.get(f"/api/v1/jobs/{job_id}", headers=owner).get_json()["status"] == "done"
+        response = client.get(f"/api/v1/jobs/{job_id}/download", headers=owner)
+        assert response.get_json() == {"link": "https://files.example/ipcr-12.xlsx"}
+        assert client.get(f"/api/v1/jobs/{job_id}", headers=other).status_code == 404
+
+    def test_download_requires_token(self, app, client):
+        from models.Jobs import Report_Job
+
+        assert client.get("/api/v1/pcr/weighted_ipcr/download/12").status_code == 401
+        assert Report_Job.query.count() == 0
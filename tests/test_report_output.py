@@ -0,0 +1,146 @@
+"""
+Report Output Tests
+Workbooks are built in memory, streamed to storage or sent back as the response, and never left on disk
+"""
+
+import io
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from services import report_jobs
+from utils import ExcelHandler, FileStorage, StreamingExcelHandler
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+OPCR_DIR = os.path.join(ROOT, "excels", "OPCR")
+
+DATA = [{"Core Functions": [{
+    "title": "Task 1",
+    "frequency": 2,
+    "summary": {"target": 10, "actual": 8},
+    "working_days": {"target": 4, "actual": 0},
+    "corrections": {"target": 2, "actual": 1},
+    "description": {
+        "target": "documents prepared", "actual": "documents submitted", "time": "day",
+        "alterations": "correction", "timeliness_mode": "count", "task_weight": 0.25,
+    },
+    "rating": {"quantity": 4, "efficiency": 3, "timeliness": 5, "average": 4, "weighted_avg": 1.0},
+}]}]
+ADMIN = {
+    "fullName": "Juan Dela Cruz",
+    "position": "College President",
+    "lastName": "Dela Cruz",
+    "individuals": {
+        key: {"name": f"{key.title()} Person", "position": "Dean"}
+        for key in ("approve", "assess", "final", "discuss", "confirm")
+    },
+}
+
+
+@pytest.fixture
+def app(bare_app, monkeypatch):
+    """Runs from the repository root; uploads are captured and every spooled file is tracked."""
+    monkeypatch.chdir(ROOT)
+    app = bare_app
+    app.uploads, app.spools = [], []
+    monkeypatch.setattr(FileStorage, "upload_fileobj", lambda output, bucket, key: app.uploads.append(key) or key)
+
+    spooled_file = FileStorage.spooled_file
+
+    def tracked():
+        spool = spooled_file()
+        app.spools.append(spool)
+        return spool
+
+    for module in (ExcelHandler, StreamingExcelHandler):
+        monkeypatch.setattr(module, "spooled_file", tracked)
+    return app
+
+
+class TestSpooledUpload:
+    """Writers upload from memory and release the spool on every path."""
+
+    def test_nothing_written_to_disk(self, app):
+        before = set(os.listdir(OPCR_DIR))
+        ExcelHandler.createNewMasterOPCR(DATA, {}, ADMIN)
+
+        assert app.uploads[0].startswith("OPCR/MOPCR-NC - ")
+        assert set(os.listdir(OPCR_DIR)) == before
+        assert all(spool.closed for spool in app.spools)
+
+    def test_spool_closed_when_upload_fails(self, app, monkeypatch):
+        def fail(output, bucket, key):
+            raise ConnectionError("S3 unreachable")
+
+        monkeypatch.setattr(FileStorage, "upload_fileobj", fail)
+        with pytest.raises(ConnectionError):
+            StreamingExcelHandler.createNewMasterOPCR(DATA, {}, ADMIN)
+
+        assert len(app.spools) == 1 and app.spools[0].closed
+
+    def test_upload_fileobj_uses_multipart_config(self, bare_app, monkeypatch):
+        bare_app.config.update(S3_MULTIPART_THRESHOLD=5 * 1024 * 1024, S3_MULTIPART_CONCURRENCY=2)
+        calls = []
+
+        class S3:
+            def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None, Config=None):
+                calls.append((fileobj.read(), bucket, key, ExtraArgs, Config))
+
+            def generate_presigned_url(self, method, Params):
+                return f"https://s3.example/{Params['Key']}"
+
+        monkeypatch.setattr(FileStorage, "s3", S3())
+        output = io.BytesIO(b"PK-report")
+        output.seek(5)
+
+        assert FileStorage.upload_fileobj(output, "bucket", "OPCR/a.xlsx") == "https://s3.example/OPCR/a.xlsx"
+        [(content, bucket, key, extra, config)] = calls
+        assert content == b"PK-report"
+        assert extra == {"ContentType": FileStorage.XLSX_MIMETYPE}
+        assert (config.multipart_threshold, config.max_concurrency) == (5 * 1024 * 1024, 2)
+
+    def test_spool_size_from_config(self, bare_app):
+        bare_app.config["REPORT_SPOOL_MAX_BYTES"] = 16
+        with FileStorage.spooled_file() as small:
+            small.write(b"x" * 8)
+            assert not small._rolled
+            small.write(b"x" * 16)
+            assert small._rolled
+
+
+class TestDirectResponse:
+    """?stream=1 sends the workbook as the response body instead of a link."""
+
+    @pytest.fixture
+    def kinds(self, monkeypatch):
+        def master(params, progress):
+            return {"url": StreamingExcelHandler.createNewMasterOPCR(DATA, {}, ADMIN)}
+
+        monkeypatch.setattr(report_jobs, "REPORT_KINDS", {"master": master})
+
+    def test_workbook_streamed(self, app, kinds):
+        from models.Jobs import Report_Job, Report_Job_Service
+
+        with app.test_request_context("/?stream=1"):
+            response = Report_Job_Service.submit("master", {})
+            response.direct_passthrough = False
+
+            assert response.status_code == 200
+            assert response.mimetype == FileStorage.XLSX_MIMETYPE
+            assert "MOPCR-NC" in response.headers["Content-Disposition"]
+            assert load_workbook(io.BytesIO(response.get_data())).active["A6"].value.startswith("I, Juan Dela Cruz")
+
+        assert app.uploads == []
+        assert Report_Job.query.count() == 0
+
+    def test_disabled_falls_back_to_job(self, app, kinds):
+        from models.Jobs import Report_Job_Service
+
+        app.config["REPORT_STREAM_RESPONSES"] = False
+        with app.test_request_context("/?stream=1"):
+            response, status = Report_Job_Service.submit("master", {})
+
+        assert status == 200
+        assert response.get_json()["link"].startswith("OPCR/MOPCR-NC")
@@ -0,0 +1,59 @@
+"""
+System Settings Cache Tests
+Per-worker settings snapshot, version-based invalidation and pre-parsed periods
+"""
+
+import pytest
+from datetime import date, timedelta
+
+from app import db
+from models.System_Settings import System_Settings, System_Settings_Service, Settings_Cache
+
+
+class TestSettingsCache:
+    """get_default_settings serves a snapshot and reloads when the version moves."""
+
+    def test_returns_read_only_snapshot(self, bare_app):
+        settings = System_Settings.get_default_settings()
+        assert settings.current_period_id
+        with pytest.raises(AttributeError):
+            settings.current_period_id = "PERIOD-X"
+
+    def test_snapshot_reused_within_ttl(self, bare_app):
+        cache = Settings_Cache.for_app()
+        cache.ttl = 60
+        first = System_Settings.get_default_settings()
+        assert System_Settings.get_default_settings() is first
+        assert cache.stats()["reloads"] == 1
+
+    def test_version_bump_reloads(self, bare_app):
+        first = System_Settings.get_default_settings()
+
+        # another worker writes the row: bump the version without touching our cache
+        row = System_Settings.query.first()
+        row.current_period_id = "PERIOD-2026-OTHER"
+        row.bump_version()
+        db.session.commit()
+
+        second = System_Settings.get_default_settings()
+        assert second is not first
+        assert second.current_period_id == "PERIOD-2026-OTHER"
+
+    def test_change_period_invalidates(self, bare_app):
+        Settings_Cache.for_app().ttl = 60
+        before = System_Settings.get_default_settings()
+        System_Settings_Service.change_period()
+        after = System_Settings.get_default_settings()
+        assert after.current_period_id != before.current_period_id
+        assert after.version == before.version + 1
+
+    def test_rating_period_uses_parsed_range(self, bare_app):
+        System_Settings.get_default_settings()
+        row = System_Settings.query.first()
+        row.rating_start_date = date.today() - timedelta(days=1)
+        row.rating_end_date = date.today() + timedelta(days=1)
+        row.bump_version()
+        db.session.commit()
+
+        assert System_Settings.get_default_settings().rating_range[0] == date.today() - timedelta(days=1)
+        assert System_Settings_Service.check_if_rating_period() is True
@@ -0,0 +1,154 @@
+"""
+Streaming Excel Tests
+The xlsxwriter backend writes the same master and weighted OPCR sheets as ExcelHandler
+"""
+
+import io
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from utils import ExcelHandler, FileStorage, StreamingExcelHandler
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def task(n, mode="count"):
+    return {
+        "title": f"Task {n}",
+        "frequency": 2,
+        "summary": {"target": 10 + n, "actual": 8},
+        "working_days": {"target": 4, "actual": -2 if n % 2 else 0},
+        "corrections": {"target": 2, "actual": 1},
+        "description": {
+            "target": "documents prepared", "actual": "documents submitted", "time": "day",
+            "alterations": "correction", "timeliness_mode": mode, "task_weight": 0.25,
+        },
+        "rating": {"quantity": 4, "efficiency": 3, "timeliness": 5, "average": 4, "weighted_avg": 1.0333},
+    }
+
+
+DATA = [
+    {"Core Functions": [task(1), task(2, "deadline"), task(3)]},
+    {},
+    {"Support Functions": [task(4, "deadline")], "Empty": []},
+]
+ASSIGNED = {"Task 1": ["Ana Reyes", "Ben Santos"], "Task 4": ["Carla Cruz"]}
+ADMIN = {
+    "fullName": "Juan Dela Cruz",
+    "position": "College President",
+    "lastName": "Dela Cruz",
+    "individuals": {
+        key: {"name": f"{key.title()} Person", "position": "Dean"}
+        for key in ("approve", "assess", "final", "discuss", "confirm")
+    },
+}
+
+
+@pytest.fixture
+def app(bare_app, monkeypatch):
+    """Runs from the repository root so the templates resolve; uploads are captured as (object name, content)."""
+    monkeypatch.chdir(ROOT)
+    saved = []
+
+    def upload(output, bucket, key):
+        output.seek(0)
+        saved.append((key, io.BytesIO(output.read())))
+        return key
+
+    monkeypatch.setattr(FileStorage, "upload_fileobj", upload)
+    bare_app.saved = saved
+    return bare_app
+
+
+def sheet(content):
+    ws = load_workbook(content).active
+    cells = {}
+    for row in ws.iter_rows():
+        for c in row:
+            value = None if c.value == "" else c.value
+            style = (
+                # a font without name/size is drawn in the workbook's Calibri 11
+                c.font.b, c.font.name or "Calibri", c.font.sz or 11.0,
+                tuple(getattr(getattr(c.border, side), "style", None) for side in ("left", "right", "top", "bottom")),
+                # general / bottom are Excel's defaults, written out or not
+                None if c.alignment.horizontal == "general" else c.alignment.horizontal,
+                None if c.alignment.vertical == "bottom" else c.alignment.vertical,
+                bool(c.alignment.wrap_text),
+                c.number_format, c.fill.fill_type,
+            )
+            if value is not None or style != sheet.blank:
+                cells[c.coordinate] = (value, style)
+    heights = {r: d.height for r, d in ws.row_dimensions.items() if d.height is not None}
+    return {
+        "cells": cells,
+        "merges": {str(r) for r in ws.merged_cells.ranges},
+        "heights": heights,
+        "images": [(i.anchor._from.col, i.anchor._from.row) for i in ws._images],
+        "landscape": ws.page_setup.orientation,
+        "fit": (ws.page_setup.fitToWidth, ws.page_setup.fitToHeight),
+    }
+
+
+sheet.blank = (False, "Calibri", 11.0, (None, None, None, None), None, None, False, "General", None)
+
+
+def assert_same(expected, actual):
+    assert actual["merges"] == expected["merges"]
+    assert actual["images"] == expected["images"]
+    assert actual["heights"] == expected["heights"]
+    assert actual["landscape"] == expected["landscape"]
+    for coordinate in expected["cells"].keys() | actual["cells"].keys():
+        assert actual["cells"].get(coordinate) == expected["cells"].get(coordinate), coordinate
+
+
+class TestStreamingOPCR:
+    """Both reports match the openpyxl output cell for cell."""
+
+    def test_master_opcr_matches(self, app):
+        ExcelHandler.createNewMasterOPCR(DATA, ASSIGNED, ADMIN)
+        StreamingExcelHandler.createNewMasterOPCR(DATA, ASSIGNED, ADMIN)
+
+        (_, expected), (name, actual) = app.saved
+        assert os.path.basename(name).startswith("MOPCR-NC - ")
+        assert_same(sheet(expected), sheet(actual))
+
+    def test_weighted_opcr_matches(self, app):
+        ExcelHandler.createNewWeightedOPCR(DATA, ASSIGNED, ADMIN)
+        StreamingExcelHandler.createNewWeightedOPCR(DATA, ASSIGNED, ADMIN)
+
+        (_, expected), (name, actual) = app.saved
+        assert "Dela Cruz" in os.path.basename(name)
+        assert_same(sheet(expected), sheet(actual))
+
+
+class TestFormatRegistry:
+    """Cells with the same style share one xlsxwriter format."""
+
+    def test_formats_are_shared(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(ROOT)
+        path = str(tmp_path / "many.xlsx")
+        StreamingExcelHandler.render_master_opcr(path, [{"Core Functions": [task(n) for n in range(40)]}], {}, ADMIN)
+
+        workbook, stream = StreamingExcelHandler.open_sheet(str(tmp_path / "few.xlsx"), "excels/OPCRTest.xlsx")
+        for n in range(40):
+            stream.prepare(f"A{30 + n}", f"C{30 + n}")
+        stream.close()
+        workbook.close()
+
+        assert len(load_workbook(path).active.merged_cells.ranges) > 500
+        assert len(stream.formats) < 60
+
+
+class TestBackendSelection:
+    """EXCEL_STREAMING_REPORTS opts report types into the streaming backend."""
+
+    def test_openpyxl_by_default(self, app):
+        assert StreamingExcelHandler.excel_handler("master_opcr") is ExcelHandler
+
+    def test_listed_report_streams(self, app):
+        app.config["EXCEL_STREAMING_REPORTS"] = ["master_opcr"]
+        assert StreamingExcelHandler.excel_handler("master_opcr") is StreamingExcelHandler
+        assert StreamingExcelHandler.excel_handler("weighted_opcr") is ExcelHandler
@@ -0,0 +1,112 @@
+"""
+Supporting Document Collector Tests
+Department compiles filter documents in SQL and load what the compilers read
+in the same statement, so the statement count does not grow with the office
+"""
+
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from models.Departments import Department
+from models.PCR import IPCR, Supporting_Document
+from models.System_Settings import System_Settings
+from models.Tasks import Main_Task, Sub_Task
+from models.User import Profile, User
+from utils import PresentationCompiler, SupportDocCompiler
+
+
+PERIOD = "PERIOD-1"
+SMALL, LARGE = 2, 30
+
+
+@pytest.fixture
+def app(bare_app):
+    settings = System_Settings.load_or_create()
+    settings.current_period_id = PERIOD
+    settings.bump_version()
+    db.session.commit()
+    seed_office(1, SMALL)
+    seed_office(2, LARGE)
+    return bare_app
+
+
+def seed_office(dept_id, members):
+    """
+    `members` users with one IPCR and one sub-task each. Every member has an
+    approved document and a pending one; the office also has an archived, an
+    untasked and a last-period approved document.
+    """
+    base = dept_id * 1000
+    db.session.execute(insert(Department), [{"id": dept_id, "name": f"Office {dept_id}"}])
+    db.session.execute(insert(Main_Task), [
+        {"id": base, "mfo": f"Task {dept_id}", "time_description": "", "modification": "",
+         "target_accomplishment": "", "actual_accomplishment": "", "period": PERIOD}
+    ])
+    db.session.execute(insert(Profile), [{"id": base + i, "email": f"user{base + i}@commithub.local"} for i in range(members)])
+    db.session.execute(insert(User), [
+        {"id": base + i, "profile_id": base + i, "first_name": f"User{i}", "middle_name": "Cruz",
+         "last_name": "Santos", "department_id": dept_id, "role": "faculty"}
+        for i in range(members)
+    ])
+    db.session.execute(insert(IPCR), [{"id": base + i, "user_id": base + i, "period": PERIOD} for i in range(members)])
+    db.session.execute(insert(Sub_Task), [
+        {"id": base + i, "mfo": f"Task {dept_id}", "batch_id": "", "main_task_id": base, "ipcr_id": base + i,
+         "period": PERIOD}
+        for i in range(members)
+    ])
+
+    def document(i, **values):
+        return {"file_name": f"docs/{dept_id}/{i}.pdf", "file_type": "application/pdf", "ipcr_id": base + i,
+                "sub_task_id": base + i, "period": PERIOD, "status": 1, "isApproved": "approved",
+                "title": f"Document {i}", **values}
+
+    db.session.execute(insert(Supporting_Document), [
+        *(document(i) for i in range(members)),
+        *(document(i, file_name=f"docs/{dept_id}/{i}-pending.pdf", isApproved="pending") for i in range(members)),
+        document(0, file_name=f"docs/{dept_id}/archived.pdf", status=0),
+        document(0, file_name=f"docs/{dept_id}/untasked.pdf", sub_task_id=None),
+        document(0, file_name=f"docs/{dept_id}/old.pdf", period="PERIOD-0"),
+    ])
+    db.session.commit()
+
+
+def statements_for(statements, fn, *args):
+    """Runs fn once to warm the settings cache, then counts the statements of a second, cold-session run."""
+    fn(*args)
+    db.session.expunge_all()
+    statements.clear()
+    fn(*args)
+    db.session.expunge_all()
+    return len(statements)
+
+
+COLLECTORS = [SupportDocCompiler.collect_by_department, PresentationCompiler.collect_by_department]
+
+
+class TestCollectByDepartment:
+    """Only the office's active, approved documents of the current period are collected."""
+
+    @pytest.mark.parametrize("collect", COLLECTORS)
+    def test_documents(self, app, collect):
+        docs = collect(1)
+
+        assert sorted(d["object_name"] for d in docs) == ["docs/1/0.pdf", "docs/1/1.pdf", "docs/1/untasked.pdf"]
+        by_name = {d["object_name"]: d for d in docs}
+        assert by_name["docs/1/1.pdf"]["task_name"] == "Task 1"
+        assert by_name["docs/1/1.pdf"]["user_name"] == "User1 C. Santos"
+        assert by_name["docs/1/1.pdf"]["department_name"] == "Office 1"
+        assert by_name["docs/1/untasked.pdf"]["task_name"] == ""
+
+    def test_matches_python_filter(self, app):
+        expected = sorted(
+            d.id for d in Supporting_Document.query.filter_by(period=PERIOD).all()
+            if str(d.ipcr.user.department.id) == "2" and d.status and d.isApproved == "approved"
+        )
+
+        assert sorted(d["id"] for d in SupportDocCompiler.collect_by_department("2")) == expected
+
+    @pytest.mark.parametrize("collect", COLLECTORS)
+    def test_statement_count_is_constant(self, app, statements, collect):
+        # the settings version check, then one joined query for the documents
+        assert statements_for(statements, collect, 1) == statements_for(statements, collect, 2) == 2
@@ -0,0 +1,114 @@
+"""
+Template Cache Tests
+Templates are parsed once, reloaded when they change and handed out as independent copies
+"""
+
+import io
+import os
+import shutil
+
+import pytest
+from docx import Document
+from openpyxl import load_workbook
+
+from utils.TemplateCache import Template_Cache
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+IPCR_TEMPLATE = os.path.join(ROOT, "excels", "IPCRTest.xlsx")
+PPTX_TEMPLATE = os.path.join(ROOT, "excels", "presentation-template.pptx")
+
+
+def cells(wb):
+    ws = wb.worksheets[0]
+    return [
+        (c.coordinate, c.value, repr(c.font), repr(c.border), repr(c.alignment), c.number_format)
+        for row in ws.iter_rows() for c in row
+    ]
+
+
+def saved(wb):
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return load_workbook(buffer)
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "IPCRTest.xlsx"
+    shutil.copy(IPCR_TEMPLATE, path)
+    return str(path)
+
+
+class TestWorkbookTemplates:
+    """Workbook copies behave exactly like a fresh load_workbook."""
+
+    def test_parsed_once(self, template):
+        cache = Template_Cache()
+        cache.workbook(template)
+        cache.workbook(template)
+
+        [stats] = cache.stats()
+        assert stats["loads"] == 1
+        assert stats["hits"] == 1
+        assert stats["copies"] == 2
+
+    def test_copy_saves_like_fresh_load(self, template):
+        cache = Template_Cache()
+        cache.workbook(template)
+
+        assert cells(saved(cache.workbook(template))) == cells(saved(load_workbook(template)))
+
+    def test_copies_are_independent(self, template):
+        cache = Template_Cache()
+        first = cache.workbook(template)
+        original = first.worksheets[0]["A1"].value
+        first.worksheets[0]["A1"] = "changed"
+
+        assert cache.workbook(template).worksheets[0]["A1"].value == original
+
+    def test_copy_sizes_new_rows_and_columns(self, template):
+        cache = Template_Cache()
+        cache.workbook(template)
+        ws = cache.workbook(template).worksheets[0]
+
+        ws.row_dimensions[5000].height = 45
+        ws.column_dimensions["ZZ"].width = 12
+
+        assert ws.row_dimensions[5000].height == 45
+        assert ws.column_dimensions["ZZ"].width == 12
+
+    def test_reloaded_when_file_changes(self, template):
+        cache = Template_Cache()
+        cache.workbook(template)
+
+        wb = load_workbook(template)
+        wb.worksheets[0]["A1"] = "New header"
+        wb.save(template)
+        stat = os.stat(template)
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert cache.workbook(template).worksheets[0]["A1"].value == "New header"
+        assert cache.stats()[0]["loads"] == 2
+
+
+class TestDocumentTemplates:
+    """docx templates are cached as bytes; pptx templates are shared read-only."""
+
+    def test_document_copies_are_independent(self, tmp_path):
+        path = str(tmp_path / "template.docx")
+        doc = Document()
+        doc.add_paragraph("Header")
+        doc.save(path)
+
+        cache = Template_Cache()
+        first = cache.document(path)
+        first.add_paragraph("Body")
+
+        assert [p.text for p in cache.document(path).paragraphs] == ["Header"]
+        assert cache.stats()[0]["loads"] == 1
+
+    def test_presentation_template_is_shared(self):
+        cache = Template_Cache()
+        assert cache.presentation(PPTX_TEMPLATE) is cache.presentation(PPTX_TEMPLATE)
@@ -0,0 +1,185 @@
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import current_app, has_app_context
+from requests.adapters import HTTPAdapter
+
+
+ATTACHMENT_FETCH_WORKERS = 8
+ATTACHMENT_FETCH_RETRIES = 2
+ATTACHMENT_FETCH_BACKOFF = 0.5   # seconds, doubled after every retry
+ATTACHMENT_FETCH_TIMEOUT = 30    # seconds per connect or read
+ATTACHMENT_FETCH_DEADLINE = 600  # seconds for a whole compile
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # the deadline is checked between chunks
+
+# statuses worth another attempt; any other 4xx fails at once
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+Fetched = namedtuple("Fetched", ["url", "content", "error", "attempts"])
+
+
+def _green():
+    """True inside the eventlet gunicorn worker, where sockets are monkey-patched."""
+    eventlet = sys.modules.get("eventlet")
+    return eventlet is not None and eventlet.patcher.is_monkey_patched("socket")
+
+
+class _Green_Pool:
+    """GreenPool with the submit()/result() shape of ThreadPoolExecutor."""
+
+    class Future:
+        def __init__(self, thread):
+            self.thread = thread
+
+        def result(self):
+            return self.thread.wait()
+
+        def cancel(self):
+            return False
+
+    def __init__(self, size):
+        import eventlet
+        self.pool = eventlet.GreenPool(size)
+
+    def submit(self, fn, *args):
+        return self.Future(self.pool.spawn(fn, *args))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.waitall()
+
+
+class Attachment_Fetcher:
+    """
+    Downloads supporting-document attachments for SupportDocCompiler and
+    PresentationCompiler with bounded concurrency.
+
+    fetch(urls) yields one Fetched(url, content, error, attempts) per url, in
+    the order given, while up to ATTACHMENT_FETCH_WORKERS downloads run ahead
+    of the caller; at most twice that many finished attachments wait in
+    memory. Every request goes through one requests.Session whose connection
+    pool is sized to the workers. Timeouts, connection errors and
+    RETRY_STATUSES are retried ATTACHMENT_FETCH_RETRIES times with
+    exponential backoff; nothing starts, waits or keeps downloading past
+    ATTACHMENT_FETCH_DEADLINE seconds after the first request, and the
+    remaining attachments come back with an error instead.
+
+    Workers are threads, or green threads under the eventlet worker class.
+    """
+
+    def __init__(self, workers=None, retries=None, backoff=None, timeout=None, deadline=None):
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.deadline = deadline
+        self._session = None
+        self._session_size = 0
+        self._lock = threading.Lock()
+
+    def _setting(self, value, name, default):
+        if value is not None:
+            return value
+        if has_app_context():
+            return type(default)(current_app.config.get(name, default))
+        return default
+
+    def settings(self):
+        return {
+            "workers": max(1, self._setting(self.workers, "ATTACHMENT_FETCH_WORKERS", ATTACHMENT_FETCH_WORKERS)),
+            "retries": self._setting(self.retries, "ATTACHMENT_FETCH_RETRIES", ATTACHMENT_FETCH_RETRIES),
+            "backoff": float(self._setting(self.backoff, "ATTACHMENT_FETCH_BACKOFF", ATTACHMENT_FETCH_BACKOFF)),
+            "timeout": float(self._setting(self.timeout, "ATTACHMENT_FETCH_TIMEOUT", ATTACHMENT_FETCH_TIMEOUT)),
+            "deadline": float(self._setting(self.deadline, "ATTACHMENT_FETCH_DEADLINE", ATTACHMENT_FETCH_DEADLINE)),
+        }
+
+    def session(self, size):
+        with self._lock:
+            if self._session is None or self._session_size < size:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session, self._session_size = session, size
+            return self._session
+
+    def fetch(self, urls):
+        settings = self.settings()
+        session = self.session(settings["workers"])
+        deadline_at = time.monotonic() + settings["deadline"]
+        window = settings["workers"] * 2
+        pool = _Green_Pool(settings["workers"]) if _green() else ThreadPoolExecutor(settings["workers"])
+
+        stopped = threading.Event()
+        pending = deque()
+        urls = iter(urls)
+        with pool:
+            try:
+                while True:
+                    for url in urls:
+                        pending.append(pool.submit(self._fetch_one, session, url, settings, deadline_at, stopped))
+                        if len(pending) >= window:
+                            break
+                    if not pending:
+                        return
+                    yield pending.popleft().result()
+            finally:
+                # the caller stopped early: drop what has not started
+                stopped.set()
+                for future in pending:
+                    future.cancel()
+
+    def fetch_all(self, urls):
+        return list(self.fetch(urls))
+
+    def _fetch_one(self, session, url, settings, deadline_at, stopped):
+        if not url:
+            return Fetched(url, None, None, 0)
+
+        error = None
+        attempt = 0
+        for attempt in range(1, settings["retries"] + 2):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0 or stopped.is_set():
+                return Fetched(url, None, error or "deadline exceeded before the download started", attempt - 1)
+            try:
+                with session.get(url, timeout=min(settings["timeout"], remaining), stream=True) as resp:
+                    if resp.status_code not in RETRY_STATUSES:
+                        resp.raise_for_status()
+                        return self._read(url, resp, deadline_at, stopped, attempt)
+                    error = f"{resp.status_code} {resp.reason}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            except Exception as e:
+                return Fetched(url, None, str(e), attempt)
+
+            pause = settings["backoff"] * (2 ** (attempt - 1))
+            if attempt <= settings["retries"] and time.monotonic() + pause < deadline_at and not stopped.is_set():
+                time.sleep(pause)
+            else:
+                break
+        return Fetched(url, None, error, attempt)
+
+    def _read(self, url, resp, deadline_at, stopped, attempt):
+        """
+        Reads the body chunk by chunk. The timeout only bounds each socket
+        read, so a slow but steady download is cut off here at the deadline.
+        """
+        body = bytearray()
+        for chunk in resp.iter_content(DOWNLOAD_CHUNK_SIZE):
+            if stopped.is_set():
+                return Fetched(url, None, "fetch cancelled during the download", attempt)
+            if time.monotonic() >= deadline_at:
+                return Fetched(url, None, "deadline exceeded during the download", attempt)
+            body += chunk
+        return Fetched(url, bytes(body), None, attempt)
+
+
+attachment_fetcher = Attachment_Fetcher()
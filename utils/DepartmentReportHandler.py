@@ -1,10 +1,11 @@
 # utils/DepartmentReportHandler.py
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import Border, Side, Alignment, Font, PatternFill
 from openpyxl.utils import get_column_letter
 import datetime
 import random
-from utils.FileStorage import upload_file
+from utils.FileStorage import spooled_file, upload_fileobj
+from utils.TemplateCache import template_cache
 from models.Departments import Department, Department_Service
 from models.User import User
 from models.System_Settings import System_Settings
@@ -59,7 +60,7 @@ def create_department_performance_report(department_id, filename_prefix=None):
     }
     
     # Create new workbook
-    wb = load_workbook("excels/SummaryReportIPCRF.xlsx")
+    wb = template_cache.workbook("excels/SummaryReportIPCRF.xlsx")
     
     ws = wb.active
     ws.title = "Department Performance"
@@ -210,11 +211,10 @@ def create_department_performance_report(department_id, filename_prefix=None):
     period = f"{datetime.datetime.now().strftime('%B %Y')}"
     filename = f"{prefix} - {dept.name} - {period} - {id_rand}"
     
-    filepath = f"excels/DepartmentReports/{filename}.xlsx"
-    wb.save(filepath)
-    
-    # Upload to cloud storage
-    file_url = upload_file(filepath, "commithub-bucket", f"DepartmentReports/{filename}.xlsx")
+    # Stream to cloud storage without writing under excels/
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = upload_fileobj(output, "commithub-bucket", f"DepartmentReports/{filename}.xlsx")
     
     return file_url
 
@@ -251,7 +251,7 @@ def create_all_departments_performance_report(filename_prefix=None):
     }
     
     # Create new workbook
-    wb = load_workbook("excels/OfficeSummaryReport.xlsx")
+    wb = template_cache.workbook("excels/OfficeSummaryReport.xlsx")
     
     ws = wb.active
     ws.title = "Office Performance"
@@ -393,11 +393,10 @@ def create_all_departments_performance_report(filename_prefix=None):
     period = f"{datetime.datetime.now().strftime('%B %Y')}"
     filename = f"{prefix} - {"NORZAGARAY COLLEGE"} - {period} - {id_rand}"
     
-    filepath = f"excels/DepartmentReports/{filename}.xlsx"
-    wb.save(filepath)
-    
-    # Upload to cloud storage
-    file_url = upload_file(filepath, "commithub-bucket", f"DepartmentReports/{filename}.xlsx")
+    # Stream to cloud storage without writing under excels/
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = upload_fileobj(output, "commithub-bucket", f"DepartmentReports/{filename}.xlsx")
     
     return file_url
 
@@ -434,7 +433,7 @@ def create_all_tasks_summary_report(filename_prefix=None):
     }
     
     # Create new workbook
-    wb = load_workbook("excels/TaskSummaryReport.xlsx")
+    wb = template_cache.workbook("excels/TaskSummaryReport.xlsx")
     
     ws = wb.active
     ws.title = "Performance Summary"
@@ -576,10 +575,9 @@ def create_all_tasks_summary_report(filename_prefix=None):
     period = f"{datetime.datetime.now().strftime('%B %Y')}"
     filename = f"{prefix} - {"NORZAGARAY COLLEGE"} - {period} - {id_rand}"
     
-    filepath = f"excels/DepartmentReports/{filename}.xlsx"
-    wb.save(filepath)
-    
-    # Upload to cloud storage
-    file_url = upload_file(filepath, "commithub-bucket", f"DepartmentReports/{filename}.xlsx")
+    # Stream to cloud storage without writing under excels/
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = upload_fileobj(output, "commithub-bucket", f"DepartmentReports/{filename}.xlsx")
     
     return file_url
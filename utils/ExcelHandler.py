@@ -1,8 +1,9 @@
-from openpyxl import load_workbook
 from openpyxl.styles import Border, Side, Alignment, Font
 from openpyxl.drawing.image import Image
 import datetime 
-from utils.FileStorage import upload_file
+from utils.FileStorage import spooled_file, upload_fileobj
+from utils.TemplateCache import template_cache
+from utils.ReportCache import report_cache
 import math
 import random
 from datetime import date
@@ -40,7 +41,12 @@ def createNewOPCR(data, assigned, admin_data):
 
     print("OPCR_DATA", data)
 
-    wb = load_workbook("excels/OPCRTest.xlsx")
+    cache_key = report_cache.key("opcr", "excels/OPCRTest.xlsx", {"data": data, "assigned": assigned, "admin_data": admin_data})
+    cached = report_cache.lookup(cache_key)
+    if cached:
+        return cached
+
+    wb = template_cache.workbook("excels/OPCRTest.xlsx")
     ws = wb.active
     
     ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
@@ -420,10 +426,9 @@ def createNewOPCR(data, assigned, admin_data):
     # Save changes
     id = random.randint(1,999999)
     filename = f"OPCR - NC - {period} - {admin_data["lastName"]} - {id}"
-    link = f"excels/OPCR/{filename}.xlsx"
-    wb.save(link)
-
-    file_url = upload_file(link, "commithub-bucket", f"OPCR/{filename}.xlsx")
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = report_cache.publish(cache_key, output, f"OPCR/{filename}.xlsx")
     
     return file_url
 
@@ -440,7 +445,12 @@ def createNewWeightedOPCR(data, assigned, admin_data):
 
     print("OPCR_DATA",data)
 
-    wb = load_workbook("excels/WeightedOPCRTest.xlsx")
+    cache_key = report_cache.key("weighted_opcr", "excels/WeightedOPCRTest.xlsx", {"data": data, "assigned": assigned, "admin_data": admin_data})
+    cached = report_cache.lookup(cache_key)
+    if cached:
+        return cached
+
+    wb = template_cache.workbook("excels/WeightedOPCRTest.xlsx")
     ws = wb.active
     
     ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
@@ -833,10 +843,9 @@ def createNewWeightedOPCR(data, assigned, admin_data):
     # Save changes
     id = random.randint(1,999999)
     filename = f"OPCR-NC - {period} - {admin_data["lastName"]} - {id}"
-    link = f"excels/OPCR/{filename}.xlsx"
-    wb.save(link)
-
-    file_url = upload_file(link, "commithub-bucket", f"OPCR/{filename}.xlsx")
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = report_cache.publish(cache_key, output, f"OPCR/{filename}.xlsx")
     
     return file_url
     datee = datetime.datetime.now().month
@@ -851,7 +860,7 @@ def createNewWeightedOPCR(data, assigned, admin_data):
 
     print("OPCR_DATA",data)
 
-    wb = load_workbook("excels/WeightedOPCRTest.xlsx")
+    wb = template_cache.workbook("excels/WeightedOPCRTest.xlsx")
     ws = wb.active
     
     ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
@@ -1239,10 +1248,9 @@ def createNewWeightedOPCR(data, assigned, admin_data):
     # Save changes
     id = random.randint(1,999999)
     filename = f"OPCR-NC - {period} - {admin_data["lastName"]} - {id}"
-    link = f"excels/OPCR/{filename}.xlsx"
-    wb.save(link)
-
-    file_url = upload_file(link, "commithub-bucket", f"OPCR/{filename}.xlsx")
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = upload_fileobj(output, "commithub-bucket", f"OPCR/{filename}.xlsx")
     
     return file_url
 
@@ -1256,7 +1264,12 @@ def createNewMasterOPCR(data, assigned, admin_data):
         period = "JULY - DECEMBER " + year
         
     print(admin_data)
-    wb = load_workbook("excels/OPCRTest.xlsx")
+    cache_key = report_cache.key("master_opcr", "excels/OPCRTest.xlsx", {"data": data, "assigned": assigned, "admin_data": admin_data})
+    cached = report_cache.lookup(cache_key)
+    if cached:
+        return cached
+
+    wb = template_cache.workbook("excels/OPCRTest.xlsx")
     ws = wb.active
     
     ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
@@ -1519,15 +1532,14 @@ def createNewMasterOPCR(data, assigned, admin_data):
     # Save changes
     id = random.randint(1,999999)
     filename = f"MOPCR-NC - {period} - {id}"
-    link = f"excels/OPCR/{filename}.xlsx"
-    wb.save(link)
-
-    file_url = upload_file(link, "commithub-bucket", f"OPCR/{filename}.xlsx")
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = report_cache.publish(cache_key, output, f"OPCR/{filename}.xlsx")
     
     return file_url
 
 def createNewIPCR(data, given, middle, last, individuals, position, dates):
-    wb = load_workbook("excels/IPCRTest.xlsx")
+    wb = template_cache.workbook("excels/IPCRTest.xlsx")
     ws = wb.active
 
 
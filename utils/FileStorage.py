@@ -1,8 +1,10 @@
 import boto3
 import os
+import tempfile
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import NoCredentialsError, ClientError
 from dotenv import load_dotenv
-from flask import jsonify
+from flask import current_app, has_app_context, jsonify
 # Initialize S3 client
 import uuid
 
@@ -13,6 +15,13 @@ key = os.getenv("AWS_SECRET_KEY")
 region = os.getenv("AWS_REGION")
 
 BUCKET = "commithub-bucket"
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Defaults for the app settings of the same names (see config.py)
+REPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+S3_MULTIPART_CONCURRENCY = 4
 ALLOWED_TYPES = {
     # Documents
     "application/pdf":                                                    "pdf",
@@ -73,6 +82,42 @@ def upload_file(file_path, bucket_name, object_name=None):
     except NoCredentialsError:
         return None
 
+def _setting(name, default):
+    if has_app_context():
+        return type(default)(current_app.config.get(name, default))
+    return default
+
+def transfer_config():
+    """upload_fileobj switches to a multipart upload above S3_MULTIPART_THRESHOLD."""
+    return TransferConfig(
+        multipart_threshold=_setting("S3_MULTIPART_THRESHOLD", S3_MULTIPART_THRESHOLD),
+        multipart_chunksize=_setting("S3_MULTIPART_CHUNKSIZE", S3_MULTIPART_CHUNKSIZE),
+        max_concurrency=_setting("S3_MULTIPART_CONCURRENCY", S3_MULTIPART_CONCURRENCY),
+    )
+
+def spooled_file():
+    """
+    Scratch file for a report: kept in memory up to REPORT_SPOOL_MAX_BYTES,
+    then rolled over to an unnamed temp file. Use it as a context manager so
+    it is released on every path.
+    """
+    max_size = _setting("REPORT_SPOOL_MAX_BYTES", REPORT_SPOOL_MAX_BYTES)
+    return tempfile.SpooledTemporaryFile(max_size=max_size, mode="w+b")
+
+def upload_fileobj(fileobj, bucket_name, object_name, content_type=XLSX_MIMETYPE):
+    """Streams a file object to S3 (multipart above S3_MULTIPART_THRESHOLD) and returns a presigned URL."""
+    try:
+        fileobj.seek(0)
+        s3.upload_fileobj(fileobj, bucket_name, object_name,
+                          ExtraArgs={"ContentType": content_type}, Config=transfer_config())
+        url = s3.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket_name, "Key": object_name},
+        )
+        return url
+    except NoCredentialsError:
+        return None
+
 def get_file(object_name=None):
     """Generate a presigned GET URL for an existing S3 object."""
     try:
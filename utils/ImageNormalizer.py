@@ -0,0 +1,108 @@
+import io
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from PIL import Image, ImageOps
+
+
+IMAGE_EMBED_DPI = 150            # resolution images are kept at in their slot
+IMAGE_EMBED_JPEG_QUALITY = 85
+
+# An image whose LINE_ART_COLORS most common colours cover LINE_ART_SHARE of
+# it (screenshots, charts, scans of forms) stays PNG; anything else is a photo.
+LINE_ART_COLORS = 16
+LINE_ART_SHARE = 0.5
+
+EXIF_ORIENTATION = 0x0112
+
+
+Embed_Image = namedtuple("Embed_Image", ["data", "format", "width", "height"])
+
+
+def _has_alpha(img):
+    if img.mode in ("RGBA", "LA", "PA"):
+        return img.getchannel("A").getextrema()[0] < 255
+    return img.mode == "P" and "transparency" in img.info
+
+
+def _line_art(img):
+    sample = img.convert("RGB")
+    sample.thumbnail((256, 256), Image.Resampling.NEAREST)
+    colors = sample.getcolors(sample.width * sample.height)
+    top = sum(count for count, _ in sorted(colors, reverse=True)[:LINE_ART_COLORS])
+    return top >= LINE_ART_SHARE * sample.width * sample.height
+
+
+class Image_Normalizer:
+    """
+    Prepares image attachments for SupportDocCompiler and PresentationCompiler.
+
+    normalize(content, box) applies the EXIF orientation, downsamples the
+    image to the pixels its slot needs at IMAGE_EMBED_DPI (box is the slot's
+    (width, height) in pixels, 0 for a side that is not limited) and picks the
+    format: JPEG photos stay JPEG, and are embedded untouched when they
+    already fit; images with transparency or line art become PNG; other
+    photographs are encoded as JPEG at IMAGE_EMBED_JPEG_QUALITY.
+    """
+
+    def settings(self):
+        def setting(name, default):
+            if has_app_context():
+                return type(default)(current_app.config.get(name, default))
+            return default
+
+        return {
+            "dpi": setting("IMAGE_EMBED_DPI", IMAGE_EMBED_DPI),
+            "jpeg_quality": setting("IMAGE_EMBED_JPEG_QUALITY", IMAGE_EMBED_JPEG_QUALITY),
+        }
+
+    def box(self, slot, settings=None):
+        """Pixel box of a (width, height) slot in inches."""
+        dpi = (settings or self.settings())["dpi"]
+        return tuple(int(side * dpi) for side in slot)
+
+    def normalize(self, content, box, settings=None):
+        settings = settings or self.settings()
+        img = Image.open(io.BytesIO(content))
+        source_format = img.format
+
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+        width, height = img.size
+        if orientation in (5, 6, 7, 8):
+            width, height = height, width
+        scale = min(1, *(limit / side for limit, side in zip(box, (width, height)) if limit))
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+        if source_format == "JPEG" and scale == 1 and orientation == 1 and img.mode in ("RGB", "L"):
+            return Embed_Image(content, "jpeg", width, height)
+
+        if source_format == "JPEG" and scale < 1:
+            # let libjpeg decode at a fraction of the size; draft works in stored orientation
+            stored = size if orientation not in (5, 6, 7, 8) else size[::-1]
+            img.draft(img.mode, stored)
+
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        if img.mode == "P":
+            img = img.convert("RGBA" if _has_alpha(img) else "RGB")
+        if img.size != size:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+
+        buf = io.BytesIO()
+        if source_format != "JPEG" and (_has_alpha(img) or _line_art(img)):
+            img.save(buf, "PNG")
+            return Embed_Image(buf.getvalue(), "png", *img.size)
+
+        if img.mode in ("RGBA", "LA"):
+            img = img.convert(img.mode[:-1])
+        img.save(buf, "JPEG", quality=settings["jpeg_quality"])
+        return Embed_Image(buf.getvalue(), "jpeg", *img.size)
+
+    def describe(self, data):
+        """Embed_Image for already normalized bytes, reading only the header."""
+        img = Image.open(io.BytesIO(data))
+        return Embed_Image(data, "jpeg" if img.format == "JPEG" else "png", *img.size)
+
+
+image_normalizer = Image_Normalizer()
@@ -0,0 +1,145 @@
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+
+
+LOG_BUFFER_SIZE = 10000
+LOG_BUFFER_BATCH = 100
+LOG_BUFFER_INTERVAL_MS = 500
+
+
+class Log_Buffer:
+    """
+    Bounded in-process queue for audit logs. Records are written by a
+    background flusher with one bulk insert every LOG_BUFFER_BATCH records or
+    LOG_BUFFER_INTERVAL_MS milliseconds, whichever comes first, so requests
+    never wait on the logs table.
+
+    The flusher is a plain thread, which the eventlet worker monkey-patches
+    into a green thread. It starts on the first record (i.e. after gunicorn
+    forks) and is drained at interpreter exit. When the queue is full new
+    records are dropped and counted.
+
+    LOG_BUFFER_MODE = "sync" writes every record immediately instead (tests,
+    CLI scripts).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.mode = "async"
+        self.maxsize = LOG_BUFFER_SIZE
+        self.batch_size = LOG_BUFFER_BATCH
+        self.interval = LOG_BUFFER_INTERVAL_MS / 1000
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["log_buffer"] = self
+        self.mode = app.config.get("LOG_BUFFER_MODE", "async")
+        self.maxsize = int(app.config.get("LOG_BUFFER_SIZE", LOG_BUFFER_SIZE))
+        self.batch_size = int(app.config.get("LOG_BUFFER_BATCH", LOG_BUFFER_BATCH))
+        self.interval = int(app.config.get("LOG_BUFFER_INTERVAL_MS", LOG_BUFFER_INTERVAL_MS)) / 1000
+        atexit.register(self.stop)
+
+    def add(self, record):
+        """Queues one logs row (a dict of Log columns). Returns False if it was dropped."""
+        record.setdefault("created_at", datetime.now())
+
+        if self.mode == "sync" or self.app is None:
+            self.enqueued += 1
+            self._write([record])
+            return True
+
+        with self._lock:
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                return False
+            self._queue.append(record)
+            self.enqueued += 1
+            pending = len(self._queue)
+
+        self._ensure_flusher()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Writes everything queued so far; returns the number of records written."""
+        total = 0
+        while True:
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if not batch:
+                return total
+            total += self._write(batch)
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "pending": len(self._queue),
+            "maxsize": self.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="log-buffer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _write(self, batch):
+        from app import db
+        from models.Logs import Log, Log_Rollup
+
+        try:
+            with (self.app or current_app._get_current_object()).app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(insert(Log.__table__), batch)
+                    Log_Rollup.apply(conn, batch)
+            self.written += len(batch)
+            self.flushes += 1
+            return len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print("Logging Failed", e)
+            return 0
+
+
+log_buffer = Log_Buffer()
@@ -1,8 +1,9 @@
 # utils/ipcr_excel.py
-from openpyxl import load_workbook
 from openpyxl.styles import Border, Side, Alignment, Font
 import datetime, random
-from utils.FileStorage import upload_file
+from utils.FileStorage import spooled_file
+from utils.ReportCache import report_cache
+from utils.TemplateCache import template_cache
 
 # Adjust these imports to match your project structure:
 from models.PCR import IPCR           # or from models.pcr import IPCR
@@ -170,6 +171,20 @@ def _build_data_from_ipcr(ipcr, is_draft=False):
     return final
 
 
+def _ipcr_cache_key(kind, template, ipcr, user, individuals, ipcr_data, filename_prefix, is_draft=False):
+    """Report cache key over everything an IPCR writer prints."""
+    pos = user.position
+    return report_cache.key(kind, template, {
+        "ipcr_id": ipcr.id,
+        "user": [user.id, user.first_name, user.middle_name, user.last_name],
+        "position": [pos.name, pos.core_weight, pos.strategic_weight, pos.support_weight] if pos else None,
+        "individuals": individuals,
+        "data": ipcr_data,
+        "prefix": filename_prefix,
+        "is_draft": is_draft,
+    })
+
+
 def createNewIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None, is_draft = False):
 
     
@@ -189,9 +204,6 @@ def createNewIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None, is_dr
     - filename_prefix: optional string to add to filename
     Returns: download link from UploadManager.upload_Report (same pattern as your original).
     """
-    wb = load_workbook("excels/IPCRTest.xlsx")
-    ws = wb.active
-
     ipcr = IPCR.query.get(ipcr_id)
     if not ipcr:
         raise ValueError("IPCR not found")
@@ -224,6 +236,15 @@ def createNewIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None, is_dr
             "confirm": _mk("confirmed_by")
         }
 
+    ipcr_data = _build_data_from_ipcr(ipcr)
+    cache_key = _ipcr_cache_key("ipcr", "excels/IPCRTest.xlsx", ipcr, user, individuals, ipcr_data, filename_prefix, is_draft)
+    cached = report_cache.lookup(cache_key)
+    if cached:
+        return cached
+
+    wb = template_cache.workbook("excels/IPCRTest.xlsx")
+    ws = wb.active
+
     print(individuals)
 
     
@@ -299,8 +320,6 @@ def createNewIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None, is_dr
     endrow = 0
     numberformat = "0.00"
 
-    ipcr_data = _build_data_from_ipcr(ipcr)
-
     for type, data in ipcr_data.items():
         
         print("TYPE", type)
@@ -624,10 +643,9 @@ def createNewIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None, is_dr
     fname_last = last
     prefix = filename_prefix if filename_prefix else "IPCR"
     filename = f"{prefix} {period} - {fname_last} - {id_rand}"
-    link = f"excels/IPCR/{filename}.xlsx"
-    wb.save(link)
-
-    file_url = upload_file(link, "commithub-bucket", f"IPCR/{filename}.xlsx")
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = report_cache.publish(cache_key, output, f"IPCR/{filename}.xlsx")
 
 
     return file_url
@@ -686,10 +704,14 @@ def createNewWeightedIPCR_from_db(ipcr_id, individuals=None, filename_prefix=Non
         }
 
     # Build 'data' structure from DB outputs/subtasks
-    
+    ipcr_data = _build_data_from_ipcr(ipcr)
+    cache_key = _ipcr_cache_key("weighted_ipcr_legacy", "excels/IPCRTest.xlsx", ipcr, user, individuals, ipcr_data, filename_prefix)
+    cached = report_cache.lookup(cache_key)
+    if cached:
+        return cached
 
     # Now replicate your excel logic exactly (with the same cell positions & merges)
-    wb = load_workbook("excels/IPCRTest.xlsx")
+    wb = template_cache.workbook("excels/IPCRTest.xlsx")
     ws = wb.active
 
     datee = datetime.datetime.now().month
@@ -757,8 +779,6 @@ def createNewWeightedIPCR_from_db(ipcr_id, individuals=None, filename_prefix=Non
     endrow = 0
     numberformat = "0.00"
 
-    ipcr_data = _build_data_from_ipcr(ipcr)
-
     for type, data in ipcr_data.items():
         
         print("TYPE", type)
@@ -1111,10 +1131,9 @@ def createNewWeightedIPCR_from_db(ipcr_id, individuals=None, filename_prefix=Non
     fname_last = last
     prefix = filename_prefix if filename_prefix else "IPCR"
     filename = f"{prefix} {period} - {fname_last} - {id_rand}"
-    link = f"excels/IPCR/{filename}.xlsx"
-    wb.save(link)
-
-    file_url = upload_file(link, "commithub-bucket", f"IPCR/{filename}.xlsx")
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = report_cache.publish(cache_key, output, f"IPCR/{filename}.xlsx")
 
 
     return file_url
@@ -1139,9 +1158,6 @@ def createWeightedIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None,
     - filename_prefix: optional string to add to filename
     Returns: download link from UploadManager.upload_Report (same pattern as your original).
     """
-    wb = load_workbook("excels/WeightedIPCRTest.xlsx")
-    ws = wb.active
-
     ipcr = IPCR.query.get(ipcr_id)
     if not ipcr:
         raise ValueError("IPCR not found")
@@ -1174,6 +1190,15 @@ def createWeightedIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None,
             "confirm": _mk("confirmed_by")
         }
 
+    ipcr_data = _build_data_from_ipcr(ipcr)
+    cache_key = _ipcr_cache_key("weighted_ipcr", "excels/WeightedIPCRTest.xlsx", ipcr, user, individuals, ipcr_data, filename_prefix, is_draft)
+    cached = report_cache.lookup(cache_key)
+    if cached:
+        return cached
+
+    wb = template_cache.workbook("excels/WeightedIPCRTest.xlsx")
+    ws = wb.active
+
     print(individuals)
 
     
@@ -1249,8 +1274,6 @@ def createWeightedIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None,
     endrow = 0
     numberformat = "0.00"
 
-    ipcr_data = _build_data_from_ipcr(ipcr)
-
     for type, data in ipcr_data.items():
         
         print("TYPE", type)
@@ -1618,10 +1641,9 @@ def createWeightedIPCR_from_db(ipcr_id, individuals=None, filename_prefix=None,
     fname_last = last
     prefix = filename_prefix if filename_prefix else "IPCR"
     filename = f"{prefix} {period} - {fname_last} - {id_rand}"
-    link = f"excels/IPCR/{filename}.xlsx"
-    wb.save(link)
-
-    file_url = upload_file(link, "commithub-bucket", f"IPCR/{filename}.xlsx")
+    with spooled_file() as output:
+        wb.save(output)
+        file_url = report_cache.publish(cache_key, output, f"IPCR/{filename}.xlsx")
 
 
     return file_url
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, or_
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _serializer(scope):
+    # the scope is part of the salt, so a logs cursor is rejected by the users list
+    return URLSafeSerializer(current_app.config["SECRET_KEY"], salt=f"keyset-cursor:{scope}")
+
+
+def encode_cursor(scope, created_at, row_id):
+    return _serializer(scope).dumps([created_at.isoformat(), row_id])
+
+
+def decode_cursor(scope, token):
+    try:
+        created_at, row_id = _serializer(scope).loads(token)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (BadSignature, TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def wants_page(cursor, limit):
+    """Paging is opt-in: without ?cursor= or ?limit= the endpoints keep returning full lists."""
+    return cursor is not None or limit is not None
+
+
+def page_size(limit):
+    try:
+        limit = int(limit) if limit not in (None, "") else DEFAULT_PAGE_SIZE
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid limit") from e
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_page(query, model, scope, cursor=None, limit=None, serialize=None):
+    """
+    Seek pagination over (created_at, id), newest first.
+
+    Instead of OFFSET, each page continues strictly after the last row of
+    the previous one, so deep pages cost the same as the first and rows
+    inserted meanwhile (which sort before the cursor) never shift or repeat
+    later pages. Rows with a NULL created_at are not reachable.
+
+    Returns {"items", "next_cursor", "has_more", "limit"}; next_cursor is an
+    opaque token signed with SECRET_KEY.
+    """
+    size = page_size(limit)
+    created_at, row_id = model.created_at, model.id
+
+    query = query.filter(created_at.isnot(None))
+    if cursor:
+        last_created_at, last_id = decode_cursor(scope, cursor)
+        # the redundant <= bound is what lets MySQL and SQLite seek the index
+        query = query.filter(
+            created_at <= last_created_at,
+            or_(created_at < last_created_at, and_(created_at == last_created_at, row_id < last_id)),
+        )
+
+    rows = query.order_by(created_at.desc(), row_id.desc()).limit(size + 1).all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    return {
+        "items": [serialize(row) if serialize else row.to_dict() for row in rows],
+        "next_cursor": encode_cursor(scope, rows[-1].created_at, rows[-1].id) if has_more else None,
+        "has_more": has_more,
+        "limit": size,
+    }
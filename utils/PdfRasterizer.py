@@ -0,0 +1,186 @@
+import io
+import multiprocessing
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, has_app_context
+from pdf2image.exceptions import PDFPopplerTimeoutError
+
+
+PDF_RASTER_WORKERS = 2
+PDF_RASTER_DPI = 150          # SupportDocCompiler pages
+PDF_RASTER_SLIDE_DPI = 120    # PresentationCompiler thumbnails
+PDF_RASTER_SLIDE_PAGES = 4    # thumbnails fit on one slide
+PDF_RASTER_MAX_PAGES = 20     # pages rendered from one PDF
+PDF_RASTER_PAGE_BUDGET = 300  # pages rendered in one compile
+PDF_RASTER_TIMEOUT = 60       # seconds per PDF before poppler is killed
+
+
+Raster_Page = namedtuple("Raster_Page", ["png", "width", "height"])
+Raster = namedtuple("Raster", ["pages", "total_pages"])
+
+
+class Pdf_Raster_Error(Exception):
+    """A PDF could not be rendered (timeout, page budget spent, poppler error); the message is shown in the report."""
+
+
+class Page_Budget:
+    """Pages one compile may still render; shared by every PDF in it."""
+
+    def __init__(self, pages):
+        self.remaining = pages
+
+    def spend(self, pages):
+        self.remaining = max(0, self.remaining - pages)
+
+
+def _render(data, dpi, max_pages, timeout):
+    """
+    Runs in a worker process: renders the first max_pages pages with poppler
+    (killed by pdf2image after `timeout` seconds) and returns them as PNGs.
+    """
+    from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+
+    total = int(pdfinfo_from_bytes(data, timeout=timeout).get("Pages", 0))
+    if total == 0:
+        return Raster([], 0)
+    images = convert_from_bytes(data, dpi=dpi, first_page=1, last_page=min(total, max_pages), timeout=timeout)
+
+    pages = []
+    for img in images:
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buf = io.BytesIO()
+        img.save(buf, "PNG")
+        pages.append(Raster_Page(buf.getvalue(), img.width, img.height))
+    return Raster(pages, total)
+
+
+class Pdf_Rasterizer:
+    """
+    Renders PDF attachments for SupportDocCompiler and PresentationCompiler
+    in a pool of PDF_RASTER_WORKERS processes, so poppler and the PNG
+    encoding never run on a request or eventlet thread.
+
+    - PDF_RASTER_MAX_PAGES caps the pages taken from one PDF (callers may
+      ask for fewer), and a Page_Budget from budget() caps a whole compile
+      at PDF_RASTER_PAGE_BUDGET pages.
+    - PDF_RASTER_DPI / PDF_RASTER_SLIDE_DPI set the resolution.
+    - poppler gets PDF_RASTER_TIMEOUT seconds per call and is killed after
+      that; a worker that still does not answer has the whole pool killed
+      and replaced.
+
+    Workers are started with "spawn" so they inherit neither the Flask app
+    nor eventlet's monkey-patching. Given a `source`, pages come from and go
+    to the render cache, and `data` may be None when they are all cached.
+    """
+
+    def __init__(self):
+        self._pool = None
+        self._lock = threading.Lock()
+        self._stats = {"documents": 0, "pages": 0, "cached": 0, "timeouts": 0, "failures": 0, "over_budget": 0, "restarts": 0}
+
+    def settings(self):
+        def setting(name, default):
+            if has_app_context():
+                return type(default)(current_app.config.get(name, default))
+            return default
+
+        return {
+            "workers": max(1, setting("PDF_RASTER_WORKERS", PDF_RASTER_WORKERS)),
+            "dpi": setting("PDF_RASTER_DPI", PDF_RASTER_DPI),
+            "slide_dpi": setting("PDF_RASTER_SLIDE_DPI", PDF_RASTER_SLIDE_DPI),
+            "max_pages": setting("PDF_RASTER_MAX_PAGES", PDF_RASTER_MAX_PAGES),
+            "page_budget": setting("PDF_RASTER_PAGE_BUDGET", PDF_RASTER_PAGE_BUDGET),
+            "timeout": setting("PDF_RASTER_TIMEOUT", PDF_RASTER_TIMEOUT),
+        }
+
+    def budget(self):
+        return Page_Budget(self.settings()["page_budget"])
+
+    def rasterize(self, data, dpi=None, max_pages=None, budget=None, source=None):
+        """Returns a Raster of the first pages of `data`; raises Pdf_Raster_Error."""
+        from utils.RenderCache import render_cache
+
+        settings = self.settings()
+        dpi = dpi or settings["dpi"]
+        pages = min(max_pages or settings["max_pages"], settings["max_pages"])
+        if budget is not None:
+            pages = min(pages, budget.remaining)
+        if pages <= 0:
+            self._count("over_budget")
+            raise Pdf_Raster_Error("page limit for this report reached; PDF not rendered")
+
+        raster = render_cache.raster(source, dpi, pages) if source else None
+        if raster is not None:
+            self._count("cached")
+        else:
+            if data is None:
+                raise Pdf_Raster_Error("the attachment was not downloaded")
+            raster = self._render(settings, data, dpi, pages)
+            if source:
+                render_cache.put_raster(source, dpi, raster)
+
+        if budget is not None:
+            budget.spend(len(raster.pages))
+        self._count("documents")
+        self._count("pages", len(raster.pages))
+        return raster
+
+    def _render(self, settings, data, dpi, pages):
+        pool, future = self._submit(settings["workers"], _render, data, dpi, pages, settings["timeout"])
+        try:
+            # poppler is killed at `timeout`; the margin covers the PNG encoding
+            raster = future.result(timeout=settings["timeout"] * 2 + 5)
+        except FutureTimeout:
+            self._count("timeouts")
+            self._restart(pool)
+            raise Pdf_Raster_Error(f"PDF took longer than {settings['timeout']} s to render")
+        except PDFPopplerTimeoutError:
+            self._count("timeouts")
+            raise Pdf_Raster_Error(f"PDF took longer than {settings['timeout']} s to render")
+        except BrokenProcessPool:
+            self._count("failures")
+            self._restart(pool)
+            raise Pdf_Raster_Error("PDF renderer crashed")
+        except Exception as e:
+            self._count("failures")
+            raise Pdf_Raster_Error(str(e))
+        return raster
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, workers, fn, *args):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            pool = self._pool
+        return pool, pool.submit(fn, *args)
+
+    def _restart(self, pool):
+        """Kills every worker of `pool`; the next call starts a new pool."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self._stats["restarts"] += 1
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+
+pdf_rasterizer = Pdf_Rasterizer()
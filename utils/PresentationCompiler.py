@@ -27,12 +27,14 @@ import zipfile
 from copy import deepcopy
 from datetime import datetime
 
-import requests
 from lxml import etree
-from PIL import Image
-from pdf2image import convert_from_bytes
 from flask import send_file
 
+from utils.AttachmentFetcher import attachment_fetcher
+from utils.PdfRasterizer import PDF_RASTER_SLIDE_PAGES, pdf_rasterizer
+from utils.RenderCache import render_cache
+from utils.TemplateCache import template_cache
+
 # ── Template config ───────────────────────────────────────────────────────────
 
 TEMPLATE_PATH = "excels/presentation-template.pptx"
@@ -46,6 +48,7 @@ DONOR_CONTENT = "slide3.xml"   # content layout: title + wavy footer + dot patte
 
 IMAGE_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"}
 PDF_TYPE    = "application/pdf"
+ATTACHMENT_SLOT = (7.8, 5.55)   # inches: right column of a content slide
 WORD_TYPES  = {
     "application/msword",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
@@ -65,6 +68,7 @@ SLIDE_CT = (
     "application/vnd.openxmlformats-officedocument"
     ".presentationml.slide+xml"
 )
+MEDIA_CT = {"png": "image/png", "jpeg": "image/jpeg"}
 SLIDE_REL_TYPE = (
     "http://schemas.openxmlformats.org/officeDocument"
     "/2006/relationships/slide"
@@ -278,14 +282,6 @@ def _add_rect_shape(spTree: etree._Element,
 
 # ── Image embedding ───────────────────────────────────────────────────────────
 
-def _png_stream(img: Image.Image) -> bytes:
-    if img.mode not in ("RGB", "L"):
-        img = img.convert("RGB")
-    buf = io.BytesIO()
-    img.save(buf, "PNG")
-    return buf.getvalue()
-
-
 def _fit(iw: int, ih: int, bw_emu: int, bh_emu: int):
     """Return (width_emu, height_emu, x_off_emu, y_off_emu) — centre-fit."""
     scale = min(bw_emu / iw, bh_emu / ih)
@@ -298,7 +294,7 @@ class _SlideBuilder:
     """
     Builds one slide's XML and accumulates extra media files it needs.
     Caller registers media via add_image(); the images are returned as
-    {rId: (filename, png_bytes)} and must be written into the zip.
+    {rId: (filename, image_bytes)} and must be written into the zip.
     """
 
     SLIDE_NS = {
@@ -316,12 +312,12 @@ class _SlideBuilder:
                     for m in re.findall(r"rId(\d+)", el.get("Id", ""))]
         self._next_rid = max(existing) + 1 if existing else 10
 
-    def add_image(self, png_bytes: bytes, hint: str = "img") -> str:
+    def add_image(self, image_bytes: bytes, hint: str = "img", ext: str = "png") -> str:
         """Register image data; return the rId to use in XML."""
         import uuid
         rid  = f"rId{self._next_rid}"
-        fname = f"image_{hint}_{self._next_rid}{uuid.uuid4().hex}.png"
-        self._images[rid] = (fname, png_bytes)
+        fname = f"image_{hint}_{self._next_rid}{uuid.uuid4().hex}.{ext}"
+        self._images[rid] = (fname, image_bytes)
         self._next_rid += 1
         # Add relationship entry
         rel = etree.SubElement(self._rels, "Relationship")
@@ -331,11 +327,11 @@ class _SlideBuilder:
         return rid
 
     def embed_picture(self, spTree: etree._Element,
-                      png_bytes: bytes,
+                      image_bytes: bytes,
                       x_emu: int, y_emu: int, cx_emu: int, cy_emu: int,
-                      hint: str = "img"):
-        """Add a <p:pic> element to spTree for the given image."""
-        rid  = self.add_image(png_bytes, hint)
+                      hint: str = "img", ext: str = "png"):
+        """Add a <p:pic> element to spTree for the given PNG or JPEG image."""
+        rid  = self.add_image(image_bytes, hint, ext)
         pic  = etree.SubElement(spTree, _qn("p", "pic"))
         nvPicPr = etree.SubElement(pic, _qn("p", "nvPicPr"))
         cNvPr   = etree.SubElement(nvPicPr, _qn("p", "cNvPr"))
@@ -406,7 +402,9 @@ def _build_section(tpl: Template, task_name: str) -> _SlideBuilder:
 
 def _build_content(tpl: Template, doc_data: dict, seq_num: int,
                    content_bytes: bytes | None,
-                   file_type: str, file_name: str) -> _SlideBuilder:
+                   file_type: str, file_name: str,
+                   pdf_budget=None, cached: bool = False,
+                   source: str | None = None) -> _SlideBuilder:
 
     sb     = _SlideBuilder(*tpl.donors["content"])
     root   = sb.root
@@ -464,12 +462,12 @@ def _build_content(tpl: Template, doc_data: dict, seq_num: int,
 
     # ── Attachment (right column) ─────────────────────────────────────────
     AX = _in(5.1);   AY = _in(1.45)
-    AW = _in(7.8);   AH = _in(5.55)
+    AW = _in(ATTACHMENT_SLOT[0]);   AH = _in(ATTACHMENT_SLOT[1])
 
-    if content_bytes and file_type in IMAGE_TYPES:
-        _embed_image_content(sb, spTree, content_bytes, AX, AY, AW, AH)
-    elif content_bytes and file_type == PDF_TYPE:
-        _embed_pdf_content(sb, spTree, content_bytes, AX, AY, AW, AH)
+    if (content_bytes or cached) and file_type in IMAGE_TYPES:
+        _embed_image_content(sb, spTree, content_bytes, AX, AY, AW, AH, source)
+    elif (content_bytes or cached) and file_type == PDF_TYPE:
+        _embed_pdf_content(sb, spTree, content_bytes, AX, AY, AW, AH, pdf_budget, source)
     elif content_bytes and file_type in WORD_TYPES:
         _embed_docx_content(sb, spTree, content_bytes, AX, AY, AW, AH)
     else:
@@ -480,23 +478,34 @@ def _build_content(tpl: Template, doc_data: dict, seq_num: int,
 
 # ── Attachment content helpers ─────────────────────────────────────────────────
 
-def _embed_image_content(sb: _SlideBuilder, spTree, data: bytes,
-                          ax, ay, aw, ah):
+def _embed_image_content(sb: _SlideBuilder, spTree, data: bytes | None,
+                          ax, ay, aw, ah, source=None):
     try:
-        img       = Image.open(io.BytesIO(data))
-        if img.mode not in ("RGB", "L"):
-            img = img.convert("RGB")
-        fw, fh, ox, oy = _fit(img.width, img.height, aw, ah)
-        png = _png_stream(img)
-        sb.embed_picture(spTree, png, ax + ox, ay + oy, fw, fh, "img")
+        image = render_cache.image(source, data, ATTACHMENT_SLOT)
+        fw, fh, ox, oy = _fit(image.width, image.height, aw, ah)
+        sb.embed_picture(spTree, image.data, ax + ox, ay + oy, fw, fh, "img", image.format)
     except Exception as e:
         _embed_error_notice(spTree, f"Image error: {e}", ax, ay, aw)
 
 
-def _embed_pdf_content(sb: _SlideBuilder, spTree, data: bytes,
-                        ax, ay, aw, ah):
+def _rendered(file_type: str, source: str | None, pdf_settings: dict) -> bool:
+    """True when the render cache holds everything this attachment needs, so it is not downloaded."""
+    if file_type in IMAGE_TYPES:
+        return render_cache.has_image(source, ATTACHMENT_SLOT)
+    if file_type == PDF_TYPE:
+        return render_cache.has_raster(source, pdf_settings["slide_dpi"], PDF_RASTER_SLIDE_PAGES)
+    return False
+
+
+def _embed_pdf_content(sb: _SlideBuilder, spTree, data: bytes | None,
+                        ax, ay, aw, ah, budget=None, source=None):
     try:
-        pages = convert_from_bytes(data, dpi=120, first_page=1, last_page=4)
+        raster = pdf_rasterizer.rasterize(data, dpi=pdf_rasterizer.settings()["slide_dpi"],
+                                          max_pages=PDF_RASTER_SLIDE_PAGES, budget=budget,
+                                          source=source)
+        pages = raster.pages
+        if not pages:
+            raise ValueError("the PDF has no pages")
         n     = len(pages)
         cols  = 2 if n > 1 else 1
         rows  = (n + 1) // 2
@@ -506,7 +515,7 @@ def _embed_pdf_content(sb: _SlideBuilder, spTree, data: bytes,
             fw, fh, ox, oy = _fit(pg.width, pg.height, cw, ch)
             px = ax + (i % cols) * (cw + _in(0.06)) + ox
             py = ay + (i // cols) * (ch + _in(0.06)) + oy
-            sb.embed_picture(spTree, _png_stream(pg), px, py, fw, fh, f"pdf{i}")
+            sb.embed_picture(spTree, pg.png, px, py, fw, fh, f"pdf{i}")
     except Exception as e:
         _embed_error_notice(spTree, f"PDF error: {e}", ax, ay, aw)
 
@@ -595,6 +604,14 @@ def _assemble_zip(tpl: Template,
         pn = ov.get("PartName", "")
         if re.match(r"/ppt/slides/slide\d+\.xml$", pn):
             ct_root.remove(ov)
+    # Declare every media extension the new slides use
+    defaults = {el.get("Extension", "").lower() for el in ct_root
+                if el.tag.endswith("Default")}
+    for ext in sorted({fname.rsplit(".", 1)[1] for sb in slides for fname, _ in sb._images.values()}):
+        if ext not in defaults:
+            el = etree.SubElement(ct_root, "Default")
+            el.set("Extension",   ext)
+            el.set("ContentType", MEDIA_CT[ext])
 
     # ── Per-slide entries ─────────────────────────────────────────────────
     slide_entries: list[tuple[str, bytes]] = []   # (zip_path, data)
@@ -667,12 +684,9 @@ def collect_by_department(dept_id):
     from models.System_Settings import System_Settings
     try:
         settings = System_Settings.get_default_settings()
-        all_docs = Supporting_Document.query.filter_by(
-            period=settings.current_period_id
-        ).all()
         return [
-            d.to_dict() for d in all_docs
-            if str(d.ipcr.user.department.id) == str(dept_id) and d.status and d.isApproved == "approved"
+            d.to_dict()
+            for d in Supporting_Document.approved_for_department(int(dept_id), settings.current_period_id)
         ]
     except Exception as e:
         print("collect_by_department error:", e)
@@ -681,6 +695,13 @@ def collect_by_department(dept_id):
 
 # ── Main entry point ──────────────────────────────────────────────────────────
 
+PPTX_MIMETYPE = (
+    "application/vnd.openxmlformats-officedocument"
+    ".presentationml.presentation"
+)
+PPTX_NAME = "Supporting_Documents_Report.pptx"
+
+
 def into_presentation(documents: list[dict],
                       report_title: str = "Supporting Documents Report",
                       dept_name: str = "",
@@ -698,6 +719,27 @@ def into_presentation(documents: list[dict],
 
     Returns None if documents is empty.
     """
+    pptx_bytes = build_presentation(documents, report_title, dept_name, template_path)
+    if pptx_bytes is None:
+        return None
+
+    return send_file(
+        io.BytesIO(pptx_bytes),
+        as_attachment=True,
+        download_name=PPTX_NAME,
+        mimetype=PPTX_MIMETYPE,
+    )
+
+
+def build_presentation(documents: list[dict],
+                       report_title: str = "Supporting Documents Report",
+                       dept_name: str = "",
+                       template_path: str | None = None,
+                       progress=None) -> bytes | None:
+    """
+    Same as into_presentation, but returns the .pptx bytes.
+    progress(done, total) is called after each attachment.
+    """
     if not documents:
         return None
 
@@ -708,7 +750,7 @@ def into_presentation(documents: list[dict],
         str(x.get("event_date") or ""),
     ))
 
-    tpl = Template(template_path or TEMPLATE_PATH)
+    tpl = template_cache.presentation(template_path or TEMPLATE_PATH)
 
     slide_builders: list[_SlideBuilder] = []
 
@@ -720,41 +762,46 @@ def into_presentation(documents: list[dict],
     current_task = None
     seq_num      = 0
 
-    for doc_data in documents:
+    # Attachments download concurrently and arrive in document order, except
+    # those whose pages are already in the render cache; PDF pages rendered
+    # for the whole deck share one page budget
+    pdf_settings = pdf_rasterizer.settings()
+    sources      = [render_cache.source(d) for d in documents]
+    rendered     = [
+        _rendered((d.get("file_type") or "").lower().strip(), source, pdf_settings)
+        for d, source in zip(documents, sources)
+    ]
+    attachments  = attachment_fetcher.fetch(
+        "" if cached else (d.get("download_url") or "")
+        for d, cached in zip(documents, rendered)
+    )
+    pdf_budget   = pdf_rasterizer.budget()
+
+    for doc_data, source, cached, fetched in zip(documents, sources, rendered, attachments):
         task_name    = doc_data.get("task_name") or "Unassigned Task"
         file_type    = (doc_data.get("file_type") or "").lower().strip()
         file_name    = doc_data.get("file_name") or ""
-        download_url = doc_data.get("download_url") or ""
 
         if task_name != current_task:
             slide_builders.append(_build_section(tpl, task_name))
             current_task = task_name
 
-        content_bytes = None
-        if download_url:
-            try:
-                resp = requests.get(download_url, timeout=30)
-                resp.raise_for_status()
-                content_bytes = resp.content
-            except Exception as e:
-                print(f"Fetch error ({download_url}): {e}")
+        content_bytes = fetched.content
+        if fetched.error:
+            print(f"Fetch error ({fetched.url}): {fetched.error}")
 
         seq_num += 1
         slide_builders.append(
             _build_content(tpl, doc_data, seq_num,
-                           content_bytes, file_type, file_name)
+                           content_bytes, file_type, file_name, pdf_budget,
+                           cached, source or render_cache.source(doc_data, content_bytes))
         )
 
+        if progress:
+            progress(seq_num, len(documents))
+
     pptx_bytes = _assemble_zip(tpl, slide_builders)
 
     print("generating presentation")
 
-    return send_file(
-        io.BytesIO(pptx_bytes),
-        as_attachment=True,
-        download_name="Supporting_Documents_Report.pptx",
-        mimetype=(
-            "application/vnd.openxmlformats-officedocument"
-            ".presentationml.presentation"
-        ),
-    )
\ No newline at end of file
+    return pptx_bytes
\ No newline at end of file
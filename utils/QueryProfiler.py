@@ -0,0 +1,197 @@
+import hashlib
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+
+N_PLUS_ONE_THRESHOLD = 10
+MAX_FINGERPRINTS_PER_ENDPOINT = 50
+# requests that match no route (404s, scanners) share one aggregate so raw
+# paths cannot grow the endpoint table without bound
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|:\w+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_sql(statement):
+    """
+    Reduces a statement to its shape: literals and bound parameters become ?,
+    and expanded IN (...) lists collapse so 3 and 300 ids fingerprint alike.
+    """
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?)", sql)
+    return sql
+
+
+def fingerprint(statement):
+    normalized = normalize_sql(statement)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+class Query_Profiler:
+    """
+    Opt-in per-request SQL instrumentation (QUERY_PROFILING=true).
+
+    Counts statements and DB time for every request, reports them in the
+    X-DB-Queries / X-DB-Time headers, and flags N+1 patterns: the same
+    normalized statement executed QUERY_PROFILING_N1_THRESHOLD or more times
+    in one request. Per-endpoint aggregates are kept in memory for the
+    diagnostics route.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.threshold = N_PLUS_ONE_THRESHOLD
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, engine=None):
+        app.extensions["query_profiler"] = self
+        self.enabled = bool(app.config.get("QUERY_PROFILING", False))
+        self.threshold = int(app.config.get("QUERY_PROFILING_N1_THRESHOLD", N_PLUS_ONE_THRESHOLD))
+
+        if not self.enabled:
+            return
+
+        if engine is None:
+            from app import db
+            with app.app_context():
+                engine = db.engine
+
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # -----------------------
+    # SQLALCHEMY EVENTS
+    # -----------------------
+
+    # the start time lives on the execution context, which is discarded with
+    # the statement, so a statement that raises leaves nothing behind
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_profiler_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_profiler_start", None)
+        if started is None or not has_request_context():
+            return
+
+        stats = g.get("db_queries")
+        if stats is None:
+            return
+
+        stats["count"] += 1
+        stats["time"] += time.perf_counter() - started
+        stats["statements"][statement] += 1
+
+    # -----------------------
+    # REQUEST HOOKS
+    # -----------------------
+
+    def _start_request(self):
+        g.db_queries = {"count": 0, "time": 0.0, "statements": Counter()}
+
+    def _finish_request(self, response):
+        stats = g.pop("db_queries", None)
+        if stats is None:
+            return response
+
+        response.headers["X-DB-Queries"] = str(stats["count"])
+        response.headers["X-DB-Time"] = f"{stats['time'] * 1000:.3f}"
+
+        fingerprints = Counter()
+        samples = {}
+        for statement, count in stats["statements"].items():
+            key, normalized = fingerprint(statement)
+            fingerprints[key] += count
+            samples.setdefault(key, normalized)
+
+        endpoint = f"{request.method} {request.url_rule.rule}" if request.url_rule else UNMATCHED_ENDPOINT
+        suspects = [key for key, count in fingerprints.items() if count >= self.threshold]
+        if suspects:
+            response.headers["X-DB-N-Plus-One"] = str(len(suspects))
+            for key in suspects:
+                print(f"[N+1] {endpoint}: {fingerprints[key]}x {samples[key][:200]}")
+
+        self._record(endpoint, stats, fingerprints, samples, suspects)
+        return response
+
+    def _record(self, endpoint, stats, fingerprints, samples, suspects):
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_time_ms": 0.0,
+                "fingerprints": {},
+            })
+            entry["requests"] += 1
+            entry["queries"] += stats["count"]
+            entry["max_queries"] = max(entry["max_queries"], stats["count"])
+            entry["db_time_ms"] += stats["time"] * 1000
+
+            for key, count in fingerprints.items():
+                found = entry["fingerprints"].get(key)
+                if found is None:
+                    if len(entry["fingerprints"]) >= MAX_FINGERPRINTS_PER_ENDPOINT:
+                        continue
+                    found = entry["fingerprints"][key] = {
+                        "sql": samples[key],
+                        "executions": 0,
+                        "max_per_request": 0,
+                        "n_plus_one_requests": 0,
+                    }
+                found["executions"] += count
+                found["max_per_request"] = max(found["max_per_request"], count)
+                if key in suspects:
+                    found["n_plus_one_requests"] += 1
+
+    # -----------------------
+    # REPORTING
+    # -----------------------
+
+    def report(self):
+        """Per-endpoint totals, worst endpoints first; fingerprints by execution count."""
+        with self._lock:
+            endpoints = []
+            for endpoint, entry in self._endpoints.items():
+                fingerprints = sorted(
+                    ({"fingerprint": key, **found} for key, found in entry["fingerprints"].items()),
+                    key=lambda item: item["executions"],
+                    reverse=True,
+                )
+                endpoints.append({
+                    "endpoint": endpoint,
+                    "requests": entry["requests"],
+                    "queries": entry["queries"],
+                    "avg_queries": round(entry["queries"] / entry["requests"], 2),
+                    "max_queries": entry["max_queries"],
+                    "db_time_ms": round(entry["db_time_ms"], 3),
+                    "n_plus_one": [f for f in fingerprints if f["n_plus_one_requests"]],
+                    "fingerprints": fingerprints,
+                })
+
+        endpoints.sort(key=lambda item: item["max_queries"], reverse=True)
+        return {"enabled": self.enabled, "threshold": self.threshold, "endpoints": endpoints}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+query_profiler = Query_Profiler()
@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+
+from flask import current_app, has_app_context
+
+
+RENDER_CACHE_FORMAT = 2   # bump when the rendering of pages or images changes
+RENDER_CACHE_MAX_MB = 512
+RENDER_CACHE_LOW_WATER = 0.9   # eviction frees space down to this share of the cap
+
+
+def png_size(png):
+    """(width, height) from a PNG's IHDR chunk, without decoding it."""
+    return struct.unpack(">II", png[16:24])
+
+
+class Render_Cache:
+    """
+    Disk cache of the page images SupportDocCompiler and PresentationCompiler
+    embed for supporting-document attachments.
+
+    An entry is keyed by (source, page, dpi, max dimension), where the source
+    is the attachment's S3 object name, or the sha256 of its content when it
+    has none. A PDF also keeps a manifest with its page count, so
+    has_raster() can tell before the download whether every page a compile
+    needs is cached; compiles then skip downloading that attachment.
+
+    Entries are written to a temporary file and renamed into place. Reading
+    an entry refreshes its mtime, and once the files pass RENDER_CACHE_MAX_MB
+    the least recently used ones are deleted. RENDER_CACHE_MAX_MB = 0 turns
+    the cache off.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bytes = {}   # size on disk per directory, counted on the first store
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def settings(self):
+        if not has_app_context():
+            return None
+        max_mb = float(current_app.config.get("RENDER_CACHE_MAX_MB", RENDER_CACHE_MAX_MB))
+        if max_mb <= 0:
+            return None
+        return {
+            "directory": current_app.config.get("RENDER_CACHE_DIR") or os.path.join("excels", "RenderCache"),
+            "max_bytes": int(max_mb * 1024 * 1024),
+        }
+
+    def source(self, doc_data, content=None):
+        """The cache identity of an attachment, or None when the cache is off."""
+        if self.settings() is None:
+            return None
+        if doc_data.get("object_name"):
+            return f"s3:{doc_data['object_name']}"
+        if content:
+            return "sha256:" + hashlib.sha256(content).hexdigest()
+        return None
+
+    # ── Images ────────────────────────────────────────────────────────────
+
+    def image(self, source, content, slot):
+        """
+        Embed_Image of an image attachment normalized for a (width, height)
+        slot in inches, made from `content` unless it is cached.
+        """
+        from utils.ImageNormalizer import image_normalizer
+
+        settings = image_normalizer.settings()
+        variant = [*image_normalizer.box(slot, settings), settings["jpeg_quality"]]
+        data = self.get(source, 1, settings["dpi"], variant, ".img")
+        if data is not None:
+            return image_normalizer.describe(data)
+        if content is None:
+            raise ValueError("the attachment was not downloaded")
+
+        image = image_normalizer.normalize(content, variant[:2], settings)
+        self.put(source, 1, settings["dpi"], variant, image.data, ".img")
+        return image
+
+    def has_image(self, source, slot):
+        from utils.ImageNormalizer import image_normalizer
+
+        settings = image_normalizer.settings()
+        variant = [*image_normalizer.box(slot, settings), settings["jpeg_quality"]]
+        return self._touch(source, 1, settings["dpi"], variant, ".img")
+
+    # ── PDF pages ─────────────────────────────────────────────────────────
+
+    def raster(self, source, dpi, max_pages):
+        """The Raster of the first max_pages pages when all of them are cached, else None."""
+        from utils.PdfRasterizer import Raster, Raster_Page
+
+        manifest = self.get(source, 0, 0, 0, ".json")
+        if manifest is None:
+            return None
+        total = json.loads(manifest)["total_pages"]
+
+        pages = []
+        for page in range(1, min(total, max_pages) + 1):
+            png = self.get(source, page, dpi, 0)
+            if png is None:
+                return None
+            pages.append(Raster_Page(png, *png_size(png)))
+        return Raster(pages, total)
+
+    def put_raster(self, source, dpi, raster):
+        for page, rendered in enumerate(raster.pages, start=1):
+            self.put(source, page, dpi, 0, rendered.png)
+        self.put(source, 0, 0, 0, json.dumps({"total_pages": raster.total_pages}).encode(), ".json")
+
+    def has_raster(self, source, dpi, max_pages):
+        settings = self.settings()
+        if source is None or settings is None:
+            return False
+        try:
+            with open(self.path(settings, self.key(source, 0, 0, 0), ".json"), "rb") as f:
+                total = json.load(f)["total_pages"]
+        except (OSError, ValueError, KeyError):
+            return False
+        return self._touch(source, 0, 0, 0, ".json") and all(
+            self._touch(source, page, dpi, 0) for page in range(1, min(total, max_pages) + 1)
+        )
+
+    # ── Entries ───────────────────────────────────────────────────────────
+
+    def key(self, source, page, dpi, max_dim):
+        canonical = json.dumps([RENDER_CACHE_FORMAT, source, page, dpi, max_dim])
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def path(self, settings, key, suffix=".png"):
+        return os.path.join(settings["directory"], key[:2], key + suffix)
+
+    def get(self, source, page, dpi, max_dim, suffix=".png"):
+        settings = self.settings()
+        if source is None or settings is None:
+            return None
+        path = self.path(settings, self.key(source, page, dpi, max_dim), suffix)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return data
+
+    def put(self, source, page, dpi, max_dim, data, suffix=".png"):
+        settings = self.settings()
+        if source is None or settings is None:
+            return
+        path = self.path(settings, self.key(source, page, dpi, max_dim), suffix)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(partial, path)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+        except OSError as e:
+            print("Render cache store failed", e)
+            return
+
+        self._count("stores")
+        with self._lock:
+            size = self._bytes.get(settings["directory"])
+            if size is not None:
+                self._bytes[settings["directory"]] = size = size + len(data)
+            over = size is None or size > settings["max_bytes"]
+        if over:
+            self.evict()
+
+    def evict(self):
+        """Deletes least recently used entries until the cache is back under its cap."""
+        settings = self.settings()
+        if settings is None:
+            return 0
+
+        entries = self._entries(settings)
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        if size > settings["max_bytes"]:
+            target = settings["max_bytes"] * RENDER_CACHE_LOW_WATER
+            for path, entry_size, _ in sorted(entries, key=lambda entry: entry[2]):
+                if size <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= entry_size
+                removed += 1
+
+        with self._lock:
+            self._bytes[settings["directory"]] = size
+            self._stats["evictions"] += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            process = dict(self._stats)
+        lookups = process["hits"] + process["misses"]
+        settings = self.settings()
+        entries = self._entries(settings) if settings else []
+        return {
+            "enabled": settings is not None,
+            **process,
+            "hit_ratio": round(process["hits"] / lookups, 3) if lookups else None,
+            "entries": len(entries),
+            "bytes": sum(entry[1] for entry in entries),
+            "max_bytes": settings["max_bytes"] if settings else 0,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def warm(self, documents, progress=None):
+        """
+        Renders the image and PDF attachments of `documents` (dicts with
+        object_name, file_type and download_url) the way both compilers
+        request them, downloading only those not cached yet.
+        """
+        from utils.AttachmentFetcher import attachment_fetcher
+        from utils.PdfRasterizer import PDF_RASTER_SLIDE_PAGES, Pdf_Raster_Error, pdf_rasterizer
+        from utils.PresentationCompiler import ATTACHMENT_SLOT
+        from utils.SupportDocCompiler import IMAGE_SLOT, IMAGE_TYPES, PDF_TYPE
+
+        settings = pdf_rasterizer.settings()
+        slots = [IMAGE_SLOT, ATTACHMENT_SLOT]
+        variants = [(settings["dpi"], settings["max_pages"]), (settings["slide_dpi"], PDF_RASTER_SLIDE_PAGES)]
+
+        def missing(doc_data):
+            """Renders still to be made, or None for attachments that are never rendered."""
+            source = self.source(doc_data)
+            file_type = (doc_data.get("file_type") or "").lower().strip()
+            if source is not None and file_type in IMAGE_TYPES:
+                return [("image", slot) for slot in slots if not self.has_image(source, slot)]
+            if source is not None and file_type == PDF_TYPE:
+                return [("pdf", *v) for v in variants if not self.has_raster(source, *v)]
+            return None
+
+        counts = {"documents": len(documents), "cached": 0, "rendered": 0, "failed": 0, "skipped": 0}
+        todo = []
+        for doc_data in documents:
+            wanted = missing(doc_data)
+            if wanted is None:
+                counts["skipped"] += 1
+            elif not wanted:
+                counts["cached"] += 1
+            else:
+                todo.append((doc_data, wanted))
+
+        fetched_all = attachment_fetcher.fetch(d.get("download_url") or "" for d, _ in todo)
+        for done, ((doc_data, wanted), fetched) in enumerate(zip(todo, fetched_all), start=1):
+            source = self.source(doc_data)
+            try:
+                if fetched.content is None:
+                    raise ValueError(fetched.error or "no download URL")
+                for kind, *variant in wanted:
+                    if kind == "image":
+                        self.image(source, fetched.content, *variant)
+                    else:
+                        pdf_rasterizer.rasterize(fetched.content, dpi=variant[0], max_pages=variant[1], source=source)
+                counts["rendered"] += 1
+            except (ValueError, OSError, Pdf_Raster_Error) as e:
+                print(f"Render cache warm failed ({source}): {e}")
+                counts["failed"] += 1
+            if progress:
+                progress(done, len(todo))
+        return counts
+
+    def _touch(self, source, page, dpi, max_dim, suffix=".png"):
+        """Marks an entry as used without reading it; False when it is not cached."""
+        settings = self.settings()
+        if source is None or settings is None:
+            return False
+        try:
+            os.utime(self.path(settings, self.key(source, page, dpi, max_dim), suffix))
+            return True
+        except OSError:
+            return False
+
+    def _entries(self, settings):
+        entries = []
+        for root, _, files in os.walk(settings["directory"]):
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+
+render_cache = Render_Cache()
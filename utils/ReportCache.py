@@ -0,0 +1,308 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context
+from sqlalchemy.exc import IntegrityError
+
+
+REPORT_CACHE_FORMAT = 1   # bump when a report writer changes its output
+REPORT_CACHE_MAX_ENTRIES = 500
+REPORT_CACHE_TTL_HOURS = 168
+
+
+def current_period():
+    """The half-year period every report prints in its header."""
+    now = datetime.datetime.now()
+    return ("JANUARY - JUNE " if now.month <= 6 else "JULY - DECEMBER ") + str(now.year)
+
+
+class S3_Artifact_Store:
+    """Keeps the object the report was uploaded as and presigns it again on a hit."""
+
+    name = "s3"
+
+    def put(self, key, output, object_name):
+        from utils import FileStorage
+        return FileStorage.upload_fileobj(output, FileStorage.BUCKET, object_name), object_name
+
+    def url(self, artifact):
+        from utils import FileStorage
+        return FileStorage.get_file(artifact.storage_key)
+
+    def delete(self, artifact):
+        from utils import FileStorage
+        return FileStorage.delete_s3_file(artifact.storage_key)
+
+
+class Local_Artifact_Store:
+    """
+    Development store: artifacts are copied to REPORT_CACHE_DIR and served by
+    GET /api/v1/jobs/artifacts/<key>, so no S3 credentials are needed.
+    """
+
+    name = "local"
+
+    def __init__(self, directory, public_url=""):
+        self.directory = directory
+        self.public_url = public_url.rstrip("/")
+
+    def path(self, key):
+        return os.path.abspath(os.path.join(self.directory, f"{key}.xlsx"))
+
+    def put(self, key, output, object_name):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                output.seek(0)
+                shutil.copyfileobj(output, f)
+            os.replace(partial, self.path(key))
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return self._url(key), self.path(key)
+
+    def url(self, artifact):
+        return self._url(artifact.key) if os.path.exists(self.path(artifact.key)) else None
+
+    def delete(self, artifact):
+        try:
+            os.remove(self.path(artifact.key))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _url(self, key):
+        return f"{self.public_url}/api/v1/jobs/artifacts/{key}"
+
+
+class Report_Cache:
+    """
+    Content-addressed cache of generated report workbooks.
+
+    A report's key is the sha256 of its normalized input data together with
+    the template's content hash, the settings version, the current period and
+    REPORT_CACHE_FORMAT. A writer calls lookup(key) before building anything
+    and publish(key, ...) instead of uploading once it has saved the
+    workbook; an unchanged report is then answered with a fresh presigned URL
+    for the object uploaded the first time.
+
+    Writers save into FileStorage.spooled_file() and hand publish() that file
+    object, so nothing is written under excels/. Inside direct() the workbook
+    is kept for the HTTP response instead of being stored.
+
+    Settings (REPORT_CACHE_*):
+    - BACKEND:     "s3", "local" (files under REPORT_CACHE_DIR) or "off"
+    - MAX_ENTRIES: least recently used artifacts beyond this are evicted
+    - TTL_HOURS:   artifacts older than this are regenerated and evicted
+
+    stats() reports hits, misses and the hit ratio of this process next to
+    the totals of the shared report_artifacts table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def backend(self, name=None):
+        if not has_app_context():
+            return None
+        name = name or current_app.config.get("REPORT_CACHE_BACKEND", "s3")
+        if name == "local":
+            return Local_Artifact_Store(
+                current_app.config.get("REPORT_CACHE_DIR") or os.path.join("excels", "ReportCache"),
+                current_app.config.get("REPORT_CACHE_PUBLIC_URL", ""),
+            )
+        if name == "s3":
+            return S3_Artifact_Store()
+        return None
+
+    def key(self, kind, template, inputs):
+        from models.System_Settings import System_Settings
+        from utils.TemplateCache import template_cache
+
+        settings = System_Settings.get_default_settings() if has_app_context() else None
+        canonical = json.dumps({
+            "format": REPORT_CACHE_FORMAT,
+            "kind": kind,
+            "template": template_cache.digest(template),
+            "settings": settings.version if settings else None,
+            "period": current_period(),
+            "inputs": inputs,
+        }, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @contextmanager
+    def direct(self):
+        """
+        Collects the workbook a writer publishes inside the block as
+        {"content", "filename"} instead of uploading or caching it.
+        """
+        g.report_direct = workbook = {}
+        try:
+            yield workbook
+        finally:
+            g.pop("report_direct", None)
+
+    def _direct(self):
+        return g.get("report_direct") if has_app_context() else None
+
+    def lookup(self, key):
+        """The download URL of a cached artifact, or None when the report has to be generated."""
+        from app import db
+        from models.Jobs import Report_Artifact
+
+        store = self.backend()
+        if store is None or self._direct() is not None:
+            return None
+
+        try:
+            artifact = db.session.get(Report_Artifact, key)
+            url = None
+            if artifact is not None and artifact.backend == store.name and not self._expired(artifact):
+                url = store.url(artifact)
+
+            if url is None:
+                self._count("misses")
+                return None
+
+            artifact.hits = (artifact.hits or 0) + 1
+            artifact.last_used_at = datetime.datetime.now()
+            db.session.commit()
+            self._count("hits")
+            return url
+        except Exception as e:
+            db.session.rollback()
+            print("Report cache lookup failed", e)
+            self._count("misses")
+            return None
+
+    def publish(self, key, output, object_name):
+        """
+        Uploads a freshly written report from the file object `output`, records
+        it under `key` and returns its download URL. Inside direct() it returns
+        the file name the response will use.
+        """
+        from app import db
+        from models.Jobs import Report_Artifact
+        from utils import FileStorage
+
+        filename = os.path.basename(object_name)
+        direct = self._direct()
+        if direct is not None:
+            output.seek(0)
+            direct.update(content=output.read(), filename=filename)
+            return filename
+
+        store = self.backend()
+        if store is None:
+            return FileStorage.upload_fileobj(output, FileStorage.BUCKET, object_name)
+
+        url, storage_key = store.put(key, output, object_name)
+        if url is None:
+            return None
+        size = output.seek(0, os.SEEK_END)
+
+        try:
+            now = datetime.datetime.now()
+            existing = db.session.get(Report_Artifact, key)
+            if existing is not None:
+                # an expired artifact, or one whose file went missing
+                if existing.storage_key != storage_key:
+                    self._delete(existing)
+                db.session.delete(existing)
+                db.session.flush()
+
+            db.session.add(Report_Artifact(
+                key=key, kind=object_name.split("/", 1)[0], backend=store.name, storage_key=storage_key,
+                filename=filename, size=size,
+                created_at=now, last_used_at=now, hits=0,
+            ))
+            db.session.commit()
+            self._count("stores")
+            self.evict()
+        except IntegrityError:
+            # another worker published the same report in between
+            db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            print("Report cache store failed", e)
+        return url
+
+    def evict(self):
+        """Removes expired artifacts and the least recently used ones beyond REPORT_CACHE_MAX_ENTRIES."""
+        from app import db
+        from models.Jobs import Report_Artifact
+
+        max_entries = int(current_app.config.get("REPORT_CACHE_MAX_ENTRIES", REPORT_CACHE_MAX_ENTRIES))
+        cutoff = datetime.datetime.now() - datetime.timedelta(hours=self._ttl_hours())
+
+        doomed = Report_Artifact.query.filter(Report_Artifact.created_at < cutoff).all()
+        over = Report_Artifact.query.count() - len(doomed) - max_entries
+        if over > 0:
+            doomed += (
+                Report_Artifact.query
+                .filter(Report_Artifact.created_at >= cutoff)
+                .order_by(Report_Artifact.last_used_at)
+                .limit(over)
+                .all()
+            )
+
+        for artifact in doomed:
+            self._delete(artifact)
+            db.session.delete(artifact)
+        if doomed:
+            db.session.commit()
+            self._count("evictions", len(doomed))
+        return len(doomed)
+
+    def stats(self):
+        from app import db
+        from models.Jobs import Report_Artifact
+
+        with self._lock:
+            process = dict(self._stats)
+        lookups = process["hits"] + process["misses"]
+        entries, size, hits = db.session.query(
+            db.func.count(Report_Artifact.key),
+            db.func.coalesce(db.func.sum(Report_Artifact.size), 0),
+            db.func.coalesce(db.func.sum(Report_Artifact.hits), 0),
+        ).one()
+        return {
+            "backend": current_app.config.get("REPORT_CACHE_BACKEND", "s3"),
+            **process,
+            "hit_ratio": round(process["hits"] / lookups, 3) if lookups else None,
+            "entries": entries,
+            "bytes": int(size),
+            "total_hits": int(hits),
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def _expired(self, artifact):
+        return artifact.created_at < datetime.datetime.now() - datetime.timedelta(hours=self._ttl_hours())
+
+    def _ttl_hours(self):
+        return float(current_app.config.get("REPORT_CACHE_TTL_HOURS", REPORT_CACHE_TTL_HOURS))
+
+    def _delete(self, artifact):
+        try:
+            self.backend(artifact.backend).delete(artifact)
+        except Exception as e:
+            print("Report cache delete failed", e)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+
+report_cache = Report_Cache()
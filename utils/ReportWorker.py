@@ -0,0 +1,288 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+
+
+REPORT_WORKER_CONCURRENCY = 2
+REPORT_WORKER_POLL_INTERVAL = 1.0
+REPORT_JOB_TIMEOUT = 1800
+REPORT_JOB_HEARTBEAT = 30.0
+REPORT_JOB_MAX_ATTEMPTS = 3
+REPORT_NOTIFY_INTERVAL = 2.0
+
+
+class Report_Worker:
+    """
+    Runs queued report jobs (models.Jobs.Report_Job) outside the web
+    process. Started with `flask report-worker`; each of the `concurrency`
+    threads claims one job at a time with a conditional UPDATE, so any number
+    of worker processes can share the table.
+
+    While a job runs, a timer thread refreshes its heartbeat every
+    REPORT_JOB_HEARTBEAT seconds, whether or not the report calls progress().
+    A running job that missed three heartbeats (the worker died) is put back
+    in the queue, and failed after REPORT_JOB_MAX_ATTEMPTS tries. A job still
+    running REPORT_JOB_TIMEOUT seconds after it started is hung and failed,
+    however alive its worker is; a result it produces later is discarded.
+
+    Generated files are written under REPORT_JOBS_DIR/<job id>/. The
+    requester is notified over Socket.IO from here when SOCKETIO_MESSAGE_QUEUE
+    is set; otherwise the web process's Job_Notifier picks the job up.
+    """
+
+    def __init__(self, app, concurrency=None, poll_interval=None):
+        self.app = app
+        self.concurrency = int(concurrency or app.config.get("REPORT_WORKER_CONCURRENCY", REPORT_WORKER_CONCURRENCY))
+        self.poll_interval = float(poll_interval or app.config.get("REPORT_WORKER_POLL_INTERVAL", REPORT_WORKER_POLL_INTERVAL))
+        self.timeout = int(app.config.get("REPORT_JOB_TIMEOUT", REPORT_JOB_TIMEOUT))
+        self.heartbeat = float(app.config.get("REPORT_JOB_HEARTBEAT", REPORT_JOB_HEARTBEAT))
+        # three missed beats, so one slow UPDATE doesn't get the job requeued
+        self.stale_after = self.heartbeat * 3
+        self.jobs_dir = app.config.get("REPORT_JOBS_DIR") or os.path.join("excels", "ReportJobs")
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._loop, args=(i,), name=f"report-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in threads:
+                thread.join(timeout=30)
+
+    def stop(self):
+        self._stopping.set()
+
+    def _loop(self, index):
+        while not self._stopping.is_set():
+            try:
+                job_id = self.run_once(worker=f"{self.name}:{index}")
+            except Exception as e:
+                print("Report worker error", e)
+                job_id = None
+            if job_id is None:
+                self._stopping.wait(self.poll_interval)
+
+    def run_once(self, worker=None):
+        """Claims and runs one job; returns its id, or None if the queue is empty."""
+        with self.app.app_context():
+            self.requeue_stale()
+            job_id = self.claim(worker or self.name)
+            if job_id is not None:
+                self.process(job_id)
+            return job_id
+
+    def claim(self, worker):
+        from app import db
+        from models.Jobs import Report_Job, JOB_QUEUED, JOB_RUNNING
+
+        candidates = db.session.execute(
+            db.select(Report_Job.id)
+            .where(Report_Job.status == JOB_QUEUED)
+            .order_by(Report_Job.created_at)
+            .limit(self.concurrency * 2)
+        ).scalars().all()
+
+        for job_id in candidates:
+            now = datetime.now()
+            claimed = db.session.execute(
+                update(Report_Job)
+                .where(Report_Job.id == job_id, Report_Job.status == JOB_QUEUED)
+                .values(status=JOB_RUNNING, worker=worker, started_at=now, heartbeat_at=now,
+                        attempts=Report_Job.attempts + 1, progress=0, message="Started")
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return job_id
+        return None
+
+    def requeue_stale(self):
+        """
+        Fails running jobs started more than REPORT_JOB_TIMEOUT seconds ago and
+        requeues those whose worker stopped beating; returns how many changed.
+        """
+        from app import db
+        from models.Jobs import Report_Job, JOB_QUEUED, JOB_RUNNING, JOB_FAILED
+
+        now = datetime.now()
+        overdue = now - timedelta(seconds=self.timeout)
+        dead = now - timedelta(seconds=self.stale_after)
+        stale = (
+            Report_Job.query
+            .filter(Report_Job.status == JOB_RUNNING,
+                    or_(Report_Job.started_at < overdue, Report_Job.heartbeat_at < dead))
+            .with_for_update()
+            .all()
+        )
+        for job in stale:
+            hung = job.started_at is not None and job.started_at < overdue
+            if hung or (job.attempts or 0) >= REPORT_JOB_MAX_ATTEMPTS:
+                job.status = JOB_FAILED
+                job.error = "The report took too long to generate."
+                job.finished_at = datetime.now()
+                job.active_key = None
+            else:
+                job.status = JOB_QUEUED
+                job.message = "Requeued"
+        if stale:
+            db.session.commit()
+        return len(stale)
+
+    def process(self, job_id):
+        from app import db
+        from models.Jobs import Report_Job, Report_Job_Error, JOB_DONE, JOB_FAILED, JOB_RUNNING
+        from services.report_jobs import run_report
+
+        job = db.session.get(Report_Job, job_id)
+        attempt = job.attempts
+        last = {"percent": -1}
+
+        def progress(done, total):
+            percent = int(done * 100 / total) if total else 0
+            if percent == last["percent"]:
+                return
+            last["percent"] = percent
+            db.session.execute(
+                update(Report_Job)
+                .where(Report_Job.id == job_id)
+                .values(progress=min(percent, 99), message=f"{done} of {total}", heartbeat_at=datetime.now())
+            )
+            db.session.commit()
+
+        beating = threading.Event()
+        beat = threading.Thread(target=self._beat, args=(job_id, beating), name=f"report-heartbeat-{job_id}", daemon=True)
+        beat.start()
+        try:
+            artifact = run_report(job.kind, dict(job.params or {}), progress)
+            if artifact.get("url") is not None:
+                job.result_url = artifact["url"]
+            else:
+                job.result_path = self._save(job.id, artifact)
+                job.result_name = artifact["filename"]
+                job.mimetype = artifact["mimetype"]
+            job.status = JOB_DONE
+            job.progress = 100
+            job.message = "Done"
+        except Report_Job_Error as e:
+            db.session.rollback()
+            job = db.session.get(Report_Job, job_id)
+            job.status = JOB_FAILED
+            job.error = str(e)
+        except Exception as e:
+            db.session.rollback()
+            traceback.print_exc()
+            job = db.session.get(Report_Job, job_id)
+            job.status = JOB_FAILED
+            job.error = str(e)
+        finally:
+            beating.set()
+            beat.join()
+
+        # requeue_stale may have failed or requeued the job while it ran
+        with db.session.no_autoflush:
+            current = db.session.execute(
+                db.select(Report_Job.status, Report_Job.attempts)
+                .where(Report_Job.id == job_id)
+                .with_for_update()
+            ).one()
+        if current.status != JOB_RUNNING or current.attempts != attempt:
+            db.session.rollback()
+            return db.session.get(Report_Job, job_id)
+
+        job.finished_at = datetime.now()
+        job.active_key = None
+        db.session.commit()
+
+        if self.app.config.get("SOCKETIO_MESSAGE_QUEUE"):
+            from models.Jobs import Report_Job_Service
+            Report_Job_Service.notify(job)
+        return job
+
+    def _beat(self, job_id, stopped):
+        """Refreshes the heartbeat of a running job until `stopped` is set."""
+        from app import db
+        from models.Jobs import Report_Job, JOB_RUNNING
+
+        while not stopped.wait(self.heartbeat):
+            try:
+                with self.app.app_context():
+                    db.session.execute(
+                        update(Report_Job)
+                        .where(Report_Job.id == job_id, Report_Job.status == JOB_RUNNING)
+                        .values(heartbeat_at=datetime.now())
+                    )
+                    db.session.commit()
+            except Exception as e:
+                print("Report heartbeat failed", e)
+
+    def _save(self, job_id, artifact):
+        folder = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.abspath(os.path.join(folder, artifact["filename"]))
+        with open(path, "wb") as f:
+            f.write(artifact["content"])
+        return path
+
+
+class Job_Notifier:
+    """
+    Background task in the web process that emits report_ready/report_failed
+    for finished jobs nobody has been told about yet. Needed when the worker
+    cannot reach the Socket.IO clients itself (no SOCKETIO_MESSAGE_QUEUE);
+    Report_Job_Service.notify claims each job atomically, so running it next
+    to a notifying worker never sends an event twice.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, app):
+        if self.app is not None:
+            return
+        with self._lock:
+            if self.app is not None:
+                return
+            self.app = app
+            from app import socketio
+            socketio.start_background_task(self._run)
+
+    def _run(self):
+        from app import socketio
+
+        interval = float(self.app.config.get("REPORT_NOTIFY_INTERVAL", REPORT_NOTIFY_INTERVAL))
+        while True:
+            socketio.sleep(interval)
+            try:
+                self.notify_finished()
+            except Exception as e:
+                print("Report notifier error", e)
+
+    def notify_finished(self):
+        from models.Jobs import Report_Job, Report_Job_Service
+
+        with self.app.app_context():
+            since = datetime.now() - timedelta(days=1)
+            jobs = (
+                Report_Job.query
+                .filter(Report_Job.finished_at >= since, Report_Job.notified_at.is_(None))
+                .order_by(Report_Job.finished_at)
+                .limit(100)
+                .all()
+            )
+            return sum(1 for job in jobs if Report_Job_Service.notify(job))
+
+
+job_notifier = Job_Notifier()
@@ -0,0 +1,772 @@
+"""
+Streaming OPCR workbooks (xlsxwriter, constant_memory)
+======================================================
+Alternative backend for the largest ExcelHandler reports. Instead of loading
+the template into openpyxl and restyling it cell by cell, the template is
+read once (utils.TemplateCache) into a snapshot of values, styles, merges,
+dimensions and images, and the report is streamed with xlsxwriter's
+constant_memory mode: every row is written once, in order, and freed.
+
+The output matches ExcelHandler's: template cells keep their style, merged
+cells are reset to the default style like openpyxl's MergedCell, and
+prepare() is prepareCells (merge + thin border on every cell).
+
+Which reports use it is set per report type by EXCEL_STREAMING_REPORTS
+("master_opcr", "weighted_opcr"); see excel_handler().
+"""
+
+import datetime
+import io
+import random
+import sys
+from collections import namedtuple
+from copy import copy
+
+import xlsxwriter
+from flask import current_app, has_app_context
+from openpyxl.cell.cell import Cell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.styles.colors import COLOR_INDEX
+from openpyxl.utils.cell import coordinate_to_tuple, range_boundaries
+from PIL import Image as PILImage
+from xlsxwriter.color import Color
+
+from utils.FileStorage import spooled_file
+from utils.ReportCache import report_cache
+from utils.TemplateCache import template_cache
+
+
+def excel_handler(report):
+    """The module that renders `report`: this one if it is listed in EXCEL_STREAMING_REPORTS, else ExcelHandler."""
+    from utils import ExcelHandler
+
+    reports = current_app.config.get("EXCEL_STREAMING_REPORTS", ()) if has_app_context() else ()
+    return sys.modules[__name__] if report in reports else ExcelHandler
+
+
+# ── Styles ────────────────────────────────────────────────────────────────────
+
+Style = namedtuple("Style", "font fill border alignment number_format protection")
+
+THIN_BORDER = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+
+# xlsxwriter uses the position in these lists as the property value
+BORDER_STYLES = [None, "thin", "medium", "dashed", "dotted", "thick", "double", "hair", "mediumDashed",
+                 "dashDot", "mediumDashDot", "dashDotDot", "mediumDashDotDot", "slantDashDot"]
+FILL_PATTERNS = ["none", "solid", "mediumGray", "darkGray", "lightGray", "darkHorizontal", "darkVertical",
+                 "darkDown", "darkUp", "darkGrid", "darkTrellis", "lightHorizontal", "lightVertical",
+                 "lightDown", "lightUp", "lightGrid", "lightTrellis", "gray125", "gray0625"]
+HORIZONTAL = {"left": "left", "center": "center", "right": "right", "fill": "fill", "justify": "justify",
+              "centerContinuous": "center_across", "distributed": "distributed"}
+VERTICAL = {"top": "top", "center": "vcenter", "bottom": "bottom", "justify": "vjustify", "distributed": "vdistributed"}
+UNDERLINE = {"single": 1, "double": 2, "singleAccounting": 33, "doubleAccounting": 34}
+
+
+def style_of(cell):
+    # copy() unwraps openpyxl's StyleProxy into the hashable style object
+    return Style(copy(cell.font), copy(cell.fill), copy(cell.border), copy(cell.alignment),
+                 cell.number_format, copy(cell.protection))
+
+
+def _color(color):
+    """openpyxl Color -> xlsxwriter color, or None for automatic."""
+    if color is None:
+        return None
+    if color.type == "rgb" and isinstance(color.rgb, str):
+        return "#" + color.rgb[-6:]
+    if color.type == "theme" and color.theme is not None and color.theme <= 9:
+        # tints other than 0 are not carried over; the templates only use plain theme colors
+        return Color((color.theme, 0))
+    if color.type == "indexed" and color.indexed is not None and color.indexed < len(COLOR_INDEX):
+        return "#" + COLOR_INDEX[color.indexed][-6:]
+    return None
+
+
+def _format_properties(style):
+    props = {}
+
+    font = style.font
+    if font.name:
+        props["font_name"] = font.name
+    if font.sz:
+        props["font_size"] = float(font.sz)
+    if font.b:
+        props["bold"] = True
+    if font.i:
+        props["italic"] = True
+    if font.strike:
+        props["font_strikeout"] = True
+    if font.u:
+        props["underline"] = UNDERLINE.get(font.u, 1)
+    if font.vertAlign == "superscript":
+        props["font_script"] = 1
+    elif font.vertAlign == "subscript":
+        props["font_script"] = 2
+    if _color(font.color) is not None:
+        props["font_color"] = _color(font.color)
+
+    fill = style.fill
+    if getattr(fill, "fill_type", None) in FILL_PATTERNS[1:]:
+        props["pattern"] = FILL_PATTERNS.index(fill.fill_type)
+        if fill.fill_type == "solid":
+            # xlsxwriter's bg_color is the solid fill color
+            if _color(fill.fgColor) is not None:
+                props["bg_color"] = _color(fill.fgColor)
+        else:
+            if _color(fill.fgColor) is not None:
+                props["fg_color"] = _color(fill.fgColor)
+            if _color(fill.bgColor) is not None:
+                props["bg_color"] = _color(fill.bgColor)
+
+    for side in ("left", "right", "top", "bottom"):
+        edge = getattr(style.border, side)
+        if edge is not None and edge.style in BORDER_STYLES:
+            props[side] = BORDER_STYLES.index(edge.style)
+            if _color(edge.color) is not None:
+                props[f"{side}_color"] = _color(edge.color)
+
+    alignment = style.alignment
+    if alignment.horizontal in HORIZONTAL:
+        props["align"] = HORIZONTAL[alignment.horizontal]
+    if alignment.vertical in VERTICAL:
+        props["valign"] = VERTICAL[alignment.vertical]
+    if alignment.wrap_text:
+        props["text_wrap"] = True
+    if alignment.shrink_to_fit:
+        props["shrink"] = True
+    if alignment.indent:
+        props["indent"] = int(alignment.indent)
+    if alignment.textRotation:
+        props["rotation"] = int(alignment.textRotation)
+
+    if style.number_format and style.number_format != "General":
+        props["num_format"] = style.number_format
+
+    if style.protection.locked is False:
+        props["locked"] = False
+    if style.protection.hidden:
+        props["hidden"] = True
+    return props
+
+
+class Format_Registry:
+    """One xlsxwriter Format per distinct cell style, shared by every cell of the workbook."""
+
+    def __init__(self, workbook, default_style):
+        self.workbook = workbook
+        self.default_style = default_style
+        self._formats = {}
+        # hashing openpyxl style objects is slow and a report reuses the same
+        # few objects for thousands of cells, so look them up by identity
+        # first; the entry holds the style, which keeps those ids in use
+        self._by_id = {}
+
+    def get(self, style):
+        key = tuple(map(id, style))
+        entry = self._by_id.get(key)
+        if entry is None:
+            if style == self.default_style:
+                fmt = None
+            else:
+                fmt = self._formats.get(style)
+                if fmt is None:
+                    fmt = self._formats[style] = self.workbook.add_format(_format_properties(style))
+            entry = self._by_id[key] = (style, fmt)
+        return entry[1]
+
+    def __len__(self):
+        return len(self._formats)
+
+
+# ── Template snapshot ─────────────────────────────────────────────────────────
+
+class Template_Sheet:
+    """What a streamed report needs from the template's first worksheet."""
+
+    def __init__(self, path):
+        wb = template_cache.workbook(path)
+        ws = wb.active
+
+        self.default_style = style_of(Cell(ws))
+        self.cells = {}
+        for (row, col), cell in ws._cells.items():
+            self.cells.setdefault(row, {})[col] = (cell.value, style_of(cell))
+        self.max_row = max(self.cells, default=0)
+
+        self.merges = [range_boundaries(str(r)) for r in ws.merged_cells.ranges]
+        self.row_heights = {row: dim.height for row, dim in ws.row_dimensions.items() if dim.height is not None}
+        self.default_row_height = ws.sheet_format.defaultRowHeight or 15
+        self.default_col_width = ws.sheet_format.defaultColWidth or 8.43
+        self.columns = [
+            (dim.min, dim.max, dim.width, style_of(dim), dim.hidden)
+            for dim in ws.column_dimensions.values() if dim.min and dim.max
+        ]
+        self.images = [(image._data(), image.anchor) for image in ws._images]
+
+    def col_width(self, col):
+        for first, last, width, _, _ in self.columns:
+            if first <= col <= last and width:
+                return width
+        return self.default_col_width
+
+    def row_height(self, row):
+        return self.row_heights.get(row, self.default_row_height)
+
+
+def _col_pixels(width):
+    # xlsxwriter's column width -> pixels conversion (Calibri 11 max digit width)
+    return int(width * 12 + 0.5) if width < 1 else int(width * 7 + 0.5) + 5
+
+
+def _row_pixels(height):
+    return int(4.0 / 3.0 * height)
+
+
+# ── Streaming worksheet ───────────────────────────────────────────────────────
+
+class _Cell:
+    __slots__ = ("value", "style")
+
+    def __init__(self, value, style):
+        self.value = value
+        self.style = style
+
+
+class Stream_Sheet:
+    """
+    Row-buffered writer over an xlsxwriter constant_memory worksheet.
+
+    Cells are addressed with openpyxl coordinates ("A27") and start from the
+    template's value and style. Rows stay editable until flush(row) writes
+    every row before `row`; constant_memory cannot go back to them.
+    """
+
+    def __init__(self, workbook, worksheet, template):
+        self.workbook = workbook
+        self.ws = worksheet
+        self.template = template
+        self.formats = Format_Registry(workbook, template.default_style)
+        self.merges = {}   # insertion-ordered set of (min_col, min_row, max_col, max_row)
+        self._merged = {}  # row -> {col: merge covering that cell}, for rows not yet written
+        self._rows = {}
+        self._heights = {}
+        self._next_row = 1
+
+        for merge in template.merges:
+            self._merge(tuple(merge))
+        for first, last, width, style, hidden in template.columns:
+            self.ws.set_column(first - 1, last - 1, width, self.formats.get(style), {"hidden": bool(hidden)})
+        self._insert_images()
+
+    def cell(self, coordinate):
+        row, col = coordinate_to_tuple(coordinate)
+        return self._cell(row, col)
+
+    def set(self, coordinate, value=None, font=None, alignment=None, number_format=None, keep_value=False):
+        cell = self.cell(coordinate)
+        if not keep_value:
+            cell.value = value
+        changes = {}
+        if font is not None:
+            changes["font"] = font
+        if alignment is not None:
+            changes["alignment"] = alignment
+        if number_format is not None:
+            changes["number_format"] = number_format
+        if changes:
+            cell.style = cell.style._replace(**changes)
+        return cell
+
+    def style(self, coordinate, font=None, alignment=None, number_format=None):
+        return self.set(coordinate, font=font, alignment=alignment, number_format=number_format, keep_value=True)
+
+    def prepare(self, start, end):
+        """prepareCells: merge start:end and give every cell a thin border."""
+        min_col, min_row, max_col, max_row = merge = range_boundaries(f"{start}:{end}")
+        self._merge(merge)
+
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                cell = self._cell(row, col)
+                if (row, col) != (min_row, min_col):
+                    # openpyxl turns these into unstyled MergedCells
+                    cell.value = None
+                    cell.style = self.template.default_style
+                cell.style = cell.style._replace(border=THIN_BORDER)
+
+    def height(self, row, height):
+        self._check_row(row)
+        self._heights[row] = height
+
+    def flush(self, before_row):
+        """Writes every row above `before_row`."""
+        while self._next_row < before_row:
+            self._write_row(self._next_row)
+            self._merged.pop(self._next_row, None)
+            self._next_row += 1
+
+    def close(self):
+        # the template sizes rows far below its content; constant_memory
+        # only keeps the height of a row when it is flushed
+        last = max([self.template.max_row, *self.template.row_heights, *self._rows, *self._heights], default=0)
+        self.flush(last + 1)
+        for min_col, min_row, max_col, max_row in self.merges:
+            # merge_range() writes its blank cells immediately, which
+            # constant_memory only allows row by row; the cells were
+            # written by _write_row, so only the range is recorded
+            self.ws.merge.append([min_row - 1, min_col - 1, max_row - 1, max_col - 1])
+
+    def _merge(self, merge):
+        min_col, min_row, max_col, max_row = merge
+        cells = [(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)]
+
+        # a range merged again replaces the ranges it overlaps
+        overlapped = {self._merged[row][col] for row, col in cells if col in self._merged.get(row, {})}
+        for old in overlapped:
+            del self.merges[old]
+            for row in range(old[1], old[3] + 1):
+                for col in range(old[0], old[2] + 1):
+                    self._merged.get(row, {}).pop(col, None)
+
+        self.merges[merge] = True
+        for row, col in cells:
+            self._merged.setdefault(row, {})[col] = merge
+
+    def _cell(self, row, col):
+        self._check_row(row)
+        cells = self._rows.get(row)
+        if cells is None:
+            cells = self._rows[row] = {
+                c: _Cell(value, style) for c, (value, style) in self.template.cells.get(row, {}).items()
+            }
+        cell = cells.get(col)
+        if cell is None:
+            cell = cells[col] = _Cell(None, self.template.default_style)
+        return cell
+
+    def _check_row(self, row):
+        if row < self._next_row:
+            raise ValueError(f"Row {row} was already written")
+
+    def _write_row(self, row):
+        cells = self._rows.pop(row, None)
+        if cells is None:
+            cells = {c: _Cell(value, style) for c, (value, style) in self.template.cells.get(row, {}).items()}
+
+        height = self._heights.pop(row, self.template.row_heights.get(row))
+        if height is not None:
+            self.ws.set_row(row - 1, height)
+            if row - 1 > self.ws.previous_row:
+                # constant_memory emits a row when a later row is written
+                # to; move on like a cell write would, so rows that only
+                # carry a height are kept too
+                self.ws._write_single_row(row - 1)
+
+        for col in sorted(cells):
+            cell = cells[col]
+            fmt = self.formats.get(cell.style)
+            if cell.value is None or cell.value == "":
+                if fmt is not None:
+                    self.ws.write_blank(row - 1, col - 1, None, fmt)
+            else:
+                self.ws.write(row - 1, col - 1, cell.value, fmt)
+
+    def _insert_images(self):
+        template = self.template
+        for data, anchor in template.images:
+            start = anchor._from
+            x_offset = start.colOff // 9525
+            y_offset = start.rowOff // 9525
+
+            if hasattr(anchor, "to") and anchor.to is not None:
+                end = anchor.to
+                width = sum(_col_pixels(template.col_width(c + 1)) for c in range(start.col, end.col)) \
+                    + end.colOff // 9525 - x_offset
+                height = sum(_row_pixels(template.row_height(r + 1)) for r in range(start.row, end.row)) \
+                    + end.rowOff // 9525 - y_offset
+            else:
+                width, height = anchor.ext.width // 9525, anchor.ext.height // 9525
+
+            with PILImage.open(io.BytesIO(data)) as image:
+                dpi_x, dpi_y = image.info.get("dpi", (96, 96))
+                native_width = image.width * 96 / (dpi_x or 96)
+                native_height = image.height * 96 / (dpi_y or 96)
+
+            self.ws.insert_image(start.row, start.col, "template-image.png", {
+                "image_data": io.BytesIO(data),
+                "x_offset": x_offset,
+                "y_offset": y_offset,
+                "x_scale": width / native_width,
+                "y_scale": height / native_height,
+                "object_position": 2,
+            })
+
+
+def open_sheet(output, template_path):
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet("Sheet1")
+    return workbook, Stream_Sheet(workbook, worksheet, Template_Sheet(template_path))
+
+
+def _page_setup(ws):
+    # same print settings ExcelHandler applies
+    ws.set_landscape()
+    ws.set_paper(9)
+    ws.set_margins(left=0, right=0, top=0, bottom=0)
+    ws.set_header("", {"margin": 0})
+    ws.set_footer("", {"margin": 0})
+    ws.fit_to_pages(1, 0)
+
+
+def _period():
+    year = str(datetime.datetime.now().year)
+    if datetime.datetime.now().month <= 6:
+        return "JANUARY - JUNE " + year
+    return "JULY - DECEMBER " + year
+
+
+CENTER = Alignment(horizontal="center", vertical="center", wrap_text=True)
+LEFT = Alignment(wrap_text=True, horizontal="left", vertical="center")
+BOTTOM = Alignment(horizontal="center", vertical="bottom", wrap_text=True)
+BOLD = Font(bold=True)
+SIGNATORY = Font(bold=True, name="Calibri", size="11")
+NUMBER_FORMAT = "0.00"
+
+
+def _accountable(assigned, title):
+    return "".join(person + "\n" for person in assigned.get(title, []))
+
+
+# ── Reports ───────────────────────────────────────────────────────────────────
+
+def createNewMasterOPCR(data, assigned, admin_data):
+    cache_key = report_cache.key("streaming_master_opcr", "excels/OPCRTest.xlsx", {"data": data, "assigned": assigned, "admin_data": admin_data})
+    cached = report_cache.lookup(cache_key)
+    if cached:
+        return cached
+
+    period = _period()
+    id = random.randint(1,999999)
+    filename = f"MOPCR-NC - {period} - {id}"
+
+    with spooled_file() as output:
+        render_master_opcr(output, data, assigned, admin_data, period)
+        return report_cache.publish(cache_key, output, f"OPCR/{filename}.xlsx")
+
+
+def render_master_opcr(output, data, assigned, admin_data, period=None):
+    """Writes the master OPCR sheet of ExcelHandler.createNewMasterOPCR to `output` (a path or file object)."""
+    period = period or _period()
+    workbook, sheet = open_sheet(output, "excels/OPCRTest.xlsx")
+    _page_setup(sheet.ws)
+
+    name = admin_data["fullName"]
+    sheet.set("A6", f"I, {name}, {admin_data["position"]} of the  NORZAGARAY COLLEGE, commit to deliver and agree to be rated on the attainment of ")
+    sheet.set("A7", f"the following targets in accordance with the indicated measures for the period of {period}.")
+    sheet.set("N8", name)
+    sheet.set("N9", admin_data["position"])
+    sheet.set("N10", "", alignment=CENTER, font=SIGNATORY)
+    sheet.set("A13", "Name: " + admin_data["individuals"]["approve"]["name"])
+    sheet.set("A14", "Position: " + admin_data["individuals"]["approve"]["position"])
+    sheet.set("A15", "Date: " + "")
+
+    row = 26
+    startingrow = 26
+    endrow = 0
+
+    for i in data:
+        if len(i) == 0: continue
+
+        for g, h in i.items():
+            if len(h) == 0: continue
+            sheet.set(f"A{row}", g, font=Font(bold=True, size=12))
+            sheet.prepare(f"A{row}", f"S{row}")
+            row += 1
+
+            for a in h:
+                sheet.prepare(f"A{row}", f"C{row+5}")
+                sheet.set(f"A{row}", a["title"], alignment=CENTER)
+
+                # target
+                sheet.prepare(f"D{row}", f"D{row+1}")
+                sheet.set(f"D{row}", a["summary"]["target"], alignment=CENTER, font=BOLD)
+                sheet.prepare(f"D{row+2}", f"D{row+3}")
+                sheet.set(f"D{row+2}", abs(round(a["working_days"]["target"] / a["frequency"])) if a["working_days"]["target"] != 0 else 0, alignment=CENTER, font=BOLD)
+                sheet.prepare(f"D{row+4}", f"D{row+5}")
+                sheet.set(f"D{row+4}", abs(round(a["corrections"]["target"] / a["frequency"])) if a["corrections"]["target"] != 0 else 0, alignment=CENTER, font=BOLD)
+
+                # description
+                sheet.prepare(f"E{row}", f"G{row+1}")
+                sheet.set(f"E{row}", a["description"]["target"], alignment=LEFT)
+                sheet.height(row, 45)
+                sheet.prepare(f"E{row+2}", f"G{row+3}")
+                sheet.set(f"E{row+2}", a["description"]["time"] + "/s ")
+                sheet.prepare(f"E{row+4}", f"G{row+5}")
+                sheet.set(f"E{row+4}", a["description"]["alterations"])
+
+                # budget and individuals
+                sheet.prepare(f"H{row}", f"H{row+5}")
+                sheet.set(f"H{row}", 0, alignment=CENTER)
+                sheet.prepare(f"I{row}", f"I{row+5}")
+                sheet.set(f"I{row}", _accountable(assigned, a["title"]), alignment=CENTER)
+
+                # actual
+                sheet.prepare(f"J{row}", f"J{row+1}")
+                sheet.set(f"J{row}", a["summary"]["actual"], alignment=CENTER, font=BOLD)
+                sheet.prepare(f"J{row+2}", f"J{row+3}")
+                sheet.set(f"J{row+2}", abs(round(a["working_days"]["actual"] / a["frequency"])) if a["working_days"]["actual"] != 0 else 0, alignment=CENTER, font=BOLD)
+                sheet.prepare(f"J{row+4}", f"J{row+5}")
+                sheet.set(f"J{row+4}", round(a["corrections"]["actual"] / a["frequency"]) if a["corrections"]["actual"] != 0 else 0, alignment=CENTER, font=BOLD)
+
+                sheet.prepare(f"K{row}", f"M{row+1}")
+                sheet.set(f"K{row}", a["description"]["actual"], alignment=LEFT)
+                sheet.prepare(f"K{row+2}", f"M{row+3}")
+                sheet.set(f"K{row+2}", a["description"]["time"] + "/s with")
+                sheet.prepare(f"K{row+4}", f"M{row+5}")
+                sheet.set(f"K{row+4}", a["description"]["alterations"])
+
+                # ratings
+                for col, key in (("N", "quantity"), ("O", "efficiency"), ("P", "timeliness")):
+                    sheet.prepare(f"{col}{row}", f"{col}{row+5}")
+                    sheet.set(f"{col}{row}", a["rating"][key], alignment=CENTER, font=BOLD)
+                sheet.prepare(f"Q{row}", f"Q{row+5}")
+                sheet.set(f"Q{row}", f"=AVERAGE(N{row}, O{row},P{row})", alignment=CENTER, font=BOLD, number_format=NUMBER_FORMAT)
+
+                sheet.prepare(f"R{row}", f"S{row+5}")
+                sheet.set(f"R{row}", " ")
+
+                endrow = row
+                row = row + 6
+                sheet.flush(row)
+
+    sheet.prepare(f"J{row}", f"M{row+1}")
+    sheet.set(f"J{row}", "Final Average Rating", alignment=CENTER)
+    for col in ("N", "O", "P", "Q"):
+        sheet.prepare(f"{col}{row}", f"{col}{row+1}")
+        sheet.set(f"{col}{row}", f"=AVERAGE({col}{startingrow+1}: {col}{endrow})", alignment=CENTER, number_format=NUMBER_FORMAT)
+    average = f"=AVERAGE(Q{startingrow}: Q{endrow})"
+    averagecell = f"Q{row}"
+
+    row += 2
+    sheet.prepare(f"J{row}", f"M{row+1}")
+    sheet.set(f"J{row}", "FINAL AVERAGE RATING", alignment=CENTER)
+    sheet.prepare(f"N{row}", f"Q{row+1}")
+    sheet.set(f"N{row}", average, alignment=CENTER, font=BOLD, number_format=NUMBER_FORMAT)
+
+    row += 2
+    sheet.prepare(f"J{row}", f"M{row+1}")
+    sheet.set(f"J{row}", "ADJECTIVAL RATING", alignment=CENTER)
+    sheet.prepare(f"N{row}", f"Q{row+1}")
+    sheet.set(f"N{row}", f'=IF(AND({averagecell}>=1, {averagecell}<=1.9), "POOR", IF(AND({averagecell}>=2, {averagecell}<=2.9), "UNSATISFACTORY", IF(AND({averagecell}>=3, {averagecell}<=3.9), "SATISFACTORY", IF(AND({averagecell}>=4, {averagecell}<=4.9), "VERY SATISFACTORY", IF(AND({averagecell}=5), "OUTSTANDING")))))', alignment=CENTER, font=BOLD)
+
+    # individuals
+    row += 2
+    sheet.prepare(f"A{row}", f"F{row}")
+    sheet.set(f"A{row}", "Assess By:", alignment=CENTER, font=BOLD)
+    sheet.prepare(f"G{row}", f"H{row}")
+    sheet.set(f"G{row}", "Date", alignment=CENTER)
+    sheet.prepare(f"I{row}", f"O{row}")
+    sheet.set(f"I{row}", "Final Rating By:", alignment=CENTER, font=BOLD)
+    sheet.prepare(f"P{row}", f"S{row}")
+    sheet.set(f"P{row}", "Date", alignment=CENTER)
+
+    row += 1
+    individuals = admin_data["individuals"]
+    sheet.prepare(f"A{row}", f"F{row+2}")
+    sheet.set(f"A{row}", individuals["assess"]["name"] + "\n" + individuals["assess"]["position"], alignment=BOTTOM, font=SIGNATORY)
+    sheet.prepare(f"G{row}", f"H{row+2}")
+    sheet.style(f"G{row}", alignment=CENTER, font=SIGNATORY)
+    sheet.prepare(f"I{row}", f"O{row+2}")
+    sheet.set(f"I{row}", individuals["final"]["name"] + "\n" + individuals["final"]["position"], alignment=BOTTOM, font=SIGNATORY)
+    sheet.prepare(f"P{row}", f"S{row+2}")
+    sheet.style(f"P{row}", alignment=CENTER, font=SIGNATORY)
+
+    sheet.close()
+    workbook.close()
+
+
+def createNewWeightedOPCR(data, assigned, admin_data):
+    cache_key = report_cache.key("streaming_weighted_opcr", "excels/WeightedOPCRTest.xlsx", {"data": data, "assigned": assigned, "admin_data": admin_data})
+    cached = report_cache.lookup(cache_key)
+    if cached:
+        return cached
+
+    period = _period()
+    id = random.randint(1,999999)
+    filename = f"OPCR-NC - {period} - {admin_data["lastName"]} - {id}"
+
+    with spooled_file() as output:
+        render_weighted_opcr(output, data, assigned, admin_data, period)
+        return report_cache.publish(cache_key, output, f"OPCR/{filename}.xlsx")
+
+
+def render_weighted_opcr(output, data, assigned, admin_data, period=None):
+    """Writes the weighted OPCR sheet of ExcelHandler.createNewWeightedOPCR to `output` (a path or file object)."""
+    period = period or _period()
+    workbook, sheet = open_sheet(output, "excels/WeightedOPCRTest.xlsx")
+    _page_setup(sheet.ws)
+
+    name = admin_data["fullName"]
+    sheet.set("A6", f"I, {name}, {admin_data["position"]} of the  NORZAGARAY COLLEGE, commit to deliver and agree to be rated on the attainment of ")
+    sheet.set("A7", f"the following targets in accordance with the indicated measures for the period of {period}.")
+    sheet.set("P8", name)
+    sheet.set("N9", "")
+    sheet.set("N10", "", alignment=CENTER, font=SIGNATORY)
+    sheet.set("A13", "Name: " + admin_data["individuals"]["approve"]["name"])
+    sheet.set("A14", "Position: " + admin_data["individuals"]["approve"]["position"])
+    sheet.set("A15", "Date: " + "")
+
+    row = 26
+    startingrow = 26
+    endrow = 0
+    total_weighted = 0
+
+    for i in data:
+        if len(i) == 0: continue
+
+        for g, h in i.items():
+            if len(h) == 0: continue
+            sheet.set(f"A{row}", g, font=Font(bold=True, size=12))
+            sheet.prepare(f"A{row}", f"S{row}")
+            row += 1
+
+            for a in h:
+                deadline = a["description"]["timeliness_mode"] == "deadline"
+
+                sheet.prepare(f"A{row}", f"C{row+5}")
+                sheet.set(f"A{row}", a["title"], alignment=CENTER)
+
+                # weight
+                sheet.prepare(f"D{row}", f"D{row+5}")
+                sheet.set(f"D{row}", str(a["description"]["task_weight"] * 100) + "%", alignment=CENTER, font=BOLD)
+
+                # target
+                sheet.prepare(f"E{row}", f"E{row+1}")
+                sheet.set(f"E{row}", a["summary"]["target"], alignment=CENTER, font=BOLD)
+                sheet.prepare(f"E{row+2}", f"E{row+3}")
+                if deadline:
+                    sheet.set(f"E{row+2}", "", alignment=CENTER, font=BOLD)
+                else:
+                    sheet.set(f"E{row+2}", abs(round(a["working_days"]["target"] / a["frequency"])) if a["working_days"]["target"] != 0 else 0, alignment=CENTER, font=BOLD)
+                sheet.prepare(f"E{row+4}", f"E{row+5}")
+                sheet.set(f"E{row+4}", abs(round(a["corrections"]["target"] / a["frequency"])) if a["corrections"]["target"] != 0 else 0, alignment=CENTER, font=BOLD)
+
+                # description
+                sheet.prepare(f"F{row}", f"G{row+1}")
+                sheet.set(f"F{row}", a["description"]["target"], alignment=LEFT)
+                sheet.height(row, 45)
+                sheet.prepare(f"F{row+2}", f"G{row+3}")
+                if deadline:
+                    sheet.set(f"F{row+2}", "on the set deadline with", alignment=Alignment(horizontal="left", vertical="center", wrap_text=True))
+                else:
+                    sheet.set(f"F{row+2}", str(a["description"]["time"] or "") + " with", alignment=Alignment(horizontal="left", vertical="center", wrap_text=True))
+                sheet.prepare(f"F{row+4}", f"G{row+5}")
+                sheet.set(f"F{row+4}", a["description"]["alterations"], alignment=Alignment(horizontal="left", vertical="center", wrap_text=True))
+
+                # budget and individuals
+                sheet.prepare(f"H{row}", f"H{row+5}")
+                sheet.set(f"H{row}", 0, alignment=CENTER)
+                sheet.prepare(f"I{row}", f"I{row+5}")
+                sheet.set(f"I{row}", _accountable(assigned, a["title"]), alignment=CENTER)
+
+                # actual
+                sheet.prepare(f"J{row}", f"J{row+1}")
+                sheet.set(f"J{row}", a["summary"]["actual"], alignment=CENTER, font=BOLD)
+                sheet.prepare(f"J{row+2}", f"J{row+3}")
+                sheet.set(f"J{row+2}", abs(round(a["working_days"]["actual"] / a["frequency"])) if a["working_days"]["actual"] != 0 else 0, alignment=CENTER, font=BOLD)
+                sheet.prepare(f"J{row+4}", f"J{row+5}")
+                sheet.set(f"J{row+4}", round(a["corrections"]["actual"] / a["frequency"]) if a["corrections"]["actual"] != 0 else 0, alignment=CENTER, font=BOLD)
+
+                sheet.prepare(f"K{row}", f"M{row+1}")
+                sheet.set(f"K{row}", a["description"]["actual"], alignment=LEFT)
+                if deadline:
+                    if a["working_days"]["actual"] == 0:
+                        actual_deadline_desc = "on the set deadline with"
+                    elif a["working_days"]["actual"] > 0:
+                        actual_deadline_desc = "day/s late with"
+                    else:
+                        actual_deadline_desc = "day/s early with"
+                else:
+                    actual_deadline_desc = str(a["description"]["time"] or "") + " with"
+                sheet.prepare(f"K{row+2}", f"M{row+3}")
+                sheet.set(f"K{row+2}", actual_deadline_desc, alignment=LEFT)
+                sheet.prepare(f"K{row+4}", f"M{row+5}")
+                sheet.set(f"K{row+4}", a["description"]["alterations"] + "/s", alignment=LEFT)
+
+                # ratings
+                for col, key in (("N", "quantity"), ("O", "efficiency"), ("P", "timeliness")):
+                    sheet.prepare(f"{col}{row}", f"{col}{row+5}")
+                    sheet.set(f"{col}{row}", a["rating"][key], alignment=CENTER, font=BOLD)
+                sheet.prepare(f"Q{row}", f"Q{row+5}")
+                sheet.set(f"Q{row}", f"=AVERAGE(N{row}, O{row},P{row})", alignment=CENTER, font=BOLD)
+
+                weighted_avg = float(f"{float(a["rating"]["weighted_avg"]):.2F}")
+                total_weighted += weighted_avg
+                sheet.prepare(f"R{row}", f"R{row+5}")
+                sheet.set(f"R{row}", weighted_avg, alignment=CENTER, font=BOLD, number_format=NUMBER_FORMAT)
+
+                sheet.prepare(f"S{row}", f"S{row+5}")
+                sheet.set(f"S{row}", "")
+
+                endrow = row
+                row = row + 6
+                sheet.flush(row)
+
+    sheet.prepare(f"K{row}", f"M{row+1}")
+    sheet.set(f"K{row}", "Final Average Rating", alignment=CENTER)
+    for col in ("N", "O", "P", "Q"):
+        sheet.prepare(f"{col}{row}", f"{col}{row+1}")
+        sheet.set(f"{col}{row}", f"=AVERAGE({col}{startingrow+1}: {col}{endrow})", alignment=CENTER, number_format=NUMBER_FORMAT)
+    average = f"=AVERAGE(Q{startingrow}: Q{endrow})"
+    averagecell = f"Q{row}"
+    sheet.prepare(f"R{row}", f"R{row+1}")
+    sheet.set(f"R{row}", f"=SUM(R{startingrow+1}: R{endrow})", alignment=CENTER, font=BOLD, number_format=NUMBER_FORMAT)
+
+    row += 2
+    sheet.prepare(f"K{row}", f"M{row+1}")
+    sheet.set(f"K{row}", "FINAL AVERAGE RATING", alignment=CENTER)
+    sheet.prepare(f"R{row}", f"R{row+1}")
+    sheet.set(f"R{row}", f"=SUM(R{startingrow+1}: R{endrow})", alignment=CENTER, number_format=NUMBER_FORMAT)
+    sheet.prepare(f"N{row}", f"Q{row+1}")
+    sheet.set(f"N{row}", average, alignment=CENTER, font=BOLD, number_format=NUMBER_FORMAT)
+
+    row += 2
+    sheet.prepare(f"K{row}", f"M{row+1}")
+    sheet.set(f"K{row}", "ADJECTIVAL RATING", alignment=CENTER)
+    sheet.prepare(f"N{row}", f"Q{row+1}")
+    sheet.set(f"N{row}", f'=IF(AND({averagecell}>=0, {averagecell}<=1.49), "POOR", IF(AND({averagecell}>=1.5, {averagecell}<=2.49), "UNSATISFACTORY", IF(AND({averagecell}>=2.5, {averagecell}<=3.49), "SATISFACTORY", IF(AND({averagecell}>=3.5, {averagecell}<=4.49), "VERY SATISFACTORY", IF(AND({averagecell}>=4.5, {averagecell}<=5), "OUTSTANDING")))))', alignment=CENTER, font=BOLD)
+    sheet.prepare(f"R{row}", f"R{row+1}")
+    sheet.set(f"R{row}", f'=IF(AND({total_weighted}>=0, {total_weighted}<=1.49), "POOR", IF(AND({total_weighted}>=1.5, {total_weighted}<=2.49), "UNSATISFACTORY", IF(AND({total_weighted}>=2.5, {total_weighted}<=3.49), "SATISFACTORY", IF(AND({total_weighted}>=3.5, {total_weighted}<=4.49), "VERY SATISFACTORY", IF(AND({total_weighted}>=4.5, {total_weighted}<=5), "OUTSTANDING")))))', alignment=CENTER, font=BOLD, number_format=NUMBER_FORMAT)
+
+    # individuals
+    row += 3
+    for start, end, label, bold in (("A", "D", "Discussed With", True), ("E", "F", "Date", False),
+                                    ("G", "J", "Assessed By", True), ("K", "L", "Date", False),
+                                    ("M", "P", "Final Rating By", True), ("Q", "S", "Date", False)):
+        sheet.prepare(f"{start}{row}", f"{end}{row}")
+        sheet.set(f"{start}{row}", label, alignment=CENTER, font=BOLD if bold else None)
+
+    row += 1
+    individuals = admin_data["individuals"]
+    for start, end, key in (("A", "D", "discuss"), ("E", "F", None), ("G", "J", "assess"),
+                            ("K", "L", None), ("M", "P", "final"), ("Q", "S", None)):
+        sheet.prepare(f"{start}{row}", f"{end}{row+2}")
+        if key:
+            sheet.set(f"{start}{row}", individuals[key]["name"] + "\n" + individuals[key]["position"], alignment=BOTTOM, font=SIGNATORY)
+        else:
+            sheet.set(f"{start}{row}", "", alignment=CENTER, font=SIGNATORY)
+
+    row += 4
+    sheet.prepare(f"G{row}", f"J{row}")
+    sheet.set(f"G{row}", "Confirmed By", alignment=CENTER, font=BOLD)
+    sheet.prepare(f"K{row}", f"L{row}")
+    sheet.set(f"K{row}", "Date", alignment=CENTER)
+
+    row += 1
+    sheet.prepare(f"G{row}", f"J{row+2}")
+    sheet.set(f"G{row}", individuals["confirm"]["name"] + "\n" + individuals["confirm"]["position"], alignment=BOTTOM, font=SIGNATORY)
+    sheet.prepare(f"K{row}", f"L{row+2}")
+    sheet.set(f"K{row}", "", alignment=CENTER, font=SIGNATORY)
+
+    sheet.close()
+    workbook.close()
@@ -1,21 +1,22 @@
-import requests
 import io
 from flask import send_file
 from datetime import datetime
 
-from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
-from PIL import Image
-from pdf2image import convert_from_bytes
+from utils.AttachmentFetcher import attachment_fetcher
+from utils.PdfRasterizer import pdf_rasterizer
+from utils.RenderCache import render_cache
+from utils.TemplateCache import template_cache
 
 
 # ── File type constants ───────────────────────────────────────────────────────
 
 IMAGE_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"}
 PDF_TYPE    = "application/pdf"
+IMAGE_SLOT  = (5.5, 0)   # inches: full text width, any height
 WORD_TYPES  = {
     "application/msword",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
@@ -54,12 +55,9 @@ def collect_by_department(dept_id):
     from models.System_Settings import System_Settings
     try:
         settings = System_Settings.get_default_settings()
-        all_docs = Supporting_Document.query.filter_by(
-            period=settings.current_period_id
-        ).all()
         return [
-            d.to_dict() for d in all_docs
-            if str(d.ipcr.user.department.id) == str(dept_id) and d.status and d.isApproved == "approved"
+            d.to_dict()
+            for d in Supporting_Document.approved_for_department(int(dept_id), settings.current_period_id)
         ]
     except Exception as e:
         print("collect_by_department error:", e)
@@ -312,13 +310,19 @@ def _meta_block(doc, doc_data, seq_num=None):
 
 # ── Attachment embed handlers ─────────────────────────────────────────────────
 
-def _embed_image(doc, content_bytes, file_type):
+def _rendered(file_type, source, pdf_settings):
+    """True when the render cache holds everything this attachment needs, so it is not downloaded."""
+    if file_type in IMAGE_TYPES:
+        return render_cache.has_image(source, IMAGE_SLOT)
+    if file_type == PDF_TYPE:
+        return render_cache.has_raster(source, pdf_settings["dpi"], pdf_settings["max_pages"])
+    return False
+
+
+def _embed_image(doc, content_bytes, file_type, source=None):
     try:
-        img = Image.open(io.BytesIO(content_bytes))
-        if img.mode not in ("RGB", "L"):
-            img = img.convert("RGB")
-        buf = io.BytesIO()
-        img.save(buf, format="PNG"); buf.seek(0)
+        image = render_cache.image(source, content_bytes, IMAGE_SLOT)
+        buf = io.BytesIO(image.data)
 
         p = doc.add_paragraph()
         p.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -337,12 +341,11 @@ def _embed_image(doc, content_bytes, file_type):
         _error_notice(doc, f"Could not render image: {e}")
 
 
-def _embed_pdf(doc, content_bytes):
+def _embed_pdf(doc, content_bytes, budget=None, source=None):
     try:
-        pages = convert_from_bytes(content_bytes, dpi=150)
-        for i, page in enumerate(pages):
-            buf = io.BytesIO()
-            page.save(buf, format="PNG"); buf.seek(0)
+        raster = pdf_rasterizer.rasterize(content_bytes, budget=budget, source=source)
+        for i, page in enumerate(raster.pages):
+            buf = io.BytesIO(page.png)
 
             p = doc.add_paragraph()
             p.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -353,10 +356,21 @@ def _embed_pdf(doc, content_bytes):
             cap = doc.add_paragraph()
             cap.alignment = WD_ALIGN_PARAGRAPH.CENTER
             cap.paragraph_format.space_after = Pt(8)
-            cr = cap.add_run(f"PDF Attachment  —  Page {i + 1} of {len(pages)}")
+            cr = cap.add_run(f"PDF Attachment  —  Page {i + 1} of {raster.total_pages}")
             cr.font.name = "Calibri"; cr.font.size = Pt(8)
             cr.font.italic = True; cr.font.color.rgb = COLOR_MID_GRAY
 
+        if len(raster.pages) < raster.total_pages:
+            note = doc.add_paragraph()
+            note.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            note.paragraph_format.space_after = Pt(8)
+            nr = note.add_run(
+                f"Only the first {len(raster.pages)} of {raster.total_pages} pages are shown. "
+                "Please download the original from the system portal."
+            )
+            nr.font.name = "Calibri"; nr.font.size = Pt(8)
+            nr.font.italic = True; nr.font.color.rgb = COLOR_MID_GRAY
+
     except Exception as e:
         _error_notice(doc, f"Could not render PDF pages: {e}")
 
@@ -445,12 +459,35 @@ TEMPLATE_PATH = "excels/template(1).docx"
 
 # ── Main compiler ─────────────────────────────────────────────────────────────
 
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOCX_NAME     = "Supporting_Documents_Report.docx"
+
+
 def into_document(documents, report_title="Supporting Documents Report", dept_name=""):
     """
     Build and return a Flask send_file response containing the compiled report.
+    Returns None if the documents list is empty.
+    """
+    content = build_document(documents, report_title, dept_name)
+    if content is None:
+        return None
+
+    return send_file(
+        io.BytesIO(content),
+        as_attachment=True,
+        download_name=DOCX_NAME,
+        mimetype=DOCX_MIMETYPE,
+    )
+
+
+def build_document(documents, report_title="Supporting Documents Report", dept_name="", progress=None):
+    """
+    Build the compiled report and return the .docx bytes (report jobs store
+    them, into_document streams them).
     Loads excels/template(1).docx so its header/footer are preserved.
     Returns None if the documents list is empty.
     All formatting is pure narrative — no tables used anywhere in the document.
+    progress(done, total) is called after each attachment.
     """
     if not documents:
         return None
@@ -458,7 +495,7 @@ def into_document(documents, report_title="Supporting Documents Report", dept_na
     generated_on = datetime.now().strftime("%B %d, %Y")
 
     # Load the template — inherits header, footer, styles, and margins
-    doc = Document(TEMPLATE_PATH)
+    doc = template_cache.document(TEMPLATE_PATH)
 
     # Clear any placeholder content the template ships with, keeping one
     # empty paragraph so the XML stays valid
@@ -483,12 +520,26 @@ def into_document(documents, report_title="Supporting Documents Report", dept_na
     current_user = None
     seq_num      = 0
 
-    for doc_data in documents:
+    # Attachments download concurrently and arrive in document order, except
+    # those whose pages are already in the render cache; PDF pages rendered
+    # for the whole report share one page budget
+    pdf_settings = pdf_rasterizer.settings()
+    sources      = [render_cache.source(d) for d in documents]
+    rendered     = [
+        _rendered((d.get("file_type") or "").lower().strip(), source, pdf_settings)
+        for d, source in zip(documents, sources)
+    ]
+    attachments  = attachment_fetcher.fetch(
+        "" if cached else (d.get("download_url") or "")
+        for d, cached in zip(documents, rendered)
+    )
+    pdf_budget   = pdf_rasterizer.budget()
+
+    for doc_data, source, cached, fetched in zip(documents, sources, rendered, attachments):
         task_name    = doc_data.get("task_name") or "Unassigned Task"
         user_name    = doc_data.get("user_name") or "Unknown User"
         file_type    = (doc_data.get("file_type") or "").lower().strip()
         file_name    = doc_data.get("file_name") or ""
-        download_url = doc_data.get("download_url") or ""
 
         if task_name != current_task:
             if current_task is not None:
@@ -504,22 +555,18 @@ def into_document(documents, report_title="Supporting Documents Report", dept_na
         seq_num += 1
         _meta_block(doc, doc_data, seq_num=seq_num)
 
-        # Fetch attachment from remote storage
-        content_bytes = None
-        if download_url:
-            try:
-                resp = requests.get(download_url, timeout=30)
-                resp.raise_for_status()
-                content_bytes = resp.content
-            except Exception as e:
-                _error_notice(doc, f"Could not retrieve file: {e}")
+        # Attachment fetched from remote storage
+        content_bytes = fetched.content
+        if fetched.error:
+            _error_notice(doc, f"Could not retrieve file: {fetched.error}")
 
         # Render attachment by type
-        if content_bytes:
+        if content_bytes or cached:
+            source = source or render_cache.source(doc_data, content_bytes)
             if file_type in IMAGE_TYPES:
-                _embed_image(doc, content_bytes, file_type)
+                _embed_image(doc, content_bytes, file_type, source)
             elif file_type == PDF_TYPE:
-                _embed_pdf(doc, content_bytes)
+                _embed_pdf(doc, content_bytes, pdf_budget, source)
             elif file_type in WORD_TYPES:
                 _embed_docx(doc, content_bytes)
             else:
@@ -529,13 +576,9 @@ def into_document(documents, report_title="Supporting Documents Report", dept_na
         _add_rule(doc, color=HEX_GRAY, sz="4", space="4",
                   space_before=Pt(8), space_after=Pt(8))
 
+        if progress:
+            progress(seq_num, len(documents))
+
     file_stream = io.BytesIO()
     doc.save(file_stream)
-    file_stream.seek(0)
-
-    return send_file(
-        file_stream,
-        as_attachment=True,
-        download_name="Supporting_Documents_Report.docx",
-        mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    )
\ No newline at end of file
+    return file_stream.getvalue()
\ No newline at end of file
@@ -0,0 +1,128 @@
+import hashlib
+import io
+import os
+import pickle
+import threading
+import time
+
+from openpyxl import load_workbook
+
+
+class Template_Cache:
+    """
+    Parses each report template once per worker process and hands out
+    copies, so a report no longer re-reads and re-parses its template zip.
+    Entries are keyed by absolute path and reloaded when the file's mtime or
+    size changes.
+
+    - workbook(path):     a fresh openpyxl workbook unpickled from a snapshot
+                          of the parsed template (a few ms, against tens of
+                          ms for load_workbook)
+    - document(path):     a python-docx Document opened from the cached bytes
+    - presentation(path): the shared PresentationCompiler.Template, which is
+                          read-only (it only holds the zip entries as bytes)
+    - digest(path):       the sha256 of the file, used by utils.ReportCache
+
+    stats() reports loads, hits and load/copy times per template.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def workbook(self, path):
+        snapshot = self._get("xlsx", path, _workbook_snapshot)
+        started = time.perf_counter()
+        wb = pickle.loads(snapshot)
+        for ws in wb.worksheets:
+            # DimensionHolder pickles without its default_factory; without it
+            # a row or column the template never sized raises KeyError
+            ws.row_dimensions.default_factory = ws._add_row
+            ws.column_dimensions.default_factory = ws._add_column
+        self._record_copy("xlsx", path, started)
+        return wb
+
+    def document(self, path):
+        from docx import Document
+
+        data = self._get("docx", path, _read_bytes)
+        started = time.perf_counter()
+        doc = Document(io.BytesIO(data))
+        self._record_copy("docx", path, started)
+        return doc
+
+    def presentation(self, path):
+        from utils.PresentationCompiler import Template
+
+        return self._get("pptx", path, Template)
+
+    def digest(self, path):
+        """sha256 of the template file, for keys that must change with it."""
+        return self._get("sha256", path, _file_digest)
+
+    def stats(self):
+        return [
+            {
+                "kind": kind,
+                "path": path,
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()},
+            }
+            for (kind, path), stats in sorted(self._stats.items())
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def _get(self, kind, path, loader):
+        key = (kind, os.path.abspath(path))
+        st = os.stat(key[1])
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != stamp:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None or entry[0] != stamp:
+                    started = time.perf_counter()
+                    entry = (stamp, loader(key[1]))
+                    self._entries[key] = entry
+
+                    stats = self._stats_for(key)
+                    stats["loads"] += 1
+                    stats["last_load_ms"] = (time.perf_counter() - started) * 1000
+                    stats["total_load_ms"] += stats["last_load_ms"]
+                    return entry[1]
+
+        self._stats_for(key)["hits"] += 1
+        return entry[1]
+
+    def _stats_for(self, key):
+        return self._stats.setdefault(key, {
+            "loads": 0, "hits": 0, "last_load_ms": 0.0, "total_load_ms": 0.0, "copies": 0, "total_copy_ms": 0.0,
+        })
+
+    def _record_copy(self, kind, path, started):
+        stats = self._stats_for((kind, os.path.abspath(path)))
+        stats["copies"] += 1
+        stats["total_copy_ms"] += (time.perf_counter() - started) * 1000
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _file_digest(path):
+    return hashlib.sha256(_read_bytes(path)).hexdigest()
+
+
+def _workbook_snapshot(path):
+    # unpickling rebuilds the whole object graph in C; copy.deepcopy is ~10x
+    # slower and drops the workbook's IndexedList style tables
+    return pickle.dumps(load_workbook(path), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+template_cache = Template_Cache()
@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g
 import jwt
 from models.Logs import Log_Service
 from models.User import User
@@ -44,6 +44,7 @@ def token_required(allowed_roles=None):
 
             # expose payload to downstream handlers
             request.user_payload = payload
+            g.token_payload = payload
 
             if allowed_roles and role not in allowed_roles:
                 return jsonify({"error": "Forbidden"}), 403
@@ -74,7 +75,8 @@ def log_action(action, target):
                 token = token.split(" ")[1]
             
             try:
-                data = jwt.decode(token, "priscilla", algorithms=["HS256"])
+                # token_required already decoded it for this request
+                data = g.get("token_payload") or jwt.decode(token, "priscilla", algorithms=["HS256"])
                 current_user_id = data["id"]
                 current_user_full_name = data["first_name"] + " " + data["last_name"]
                 department = data["department"]["name"]
@@ -82,8 +84,7 @@ def log_action(action, target):
                 ip_address = request.remote_addr
                 user_agent = request.headers.get("User-Agent")
                 
-                res = Log_Service.add_logs(current_user_id,current_user_full_name, department, action, target, ip=ip_address, agent=user_agent)
-                print("Log Recorded: ", res)
+                Log_Service.queue_log(current_user_id,current_user_full_name, department, action, target, ip=ip_address, agent=user_agent)
                 
                 
             except Exception as e:
@@ -105,8 +106,7 @@ def log_enter(action):
                 ip_address = request.remote_addr
                 user_agent = request.headers.get("User-Agent")
                 
-                res = Log_Service.add_logs("0","UNKNOWN", "UNKNOWN", action, "UNKNOWN", ip=ip_address, agent=user_agent)
-                print("Log Recorded: ", res)
+                Log_Service.queue_log("0","UNKNOWN", "UNKNOWN", action, "UNKNOWN", ip=ip_address, agent=user_agent)
                 
                 
             except Exception as e: